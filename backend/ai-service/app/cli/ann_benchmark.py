@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+ANN Index Benchmark
+Measures build time, query latency and recall@k of the IVF-flat profile
+index against brute force on synthetic clustered embeddings.
+
+Usage:
+    python -m app.cli.ann_benchmark --size 1000000 --dim 384 --n-lists 1024 --n-probe 8 16 32
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.ann_index import IVFFlatIndex, SearchFilter, recall_at_k
+
+logger = logging.getLogger(__name__)
+
+LOCATIONS = ["milan", "rome", "turin", "bologna", "naples", "florence"]
+DISCIPLINES = ["computer science", "engineering", "design", "business", "data science"]
+
+def synthetic_vectors(size: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around random cluster centres, like profile embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, 100000):
+        end = min(start + 100000, size)
+        labels = rng.integers(0, clusters, end - start)
+        block = centres[labels] + rng.normal(scale=0.6, size=(end - start, dim)).astype(np.float32)
+        vectors[start:end] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+def synthetic_metadata(size: int, seed: int) -> List[Dict]:
+    rng = np.random.default_rng(seed + 1)
+    locations = rng.integers(0, len(LOCATIONS), size)
+    disciplines = rng.integers(0, len(DISCIPLINES), size)
+    remote = rng.random(size) < 0.2
+    experience = rng.integers(0, 10, size)
+    return [
+        {
+            "location": LOCATIONS[locations[i]],
+            "remote": bool(remote[i]),
+            "discipline": DISCIPLINES[disciplines[i]],
+            "experience": int(experience[i])
+        }
+        for i in range(size)
+    ]
+
+def latency_ms(index: IVFFlatIndex, queries: np.ndarray, k: int, n_probe: int, filters=None) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, k, filters, n_probe)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings = np.array(timings)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3)
+    }
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the IVF-flat profile index")
+    parser.add_argument("--size", type=int, default=200000, help="Indexed profiles")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--clusters", type=int, default=2000, help="Synthetic cluster count")
+    parser.add_argument("--n-lists", type=int, default=1024, help="Inverted lists")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[8, 16, 32], help="Probe counts to sweep")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--recall-queries", type=int, default=50, help="Queries checked against brute force")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    vectors = synthetic_vectors(args.size, args.dim, args.clusters, args.seed)
+    metadata = synthetic_metadata(args.size, args.seed)
+    queries = synthetic_vectors(args.queries, args.dim, args.clusters, args.seed)
+
+    started = time.perf_counter()
+    index = IVFFlatIndex(args.dim, n_lists=args.n_lists, capacity=args.size)
+    sample = vectors[np.random.default_rng(args.seed).choice(args.size, min(args.size, args.n_lists * 40), replace=False)]
+    index.train(sample)
+    index.add([f"p{i}" for i in range(args.size)], vectors, metadata)
+    build_seconds = time.perf_counter() - started
+    logger.info(f"Built index over {args.size} vectors in {build_seconds:.1f}s")
+
+    filters = SearchFilter(locations=["milan"], disciplines=["engineering"], min_experience=2)
+    report = {"size": args.size, "dim": args.dim, "n_lists": index.n_lists, "build_seconds": round(build_seconds, 2), "runs": []}
+    for n_probe in args.n_probe:
+        recall_queries = queries[:args.recall_queries]
+        report["runs"].append({
+            "n_probe": n_probe,
+            "recall_at_k": round(recall_at_k(index, recall_queries, args.k, n_probe=n_probe), 4),
+            "filtered_recall_at_k": round(recall_at_k(index, recall_queries, args.k, filters, n_probe), 4),
+            **latency_ms(index, queries, args.k, n_probe),
+            "filtered": latency_ms(index, queries, args.k, n_probe, filters)
+        })
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
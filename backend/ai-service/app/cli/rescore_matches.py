@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Offline Match Rescorer
+Recomputes deterministic match scores for every (job, candidate) pair and
+writes sharded top-k results per job.
+
+Usage:
+    python -m app.cli.rescore_matches --jobs jobs.jsonl --candidates candidates.parquet \\
+        --output out/ --top-k 50 --workers 4
+
+Only the components that do not need an LLM are scored: experience,
+education, location and skills overlap. The overall score is the weighted
+sum of those components, renormalized by their total weight so it stays on
+the 0-1 scale used by /find-matches.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.services.candidate_matcher import CandidateMatcher, MatchType
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = (MatchType.SKILLS, MatchType.EXPERIENCE, MatchType.EDUCATION, MatchType.LOCATION)
+
+@dataclass
+class EncodedBatch:
+    """Column-oriented features for a chunk of jobs or candidates"""
+    ids: List[str]
+    years: np.ndarray
+    level: np.ndarray
+    degree: np.ndarray
+    fields: List[str]
+    remote: np.ndarray
+    cities: List[str]
+    states: List[str]
+    skills: List[List[str]]
+
+def iter_records(path: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Stream records from a JSONL or Parquet file in fixed-size batches"""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet input requires pyarrow (pip install pyarrow)")
+
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+        return
+
+    batch = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def _normalize_skills(skills: Optional[List[str]]) -> List[str]:
+    return sorted({s.strip().lower() for s in (skills or []) if isinstance(s, str) and s.strip()})
+
+def encode_jobs(records: List[Dict[str, Any]]) -> EncodedBatch:
+    levels = CandidateMatcher.level_hierarchy
+    degrees = CandidateMatcher.degree_hierarchy
+    experience = [r.get("experience_requirements") or {} for r in records]
+    education = [r.get("education_requirements") or {} for r in records]
+    location = [r.get("location") or {} for r in records]
+
+    return EncodedBatch(
+        ids=[str(r.get("id", "")) for r in records],
+        years=np.array([float(e.get("years", 0) or 0) for e in experience]),
+        level=np.array([levels.get(e.get("level", "entry"), 1) for e in experience], dtype=float),
+        degree=np.array([degrees.get((e.get("degree_level") or "").lower(), 0) for e in education], dtype=float),
+        fields=[(e.get("field_of_study") or "").lower() for e in education],
+        remote=np.array([bool(l.get("remote", False)) for l in location]),
+        cities=[(l.get("city") or "").lower() for l in location],
+        states=[(l.get("state") or "").lower() for l in location],
+        skills=[
+            _normalize_skills((r.get("required_skills") or []) + (r.get("preferred_skills") or []))
+            for r in records
+        ]
+    )
+
+def encode_candidates(records: List[Dict[str, Any]]) -> EncodedBatch:
+    levels = CandidateMatcher.level_hierarchy
+    degrees = CandidateMatcher.degree_hierarchy
+    experience = [r.get("experience") or {} for r in records]
+    education = [r.get("education") or {} for r in records]
+    location = [r.get("location") or {} for r in records]
+
+    return EncodedBatch(
+        ids=[str(r.get("id", "")) for r in records],
+        years=np.array([float(e.get("years", 0) or 0) for e in experience]),
+        level=np.array([levels.get(e.get("level", "entry"), 1) for e in experience], dtype=float),
+        degree=np.array([degrees.get((e.get("degree_level") or "").lower(), 0) for e in education], dtype=float),
+        fields=[(e.get("field_of_study") or "").lower() for e in education],
+        remote=np.array([bool(l.get("remote_preference", False)) for l in location]),
+        cities=[(l.get("city") or "").lower() for l in location],
+        states=[(l.get("state") or "").lower() for l in location],
+        skills=[_normalize_skills(r.get("skills")) for r in records]
+    )
+
+def _codes(values: List[str], vocab: Dict[str, int]) -> np.ndarray:
+    return np.array([vocab.setdefault(v, len(vocab)) for v in values], dtype=np.int64)
+
+def _skill_matrix(skill_lists: List[List[str]], vocab: Dict[str, int]) -> sparse.csr_matrix:
+    rows, cols = [], []
+    for row, skills in enumerate(skill_lists):
+        for skill in skills:
+            rows.append(row)
+            cols.append(vocab.setdefault(skill, len(vocab)))
+    data = np.ones(len(rows), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(skill_lists), max(len(vocab), 1)))
+
+def score_chunk(jobs: EncodedBatch, candidates: EncodedBatch) -> Dict[MatchType, np.ndarray]:
+    """Score a jobs x candidates block; each component is a (J, C) float32 array.
+
+    Mirrors CandidateMatcher's experience, education and location rules and its
+    set-intersection skills fallback.
+    """
+    # Experience: average of capped years ratio and capped level ratio
+    years_score = np.minimum(candidates.years[None, :] / np.maximum(jobs.years, 1)[:, None], 1.0)
+    level_score = np.minimum(candidates.level[None, :] / jobs.level[:, None], 1.0)
+    experience = (years_score + level_score) / 2
+
+    # Education: degree ratio (1.0 when no requirement) and field-of-study containment
+    degree_score = np.where(
+        jobs.degree[:, None] == 0,
+        1.0,
+        np.minimum(candidates.degree[None, :] / np.maximum(jobs.degree, 1)[:, None], 1.0)
+    )
+    field_vocab: Dict[str, int] = {}
+    job_fields = _codes(jobs.fields, field_vocab)
+    cand_fields = _codes(candidates.fields, field_vocab)
+    terms = sorted(field_vocab, key=field_vocab.get)
+    field_table = np.array([
+        [0.8 if not req or not cand else (1.0 if req in cand else 0.5) for cand in terms]
+        for req in terms
+    ])
+    field_score = field_table[np.ix_(job_fields, cand_fields)]
+    education = (degree_score + field_score) / 2
+
+    # Location: remote on either side, then same city+state, then same state
+    place_vocab: Dict[str, int] = {}
+    job_cities, cand_cities = _codes(jobs.cities, place_vocab), _codes(candidates.cities, place_vocab)
+    job_states, cand_states = _codes(jobs.states, place_vocab), _codes(candidates.states, place_vocab)
+    same_state = job_states[:, None] == cand_states[None, :]
+    same_city = (job_cities[:, None] == cand_cities[None, :]) & same_state
+    location = np.where(same_city, 1.0, np.where(same_state, 0.7, 0.3))
+    location[jobs.remote, :] = 1.0
+    location[:, candidates.remote] = 1.0
+
+    # Skills: share of the job's skills the candidate has
+    skill_vocab: Dict[str, int] = {}
+    job_skills = _skill_matrix(jobs.skills, skill_vocab)
+    cand_skills = _skill_matrix(candidates.skills, skill_vocab)
+    job_skills.resize((job_skills.shape[0], len(skill_vocab) or 1))
+    cand_skills.resize((cand_skills.shape[0], len(skill_vocab) or 1))
+    overlap = (job_skills @ cand_skills.T).toarray()
+    required_counts = np.asarray(job_skills.sum(axis=1)).ravel()
+    skills = np.where(
+        required_counts[:, None] > 0,
+        np.minimum(overlap / np.maximum(required_counts, 1)[:, None], 1.0),
+        0.0
+    )
+
+    return {
+        MatchType.SKILLS: skills.astype(np.float32),
+        MatchType.EXPERIENCE: experience.astype(np.float32),
+        MatchType.EDUCATION: education.astype(np.float32),
+        MatchType.LOCATION: location.astype(np.float32)
+    }
+
+def rescore_job_chunk(
+    shard: int,
+    job_records: List[Dict[str, Any]],
+    candidates_path: str,
+    weights: Dict[str, float],
+    top_k: int,
+    candidate_batch_size: int,
+    min_score: float,
+    output_dir: str
+) -> Tuple[int, int, int]:
+    """Worker entry point: score one chunk of jobs against all candidates.
+
+    Memory is bounded by the job chunk x candidate batch block plus a
+    size-k heap per job.
+    """
+    jobs = encode_jobs(job_records)
+    weight_vector = np.array([weights[c.value] for c in COMPONENTS], dtype=np.float32)
+    weight_total = float(weight_vector.sum()) or 1.0
+
+    heaps: List[List[Tuple[float, str, Tuple[float, ...]]]] = [[] for _ in jobs.ids]
+    pairs = 0
+
+    for candidate_records in iter_records(candidates_path, candidate_batch_size):
+        candidates = encode_candidates(candidate_records)
+        components = score_chunk(jobs, candidates)
+        stacked = np.stack([components[c] for c in COMPONENTS], axis=-1)
+        overall = (stacked @ weight_vector) / weight_total
+        pairs += overall.size
+
+        keep = min(top_k, overall.shape[1])
+        best = np.argpartition(-overall, keep - 1, axis=1)[:, :keep]
+        for row, heap in enumerate(heaps):
+            for col in best[row]:
+                score = float(overall[row, col])
+                if score < min_score:
+                    continue
+                entry = (score, candidates.ids[col], tuple(float(v) for v in stacked[row, col]))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+    shard_path = os.path.join(output_dir, f"topk-{shard:05d}.jsonl")
+    with open(shard_path, "w", encoding="utf-8") as handle:
+        for job_id, heap in zip(jobs.ids, heaps):
+            matches = [
+                {
+                    "candidate_id": candidate_id,
+                    "overall_score": round(score, 6),
+                    "match_breakdown": {
+                        c.value: round(value, 6) for c, value in zip(COMPONENTS, breakdown)
+                    }
+                }
+                for score, candidate_id, breakdown in sorted(heap, reverse=True)
+            ]
+            handle.write(json.dumps({"job_id": job_id, "matches": matches}) + "\n")
+
+    return shard, len(jobs.ids), pairs
+
+def load_weights(path: Optional[str]) -> Dict[str, float]:
+    weights = {match_type.value: weight for match_type, weight in CandidateMatcher.default_skill_weights.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as handle:
+            overrides = json.load(handle)
+        unknown = set(overrides) - set(weights)
+        if unknown:
+            raise SystemExit(f"Unknown weight keys: {', '.join(sorted(unknown))}")
+        weights.update({k: float(v) for k, v in overrides.items()})
+    return weights
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recompute deterministic match scores offline")
+    parser.add_argument("--jobs", required=True, help="Jobs file (.jsonl or .parquet)")
+    parser.add_argument("--candidates", required=True, help="Candidates file (.jsonl or .parquet)")
+    parser.add_argument("--output", required=True, help="Directory for sharded top-k results")
+    parser.add_argument("--weights", help="JSON file overriding CandidateMatcher weights")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--min-score", type=float, default=0.0)
+    parser.add_argument("--job-batch-size", type=int, default=512,
+                        help="Jobs per shard / worker task")
+    parser.add_argument("--candidate-batch-size", type=int, default=4096,
+                        help="Candidates scored per vectorized block")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = parse_args(argv)
+    weights = load_weights(args.weights)
+    os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    total_jobs = total_pairs = 0
+
+    # Keep at most 2x workers job chunks in flight so job input is streamed too
+    max_pending = max(args.workers * 2, 1)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pending = set()
+        job_chunks = iter_records(args.jobs, args.job_batch_size)
+
+        for shard, job_records in enumerate(job_chunks):
+            pending.add(pool.submit(
+                rescore_job_chunk, shard, job_records, args.candidates, weights,
+                args.top_k, args.candidate_batch_size, args.min_score, args.output
+            ))
+            if len(pending) >= max_pending:
+                done = next(as_completed(pending))
+                pending.remove(done)
+                _, jobs_done, pairs = done.result()
+                total_jobs += jobs_done
+                total_pairs += pairs
+
+        for done in as_completed(pending):
+            _, jobs_done, pairs = done.result()
+            total_jobs += jobs_done
+            total_pairs += pairs
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Rescored {total_jobs} jobs / {total_pairs} pairs in {elapsed:.1f}s "
+        f"({total_pairs / max(elapsed, 1e-9):,.0f} pairs/s) -> {args.output}"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Service Container
+Builds each service on first use and hands out the same instance afterwards,
+so importing the app is cheap and a worker starts serving without waiting on
+every dependency. Services share the process-wide Redis pool, LLM gateway and
+HTTP pools from app.utils.connections.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.benchmark_engine import BenchmarkEngine
+from app.services.batch_processor import BatchProcessor, build_default_handlers
+from app.services.candidate_matcher import CandidateMatcher
+from app.services.conversation_service import ConversationService
+from app.services.file_processor import FileProcessor
+from app.services.institution_actions import InstitutionActionHandler
+from app.services.market_analyzer import MarketAnalyzer
+from app.services.project_analyzer import ProjectAnalyzer
+from app.services.recruiter_actions import RecruiterActionHandler
+from app.services.repo_analyzer import RepoAnalyzer
+from app.services.resume_optimizer import ResumeOptimizer
+from app.services.risk_scoring import RiskScoringEngine
+from app.services.skills_assessor import SkillsAssessor
+from app.services.story_generator import StoryGenerator
+from app.services.student_actions import StudentActionHandler
+from app.services.text_analyzer import TextAnalyzer
+from app.utils.cache_manager import CacheManager
+from app.utils.connections import connect_redis, get_redis_client
+from app.utils.llm_gateway import LLMGateway, get_llm_gateway
+from app.utils.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        # Reentrant: factories resolve their own dependencies through the container
+        self._lock = threading.RLock()
+        self.build_ms: Dict[str, float] = {}
+        self.warmup_ms: Optional[float] = None
+        # Referenced so the tasks are not garbage collected mid-run
+        self.redis_check: Optional[asyncio.Task] = None
+        self.warm_up_task: Optional[asyncio.Task] = None
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                started = time.perf_counter()
+                self._instances[name] = factory()
+                self.build_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                logger.info(f"Built {name} in {self.build_ms[name]}ms")
+        return self._instances[name]
+
+    @property
+    def llm_gateway(self) -> LLMGateway:
+        return self._get("llm_gateway", get_llm_gateway)
+
+    @property
+    def cache_manager(self) -> CacheManager:
+        return self._get("cache_manager", CacheManager)
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._get("rate_limiter", RateLimiter)
+
+    @property
+    def project_analyzer(self) -> ProjectAnalyzer:
+        return self._get("project_analyzer", lambda: ProjectAnalyzer(repo_analyzer=self.repo_analyzer))
+
+    @property
+    def repo_analyzer(self) -> RepoAnalyzer:
+        return self._get("repo_analyzer", lambda: RepoAnalyzer(file_processor=self.file_processor))
+
+    @property
+    def candidate_matcher(self) -> CandidateMatcher:
+        return self._get("candidate_matcher", self._build_candidate_matcher)
+
+    @property
+    def story_generator(self) -> StoryGenerator:
+        return self._get("story_generator", lambda: StoryGenerator(cache_manager=self.cache_manager))
+
+    @property
+    def skills_assessor(self) -> SkillsAssessor:
+        return self._get("skills_assessor", SkillsAssessor)
+
+    @property
+    def market_analyzer(self) -> MarketAnalyzer:
+        return self._get("market_analyzer", MarketAnalyzer)
+
+    @property
+    def resume_optimizer(self) -> ResumeOptimizer:
+        return self._get("resume_optimizer", ResumeOptimizer)
+
+    @property
+    def conversation_service(self) -> ConversationService:
+        return self._get("conversation_service", ConversationService)
+
+    @property
+    def batch_processor(self) -> BatchProcessor:
+        return self._get("batch_processor", lambda: BatchProcessor(
+            handlers=build_default_handlers(
+                self.project_analyzer, self.skills_assessor, self.candidate_matcher, self.story_generator
+            )
+        ))
+
+    @property
+    def file_processor(self) -> FileProcessor:
+        return self._get("file_processor", FileProcessor)
+
+    @property
+    def text_analyzer(self) -> TextAnalyzer:
+        return self._get("text_analyzer", lambda: TextAnalyzer(file_processor=self.file_processor))
+
+    @property
+    def student_actions(self) -> StudentActionHandler:
+        return self._get("student_actions", lambda: StudentActionHandler(
+            skills_assessor=self.skills_assessor,
+            candidate_matcher=self.candidate_matcher,
+            market_analyzer=self.market_analyzer
+        ))
+
+    @property
+    def recruiter_actions(self) -> RecruiterActionHandler:
+        return self._get("recruiter_actions", lambda: RecruiterActionHandler(
+            candidate_matcher=self.candidate_matcher,
+            market_analyzer=self.market_analyzer,
+            skills_assessor=self.skills_assessor
+        ))
+
+    @property
+    def institution_actions(self) -> InstitutionActionHandler:
+        return self._get("institution_actions", lambda: InstitutionActionHandler(
+            market_analyzer=self.market_analyzer,
+            analytics_engine=self.analytics_engine,
+            risk_engine=self.risk_engine,
+            benchmark_engine=self.benchmark_engine
+        ))
+
+    @property
+    def analytics_engine(self) -> AnalyticsEngine:
+        return self._get("analytics_engine", AnalyticsEngine)
+
+    @property
+    def risk_engine(self) -> RiskScoringEngine:
+        return self._get("risk_engine", lambda: RiskScoringEngine(analytics_engine=self.analytics_engine))
+
+    @property
+    def benchmark_engine(self) -> BenchmarkEngine:
+        return self._get("benchmark_engine", lambda: BenchmarkEngine(analytics_engine=self.analytics_engine))
+
+    @staticmethod
+    def _build_candidate_matcher() -> CandidateMatcher:
+        matcher = CandidateMatcher()
+        if os.getenv("ANN_INDEX_DIR"):
+            matcher.load_indexes(os.getenv("ANN_INDEX_DIR"))
+        return matcher
+
+    def warm_up(self, names: Optional[List[str]] = None):
+        """Check Redis and build services ahead of traffic; blocking, so run it in a thread"""
+        started = time.perf_counter()
+        get_redis_client()
+        for name in names or []:
+            try:
+                getattr(self, name)
+            except Exception as e:
+                logger.error(f"Warm-up of {name} failed: {str(e)}")
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Warm-up finished in {self.warmup_ms}ms")
+
+    def start_warm_up(self) -> asyncio.Task:
+        """Warm up behind the first requests (SERVICE_WARMUP lists services to prebuild)"""
+        names = [name.strip() for name in os.getenv("SERVICE_WARMUP", "").split(",") if name.strip()]
+        attempts = int(os.getenv("REDIS_CONNECT_ATTEMPTS", "3"))
+        self.redis_check = asyncio.create_task(asyncio.to_thread(connect_redis, attempts), name="redis-check")
+        self.warm_up_task = asyncio.create_task(asyncio.to_thread(self.warm_up, names), name="service-warmup")
+        return self.warm_up_task
+
+    async def wait_for_redis_check(self):
+        """Requests arriving during warm-up wait (up to the connect timeout) for
+        the Redis check, so the services they build see its result"""
+        if self.redis_check is None or self.redis_check.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self.redis_check), float(os.getenv("REDIS_CONNECT_TIMEOUT", "2")))
+        except asyncio.TimeoutError:
+            logger.warning("Redis check still running; serving without waiting for it")
+
+    def shutdown(self):
+        """Stop worker pools owned by built services"""
+        for instance in list(self._instances.values()):
+            if hasattr(instance, "shutdown"):
+                instance.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "built": sorted(self._instances),
+            "build_ms": dict(self.build_ms),
+            "warmup_ms": self.warmup_ms
+        }
+
+container = ServiceContainer()
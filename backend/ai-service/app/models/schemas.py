@@ -50,6 +50,15 @@ class StoryGenerationRequest(BaseModel):
     length: LengthType = LengthType.MEDIUM
     focus_areas: Optional[List[str]] = None
 
+class StoryBundleRequest(BaseModel):
+    project_data: Dict[str, Any]
+    target_audience: TargetAudience = TargetAudience.RECRUITER
+    tone: ToneType = ToneType.PROFESSIONAL
+    length: LengthType = LengthType.MEDIUM
+    focus_areas: Optional[List[str]] = None
+    linkedin_style: str = "achievement"
+    pitch_duration: int = Field(default=30, ge=10, le=120)
+
 class MatchingRequest(BaseModel):
     query_type: QueryType
     query_data: Dict[str, Any]
@@ -84,6 +93,16 @@ class StoryGenerationResponse(BaseModel):
     alternative_versions: Optional[List[str]] = None
     status: str
 
+class StoryBundleResponse(BaseModel):
+    story: str
+    key_points: List[str]
+    call_to_action: str
+    alternative_versions: List[str]
+    linkedin_post: str
+    elevator_pitch: str
+    metadata: Dict[str, Any]
+    status: str
+
 class MatchingResponse(BaseModel):
     matches: List[Dict[str, Any]]
     total_matches: int
@@ -170,9 +189,19 @@ class ConversationHistoryResponse(BaseModel):
     status: str = "success"
 
 
+class ProfileSearchFilters(BaseModel):
+    locations: Optional[List[str]] = None
+    include_remote: bool = True
+    disciplines: Optional[List[str]] = None
+    min_experience: Optional[float] = None
+    max_experience: Optional[float] = None
+
+
 class CandidateMatchingRequest(BaseModel):
     job_data: Dict[str, Any]
-    candidates: List[Dict[str, Any]]
+    # When omitted, candidates are retrieved from the profile index
+    candidates: Optional[List[Dict[str, Any]]] = None
+    filters: Optional[ProfileSearchFilters] = None
     limit: int = Field(default=10, ge=1, le=100)
 
 
@@ -261,9 +290,104 @@ class ProjectRecommendationsResponse(BaseModel):
 
 
 class BatchProcessingRequest(BaseModel):
-    operations: List[Dict[str, Any]]
+    operations: List[Dict[str, Any]] = Field(..., min_items=1)
 
 
 class BatchProcessingResponse(BaseModel):
     results: List[Dict[str, Any]]
-    status: str
\ No newline at end of file
+    status: str
+    job_id: Optional[str] = None
+    progress: Optional[Dict[str, int]] = None
+
+
+class BatchJobStatusResponse(BaseModel):
+    job_id: str
+    job_status: str
+    progress: Dict[str, int]
+    results: List[Dict[str, Any]]
+    errors: List[Dict[str, Any]]
+    created_at: str
+    updated_at: str
+    finished_at: Optional[str] = None
+    runs: int = 0
+    status: str = "success"
+
+class TextBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=1000)
+    analysis_type: str = "all"
+
+
+class TextBatchResponse(BaseModel):
+    results: List[Dict[str, Any]]
+    count: int
+    status: str = "success"
+
+class AnalyticsEventsRequest(BaseModel):
+    events: List[Dict[str, Any]] = Field(..., min_items=1, max_items=10000)
+
+
+class AnalyticsEventsResponse(BaseModel):
+    accepted: int
+    rejected: List[Dict[str, Any]]
+    parts: int
+    status: str = "success"
+
+class StudentRecordsRequest(BaseModel):
+    students: List[Dict[str, Any]] = Field(..., min_items=1, max_items=50000)
+
+
+class StudentRecordsResponse(BaseModel):
+    upserted: int
+    removed: int
+    rejected: List[Dict[str, Any]]
+    total: int
+    status: str = "success"
+
+
+class AtRiskStudentsResponse(BaseModel):
+    students: List[Dict[str, Any]]
+    total: int
+    page: int
+    page_size: int
+    summary: Dict[str, Any]
+    status: str = "success"
+
+class BenchmarkProfilesRequest(BaseModel):
+    institutions: List[Dict[str, Any]] = Field(..., min_items=1, max_items=10000)
+
+
+class BenchmarkProfilesResponse(BaseModel):
+    upserted: int
+    rejected: List[Dict[str, Any]]
+    total: int
+    status: str = "success"
+
+
+class BenchmarkComparisonResponse(BaseModel):
+    ranking: Dict[str, Any]
+    metrics: Dict[str, Dict[str, Any]]
+    strengths: List[str]
+    improvements: List[str]
+    compare_to: str
+    peer_group: Dict[str, Any]
+    window_days: Optional[int] = None
+    status: str = "success"
+
+class ProfileKind(str, Enum):
+    CANDIDATE = "candidate"
+    JOB = "job"
+
+
+class ProfileIndexRequest(BaseModel):
+    kind: ProfileKind
+    profiles: List[Dict[str, Any]] = []
+    remove_ids: List[str] = []
+    snapshot: bool = False
+
+
+class ProfileIndexResponse(BaseModel):
+    kind: str
+    indexed: int
+    removed: int
+    total: int
+    status: str = "success"
@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Institution Analytics Engine
+Answers the institution analytics intents (search analytics, skill demand,
+company interest) and the per-institution metrics the benchmark engine ranks
+from rollups kept in memory, instead of asking the backend on every chat
+question.
+
+Events (company searches, profile views, contacts and student profile
+snapshots) are appended to a Parquet log partitioned by day:
+
+    <ANALYTICS_DIR>/events/date=YYYY-MM-DD/part-<hash>.parquet
+
+Parts are immutable and named by a hash of their content, so re-ingesting the
+same batch is a no-op. Every part is applied once to per-institution daily
+rollups; a JSON snapshot of the rollups and the parts they include makes a
+restart incremental. Workers that did not write a part pick it up on their
+next refresh.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("search", "view", "contact", "profile")
+EVENT_COLUMNS = [
+    "event_id", "event_type", "occurred_at", "institution_id", "company_id", "company_name",
+    "industry", "student_id", "skills", "location"
+]
+# Searches not tied to an institution's students count towards the whole market
+MARKET = "__market__"
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30, "quarter": 90, "semester": 180, "year": 365}
+PERIOD_UNITS = {"day": 1, "week": 7, "month": 30, "year": 365}
+TREND_THRESHOLD = 0.10
+BENCHMARK_METRICS = ("student_visibility", "students_contacted", "company_engagement")
+
+def period_days(period: Optional[str]) -> int:
+    """week, month, last_quarter, 14_days, 3_months, ... as a number of days (default 30)"""
+    key = (period or "month").lower().replace("last_", "").replace("this_", "").strip()
+    if key in PERIOD_DAYS:
+        return PERIOD_DAYS[key]
+    match = re.match(r"(\d+)[_ ]?(day|week|month|year)s?$", key)
+    if match:
+        return max(1, int(match.group(1)) * PERIOD_UNITS[match.group(2)])
+    return PERIOD_DAYS["month"]
+
+def trend_direction(current: float, previous: float) -> str:
+    if previous <= 0:
+        return "increasing" if current > 0 else "stable"
+    change = (current - previous) / previous
+    if change > TREND_THRESHOLD:
+        return "increasing"
+    if change < -TREND_THRESHOLD:
+        return "decreasing"
+    return "stable"
+
+def require_pandas():
+    try:
+        import pandas as pd
+        import pyarrow  # noqa: F401  (Parquet engine)
+    except ImportError:
+        raise RuntimeError("The analytics event log requires pandas and pyarrow (pip install pandas pyarrow)")
+    return pd
+
+def _timestamp(value: Any) -> datetime:
+    if value is None or value == "":
+        return datetime.now(timezone.utc)
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _skills(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[;,|]", value)
+    return [str(skill).strip() for skill in value if str(skill).strip()]
+
+def normalize_event(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validated event row for the log; raises ValueError with the reason"""
+    event_type = str(raw.get("event_type") or raw.get("type") or "").lower()
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"unknown event_type {event_type!r}")
+    event = {column: raw.get(column) for column in EVENT_COLUMNS}
+    event["event_type"] = event_type
+    event["occurred_at"] = _timestamp(raw.get("occurred_at") or raw.get("timestamp"))
+    event["skills"] = _skills(raw.get("skills"))
+    for column in ("event_id", "institution_id", "company_id", "company_name", "industry", "student_id", "location"):
+        event[column] = str(event[column]).strip() if event[column] not in (None, "") else None
+    if event_type != "search" and not (event["institution_id"] and event["student_id"]):
+        raise ValueError(f"{event_type} events need institution_id and student_id")
+    if event_type in ("view", "contact") and not event["company_id"]:
+        raise ValueError(f"{event_type} events need company_id")
+    return event
+
+def read_event_batches(path: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Stream raw events from a JSONL, CSV or Parquet export in fixed-size batches"""
+    if path.endswith(".parquet"):
+        require_pandas()
+        import pyarrow.parquet as pq
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+        return
+    if path.endswith(".csv"):
+        import csv
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            batch = []
+            for row in csv.DictReader(handle):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return
+    batch = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def _new_bucket() -> Dict[str, Any]:
+    return {
+        "searches": 0, "search_companies": set(), "skills": Counter(), "locations": Counter(),
+        "views": 0, "contacts": 0, "viewed_students": set(), "contacted_students": set(),
+        "company_views": Counter(), "company_contacts": Counter(), "student_views": Counter()
+    }
+
+def _merge(into: Dict[str, Any], bucket: Dict[str, Any]):
+    for key, value in bucket.items():
+        if isinstance(value, set):
+            into[key] |= value
+        elif isinstance(value, Counter):
+            into[key].update(value)
+        else:
+            into[key] += value
+
+class AnalyticsEngine:
+    """Event log plus in-memory rollups, shared per worker"""
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or os.getenv("ANALYTICS_DIR", os.path.join("data", "analytics"))
+        self.events_dir = os.path.join(self.data_dir, "events")
+        self.snapshot_path = os.path.join(self.data_dir, "rollups.json")
+        self.refresh_seconds = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "30"))
+        self.snapshot_seconds = float(os.getenv("ANALYTICS_SNAPSHOT_SECONDS", "300"))
+        self.retention_days = int(os.getenv("ANALYTICS_RETENTION_DAYS", "400"))
+        self.demand_days = int(os.getenv("ANALYTICS_DEMAND_DAYS", "90"))
+        self.apply_batch_parts = 256
+
+        # institution -> day (YYYY-MM-DD) -> bucket
+        self.daily: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # institution -> student -> latest profile snapshot
+        self.students: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.companies: Dict[str, Dict[str, Optional[str]]] = {}
+        # Skills and locations are counted case-insensitively and shown as first seen
+        self.labels: Dict[str, str] = {}
+        self.applied_parts: Set[str] = set()
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._last_snapshot = time.monotonic()
+        self._dirty = False
+        self._version = 0
+        self._memo: Dict[Tuple, Any] = {}
+
+    def _label(self, value: str) -> str:
+        key = value.strip().lower()
+        self.labels.setdefault(key, value.strip())
+        return key
+
+    def _bucket(self, institution_id: str, day: str) -> Dict[str, Any]:
+        return self.daily.setdefault(institution_id, {}).setdefault(day, _new_bucket())
+
+    def _part_path(self, day: str, events: List[Dict[str, Any]]) -> str:
+        digest = hashlib.sha1()
+        for event in events:
+            digest.update(json.dumps(event, sort_keys=True, default=str).encode("utf-8"))
+        return os.path.join(f"date={day}", f"part-{digest.hexdigest()[:20]}.parquet")
+
+    def _list_parts(self) -> List[str]:
+        if not os.path.isdir(self.events_dir):
+            return []
+        parts = []
+        for partition in sorted(os.listdir(self.events_dir)):
+            directory = os.path.join(self.events_dir, partition)
+            if partition.startswith("date=") and os.path.isdir(directory):
+                parts.extend(
+                    os.path.join(partition, name) for name in sorted(os.listdir(directory)) if name.endswith(".parquet")
+                )
+        return parts
+
+    def ingest_records(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate, append to the log and apply to the rollups; blocking"""
+        events, rejected = [], []
+        for index, raw in enumerate(records):
+            try:
+                events.append(normalize_event(raw))
+            except (ValueError, TypeError) as e:
+                rejected.append({"index": index, "reason": str(e)})
+        if not events:
+            return {"accepted": 0, "rejected": rejected, "parts": 0}
+
+        pd = require_pandas()
+        self._ensure_loaded()
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for event in events:
+            by_day.setdefault(event["occurred_at"].strftime("%Y-%m-%d"), []).append(event)
+
+        parts, frames = [], []
+        # Serialized with refresh, so a part is never applied twice
+        with self._refresh_lock:
+            for day, day_events in sorted(by_day.items()):
+                relative = self._part_path(day, day_events)
+                if relative in self.applied_parts:
+                    continue
+                target = os.path.join(self.events_dir, relative)
+                frame = pd.DataFrame(day_events, columns=EVENT_COLUMNS)
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    # Readers only list *.parquet, so they never see a half-written part
+                    temporary = f"{target}.{os.getpid()}.tmp"
+                    frame.to_parquet(temporary, index=False)
+                    os.replace(temporary, target)
+                parts.append(relative)
+                frames.append(frame)
+            if frames:
+                self._apply(parts, pd.concat(frames, ignore_index=True))
+        self._maybe_snapshot()
+        return {"accepted": len(events), "rejected": rejected, "parts": len(parts)}
+
+    async def ingest(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.ingest_records, records)
+
+    def _apply(self, parts: List[str], frame):
+        """Fold the events of some log parts into the daily rollups; callers hold _refresh_lock"""
+        pd = require_pandas()
+        frame = frame.assign(
+            day=frame["occurred_at"].dt.strftime("%Y-%m-%d"),
+            institution_id=frame["institution_id"].fillna(MARKET)
+        )
+        keys = ["institution_id", "day"]
+        # One vectorized aggregate per rollup field; iterating groups costs a frame slice each
+        with self._lock:
+            searches = frame[frame["event_type"] == "search"]
+            searches = pd.concat([searches.assign(institution_id=MARKET), searches[searches["institution_id"] != MARKET]])
+            for (institution_id, day), count in searches.groupby(keys).size().items():
+                self._bucket(institution_id, day)["searches"] += int(count)
+            for institution_id, day, company_id in searches[keys + ["company_id"]].dropna().drop_duplicates().itertuples(index=False):
+                self._bucket(institution_id, day)["search_companies"].add(company_id)
+            exploded = searches[keys + ["skills"]].explode("skills").dropna()
+            for (institution_id, day, skill), count in exploded.value_counts().items():
+                self._bucket(institution_id, day)["skills"][self._label(skill)] += int(count)
+            for (institution_id, day, location), count in searches[keys + ["location"]].dropna().value_counts().items():
+                self._bucket(institution_id, day)["locations"][self._label(location)] += int(count)
+
+            for kind, count_key, students_key, companies_key in (
+                ("view", "views", "viewed_students", "company_views"),
+                ("contact", "contacts", "contacted_students", "company_contacts")
+            ):
+                scoped = frame[(frame["event_type"] == kind) & (frame["institution_id"] != MARKET)]
+                for (institution_id, day), count in scoped.groupby(keys).size().items():
+                    self._bucket(institution_id, day)[count_key] += int(count)
+                for institution_id, day, student_id in scoped[keys + ["student_id"]].drop_duplicates().itertuples(index=False):
+                    self._bucket(institution_id, day)[students_key].add(student_id)
+                for (institution_id, day, company_id), count in scoped[keys + ["company_id"]].value_counts().items():
+                    self._bucket(institution_id, day)[companies_key][company_id] += int(count)
+                if kind == "view":
+                    for (institution_id, day, student_id), count in scoped[keys + ["student_id"]].value_counts().items():
+                        self._bucket(institution_id, day)["student_views"][student_id] += int(count)
+
+            known = frame[frame["company_id"].notna() & (frame["company_name"].notna() | frame["industry"].notna())]
+            for row in known[["company_id", "company_name", "industry"]].drop_duplicates("company_id", keep="last").itertuples():
+                meta = self.companies.setdefault(row.company_id, {"name": None, "industry": None})
+                meta["name"] = row.company_name or meta["name"]
+                meta["industry"] = row.industry or meta["industry"]
+
+            profiles = frame[frame["event_type"] == "profile"].sort_values("occurred_at")
+            for row in profiles.itertuples():
+                at = row.occurred_at.isoformat()
+                roster = self.students.setdefault(row.institution_id, {})
+                if roster.get(row.student_id, {}).get("at", "") <= at:
+                    roster[row.student_id] = {"skills": [self._label(s) for s in row.skills], "at": at}
+
+            self.applied_parts.update(parts)
+            self._dirty = True
+            self._version += 1
+            self._memo.clear()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._refresh_lock:
+            if not self._loaded:
+                self._load_snapshot()
+                self._loaded = True
+
+    def _read_parts(self, parts: List[str]):
+        """Events of some log parts as one DataFrame"""
+        require_pandas()
+        import pyarrow
+        import pyarrow.parquet as pq
+        # Many small parts are read as Arrow tables and converted together: per-part
+        # DataFrame conversion and rollup updates have a fixed cost per call
+        tables = [pq.read_table(os.path.join(self.events_dir, part)) for part in parts]
+        return pyarrow.concat_tables(tables, promote_options="default").to_pandas()
+
+    def refresh_sync(self, force: bool = False) -> int:
+        """Apply log parts written since the last refresh (by any worker); returns how many were applied"""
+        self._ensure_loaded()
+        if not force and time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return 0
+        applied = 0
+        with self._refresh_lock:
+            self._last_refresh = time.monotonic()
+            with self._lock:
+                pending = [part for part in self._list_parts() if part not in self.applied_parts]
+            for start in range(0, len(pending), self.apply_batch_parts):
+                chunk = pending[start:start + self.apply_batch_parts]
+                try:
+                    self._apply(chunk, self._read_parts(chunk))
+                except Exception as e:
+                    # Left unapplied, so the next refresh retries them
+                    logger.error(f"Failed to apply analytics parts {chunk[0]}..{chunk[-1]}: {str(e)}")
+                    continue
+                applied += len(chunk)
+            if pending:
+                logger.info(f"Applied {applied} of {len(pending)} analytics log parts")
+        self._maybe_snapshot()
+        return applied
+
+    async def refresh(self):
+        if not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_seconds:
+            await asyncio.to_thread(self.refresh_sync)
+
+    def rebuild(self) -> int:
+        """
+        Recompute every rollup from the full log into fresh structures. The live
+        rollups and the snapshot are only replaced when every part applied; any
+        read or apply error is raised
+        """
+        with self._refresh_lock:
+            fresh = AnalyticsEngine(data_dir=self.data_dir)
+            parts = fresh._list_parts()
+            for start in range(0, len(parts), self.apply_batch_parts):
+                chunk = parts[start:start + self.apply_batch_parts]
+                fresh._apply(chunk, fresh._read_parts(chunk))
+            with self._lock:
+                self.daily, self.students = fresh.daily, fresh.students
+                self.companies, self.labels = fresh.companies, fresh.labels
+                self.applied_parts = fresh.applied_parts
+                self._loaded = True
+                self._dirty = True
+                self._version += 1
+                self._memo.clear()
+        self.save_snapshot()
+        return len(parts)
+
+    def _prune(self):
+        cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        for days in self.daily.values():
+            for day in [day for day in days if day < cutoff]:
+                del days[day]
+
+    def save_snapshot(self):
+        with self._lock:
+            self._prune()
+            state = {
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "applied_parts": sorted(self.applied_parts),
+                "daily": {
+                    institution_id: {
+                        day: {key: sorted(value) if isinstance(value, set) else value for key, value in bucket.items()}
+                        for day, bucket in days.items()
+                    }
+                    for institution_id, days in self.daily.items()
+                },
+                "students": self.students,
+                "companies": self.companies,
+                "labels": self.labels
+            }
+            self._dirty = False
+            self._last_snapshot = time.monotonic()
+        os.makedirs(self.data_dir, exist_ok=True)
+        temporary = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(temporary, self.snapshot_path)
+
+    def _maybe_snapshot(self):
+        if self._dirty and time.monotonic() - self._last_snapshot >= self.snapshot_seconds:
+            try:
+                self.save_snapshot()
+            except OSError as e:
+                logger.error(f"Failed to save analytics snapshot: {str(e)}")
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable analytics snapshot: {str(e)}")
+            return
+        with self._lock:
+            self.daily = {}
+            for institution_id, days in state.get("daily", {}).items():
+                for day, saved in days.items():
+                    # Fields added since the snapshot was written start empty
+                    bucket = self._bucket(institution_id, day)
+                    for key, value in saved.items():
+                        if key in bucket:
+                            bucket[key] = type(bucket[key])(value) if isinstance(bucket[key], (set, Counter)) else value
+            self.students = state.get("students", {})
+            self.companies = state.get("companies", {})
+            self.labels = state.get("labels", {})
+            self.applied_parts = set(state.get("applied_parts", []))
+            self._version += 1
+        logger.info(f"Loaded analytics rollups ({len(self.applied_parts)} log parts)")
+
+    def _window(self, institution_id: str, days: int, offset: int = 0) -> Dict[str, Any]:
+        """Merged bucket for the ``days`` days ending ``offset`` days ago"""
+        merged = _new_bucket()
+        buckets = self.daily.get(institution_id, {})
+        end = date.today() - timedelta(days=offset)
+        for delta in range(days):
+            bucket = buckets.get((end - timedelta(days=delta)).isoformat())
+            if bucket:
+                _merge(merged, bucket)
+        return merged
+
+    def _top(self, counter: Counter, limit: int) -> List[Tuple[str, int]]:
+        return [(self.labels.get(key, key), count) for key, count in counter.most_common(limit)]
+
+    def _company(self, company_id: str) -> Dict[str, Optional[str]]:
+        return self.companies.get(company_id, {"name": None, "industry": None})
+
+    def search_analytics(self, institution_id: Optional[str], period: str) -> Optional[Dict[str, Any]]:
+        """Fields of InstitutionActionHandler's SearchAnalytics, or None without data"""
+        days = period_days(period)
+        with self._lock:
+            own = self._window(institution_id, days) if institution_id else _new_bucket()
+            scope = institution_id if own["searches"] else MARKET
+            source = own if own["searches"] else self._window(MARKET, days)
+            if not source["searches"] and not own["views"]:
+                return None
+            previous = self._window(scope, days, offset=days)
+            return {
+                "total_searches": source["searches"],
+                "unique_companies": len(source["search_companies"]),
+                "top_skills_searched": self._top(source["skills"], 10),
+                "top_locations_searched": self._top(source["locations"], 5),
+                "search_trend": trend_direction(source["searches"], previous["searches"]),
+                "period": period,
+                "your_students_viewed": own["views"],
+                "conversion_rate": round(own["contacts"] / own["views"], 4) if own["views"] else 0.0
+            }
+
+    def company_interest(self, institution_id: Optional[str], period: str) -> Optional[Dict[str, Any]]:
+        if not institution_id:
+            return None
+        days = period_days(period)
+        with self._lock:
+            own = self._window(institution_id, days)
+            if not own["views"] and not own["contacts"]:
+                return None
+            previous = self._window(institution_id, days, offset=days)
+            industries = Counter()
+            for company_id, views in own["company_views"].items():
+                industries[self._company(company_id)["industry"] or "Other"] += views
+            total_views = sum(industries.values())
+            return {
+                "unique_companies": len(set(own["company_views"]) | set(own["company_contacts"])),
+                "total_views": own["views"],
+                "total_messages": own["contacts"],
+                "trend": trend_direction(own["views"], previous["views"]),
+                "top_companies": [
+                    {
+                        "company_id": company_id,
+                        "name": self._company(company_id)["name"] or company_id,
+                        "industry": self._company(company_id)["industry"] or "Other",
+                        "student_views": views,
+                        "messages_sent": own["company_contacts"].get(company_id, 0)
+                    }
+                    for company_id, views in own["company_views"].most_common(10)
+                ],
+                "industry_breakdown": {
+                    industry: round(views / total_views, 3) for industry, views in industries.most_common(6)
+                } if total_views else {}
+            }
+
+    def skill_demand(self, institution_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Share of company searches per skill against the share of students who have it"""
+        with self._lock:
+            market = self._window(MARKET, self.demand_days)
+            if not market["searches"]:
+                return None
+            roster = self.students.get(institution_id, {}) if institution_id else {}
+            supply = Counter(skill for profile in roster.values() for skill in set(profile["skills"]))
+            rows = []
+            for skill, count in market["skills"].most_common(25):
+                demand = count / market["searches"]
+                share = supply.get(skill, 0) / len(roster) if roster else 0.0
+                rows.append({
+                    "skill": self.labels.get(skill, skill),
+                    "market_demand": round(demand, 3),
+                    "student_supply": round(share, 3),
+                    "gap": round(demand - share, 3)
+                })
+        gaps = sorted((row for row in rows if row["gap"] > 0), key=lambda row: row["gap"], reverse=True)
+        strengths = [
+            f"{row['skill']}: {row['student_supply']:.0%} of students vs {row['market_demand']:.0%} of searches"
+            for row in rows if roster and row["gap"] <= 0
+        ]
+        recommendations = [
+            f"Expand {row['skill']} coursework and projects ({row['market_demand']:.0%} of company searches, "
+            f"{row['student_supply']:.0%} of your students)"
+            for row in gaps[:4]
+        ]
+        if not recommendations:
+            recommendations = ["Student skills cover the most searched skills; watch emerging ones in search analytics"]
+        return {
+            "skill_gaps": gaps[:15],
+            "strengths": strengths[:5],
+            "recommendations": recommendations,
+            "students_tracked": len(roster),
+            "searches_analyzed": market["searches"],
+            "window_days": self.demand_days
+        }
+
+    def institution_metrics(self, days: int) -> Dict[str, Dict[str, float]]:
+        """Percent metrics per institution with students and views; memoized until new events"""
+        key = ("metrics", days, date.today())
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+            metrics = {}
+            for institution_id, roster in self.students.items():
+                window = self._window(institution_id, days)
+                if not roster or not window["views"]:
+                    continue
+                metrics[institution_id] = {
+                    "student_visibility": round(100 * len(window["viewed_students"] & roster.keys()) / len(roster), 1),
+                    "students_contacted": round(100 * len(window["contacted_students"] & roster.keys()) / len(roster), 1),
+                    "company_engagement": round(100 * window["contacts"] / window["views"], 1),
+                    "students": len(roster)
+                }
+            self._memo[key] = metrics
+            return metrics
+
+    @property
+    def version(self) -> int:
+        """Changes whenever the rollups change"""
+        return self._version
+
+    def student_view_counts(self, institution_id: str, days: int) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._window(institution_id, days)["student_views"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "data_dir": self.data_dir,
+                "applied_parts": len(self.applied_parts),
+                "institutions": len([i for i in self.daily if i != MARKET]),
+                "students": sum(len(roster) for roster in self.students.values()),
+                "companies": len(self.companies),
+                "days": len({day for days in self.daily.values() for day in days})
+            }
+
+    def shutdown(self):
+        if self._dirty:
+            try:
+                self.save_snapshot()
+            except OSError as e:
+                logger.error(f"Failed to save analytics snapshot: {str(e)}")
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+ANN Index
+IVF-flat approximate nearest-neighbor index over profile embeddings, used as
+the candidate-generation stage in front of the full match scorer
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = -1
+
+@dataclass
+class SearchFilter:
+    """Attribute constraints applied to probed vectors before ranking"""
+    locations: Optional[List[str]] = None
+    include_remote: bool = True
+    disciplines: Optional[List[str]] = None
+    min_experience: Optional[float] = None
+    max_experience: Optional[float] = None
+
+class _Vocabulary:
+    """Maps category strings to dense integer codes"""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values or [])
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: Optional[str]) -> int:
+        if not value:
+            return UNKNOWN
+        key = value.strip().lower()
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.values)
+            self.values.append(key)
+            self.codes[key] = code
+        return code
+
+    def allowed(self, values: Iterable[str]) -> np.ndarray:
+        """Boolean table indexed by code; the trailing slot (code -1) stays False"""
+        table = np.zeros(len(self.values) + 1, dtype=bool)
+        for value in values:
+            code = self.codes.get(value.strip().lower()) if value else None
+            if code is not None:
+                table[code] = True
+        return table
+
+class IVFFlatIndex:
+    """Inverted-file index with exact inner-product scoring inside probed lists.
+
+    Vectors must be L2-normalized so inner product equals cosine similarity.
+    Deletes are tombstones; ``compact`` (run by ``save``) reclaims the slots.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 1024, n_probe: int = 16, capacity: int = 1024):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.centroids: Optional[np.ndarray] = None
+
+        self.size = 0
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.assignments = np.full(capacity, UNKNOWN, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.location = np.full(capacity, UNKNOWN, dtype=np.int32)
+        self.remote = np.zeros(capacity, dtype=bool)
+        self.discipline = np.full(capacity, UNKNOWN, dtype=np.int32)
+        self.experience = np.zeros(capacity, dtype=np.float32)
+
+        self.ids: List[Optional[str]] = []
+        self.slots: Dict[str, int] = {}
+        self.locations = _Vocabulary()
+        self.disciplines = _Vocabulary()
+
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def train(self, sample: np.ndarray, iterations: int = 15, seed: int = 0):
+        """Spherical k-means over a sample to place the list centroids"""
+        sample = np.asarray(sample, dtype=np.float32)
+        n_lists = min(self.n_lists, len(sample))
+        rng = np.random.default_rng(seed)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Reseed empty lists from random sample points
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            self.centroids = centroids.astype(np.float32)
+            self.n_lists = n_lists
+            self._reassign()
+
+    def add(self, ids: List[str], vectors: np.ndarray, metadata: Optional[List[Dict[str, Any]]] = None):
+        """Insert or replace vectors; metadata supplies the filterable attributes"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        metadata = metadata or [{}] * len(ids)
+
+        with self._lock:
+            self.remove([i for i in ids if i in self.slots])
+            self._reserve(self.size + len(ids))
+            start, end = self.size, self.size + len(ids)
+
+            self.vectors[start:end] = vectors
+            self.alive[start:end] = True
+            for offset, (item_id, meta) in enumerate(zip(ids, metadata)):
+                slot = start + offset
+                self.ids.append(item_id)
+                self.slots[item_id] = slot
+                self.location[slot] = self.locations.encode(meta.get("location"))
+                self.remote[slot] = bool(meta.get("remote", False))
+                self.discipline[slot] = self.disciplines.encode(meta.get("discipline"))
+                self.experience[slot] = float(meta.get("experience") or 0.0)
+            self.size = end
+
+            if self.is_trained:
+                assignment = self._nearest(vectors, self.centroids)
+                self.assignments[start:end] = assignment
+                for offset, list_id in enumerate(assignment):
+                    self._lists[list_id].append(start + offset)
+                    self._list_arrays.pop(int(list_id), None)
+
+    def remove(self, ids: List[str]) -> int:
+        removed = 0
+        with self._lock:
+            for item_id in ids:
+                slot = self.slots.pop(item_id, None)
+                if slot is None:
+                    continue
+                self.alive[slot] = False
+                self.ids[slot] = None
+                removed += 1
+        return removed
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        filters: Optional[SearchFilter] = None,
+        n_probe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine) pairs; widens the probe when filters starve it"""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        n_probe = min(n_probe or self.n_probe, max(self.n_lists, 1))
+
+        with self._lock:
+            if not self.is_trained:
+                return self._rank(query, np.arange(self.size), k, filters)
+
+            order = np.argsort(-(self.centroids @ query))
+            if filters is not None:
+                # A filter passing a fraction f of vectors needs ~1/f more
+                # lists to see as many eligible neighbours as an open search
+                slots = self._gather(order[:n_probe])
+                if len(slots):
+                    selectivity = max(float(self._mask(slots, filters).mean()), 1e-3)
+                    n_probe = min(int(np.ceil(n_probe / selectivity)), self.n_lists)
+            while True:
+                slots = self._gather(order[:n_probe])
+                results = self._rank(query, slots, k, filters)
+                if len(results) >= k or n_probe >= self.n_lists:
+                    return results
+                n_probe = min(n_probe * 2, self.n_lists)
+
+    def exact_search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        filters: Optional[SearchFilter] = None
+    ) -> List[Tuple[str, float]]:
+        """Brute-force reference search over every live vector"""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            return self._rank(query, np.arange(self.size), k, filters)
+
+    def compact(self):
+        """Drop tombstoned slots and rebuild the inverted lists"""
+        with self._lock:
+            keep = np.flatnonzero(self.alive[:self.size])
+            for name in ("vectors", "assignments", "alive", "location", "remote", "discipline", "experience"):
+                setattr(self, name, np.array(getattr(self, name)[keep]))
+            self.ids = [self.ids[slot] for slot in keep]
+            self.slots = {item_id: slot for slot, item_id in enumerate(self.ids)}
+            self.size = len(keep)
+            self._rebuild_lists()
+
+    def save(self, directory: str):
+        """Write a snapshot that ``load`` can memory-map"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.compact()
+            for name in ("vectors", "assignments", "location", "remote", "discipline", "experience"):
+                np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name)[:self.size])
+            if self.is_trained:
+                np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+            meta = {
+                "dim": self.dim,
+                "n_lists": self.n_lists,
+                "n_probe": self.n_probe,
+                "ids": self.ids,
+                "locations": self.locations.values,
+                "disciplines": self.disciplines.values
+            }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "IVFFlatIndex":
+        """Open a snapshot; vectors are mapped copy-on-write so inserts still work"""
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+
+        index = cls(meta["dim"], n_lists=meta["n_lists"], n_probe=meta["n_probe"], capacity=0)
+        mmap_mode = "c" if mmap else None
+        for name in ("vectors", "assignments", "location", "remote", "discipline", "experience"):
+            setattr(index, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+
+        index.ids = meta["ids"]
+        index.size = len(index.ids)
+        index.slots = {item_id: slot for slot, item_id in enumerate(index.ids)}
+        index.alive = np.ones(index.size, dtype=bool)
+        index.locations = _Vocabulary(meta["locations"])
+        index.disciplines = _Vocabulary(meta["disciplines"])
+        index._rebuild_lists()
+        return index
+
+    def _nearest(self, vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    def _reassign(self):
+        if self.size:
+            self.assignments[:self.size] = self._nearest(self.vectors[:self.size], self.centroids)
+        self._rebuild_lists()
+
+    def _rebuild_lists(self):
+        self._lists = [[] for _ in range(self.n_lists)]
+        self._list_arrays = {}
+        if not self.is_trained or not self.size:
+            return
+        assignments = np.asarray(self.assignments[:self.size])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(self.n_lists + 1))
+        for list_id in range(self.n_lists):
+            members = order[bounds[list_id]:bounds[list_id + 1]]
+            self._lists[list_id] = members.tolist()
+            self._list_arrays[list_id] = members
+
+    def _gather(self, list_ids: np.ndarray) -> np.ndarray:
+        arrays = []
+        for list_id in list_ids:
+            list_id = int(list_id)
+            members = self._list_arrays.get(list_id)
+            if members is None:
+                members = np.array(self._lists[list_id], dtype=np.int64)
+                self._list_arrays[list_id] = members
+            arrays.append(members)
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    def _rank(
+        self,
+        query: np.ndarray,
+        slots: np.ndarray,
+        k: int,
+        filters: Optional[SearchFilter]
+    ) -> List[Tuple[str, float]]:
+        if len(slots):
+            slots = slots[self._mask(slots, filters)]
+        if not len(slots):
+            return []
+
+        scores = self.vectors[slots] @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[slots[i]], float(scores[i])) for i in top]
+
+    def _mask(self, slots: np.ndarray, filters: Optional[SearchFilter]) -> np.ndarray:
+        mask = self.alive[slots].copy()
+        if filters is None:
+            return mask
+
+        if filters.locations:
+            location_ok = self.locations.allowed(filters.locations)[self.location[slots]]
+            if filters.include_remote:
+                location_ok |= self.remote[slots]
+            mask &= location_ok
+        if filters.disciplines:
+            mask &= self.disciplines.allowed(filters.disciplines)[self.discipline[slots]]
+        if filters.min_experience is not None:
+            mask &= self.experience[slots] >= filters.min_experience
+        if filters.max_experience is not None:
+            mask &= self.experience[slots] <= filters.max_experience
+        return mask
+
+    def _reserve(self, needed: int):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        self.vectors = self._grow(self.vectors, (new_capacity, self.dim), 0)
+        self.assignments = self._grow(self.assignments, (new_capacity,), UNKNOWN)
+        self.alive = self._grow(self.alive, (new_capacity,), False)
+        self.location = self._grow(self.location, (new_capacity,), UNKNOWN)
+        self.remote = self._grow(self.remote, (new_capacity,), False)
+        self.discipline = self._grow(self.discipline, (new_capacity,), UNKNOWN)
+        self.experience = self._grow(self.experience, (new_capacity,), 0)
+
+    def _grow(self, array: np.ndarray, shape: Tuple[int, ...], fill: Any) -> np.ndarray:
+        grown = np.full(shape, fill, dtype=array.dtype)
+        grown[:self.size] = array[:self.size]
+        return grown
+
+def recall_at_k(
+    index: IVFFlatIndex,
+    queries: np.ndarray,
+    k: int = 10,
+    filters: Optional[SearchFilter] = None,
+    n_probe: Optional[int] = None
+) -> float:
+    """Mean fraction of the exact top-k that the approximate search returns"""
+    hits, total = 0, 0
+    for query in queries:
+        exact = {item_id for item_id, _ in index.exact_search(query, k, filters)}
+        if not exact:
+            continue
+        approx = {item_id for item_id, _ in index.search(query, k, filters, n_probe)}
+        hits += len(exact & approx)
+        total += len(exact)
+    return hits / total if total else 1.0
+
+class ProfileIndex:
+    """Embeds candidate or job profiles and keeps them searchable by vector"""
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        kind: str,
+        n_lists: int = 1024,
+        n_probe: int = 16,
+        train_threshold: int = 20000
+    ):
+        if kind not in ("candidate", "job"):
+            raise ValueError(f"Unknown profile kind: {kind}")
+        self.embedding_service = embedding_service
+        self.kind = kind
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold
+        self.index: Optional[IVFFlatIndex] = None
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def profile_text(profile: Dict[str, Any], kind: str) -> str:
+        if kind == "job":
+            skills = profile.get('required_skills', []) + profile.get('preferred_skills', [])
+            parts = [profile.get('title', ''), ", ".join(skills), profile.get('job_description', '')[:500]]
+        else:
+            parts = [
+                profile.get('discipline', '') or profile.get('education', {}).get('field_of_study', ''),
+                ", ".join(profile.get('skills', [])),
+                "; ".join(p.get('title', '') for p in profile.get('projects', [])[:5])
+            ]
+        return "\n".join(part for part in parts if part)
+
+    @staticmethod
+    def profile_metadata(profile: Dict[str, Any], kind: str) -> Dict[str, Any]:
+        location = profile.get('location', {}) or {}
+        if kind == "job":
+            return {
+                "location": location.get('city') or location.get('state'),
+                "remote": location.get('remote', False),
+                "discipline": profile.get('discipline'),
+                "experience": profile.get('experience_requirements', {}).get('years', 0)
+            }
+        return {
+            "location": location.get('city') or location.get('state'),
+            "remote": location.get('remote_preference', False),
+            "discipline": profile.get('discipline') or profile.get('education', {}).get('field_of_study'),
+            "experience": profile.get('experience', {}).get('years', 0)
+        }
+
+    def upsert(self, profiles: List[Dict[str, Any]]):
+        profiles = [p for p in profiles if p.get('id')]
+        if not profiles:
+            return
+        vectors = self.embedding_service.encode([self.profile_text(p, self.kind) for p in profiles])
+        if self.index is None:
+            self.index = IVFFlatIndex(vectors.shape[1], n_lists=self.n_lists, n_probe=self.n_probe)
+        self.index.add(
+            [p['id'] for p in profiles],
+            vectors,
+            [self.profile_metadata(p, self.kind) for p in profiles]
+        )
+        for profile in profiles:
+            self.profiles[profile['id']] = profile
+
+        # Flat scan is fine while small; switch to IVF once there is enough data
+        if not self.index.is_trained and len(self.index) >= self.train_threshold:
+            sample_size = min(len(self.index), max(self.n_lists * 40, self.train_threshold))
+            live = np.flatnonzero(self.index.alive[:self.index.size])
+            sample = self.index.vectors[np.random.default_rng(0).choice(live, sample_size, replace=False)]
+            self.index.train(sample)
+
+    def remove(self, ids: List[str]) -> int:
+        for item_id in ids:
+            self.profiles.pop(item_id, None)
+        return self.index.remove(ids) if self.index else 0
+
+    def search(
+        self,
+        query_profile: Dict[str, Any],
+        query_kind: str,
+        k: int,
+        filters: Optional[SearchFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """Profiles most similar to ``query_profile`` (of the opposite kind)"""
+        if self.index is None or not len(self.index):
+            return []
+        query = self.embedding_service.encode([self.profile_text(query_profile, query_kind)])[0]
+        hits = self.index.search(query, k, filters)
+        return [self.profiles[item_id] for item_id, _ in hits if item_id in self.profiles]
+
+    def save(self, directory: str):
+        if self.index is None:
+            return
+        self.index.save(directory)
+        with open(os.path.join(directory, "profiles.jsonl"), "w", encoding="utf-8") as handle:
+            for item_id in self.index.ids:
+                handle.write(json.dumps(self.profiles[item_id]) + "\n")
+
+    def load(self, directory: str, mmap: bool = True):
+        self.index = IVFFlatIndex.load(directory, mmap=mmap)
+        self.profiles = {}
+        with open(os.path.join(directory, "profiles.jsonl"), "r", encoding="utf-8") as handle:
+            for line in handle:
+                profile = json.loads(line)
+                self.profiles[profile['id']] = profile
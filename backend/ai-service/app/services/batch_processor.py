@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Batch Processor Service
+Asynchronous batch jobs mixing analysis, assessment, matching and story operations
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.utils.connections import get_redis_client
+from app.utils.llm_gateway import LLMOutputError, llm_deadline
+from app.utils.llm_governor import LLMPriority, llm_priority
+
+logger = logging.getLogger(__name__)
+
+class BatchOperation(Enum):
+    ANALYZE = "analyze"
+    ASSESS = "assess"
+    MATCH = "match"
+    STORY = "story"
+
+class BatchStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    PARTIAL = "partial"      # finished, some items failed
+    FAILED = "failed"
+
+class ItemStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+@dataclass
+class BatchItem:
+    index: int
+    operation: str
+    params: Dict[str, Any]
+    item_id: Optional[str] = None
+    status: str = ItemStatus.PENDING.value
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+@dataclass
+class BatchJob:
+    job_id: str
+    status: str
+    total: int
+    created_at: str
+    updated_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    runs: int = 0
+
+OperationHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Extend or release a run lease only if this owner still holds it
+LEASE_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+LEASE_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class BatchJobStore:
+    """Persists batch jobs in Redis, falling back to a local SQLite file"""
+
+    def __init__(self, redis_client=None, db_path: Optional[str] = None):
+        self.redis_client = redis_client
+        self.job_ttl = 7 * 86400  # keep finished jobs for a week
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        if self.redis_client is None:
+            self._init_sqlite(db_path or os.getenv("BATCH_DB_PATH", "batch_jobs.db"))
+        else:
+            self._renew_script = self.redis_client.register_script(LEASE_RENEW_LUA)
+            self._release_script = self.redis_client.register_script(LEASE_RELEASE_LUA)
+
+    def _init_sqlite(self, db_path: str):
+        """Initialize SQLite storage for job state"""
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS batch_jobs (job_id TEXT PRIMARY KEY, meta TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS batch_items ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (job_id, idx))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS batch_leases (job_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        logger.info(f"Batch job store using SQLite at {db_path}")
+
+    def _job_key(self, job_id: str) -> str:
+        return f"batch:job:{job_id}"
+
+    def _items_key(self, job_id: str) -> str:
+        return f"batch:items:{job_id}"
+
+    def _lease_key(self, job_id: str) -> str:
+        return f"batch:lease:{job_id}"
+
+    def acquire_lease(self, job_id: str, owner: str, ttl: float) -> bool:
+        """Claim the right to run a job, unless another live run holds it"""
+        if self.redis_client:
+            return bool(self.redis_client.set(self._lease_key(job_id), owner, nx=True, px=int(ttl * 1000)))
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "INSERT INTO batch_leases (job_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE batch_leases.expires_at < ? OR batch_leases.owner = excluded.owner",
+                (job_id, owner, now + ttl, now)
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+
+    def renew_lease(self, job_id: str, owner: str, ttl: float) -> bool:
+        """Heartbeat; False when the lease expired and may belong to someone else"""
+        if self.redis_client:
+            return bool(self._renew_script(keys=[self._lease_key(job_id)], args=[owner, int(ttl * 1000)]))
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE batch_leases SET expires_at = ? WHERE job_id = ? AND owner = ? AND expires_at >= ?",
+                (time.time() + ttl, job_id, owner, time.time())
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+
+    def release_lease(self, job_id: str, owner: str):
+        if self.redis_client:
+            self._release_script(keys=[self._lease_key(job_id)], args=[owner])
+            return
+        with self._db_lock:
+            self._db.execute("DELETE FROM batch_leases WHERE job_id = ? AND owner = ?", (job_id, owner))
+            self._db.commit()
+
+    def lease_held(self, job_id: str) -> bool:
+        """Whether any worker is running the job right now"""
+        if self.redis_client:
+            return bool(self.redis_client.exists(self._lease_key(job_id)))
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT 1 FROM batch_leases WHERE job_id = ? AND expires_at >= ?", (job_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def save_job(self, job: BatchJob):
+        data = json.dumps(asdict(job))
+        if self.redis_client:
+            self.redis_client.setex(self._job_key(job.job_id), self.job_ttl, data)
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO batch_jobs (job_id, meta) VALUES (?, ?)",
+                (job.job_id, data)
+            )
+            self._db.commit()
+
+    def save_items(self, job_id: str, items: List[BatchItem]):
+        if not items:
+            return
+        if self.redis_client:
+            pipe = self.redis_client.pipeline()
+            pipe.hset(
+                self._items_key(job_id),
+                mapping={str(item.index): json.dumps(asdict(item), default=str) for item in items}
+            )
+            pipe.expire(self._items_key(job_id), self.job_ttl)
+            pipe.execute()
+            return
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO batch_items (job_id, idx, data) VALUES (?, ?, ?)",
+                [(job_id, item.index, json.dumps(asdict(item), default=str)) for item in items]
+            )
+            self._db.commit()
+
+    def load_job(self, job_id: str) -> Optional[BatchJob]:
+        if self.redis_client:
+            data = self.redis_client.get(self._job_key(job_id))
+        else:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT meta FROM batch_jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+            data = row[0] if row else None
+        return BatchJob(**json.loads(data)) if data else None
+
+    def load_items(self, job_id: str) -> List[BatchItem]:
+        if self.redis_client:
+            raw = self.redis_client.hvals(self._items_key(job_id))
+        else:
+            with self._db_lock:
+                raw = [
+                    row[0] for row in self._db.execute(
+                        "SELECT data FROM batch_items WHERE job_id = ?", (job_id,)
+                    )
+                ]
+        items = [BatchItem(**json.loads(data)) for data in raw]
+        items.sort(key=lambda item: item.index)
+        return items
+
+class BatchProcessor:
+    """Runs batch jobs on a bounded worker pool with per-operation concurrency limits"""
+
+    def __init__(
+        self,
+        handlers: Dict[str, OperationHandler],
+        store: Optional[BatchJobStore] = None,
+        max_workers: Optional[int] = None,
+        operation_limits: Optional[Dict[str, int]] = None,
+        max_attempts: int = 3
+    ):
+        self.handlers = handlers
+        self.store = store or BatchJobStore(self._init_redis())
+        self.max_workers = max_workers or int(os.getenv("BATCH_MAX_WORKERS", 8))
+        self.max_attempts = max_attempts
+        self.max_operations = int(os.getenv("BATCH_MAX_OPERATIONS", 10000))
+        # A run holds a lease in the job store, renewed every third of this; a
+        # crashed worker's lease expires and the job can be retried
+        self.lease_seconds = float(os.getenv("BATCH_LEASE_SECONDS", "60"))
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # LLM-heavy operations get fewer slots than the cheap ones
+        limits = {
+            BatchOperation.ANALYZE.value: 3,
+            BatchOperation.ASSESS.value: 3,
+            BatchOperation.MATCH.value: 6,
+            BatchOperation.STORY.value: 2
+        }
+        limits.update(operation_limits or {})
+        self.operation_semaphores = {
+            operation: asyncio.Semaphore(limit) for operation, limit in limits.items()
+        }
+
+        self._running: Dict[str, asyncio.Task] = {}
+        # Strong references: the event loop only keeps weak ones to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _init_redis(self):
+        """Initialize Redis for job persistence"""
+        client = get_redis_client()
+        if not client:
+            logger.warning("Redis unavailable. Using SQLite batch store.")
+        return client
+
+    def create_job(self, operations: List[Dict[str, Any]]) -> BatchJob:
+        """Validate operations and persist a new pending job"""
+        if not operations:
+            raise ValueError("Batch must contain at least one operation")
+        if len(operations) > self.max_operations:
+            raise ValueError(f"Batch exceeds maximum of {self.max_operations} operations")
+
+        items = []
+        for index, spec in enumerate(operations):
+            operation = spec.get("operation") or spec.get("type")
+            if operation not in self.handlers:
+                raise ValueError(
+                    f"Unsupported operation at index {index}: {operation}. "
+                    f"Expected one of: {', '.join(self.handlers)}"
+                )
+            items.append(BatchItem(
+                index=index,
+                operation=operation,
+                params=spec.get("params", {}),
+                item_id=spec.get("id")
+            ))
+
+        now = datetime.utcnow().isoformat()
+        job = BatchJob(
+            job_id=uuid.uuid4().hex,
+            status=BatchStatus.PENDING.value,
+            total=len(items),
+            created_at=now,
+            updated_at=now
+        )
+        self.store.save_items(job.job_id, items)
+        self.store.save_job(job)
+        logger.info(f"Created batch job {job.job_id} with {len(items)} operations")
+        return job
+
+    def retry_job(self, job_id: str) -> BatchJob:
+        """Reset failed and interrupted items so the next run picks them up"""
+        job = self.store.load_job(job_id)
+        if not job:
+            raise KeyError(job_id)
+        if job_id in self._running or self.store.lease_held(job_id):
+            raise ValueError(f"Batch job {job_id} is still running")
+
+        items = [
+            item for item in self.store.load_items(job_id)
+            if item.status != ItemStatus.SUCCEEDED.value
+        ]
+        for item in items:
+            item.status = ItemStatus.PENDING.value
+            item.error = None
+            item.attempts = 0
+        self.store.save_items(job_id, items)
+
+        job.status = BatchStatus.PENDING.value
+        job.updated_at = datetime.utcnow().isoformat()
+        self.store.save_job(job)
+        return job
+
+    def start(self, job_id: str) -> asyncio.Task:
+        """
+        Run a job on its own task, outside the submitting request: its runtime
+        must not count towards that request's duration, in-flight gauge or trace
+        """
+        task = asyncio.create_task(
+            self.run_job(job_id), name=f"batch-{job_id}", context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _heartbeat(self, job_id: str, run: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self.store.renew_lease, job_id, self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Batch job {job_id} lease renewal failed: {str(e)}")
+                continue
+            if not renewed:
+                logger.error(f"Batch job {job_id} lost its run lease; stopping this run")
+                run.cancel()
+                return
+
+    async def run_job(self, job_id: str):
+        """Execute every item that has not succeeded yet"""
+        if job_id in self._running:
+            return
+        # Store calls are blocking Redis or SQLite round trips; keep them off the loop
+        if not await asyncio.to_thread(self.store.acquire_lease, job_id, self.owner, self.lease_seconds):
+            logger.info(f"Batch job {job_id} is running on another worker")
+            return
+        self._running[job_id] = asyncio.current_task()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, asyncio.current_task()))
+        workers: List[asyncio.Task] = []
+
+        try:
+            job = await asyncio.to_thread(self.store.load_job, job_id)
+            if not job:
+                logger.error(f"Batch job {job_id} not found")
+                return
+
+            items = [
+                item for item in await asyncio.to_thread(self.store.load_items, job_id)
+                if item.status != ItemStatus.SUCCEEDED.value
+            ]
+
+            job.status = BatchStatus.RUNNING.value
+            job.runs += 1
+            job.started_at = job.started_at or datetime.utcnow().isoformat()
+            job.updated_at = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self.store.save_job, job)
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for item in items:
+                queue.put_nowait(item)
+
+            # Workers inherit the batch priority so the LLM governor keeps
+            # headroom for interactive traffic
+            # Workers outlive the request that submitted the job, so drop its deadline
+            with llm_priority(LLMPriority.BATCH), llm_deadline(None):
+                workers = [
+                    asyncio.create_task(self._worker(job_id, queue))
+                    for _ in range(min(self.max_workers, len(items)) or 1)
+                ]
+            # Workers exit once the queue is drained; waiting on them (not on
+            # queue.join()) cannot hang if one of them dies
+            for outcome in await asyncio.gather(*workers, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Batch job {job_id} worker died: {str(outcome)}")
+
+            progress = self.get_progress(await asyncio.to_thread(self.store.load_items, job_id))
+            # Items a dead worker or a failed save left behind count as not done
+            unfinished = progress["failed"] + progress["pending"] + progress["running"]
+            if unfinished == 0:
+                job.status = BatchStatus.COMPLETED.value
+            elif progress["succeeded"] == 0:
+                job.status = BatchStatus.FAILED.value
+            else:
+                job.status = BatchStatus.PARTIAL.value
+            job.finished_at = job.updated_at = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self.store.save_job, job)
+            logger.info(f"Batch job {job_id} finished: {job.status} {progress}")
+
+        except Exception as e:
+            logger.error(f"Batch job {job_id} failed: {str(e)}")
+            try:
+                job = await asyncio.to_thread(self.store.load_job, job_id)
+                if job:
+                    job.status = BatchStatus.FAILED.value
+                    job.updated_at = datetime.utcnow().isoformat()
+                    await asyncio.to_thread(self.store.save_job, job)
+            except Exception as e:
+                logger.error(f"Batch job {job_id} status update failed: {str(e)}")
+        finally:
+            heartbeat.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(heartbeat, *workers, return_exceptions=True)
+            self._running.pop(job_id, None)
+            try:
+                await asyncio.to_thread(self.store.release_lease, job_id, self.owner)
+            except Exception as e:
+                logger.error(f"Batch job {job_id} lease release failed: {str(e)}")
+
+    async def _worker(self, job_id: str, queue: asyncio.Queue):
+        while not queue.empty():
+            item = queue.get_nowait()
+            try:
+                await self._execute_item(job_id, item)
+            except Exception as e:
+                # Typically the store (a Redis blip); fail this item, keep draining
+                logger.error(f"Batch item {job_id}/{item.index} could not be processed: {str(e)}")
+                item.status = ItemStatus.FAILED.value
+                item.error = f"Internal error: {str(e)}"
+                item.updated_at = datetime.utcnow().isoformat()
+                try:
+                    await asyncio.to_thread(self.store.save_items, job_id, [item])
+                except Exception as e:
+                    logger.error(f"Batch item {job_id}/{item.index} status update failed: {str(e)}")
+
+    async def _execute_item(self, job_id: str, item: BatchItem):
+        handler = self.handlers[item.operation]
+        semaphore = self.operation_semaphores.get(item.operation)
+
+        while item.attempts < self.max_attempts:
+            item.attempts += 1
+            item.status = ItemStatus.RUNNING.value
+            item.updated_at = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self.store.save_items, job_id, [item])
+
+            try:
+                if semaphore:
+                    async with semaphore:
+                        result = await handler(item.params)
+                else:
+                    result = await handler(item.params)
+
+                item.status = ItemStatus.SUCCEEDED.value
+                item.result = result
+                item.error = None
+                break
+
+            except Exception as e:
+                # Bad parameters will not succeed on retry; a malformed completion may
+                if isinstance(e, (KeyError, ValueError, TypeError)) and not isinstance(e, LLMOutputError):
+                    item.status = ItemStatus.FAILED.value
+                    item.error = str(e)
+                    break
+                logger.error(f"Batch item {job_id}/{item.index} attempt {item.attempts} failed: {str(e)}")
+                item.status = ItemStatus.FAILED.value
+                item.error = str(e)
+                if item.attempts < self.max_attempts:
+                    await asyncio.sleep(min(2 ** item.attempts, 30))
+
+        item.updated_at = datetime.utcnow().isoformat()
+        await asyncio.to_thread(self.store.save_items, job_id, [item])
+
+    def shutdown(self):
+        """Stop local runs; their leases expire and the jobs can be retried"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    def get_progress(self, items: List[BatchItem]) -> Dict[str, int]:
+        progress = {status.value: 0 for status in ItemStatus}
+        for item in items:
+            progress[item.status] = progress.get(item.status, 0) + 1
+        progress["total"] = len(items)
+        return progress
+
+    def get_status(self, job_id: str, include_results: bool = True) -> Optional[Dict[str, Any]]:
+        """Job status, progress and the results completed so far"""
+        job = self.store.load_job(job_id)
+        if not job:
+            return None
+
+        items = self.store.load_items(job_id)
+        return {
+            "job": asdict(job),
+            "progress": self.get_progress(items),
+            "results": [
+                {
+                    "index": item.index,
+                    "id": item.item_id,
+                    "operation": item.operation,
+                    "result": item.result
+                }
+                for item in items
+                if include_results and item.status == ItemStatus.SUCCEEDED.value
+            ],
+            "errors": [
+                {
+                    "index": item.index,
+                    "id": item.item_id,
+                    "operation": item.operation,
+                    "error": item.error,
+                    "attempts": item.attempts
+                }
+                for item in items
+                if item.status == ItemStatus.FAILED.value
+            ]
+        }
+
+def build_default_handlers(
+    project_analyzer,
+    skills_assessor,
+    candidate_matcher,
+    story_generator
+) -> Dict[str, OperationHandler]:
+    """Map batch operations onto the existing service entry points"""
+
+    async def analyze(params: Dict[str, Any]) -> Dict[str, Any]:
+        return await project_analyzer.analyze_project(
+            title=params["title"],
+            description=params["description"],
+            technologies=params.get("technologies", []),
+            category=params.get("category"),
+            repository_url=params.get("repository_url"),
+            project_files=params.get("project_files")
+        )
+
+    async def assess(params: Dict[str, Any]) -> Dict[str, Any]:
+        return await skills_assessor.assess_skills(
+            projects=params.get("projects", []),
+            technologies=params.get("technologies", []),
+            experience_level=params.get("experience_level") or "intermediate",
+            education_background=params.get("education_background")
+        )
+
+    async def match(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        matches = await candidate_matcher.find_candidate_matches(
+            job_data=params["job_data"],
+            candidates=params.get("candidates", []),
+            limit=params.get("limit", 10)
+        )
+        return [asdict(m) for m in matches]
+
+    async def story(params: Dict[str, Any]) -> Dict[str, Any]:
+        bundle = await story_generator.generate_story_bundle(
+            project_data=params["project_data"],
+            target_audience=params.get("target_audience", "recruiters"),
+            tone=params.get("tone", "professional"),
+            length=params.get("length", "medium"),
+            focus_areas=params.get("focus_areas")
+        )
+        return asdict(bundle)
+
+    return {
+        BatchOperation.ANALYZE.value: analyze,
+        BatchOperation.ASSESS.value: assess,
+        BatchOperation.MATCH.value: match,
+        BatchOperation.STORY.value: story
+    }
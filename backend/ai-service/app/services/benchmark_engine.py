@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Institution Benchmark Engine
+Ranks an institution against all others, or against peers in the same region,
+size band or discipline mix, by percentile per metric.
+
+Every peer group keeps one sorted array of values per metric, so a percentile
+rank, a ranking position or a quartile is a binary search; a metric that
+changes moves one value in each of the institution's groups (a remove and an
+insort) instead of rescanning every institution. Running sums give the peer
+averages.
+
+Metrics come from two places: the analytics rollups (visibility, contacts,
+company engagement), re-read whenever the rollups change, and metrics the
+backend reports with an institution's profile (region, students, disciplines),
+kept in a JSON file in BENCHMARK_DIR that every worker reloads when it changes.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.analytics_engine import AnalyticsEngine, BENCHMARK_METRICS
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+COMPOSITE = "overall"
+# Upper bound (exclusive) of students per size band
+SIZE_BANDS = [(2000, "small"), (10000, "medium"), (30000, "large")]
+COMPARE_GROUPS = ("national", "regional", "similar", "size", "discipline")
+STRENGTH_PERCENTILE = 60
+IMPROVEMENT_PERCENTILE = 40
+
+def size_band(students: Optional[int]) -> Optional[str]:
+    if not students:
+        return None
+    for limit, band in SIZE_BANDS:
+        if students < limit:
+            return band
+    return "very_large"
+
+def _disciplines(value: Any) -> Dict[str, float]:
+    """{discipline: share} from a share mapping or a list of disciplines"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        shares = {str(name).strip().lower(): float(share) for name, share in value.items() if share}
+    else:
+        shares = {str(name).strip().lower(): 1.0 for name in value}
+    total = sum(shares.values())
+    return {name: round(share / total, 3) for name, share in shares.items()} if total > 0 else {}
+
+def _dominant(disciplines: Dict[str, float]) -> Optional[str]:
+    return max(disciplines, key=disciplines.get) if disciplines else None
+
+class _Distribution:
+    """Sorted values of one metric within one peer group"""
+    __slots__ = ("values", "total")
+
+    def __init__(self):
+        self.values: List[float] = []
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: float):
+        insort(self.values, value)
+        self.total += value
+
+    def remove(self, value: float):
+        index = bisect_left(self.values, value)
+        if index < len(self.values) and self.values[index] == value:
+            del self.values[index]
+            self.total -= value
+
+    def percentile(self, value: float) -> float:
+        """Share of the group below the value, counting ties as half"""
+        below = bisect_left(self.values, value)
+        ties = bisect_right(self.values, value) - below
+        return 100 * (below + ties / 2) / len(self.values)
+
+    def position(self, value: float) -> int:
+        """1-based rank, highest value first; ties share the best rank"""
+        return len(self.values) - bisect_right(self.values, value) + 1
+
+    def quantile(self, q: float) -> float:
+        return self.values[min(int(q * (len(self.values) - 1) + 0.5), len(self.values) - 1)]
+
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+class BenchmarkEngine:
+    """Per-peer-group metric distributions with O(log n) percentile queries"""
+
+    def __init__(self, analytics_engine: Optional[AnalyticsEngine] = None, data_dir: Optional[str] = None):
+        self.analytics_engine = analytics_engine
+        self.data_dir = data_dir or os.getenv("BENCHMARK_DIR", os.path.join("data", "benchmarks"))
+        self.path = os.path.join(self.data_dir, "institutions.json")
+        self.min_peers = int(os.getenv("BENCHMARK_MIN_PEERS", "5"))
+        # Reported by the backend: {institution_id: {"region", "students", "disciplines", "metrics"}}
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        # From the analytics rollups: metrics and roster size
+        self.derived: Dict[str, Dict[str, float]] = {}
+        self.derived_students: Dict[str, int] = {}
+        # What the distributions currently hold, per institution
+        self.values: Dict[str, Dict[str, float]] = {}
+        self.memberships: Dict[str, Tuple[tuple, ...]] = {}
+        self.groups: Dict[tuple, Dict[str, _Distribution]] = defaultdict(lambda: defaultdict(_Distribution))
+        self.group_sizes: Counter = Counter()
+        self._lock = threading.RLock()
+        # (mtime_ns, inode) of the profiles file last read or written
+        self._file_version = (0, 0)
+        self._analytics_version = -1
+
+    def _groups_for(self, institution_id: str) -> Tuple[tuple, ...]:
+        profile = self.profiles.get(institution_id, {})
+        band = size_band(profile.get("students") or self.derived_students.get(institution_id))
+        discipline = _dominant(profile.get("disciplines", {}))
+        groups = [("national",)]
+        if profile.get("region"):
+            groups.append(("regional", profile["region"]))
+        if band:
+            groups.append(("size", band))
+            # Without a discipline mix, similar means the same size band
+            groups.append(("similar", band, discipline))
+        if discipline:
+            groups.append(("discipline", discipline))
+        return tuple(groups)
+
+    def _reindex(self, institution_id: str):
+        """Move one institution's values into its current groups, touching only what changed"""
+        old_values = self.values.get(institution_id, {})
+        old_groups = self.memberships.get(institution_id, ())
+        values = {
+            **self.derived.get(institution_id, {}),
+            **self.profiles.get(institution_id, {}).get("metrics", {})
+        }
+        composite = [values[name] for name in BENCHMARK_METRICS if name in values]
+        if composite:
+            values[COMPOSITE] = round(sum(composite) / len(composite), 2)
+        groups = self._groups_for(institution_id) if values else ()
+
+        for group in old_groups:
+            kept = group in groups
+            for name, value in old_values.items():
+                if not kept or values.get(name) != value:
+                    self.groups[group][name].remove(value)
+            if not kept:
+                self.group_sizes[group] -= 1
+        for group in groups:
+            new = group not in old_groups
+            for name, value in values.items():
+                if new or old_values.get(name) != value:
+                    self.groups[group][name].add(value)
+            if new:
+                self.group_sizes[group] += 1
+
+        if values:
+            self.values[institution_id] = values
+            self.memberships[institution_id] = groups
+        else:
+            self.values.pop(institution_id, None)
+            self.memberships.pop(institution_id, None)
+
+    def _rebuild(self):
+        self.values.clear()
+        self.memberships.clear()
+        self.groups.clear()
+        self.group_sizes.clear()
+        for institution_id in set(self.profiles) | set(self.derived):
+            self._reindex(institution_id)
+
+    def _load_profiles(self):
+        """Reload reported profiles when another worker rewrote them"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        # Every write replaces the file, so a new inode means another writer
+        file_version = (stat.st_mtime_ns, stat.st_ino)
+        if file_version == self._file_version:
+            return
+        try:
+            with open(self.path) as f:
+                self.profiles = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load benchmark profiles: {str(e)}")
+            return
+        self._file_version = file_version
+        self._rebuild()
+
+    def _sync_analytics(self):
+        """Re-read rollup metrics when the rollups changed; reindex only institutions that moved"""
+        if self.analytics_engine is None or self._analytics_version == self.analytics_engine.version:
+            return
+        metrics = self.analytics_engine.institution_metrics(self.analytics_engine.demand_days)
+        for institution_id in set(self.derived) | set(metrics):
+            row = metrics.get(institution_id, {})
+            values = {name: row[name] for name in BENCHMARK_METRICS if name in row}
+            students = int(row.get("students", 0))
+            if values == self.derived.get(institution_id) and students == self.derived_students.get(institution_id):
+                continue
+            if values:
+                self.derived[institution_id] = values
+                self.derived_students[institution_id] = students
+            else:
+                self.derived.pop(institution_id, None)
+                self.derived_students.pop(institution_id, None)
+            self._reindex(institution_id)
+        self._analytics_version = self.analytics_engine.version
+
+    def sync(self):
+        with self._lock:
+            self._load_profiles()
+            self._sync_analytics()
+
+    def upsert_profiles(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge institution profiles: region, students, disciplines ({name: share}
+        or a list) and metrics ({name: number}, null removes a metric)
+        """
+        # The file lock makes read-merge-write atomic across workers: the
+        # merge starts from whatever the last writer left on disk. It is taken
+        # before the in-process lock, so compare() never waits behind another
+        # worker's write
+        with file_lock(self.path), self._lock:
+            self.sync()
+            changed, rejected = [], []
+            for index, raw in enumerate(records):
+                try:
+                    institution_id = str(raw.get("institution_id") or "").strip()
+                    if not institution_id:
+                        raise ValueError("institution_id is required")
+                    profile = dict(self.profiles.get(institution_id, {}))
+                    if "region" in raw:
+                        profile["region"] = str(raw["region"]).strip().lower() if raw["region"] else None
+                    if "students" in raw:
+                        profile["students"] = int(raw["students"]) if raw["students"] else None
+                    if "disciplines" in raw:
+                        profile["disciplines"] = _disciplines(raw["disciplines"])
+                    metrics = dict(profile.get("metrics", {}))
+                    for name, value in (raw.get("metrics") or {}).items():
+                        if name == COMPOSITE:
+                            raise ValueError(f"'{COMPOSITE}' is computed, not reported")
+                        if value is None:
+                            metrics.pop(name, None)
+                            continue
+                        value = float(value)
+                        if not math.isfinite(value):
+                            raise ValueError(f"metric {name} is not a finite number")
+                        metrics[name] = value
+                    profile["metrics"] = metrics
+                except (ValueError, TypeError, AttributeError) as e:
+                    rejected.append({"index": index, "reason": str(e)})
+                    continue
+                self.profiles[institution_id] = profile
+                changed.append(institution_id)
+
+            if changed:
+                os.makedirs(self.data_dir, exist_ok=True)
+                temporary = f"{self.path}.{os.getpid()}.tmp"
+                with open(temporary, "w") as f:
+                    json.dump(self.profiles, f)
+                os.replace(temporary, self.path)
+                stat = os.stat(self.path)
+                self._file_version = (stat.st_mtime_ns, stat.st_ino)
+                for institution_id in set(changed):
+                    self._reindex(institution_id)
+            return {"upserted": len(changed), "rejected": rejected, "total": len(self.values)}
+
+    def _peer_group(self, institution_id: str, compare_to: str) -> Tuple[tuple, bool]:
+        """The requested peer group, or national when it is too small; second value says it was widened"""
+        for group in self.memberships.get(institution_id, ()):
+            if group[0] == compare_to:
+                if self.group_sizes[group] >= self.min_peers:
+                    return group, False
+                break
+        return ("national",), compare_to != "national"
+
+    @staticmethod
+    def _label(group: tuple) -> str:
+        if group[0] == "national":
+            return "all institutions"
+        if group[0] == "similar":
+            return f"{group[1].replace('_', ' ')} {group[2] or ''} institutions".replace("  ", " ")
+        if group[0] == "size":
+            return f"{group[1].replace('_', ' ')} institutions"
+        return f"{group[1]} institutions"
+
+    def compare(self, institution_id: Optional[str], compare_to: str = "national") -> Optional[Dict[str, Any]]:
+        """Percentile, peer quartiles and rank per metric; None when the institution has no metrics"""
+        if compare_to not in COMPARE_GROUPS:
+            raise ValueError(f"compare_to must be one of: {', '.join(COMPARE_GROUPS)}")
+        with self._lock:
+            self.sync()
+            values = self.values.get(institution_id) if institution_id else None
+            if not values:
+                return None
+            group, widened = self._peer_group(institution_id, compare_to)
+            if self.group_sizes[group] < 2:
+                return None
+            distributions = self.groups[group]
+
+            metrics = {}
+            for name, value in values.items():
+                distribution = distributions[name]
+                if name == COMPOSITE or len(distribution) < 2:
+                    continue
+                metrics[name] = {
+                    "your_value": value,
+                    "average": round(distribution.mean(), 1),
+                    "median": distribution.quantile(0.5),
+                    "p25": distribution.quantile(0.25),
+                    "p75": distribution.quantile(0.75),
+                    "percentile": round(distribution.percentile(value), 1),
+                    "rank": distribution.position(value),
+                    "peers": len(distribution)
+                }
+
+            ranking = {"position": None, "total": self.group_sizes[group], "percentile": None}
+            if COMPOSITE in values and len(distributions[COMPOSITE]) >= 2:
+                overall = distributions[COMPOSITE]
+                ranking = {
+                    "position": overall.position(values[COMPOSITE]),
+                    "total": len(overall),
+                    "percentile": round(overall.percentile(values[COMPOSITE]), 1)
+                }
+
+            by_percentile = sorted(metrics.items(), key=lambda item: -item[1]["percentile"])
+            strengths = [
+                f"{name.replace('_', ' ').capitalize()} (top {max(1, round(100 - data['percentile']))}% of peers)"
+                for name, data in by_percentile if data["percentile"] >= STRENGTH_PERCENTILE
+            ]
+            improvements = [
+                f"{name.replace('_', ' ').capitalize()} (bottom {max(1, round(data['percentile']))}% of peers)"
+                for name, data in reversed(by_percentile) if data["percentile"] <= IMPROVEMENT_PERCENTILE
+            ]
+            return {
+                "ranking": ranking,
+                "metrics": metrics,
+                "strengths": strengths,
+                "improvements": improvements,
+                "compare_to": compare_to,
+                "peer_group": {
+                    "type": group[0],
+                    "label": self._label(group),
+                    "size": self.group_sizes[group],
+                    "widened": widened
+                },
+                "window_days": self.analytics_engine.demand_days if self.analytics_engine else None
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "institutions": len(self.values),
+                "profiles": len(self.profiles),
+                "peer_groups": sum(1 for size in self.group_sizes.values() if size > 0)
+            }
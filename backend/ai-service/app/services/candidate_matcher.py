@@ -6,11 +6,15 @@ AI-powered matching between candidates and job opportunities
 
 import asyncio
 import logging
+import os
 from typing import Dict, List, Optional, Any, Tuple
-import openai
 import numpy as np
 from dataclasses import dataclass
 from enum import Enum
+from app.services.ann_index import ProfileIndex, SearchFilter
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -33,30 +37,115 @@ class MatchResult:
     recommendations: List[str]
 
 class CandidateMatcher:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI()
-        self.skill_weights = {
-            MatchType.SKILLS: 0.30,
-            MatchType.EXPERIENCE: 0.25,
-            MatchType.EDUCATION: 0.15,
-            MatchType.PROJECTS: 0.20,
-            MatchType.LOCATION: 0.05,
-            MatchType.CULTURE: 0.05
+    default_skill_weights = {
+        MatchType.SKILLS: 0.30,
+        MatchType.EXPERIENCE: 0.25,
+        MatchType.EDUCATION: 0.15,
+        MatchType.PROJECTS: 0.20,
+        MatchType.LOCATION: 0.05,
+        MatchType.CULTURE: 0.05
+    }
+    level_hierarchy = {'entry': 1, 'junior': 2, 'mid': 3, 'senior': 4, 'lead': 5, 'executive': 6}
+    degree_hierarchy = {'certificate': 1, 'associates': 2, 'bachelors': 3, 'masters': 4, 'doctorate': 5}
+    # How many ANN hits to fully score per requested match
+    retrieval_factor = 5
+    min_retrieval = 50
+
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None):
+        self.llm = get_llm_gateway()
+        self.skill_weights = dict(self.default_skill_weights)
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.candidate_index: Optional[ProfileIndex] = None
+        self.job_index: Optional[ProfileIndex] = None
+        if self.embedding_service:
+            self.candidate_index = ProfileIndex(self.embedding_service, "candidate")
+            self.job_index = ProfileIndex(self.embedding_service, "job")
+
+    async def index_profiles(
+        self,
+        kind: str,
+        profiles: List[Dict[str, Any]],
+        remove_ids: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """Insert, replace or delete candidate/job profiles in the ANN index"""
+        index = self._profile_index(kind)
+        removed = await asyncio.to_thread(index.remove, remove_ids or [])
+        await asyncio.to_thread(index.upsert, profiles)
+        return {
+            'indexed': len(profiles),
+            'removed': removed,
+            'total': len(index.index) if index.index else 0
         }
+
+    def save_indexes(self, directory: str):
+        for kind in ("candidate", "job"):
+            self._profile_index(kind).save(os.path.join(directory, kind))
+
+    def load_indexes(self, directory: str):
+        for kind in ("candidate", "job"):
+            path = os.path.join(directory, kind)
+            if os.path.exists(os.path.join(path, "meta.json")):
+                self._profile_index(kind).load(path)
+
+    def _profile_index(self, kind: str) -> ProfileIndex:
+        index = self.candidate_index if kind == "candidate" else self.job_index
+        if index is None:
+            raise ValueError("Profile index requires the embedding service")
+        return index
+
+    @traced("matcher.retrieve")
+    async def _retrieve(
+        self,
+        index: Optional[ProfileIndex],
+        query_profile: Dict[str, Any],
+        query_kind: str,
+        limit: int,
+        filters: Optional[SearchFilter]
+    ) -> List[Dict[str, Any]]:
+        """Candidate-generation stage: nearest indexed profiles to the query"""
+        if index is None:
+            return []
+        k = max(limit * self.retrieval_factor, self.min_retrieval)
+        return await asyncio.to_thread(index.search, query_profile, query_kind, k, filters)
+
+    @staticmethod
+    def _default_filters(query_profile: Dict[str, Any], query_kind: str) -> SearchFilter:
+        """Loose attribute filters so retrieval never drops plausible matches.
+
+        Discipline is left to education scoring: names differ across sources
+        ("computer science" vs "software engineering") and profiles without one
+        would never be retrieved.
+        """
+        if query_kind == "job":
+            required_years = query_profile.get('experience_requirements', {}).get('years', 0)
+            return SearchFilter(min_experience=max(required_years - 2, 0) if required_years else None)
+        candidate_years = query_profile.get('experience', {}).get('years', 0)
+        return SearchFilter(max_experience=candidate_years + 2)
     
+    @traced("matcher.find_candidates")
     async def find_candidate_matches(
         self,
         job_data: Dict[str, Any],
-        candidates: List[Dict[str, Any]],
+        candidates: Optional[List[Dict[str, Any]]] = None,
         limit: int = 10,
-        min_score: float = 0.5
+        min_score: float = 0.5,
+        filters: Optional[SearchFilter] = None
     ) -> List[MatchResult]:
-        """Find best candidate matches for a job position"""
+        """Find best candidate matches for a job position.
+
+        Without an explicit candidate list, candidates come from the ANN index.
+        """
         try:
             matches = []
-            
-            for candidate in candidates:
-                match_result = await self._calculate_match_score(job_data, candidate)
+            if candidates is None:
+                candidates = await self._retrieve(
+                    self.candidate_index, job_data, "job", limit,
+                    filters or self._default_filters(job_data, "job")
+                )
+            semantic_scores = await self._semantic_scores([job_data], candidates)
+            
+            for candidate, scores in zip(candidates, semantic_scores):
+                match_result = await self._calculate_match_score(job_data, candidate, scores)
                 if match_result.overall_score >= min_score:
                     matches.append(match_result)
             
@@ -68,19 +157,30 @@ class CandidateMatcher:
             logger.error(f"Candidate matching failed: {str(e)}")
             raise
 
+    @traced("matcher.find_jobs")
     async def find_job_matches(
         self,
         candidate_data: Dict[str, Any],
-        jobs: List[Dict[str, Any]],
+        jobs: Optional[List[Dict[str, Any]]] = None,
         limit: int = 10,
-        min_score: float = 0.5
+        min_score: float = 0.5,
+        filters: Optional[SearchFilter] = None
     ) -> List[MatchResult]:
-        """Find best job matches for a candidate"""
+        """Find best job matches for a candidate.
+
+        Without an explicit job list, jobs come from the ANN index.
+        """
         try:
             matches = []
-            
-            for job in jobs:
-                match_result = await self._calculate_match_score(job, candidate_data)
+            if jobs is None:
+                jobs = await self._retrieve(
+                    self.job_index, candidate_data, "candidate", limit,
+                    filters or self._default_filters(candidate_data, "candidate")
+                )
+            semantic_scores = await self._semantic_scores(jobs, [candidate_data])
+            
+            for job, scores in zip(jobs, semantic_scores):
+                match_result = await self._calculate_match_score(job, candidate_data, scores)
                 if match_result.overall_score >= min_score:
                     matches.append(match_result)
             
@@ -92,19 +192,89 @@ class CandidateMatcher:
             logger.error(f"Job matching failed: {str(e)}")
             raise
 
+    @traced("matcher.semantic_scores")
+    async def _semantic_scores(
+        self,
+        jobs: List[Dict[str, Any]],
+        candidates: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, float]]]:
+        """Precompute embedding-based skills/projects scores for one-to-many matching.
+
+        Either ``jobs`` or ``candidates`` has a single entry. Vectors are cached
+        by content hash, so a candidate profile is only encoded when it changes.
+        """
+        pairs = max(len(jobs), len(candidates))
+        if not self.embedding_service or not jobs or not candidates:
+            return [None] * pairs
+
+        def compute() -> List[Dict[str, float]]:
+            if len(jobs) == 1:
+                job = jobs[0]
+                skills = self.embedding_service.skills_match_many(
+                    self._job_skills(job), [c.get('skills', []) for c in candidates]
+                )
+                projects = self.embedding_service.projects_match_many(
+                    job.get('job_description', ''), [c.get('projects', []) for c in candidates]
+                )
+            else:
+                candidate = candidates[0]
+                skills = [
+                    self.embedding_service.skills_match_many(
+                        self._job_skills(job), [candidate.get('skills', [])]
+                    )[0]
+                    for job in jobs
+                ]
+                projects = [
+                    self.embedding_service.projects_match_many(
+                        job.get('job_description', ''), [candidate.get('projects', [])]
+                    )[0]
+                    for job in jobs
+                ]
+            return [
+                {'skills': skill_score, 'projects': project_score}
+                for skill_score, project_score in zip(skills, projects)
+            ]
+
+        try:
+            # Warm the vector cache with every text in one batched encode
+            service = self.embedding_service
+            texts = [s for job in jobs for s in self._job_skills(job)]
+            texts += [
+                service.description_text(job['job_description'])
+                for job in jobs if job.get('job_description')
+            ]
+            texts += [s for c in candidates for s in c.get('skills', [])]
+            texts += [
+                service.project_text(p) for c in candidates for p in c.get('projects', [])[:5]
+            ]
+            if texts:
+                await self.embedding_service.aencode(texts)
+            return await asyncio.to_thread(compute)
+        except Exception as e:
+            logger.error(f"Semantic matching failed: {str(e)}")
+            return [None] * pairs
+
+    @staticmethod
+    def _job_skills(job_data: Dict[str, Any]) -> List[str]:
+        return job_data.get('required_skills', []) + job_data.get('preferred_skills', [])
+
     async def _calculate_match_score(
         self,
         job_data: Dict[str, Any],
-        candidate_data: Dict[str, Any]
+        candidate_data: Dict[str, Any],
+        semantic_scores: Optional[Dict[str, float]] = None
     ) -> MatchResult:
         """Calculate comprehensive match score between job and candidate"""
         
         # Extract key information
-        job_skills = job_data.get('required_skills', []) + job_data.get('preferred_skills', [])
+        job_skills = self._job_skills(job_data)
         candidate_skills = candidate_data.get('skills', [])
         
         # Calculate individual match scores
-        skills_score = await self._calculate_skills_match(job_skills, candidate_skills)
+        if semantic_scores is not None:
+            skills_score = semantic_scores['skills']
+        else:
+            skills_score = await self._calculate_skills_match(job_skills, candidate_skills)
         experience_score = await self._calculate_experience_match(
             job_data.get('experience_requirements', {}),
             candidate_data.get('experience', {})
@@ -113,10 +283,13 @@ class CandidateMatcher:
             job_data.get('education_requirements', {}),
             candidate_data.get('education', {})
         )
-        projects_score = await self._calculate_projects_match(
-            job_data.get('job_description', ''),
-            candidate_data.get('projects', [])
-        )
+        if semantic_scores is not None:
+            projects_score = semantic_scores['projects']
+        else:
+            projects_score = await self._calculate_projects_match(
+                job_data.get('job_description', ''),
+                candidate_data.get('projects', [])
+            )
         location_score = self._calculate_location_match(
             job_data.get('location', {}),
             candidate_data.get('location', {})
@@ -165,6 +338,15 @@ class CandidateMatcher:
         if not required_skills or not candidate_skills:
             return 0.0
         
+        if self.embedding_service:
+            try:
+                scores = await asyncio.to_thread(
+                    self.embedding_service.skills_match_many, required_skills, [candidate_skills]
+                )
+                return scores[0]
+            except Exception as e:
+                logger.error(f"Semantic skills matching failed: {str(e)}")
+        
         try:
             prompt = f"""
             Analyze the match between required skills and candidate skills:
@@ -182,16 +364,14 @@ class CandidateMatcher:
             Return only the numerical score.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.FLOAT,
+                call_site="matcher.skills"
             )
             
-            score_text = response.choices[0].message.content.strip()
-            return float(score_text)
-            
         except Exception as e:
             logger.error(f"Skills matching failed: {str(e)}")
             # Fallback to simple matching
@@ -214,9 +394,8 @@ class CandidateMatcher:
             years_score = min(candidate_years / max(required_years, 1), 1.0)
             
             # Level matching
-            level_hierarchy = {'entry': 1, 'junior': 2, 'mid': 3, 'senior': 4, 'lead': 5, 'executive': 6}
-            required_level_num = level_hierarchy.get(required_level, 1)
-            candidate_level_num = level_hierarchy.get(candidate_level, 1)
+            required_level_num = self.level_hierarchy.get(required_level, 1)
+            candidate_level_num = self.level_hierarchy.get(candidate_level, 1)
             level_score = min(candidate_level_num / required_level_num, 1.0)
             
             return (years_score + level_score) / 2
@@ -238,9 +417,8 @@ class CandidateMatcher:
             candidate_field = candidate_education.get('field_of_study', '')
             
             # Degree level scoring
-            degree_hierarchy = {'certificate': 1, 'associates': 2, 'bachelors': 3, 'masters': 4, 'doctorate': 5}
-            required_degree_num = degree_hierarchy.get(required_degree.lower(), 0)
-            candidate_degree_num = degree_hierarchy.get(candidate_degree.lower(), 0)
+            required_degree_num = self.degree_hierarchy.get(required_degree.lower(), 0)
+            candidate_degree_num = self.degree_hierarchy.get(candidate_degree.lower(), 0)
             
             if required_degree_num == 0:
                 degree_score = 1.0  # No specific requirement
@@ -268,6 +446,15 @@ class CandidateMatcher:
         if not candidate_projects or not job_description:
             return 0.5
         
+        if self.embedding_service:
+            try:
+                scores = await asyncio.to_thread(
+                    self.embedding_service.projects_match_many, job_description, [candidate_projects]
+                )
+                return scores[0]
+            except Exception as e:
+                logger.error(f"Semantic projects matching failed: {str(e)}")
+        
         try:
             projects_text = "\n".join([
                 f"- {p.get('title', '')}: {p.get('description', '')}"
@@ -292,16 +479,14 @@ class CandidateMatcher:
             Return only the numerical score.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.FLOAT,
+                call_site="matcher.projects"
             )
             
-            score_text = response.choices[0].message.content.strip()
-            return float(score_text)
-            
         except Exception as e:
             logger.error(f"Projects matching failed: {str(e)}")
             return 0.5
@@ -365,16 +550,14 @@ class CandidateMatcher:
             Return only the numerical score.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.FLOAT,
+                call_site="matcher.culture"
             )
             
-            score_text = response.choices[0].message.content.strip()
-            return float(score_text)
-            
         except Exception as e:
             logger.error(f"Culture matching failed: {str(e)}")
             return 0.8
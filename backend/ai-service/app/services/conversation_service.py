@@ -9,41 +9,33 @@ import os
 import json
 import logging
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, AsyncGenerator
 from enum import Enum
-import redis
-import httpx
 from pydantic import BaseModel, Field
+from app.services.embedding_service import get_embedding_service
+from app.utils.connections import get_redis_client
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
+from app.utils.semantic_cache import SemanticResponseCache
+from app.utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
-# Import action handlers (lazy import to avoid circular deps)
-_student_actions = None
-_recruiter_actions = None
+# Action handlers are shared singletons from the service container
+# (imported lazily: the container itself imports this module)
 
 def get_student_actions():
-    global _student_actions
-    if _student_actions is None:
-        from app.services.student_actions import StudentActionHandler
-        _student_actions = StudentActionHandler()
-    return _student_actions
+    from app.container import container
+    return container.student_actions
 
 def get_recruiter_actions():
-    global _recruiter_actions
-    if _recruiter_actions is None:
-        from app.services.recruiter_actions import RecruiterActionHandler
-        _recruiter_actions = RecruiterActionHandler()
-    return _recruiter_actions
-
-_institution_actions = None
+    from app.container import container
+    return container.recruiter_actions
 
 def get_institution_actions():
-    global _institution_actions
-    if _institution_actions is None:
-        from app.services.institution_actions import InstitutionActionHandler
-        _institution_actions = InstitutionActionHandler()
-    return _institution_actions
+    from app.container import container
+    return container.institution_actions
 
 
 class UserRole(str, Enum):
@@ -123,26 +115,27 @@ class ConversationService:
         self.redis_client = None
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.llm = get_llm_gateway()
+        # Haiku is the cheaper, faster model for the conversational tier
+        self.llm_providers = ["anthropic", "openai"]
         self.session_ttl = 3600  # 1 hour
+        # Opt-in JSONL log of chat turns for offline cache replay (benchmarks/chat_cache_replay.py)
+        self.traffic_log = os.getenv("CHAT_TRAFFIC_LOG")
         self._init_redis()
 
+        self.semantic_cache = None
+        embedding_service = get_embedding_service()
+        if embedding_service and os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true":
+            self.semantic_cache = SemanticResponseCache(embedding_service)
+
     def _init_redis(self):
         """Initialize Redis connection for session management"""
-        try:
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            self.redis_client.ping()
-            logger.info("Conversation service: Redis connected")
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}. Using in-memory storage.")
-            self.redis_client = None
+        self.redis_client = get_redis_client()
+        if not self.redis_client:
+            logger.warning("Redis unavailable. Using in-memory session storage.")
             self._memory_sessions: Dict[str, str] = {}
 
+    @traced("session.get")
     async def get_session(self, session_id: str) -> Optional[ConversationContext]:
         """Retrieve conversation session from storage"""
         try:
@@ -158,6 +151,7 @@ class ConversationService:
             logger.error(f"Error retrieving session: {e}")
         return None
 
+    @traced("session.save")
     async def save_session(self, context: ConversationContext) -> bool:
         """Save conversation session to storage"""
         try:
@@ -247,6 +241,7 @@ class ConversationService:
         }
         return greetings.get(role, greetings[UserRole.STUDENT])
 
+    @traced("chat.detect_intent")
     async def detect_intent(
         self,
         message: str,
@@ -308,15 +303,18 @@ For {user_role.value}, focus on these intents:
 Return ONLY valid JSON, no explanation."""
 
         try:
-            if self.anthropic_api_key:
-                result = await self._call_claude(system_prompt, message, conversation_history)
-            elif self.openai_api_key:
-                result = await self._call_openai(system_prompt, message, conversation_history)
+            if self.llm.available_providers(self.llm_providers):
+                result = await self._call_llm(system_prompt, message, conversation_history)
             else:
                 # Fallback to rule-based detection
                 result = self._rule_based_intent(message, user_role)
 
-            return IntentResult(**result)
+            intent_result = IntentResult(**result)
+            current_span().set_attributes({
+                "chat.intent": intent_result.primary_intent.value,
+                "chat.intent_confidence": intent_result.confidence
+            })
+            return intent_result
 
         except Exception as e:
             logger.error(f"Intent detection failed: {e}")
@@ -326,80 +324,27 @@ Return ONLY valid JSON, no explanation."""
                 entities={}
             )
 
-    async def _call_claude(
+    async def _call_llm(
         self,
         system_prompt: str,
         message: str,
         conversation_history: str = ""
     ) -> Dict[str, Any]:
-        """Call Claude API for intent detection"""
-        async with httpx.AsyncClient() as client:
-            user_content = message
-            if conversation_history:
-                user_content = f"Previous conversation:\n{conversation_history}\n\nNew message: {message}"
-
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": "claude-3-haiku-20240307",
-                    "max_tokens": 500,
-                    "system": system_prompt,
-                    "messages": [{"role": "user", "content": user_content}]
-                },
-                timeout=30.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                content = data["content"][0]["text"]
-                # Parse JSON from response
-                return json.loads(content)
-            else:
-                logger.error(f"Claude API error: {response.status_code}")
-                raise Exception(f"Claude API error: {response.status_code}")
-
-    async def _call_openai(
-        self,
-        system_prompt: str,
-        message: str,
-        conversation_history: str = ""
-    ) -> Dict[str, Any]:
-        """Call OpenAI API for intent detection"""
-        async with httpx.AsyncClient() as client:
-            user_content = message
-            if conversation_history:
-                user_content = f"Previous conversation:\n{conversation_history}\n\nNew message: {message}"
-
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_content}
-                    ],
-                    "max_tokens": 500,
-                    "temperature": 0.1
-                },
-                timeout=30.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return json.loads(content)
-            else:
-                logger.error(f"OpenAI API error: {response.status_code}")
-                raise Exception(f"OpenAI API error: {response.status_code}")
+        """Call the LLM gateway for intent detection"""
+        user_content = message
+        if conversation_history:
+            user_content = f"Previous conversation:\n{conversation_history}\n\nNew message: {message}"
+
+        return await self.llm.complete(
+            user_content,
+            system=system_prompt,
+            tier="fast",
+            max_tokens=500,
+            temperature=0.1,
+            output=OutputFormat.JSON,
+            providers=self.llm_providers,
+            call_site="conversation.intent"
+        )
 
     def _rule_based_intent(self, message: str, user_role: UserRole) -> Dict[str, Any]:
         """Fallback rule-based intent detection"""
@@ -604,6 +549,15 @@ Return ONLY valid JSON, no explanation."""
                     data=action_result.data
                 )
 
+        cached = await self._semantic_lookup(message, context, intent_result)
+        if cached:
+            return ConversationResponse(
+                message=cached["message"],
+                intent=intent_result.primary_intent,
+                entities=intent_result.entities,
+                suggested_actions=cached["suggested_actions"]
+            )
+
         # Build the prompt for response generation
         system_prompt = self._build_response_prompt(context.user_role, intent_result)
 
@@ -611,14 +565,14 @@ Return ONLY valid JSON, no explanation."""
         history = self._format_conversation_history(context)
 
         try:
-            if self.anthropic_api_key:
-                response_text = await self._generate_with_claude(
-                    system_prompt, message, history, intent_result
-                )
-            elif self.openai_api_key:
-                response_text = await self._generate_with_openai(
+            # Generate suggested actions
+            actions = self._get_suggested_actions(intent_result.primary_intent, context.user_role)
+
+            if self.llm.available_providers(self.llm_providers):
+                response_text = await self._generate_with_llm(
                     system_prompt, message, history, intent_result
                 )
+                await self._semantic_store(message, context, intent_result, response_text, actions)
             else:
                 response_text = self._generate_fallback_response(
                     intent_result.primary_intent,
@@ -626,9 +580,6 @@ Return ONLY valid JSON, no explanation."""
                     intent_result.entities
                 )
 
-            # Generate suggested actions
-            actions = self._get_suggested_actions(intent_result.primary_intent, context.user_role)
-
             return ConversationResponse(
                 message=response_text,
                 intent=intent_result.primary_intent,
@@ -644,6 +595,59 @@ Return ONLY valid JSON, no explanation."""
                 entities={}
             )
 
+    def _history_free(self, context: ConversationContext) -> bool:
+        """
+        True on the first turn of a session. Later answers are written from the
+        user's own conversation, so they must never be served to anyone else
+        """
+        # The current message is already in the context
+        return len(context.messages) <= 1
+
+    @traced("cache.semantic.lookup")
+    async def _semantic_lookup(
+        self,
+        message: str,
+        context: ConversationContext,
+        intent_result: IntentResult
+    ) -> Optional[Dict[str, Any]]:
+        if not self.semantic_cache or not self._history_free(context):
+            return None
+        try:
+            return await self.semantic_cache.lookup(
+                context.user_role.value,
+                intent_result.primary_intent.value,
+                intent_result.entities,
+                message
+            )
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None
+
+    @traced("cache.semantic.store")
+    async def _semantic_store(
+        self,
+        message: str,
+        context: ConversationContext,
+        intent_result: IntentResult,
+        response_text: str,
+        actions: List[Dict[str, str]]
+    ):
+        # Answers written from a user's conversation history stay private
+        if not self.semantic_cache or not self._history_free(context):
+            return
+        try:
+            await self.semantic_cache.store(
+                context.user_role.value,
+                intent_result.primary_intent.value,
+                intent_result.entities,
+                message,
+                response_text,
+                actions
+            )
+        except Exception as e:
+            logger.error(f"Semantic cache store failed: {e}")
+
+    @traced("chat.action.student")
     async def _handle_student_action(
         self,
         intent: Intent,
@@ -685,6 +689,7 @@ Return ONLY valid JSON, no explanation."""
 
         return None
 
+    @traced("chat.action.recruiter")
     async def _handle_recruiter_action(
         self,
         intent: Intent,
@@ -724,6 +729,7 @@ Return ONLY valid JSON, no explanation."""
 
         return None
 
+    @traced("chat.action.institution")
     async def _handle_institution_action(
         self,
         intent: Intent,
@@ -812,77 +818,27 @@ Respond naturally and helpfully to their message."""
             f"{m.role.upper()}: {m.content}" for m in recent
         ])
 
-    async def _generate_with_claude(
-        self,
-        system_prompt: str,
-        message: str,
-        history: str,
-        intent: IntentResult
-    ) -> str:
-        """Generate response using Claude"""
-        async with httpx.AsyncClient() as client:
-            user_content = message
-            if history:
-                user_content = f"Conversation so far:\n{history}\n\nUser's new message: {message}"
-
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": "claude-3-haiku-20240307",
-                    "max_tokens": 1000,
-                    "system": system_prompt,
-                    "messages": [{"role": "user", "content": user_content}]
-                },
-                timeout=30.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                return data["content"][0]["text"]
-            else:
-                raise Exception(f"Claude API error: {response.status_code}")
-
-    async def _generate_with_openai(
+    async def _generate_with_llm(
         self,
         system_prompt: str,
         message: str,
         history: str,
         intent: IntentResult
     ) -> str:
-        """Generate response using OpenAI"""
-        async with httpx.AsyncClient() as client:
-            messages = [{"role": "system", "content": system_prompt}]
-
-            if history:
-                messages.append({"role": "user", "content": f"Conversation context:\n{history}"})
-
-            messages.append({"role": "user", "content": message})
-
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": messages,
-                    "max_tokens": 1000,
-                    "temperature": 0.7
-                },
-                timeout=30.0
-            )
+        """Generate response through the LLM gateway"""
+        user_content = message
+        if history:
+            user_content = f"Conversation so far:\n{history}\n\nUser's new message: {message}"
 
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"OpenAI API error: {response.status_code}")
+        return await self.llm.complete(
+            user_content,
+            system=system_prompt,
+            tier="fast",
+            max_tokens=1000,
+            temperature=0.7,
+            providers=self.llm_providers,
+            call_site="conversation.response"
+        )
 
     def _generate_fallback_response(
         self,
@@ -995,7 +951,10 @@ Respond naturally and helpfully to their message."""
         context.extracted_entities.update(intent_result.entities)
 
         # Generate response
+        started = time.perf_counter()
         response = await self.generate_response(message, context, intent_result)
+        if self.traffic_log:
+            self._record_traffic(message, context, intent_result, response, time.perf_counter() - started)
 
         # Add assistant response to context
         context.messages.append(ConversationMessage(
@@ -1003,7 +962,8 @@ Respond naturally and helpfully to their message."""
             content=response.message,
             metadata={
                 "intent": intent_result.primary_intent.value,
-                "confidence": intent_result.confidence
+                "confidence": intent_result.confidence,
+                "action_data": response.data is not None
             }
         ))
 
@@ -1012,6 +972,30 @@ Respond naturally and helpfully to their message."""
 
         return response
 
+    def _record_traffic(
+        self,
+        message: str,
+        context: ConversationContext,
+        intent_result: IntentResult,
+        response: ConversationResponse,
+        elapsed: float
+    ):
+        try:
+            with open(self.traffic_log, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps({
+                    "ts": time.time(),
+                    "role": context.user_role.value,
+                    "intent": intent_result.primary_intent.value,
+                    "entities": intent_result.entities,
+                    "message": message,
+                    "response": response.message,
+                    "action_data": response.data is not None,
+                    "history_free": self._history_free(context),
+                    "latency_ms": round(elapsed * 1000, 1)
+                }, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"Traffic log write failed: {e}")
+
     async def stream_response(
         self,
         session_id: str,
@@ -1037,15 +1021,19 @@ Respond naturally and helpfully to their message."""
 
         # Stream the response
         full_response = ""
+        cached = await self._semantic_lookup(message, context, intent_result)
 
-        if self.anthropic_api_key:
-            async for chunk in self._stream_claude_response(context, message, intent_result):
-                full_response += chunk
-                yield chunk
-        elif self.openai_api_key:
-            async for chunk in self._stream_openai_response(context, message, intent_result):
+        if cached:
+            full_response = cached["message"]
+            yield full_response
+        elif self.llm.available_providers(self.llm_providers):
+            async for chunk in self._stream_llm_response(context, message, intent_result):
                 full_response += chunk
                 yield chunk
+            await self._semantic_store(
+                message, context, intent_result, full_response,
+                self._get_suggested_actions(intent_result.primary_intent, user_role)
+            )
         else:
             # Fallback: yield complete response at once
             response = self._generate_fallback_response(
@@ -1063,13 +1051,13 @@ Respond naturally and helpfully to their message."""
         ))
         await self.save_session(context)
 
-    async def _stream_claude_response(
+    async def _stream_llm_response(
         self,
         context: ConversationContext,
         message: str,
         intent: IntentResult
     ) -> AsyncGenerator[str, None]:
-        """Stream response from Claude API"""
+        """Stream response tokens through the LLM gateway"""
         system_prompt = self._build_response_prompt(context.user_role, intent)
         history = self._format_conversation_history(context)
 
@@ -1077,66 +1065,13 @@ Respond naturally and helpfully to their message."""
         if history:
             user_content = f"Conversation so far:\n{history}\n\nUser's new message: {message}"
 
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "POST",
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": self.anthropic_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": "claude-3-haiku-20240307",
-                    "max_tokens": 1000,
-                    "stream": True,
-                    "system": system_prompt,
-                    "messages": [{"role": "user", "content": user_content}]
-                },
-                timeout=60.0
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        if data.get("type") == "content_block_delta":
-                            text = data.get("delta", {}).get("text", "")
-                            if text:
-                                yield text
-
-    async def _stream_openai_response(
-        self,
-        context: ConversationContext,
-        message: str,
-        intent: IntentResult
-    ) -> AsyncGenerator[str, None]:
-        """Stream response from OpenAI API"""
-        system_prompt = self._build_response_prompt(context.user_role, intent)
-        history = self._format_conversation_history(context)
-
-        messages = [{"role": "system", "content": system_prompt}]
-        if history:
-            messages.append({"role": "assistant", "content": f"Previous context:\n{history}"})
-        messages.append({"role": "user", "content": message})
-
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "POST",
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": messages,
-                    "max_tokens": 1000,
-                    "stream": True
-                },
-                timeout=60.0
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: ") and line != "data: [DONE]":
-                        data = json.loads(line[6:])
-                        content = data.get("choices", [{}])[0].get("delta", {}).get("content", "")
-                        if content:
-                            yield content
+        async for text in self.llm.stream(
+            user_content,
+            system=system_prompt,
+            tier="fast",
+            max_tokens=1000,
+            temperature=0.7,
+            providers=self.llm_providers,
+            call_site="conversation.stream"
+        ):
+            yield text
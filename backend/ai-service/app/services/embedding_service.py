@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Embedding Service
+Local sentence embeddings for semantic skill and project matching,
+persisted in a content-hash keyed on-disk vector store
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class VectorStore:
+    """SQLite-backed vector store keyed by content hash"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, dim INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        # SQLite caps bound parameters, so look up in slices
+        for start in range(0, len(keys), 500):
+            chunk = list(keys[start:start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT key, data FROM vectors WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+            for key, data in rows:
+                found[key] = np.frombuffer(data, dtype=np.float32)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        if not vectors:
+            return
+        rows = [
+            (key, int(vector.shape[0]), np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in vectors.items()
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (key, dim, data) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+class EmbeddingService:
+    """Encodes text on CPU in batches, caching vectors in memory and on disk"""
+
+    # Similarity -> score mapping. Near-synonyms ("PostgreSQL" / "Postgres")
+    # land above skill_full_credit; unrelated skills below skill_no_credit.
+    skill_full_credit = 0.80
+    skill_no_credit = 0.45
+    project_full_credit = 0.65
+    project_no_credit = 0.15
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        store_path: Optional[str] = None,
+        batch_size: int = 64,
+        memory_cache_size: int = 50000
+    ):
+        self.model_name = model_name or os.getenv(
+            "HUGGINGFACE_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+        )
+        self.batch_size = batch_size
+        self.memory_cache_size = memory_cache_size
+        self.store = VectorStore(store_path or os.getenv("EMBEDDING_STORE_PATH", "embeddings.db"))
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._memory_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Load the sentence-transformers model on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading embedding model {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def content_hash(self, text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha256(f"{self.model_name}\x00{normalized}".encode()).hexdigest()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return L2-normalized embeddings, shape (len(texts), dim)"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        keys = [self.content_hash(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        with self._cache_lock:
+            for key in set(keys):
+                vector = self._memory_cache.get(key)
+                if vector is not None:
+                    self._memory_cache.move_to_end(key)
+                    vectors[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            vectors.update(self.store.get_many(missing))
+
+        to_encode: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in to_encode:
+                to_encode[key] = text
+
+        if to_encode:
+            encoded = self.model.encode(
+                list(to_encode.values()),
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ).astype(np.float32)
+            new_vectors = dict(zip(to_encode.keys(), encoded))
+            self.store.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        self._remember(vectors)
+        return np.stack([vectors[key] for key in keys])
+
+    async def aencode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode off the event loop"""
+        return await asyncio.to_thread(self.encode, texts)
+
+    def _remember(self, vectors: Dict[str, np.ndarray]):
+        with self._cache_lock:
+            for key, vector in vectors.items():
+                self._memory_cache[key] = vector
+                self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+    @staticmethod
+    def project_text(project: Dict) -> str:
+        return f"{project.get('title', '')}: {project.get('description', '')}"
+
+    @staticmethod
+    def description_text(description: str) -> str:
+        return description[:1000]
+
+    @staticmethod
+    def similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Cosine similarity of normalized row vectors"""
+        return a @ b.T
+
+    @staticmethod
+    def _credit(similarity: np.ndarray, no_credit: float, full_credit: float) -> np.ndarray:
+        return np.clip((similarity - no_credit) / (full_credit - no_credit), 0.0, 1.0)
+
+    def skills_match_many(
+        self,
+        required_skills: List[str],
+        candidate_skill_lists: List[List[str]]
+    ) -> List[float]:
+        """Semantic skills coverage of one requirement list against many candidates.
+
+        Each required skill earns credit from its closest candidate skill; the
+        score is the mean credit. One similarity matrix covers all candidates.
+        """
+        if not required_skills:
+            return [0.0] * len(candidate_skill_lists)
+
+        flat = [skill for skills in candidate_skill_lists for skill in skills]
+        if not flat:
+            return [0.0] * len(candidate_skill_lists)
+
+        embeddings = self.encode(list(required_skills) + flat)
+        required, candidates = embeddings[:len(required_skills)], embeddings[len(required_skills):]
+        similarity = self.similarity_matrix(required, candidates)
+
+        scores, offset = [], 0
+        for skills in candidate_skill_lists:
+            if not skills:
+                scores.append(0.0)
+                continue
+            best = similarity[:, offset:offset + len(skills)].max(axis=1)
+            credit = self._credit(best, self.skill_no_credit, self.skill_full_credit)
+            scores.append(float(credit.mean()))
+            offset += len(skills)
+        return scores
+
+    def projects_match_many(
+        self,
+        job_description: str,
+        candidate_project_lists: List[List[Dict]]
+    ) -> List[float]:
+        """Relevance of each candidate's top projects to a job description"""
+        texts_per_candidate = [
+            [self.project_text(p) for p in projects[:5]]
+            for projects in candidate_project_lists
+        ]
+        flat = [text for texts in texts_per_candidate for text in texts]
+        if not job_description or not flat:
+            return [0.5] * len(candidate_project_lists)
+
+        embeddings = self.encode([self.description_text(job_description)] + flat)
+        similarity = self.similarity_matrix(embeddings[:1], embeddings[1:])[0]
+
+        scores, offset = [], 0
+        for texts in texts_per_candidate:
+            if not texts:
+                scores.append(0.5)
+                continue
+            best = similarity[offset:offset + len(texts)].max()
+            scores.append(float(self._credit(best, self.project_no_credit, self.project_full_credit)))
+            offset += len(texts)
+        return scores
+
+_embedding_service = None
+_embedding_service_checked = False
+
+def get_embedding_service() -> Optional[EmbeddingService]:
+    """Shared embedding service, or None when sentence-transformers is unavailable"""
+    global _embedding_service, _embedding_service_checked
+    if not _embedding_service_checked:
+        _embedding_service_checked = True
+        if os.getenv("EMBEDDINGS_ENABLED", "true").lower() == "false":
+            return None
+        try:
+            import sentence_transformers  # noqa: F401
+            _embedding_service = EmbeddingService()
+        except ImportError:
+            logger.warning("sentence-transformers not installed; semantic matching disabled")
+        except Exception as e:
+            logger.warning(f"Embedding service unavailable: {str(e)}")
+    return _embedding_service
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+File Processor Service
+Streaming text extraction and code statistics for uploaded files.
+
+Uploads are parsed incrementally off the request stream (a declared
+Content-Length over the limit is rejected before any read) and copied in
+chunks into a spooled temp file (memory for small files, disk beyond
+FILE_SPOOL_MEMORY_KB) with the size limit enforced while reading and the type
+sniffed from the first bytes, so oversized or unsupported uploads are
+rejected before they are stored. Extraction is
+incremental: archive members one at a time, PDFs page by page, text line by
+line, each stopping at the extracted-text budget. Parsing runs in a process
+pool so large archives do not block the event loop.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Slack over the upload limit for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+class FileTooLarge(ValueError):
+    """Upload or archive content exceeds the configured limits"""
+
+class UnsupportedFileType(ValueError):
+    """Upload content cannot be processed"""
+
+EXTENSION_LANGUAGES = {
+    ".py": "Python", ".pyi": "Python", ".ipynb": "Jupyter Notebook",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".java": "Java", ".kt": "Kotlin", ".kts": "Kotlin", ".scala": "Scala",
+    ".go": "Go", ".rs": "Rust", ".rb": "Ruby", ".php": "PHP", ".swift": "Swift", ".dart": "Dart",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".cxx": "C++", ".hpp": "C++", ".cs": "C#",
+    ".m": "Objective-C", ".r": "R", ".jl": "Julia", ".lua": "Lua", ".pl": "Perl",
+    ".sh": "Shell", ".bash": "Shell", ".zsh": "Shell", ".ps1": "PowerShell",
+    ".sql": "SQL", ".html": "HTML", ".htm": "HTML", ".css": "CSS", ".scss": "SCSS", ".sass": "SCSS",
+    ".vue": "Vue", ".svelte": "Svelte",
+    ".json": "JSON", ".yaml": "YAML", ".yml": "YAML", ".toml": "TOML", ".xml": "XML",
+    ".md": "Markdown", ".rst": "reStructuredText", ".txt": "Text", ".csv": "CSV",
+    ".tf": "HCL", ".gradle": "Groovy", ".groovy": "Groovy"
+}
+FILENAME_LANGUAGES = {"Dockerfile": "Dockerfile", "Makefile": "Makefile", "Jenkinsfile": "Groovy"}
+
+# Languages whose lines count towards code statistics (not data or prose)
+CODE_LANGUAGES = {
+    "Python", "JavaScript", "TypeScript", "Java", "Kotlin", "Scala", "Go", "Rust", "Ruby", "PHP",
+    "Swift", "Dart", "C", "C++", "C#", "Objective-C", "R", "Julia", "Lua", "Perl", "Shell",
+    "PowerShell", "SQL", "HTML", "CSS", "SCSS", "Vue", "Svelte", "HCL", "Groovy", "Dockerfile", "Makefile"
+}
+LINE_COMMENTS = {
+    "Python": ("#",), "Ruby": ("#",), "Shell": ("#",), "PowerShell": ("#",), "R": ("#",), "Perl": ("#",),
+    "Julia": ("#",), "Dockerfile": ("#",), "Makefile": ("#",), "HCL": ("#", "//"), "YAML": ("#",),
+    "TOML": ("#",), "SQL": ("--",), "Lua": ("--",), "HTML": ("<!--",)
+}
+C_STYLE_COMMENTS = ("//", "/*", "*", "*/")
+
+# Archive members that are never source: dependencies, build output, VCS data
+SKIPPED_DIRECTORIES = {
+    ".git", "node_modules", "vendor", "dist", "build", "target", "__pycache__", ".venv", "venv",
+    ".next", ".idea", ".vscode", "coverage", ".gradle", "Pods"
+}
+
+@dataclass
+class ProcessingLimits:
+    max_upload_bytes: int = 25 * 1024 * 1024
+    max_text_chars: int = 1_000_000
+    max_archive_members: int = 5000
+    max_member_bytes: int = 2 * 1024 * 1024
+    max_uncompressed_bytes: int = 200 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "ProcessingLimits":
+        return cls(
+            max_upload_bytes=int(float(os.getenv("FILE_MAX_UPLOAD_MB", "25")) * 1024 * 1024),
+            max_text_chars=int(os.getenv("FILE_MAX_TEXT_CHARS", "1000000")),
+            max_archive_members=int(os.getenv("FILE_MAX_ARCHIVE_MEMBERS", "5000")),
+            max_member_bytes=int(float(os.getenv("FILE_MAX_MEMBER_MB", "2")) * 1024 * 1024),
+            max_uncompressed_bytes=int(float(os.getenv("FILE_MAX_UNCOMPRESSED_MB", "200")) * 1024 * 1024)
+        )
+
+@dataclass
+class SpooledUpload:
+    """An upload held in memory when small, otherwise in a temp file on disk"""
+    filename: str
+    content_type: str
+    size: int
+    head: bytes
+    sha256: str = ""
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    def open(self):
+        return open(self.path, "rb") if self.path else io.BytesIO(self.data or b"")
+
+    def close(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+def sniff_content_type(head: bytes, filename: str = "") -> str:
+    """zip, tar, gzip, pdf, image or text, from magic bytes first and the name second"""
+    name = (filename or "").lower()
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith((b"PK\x03\x04", b"PK\x05\x06")):
+        return "zip"
+    if head.startswith(b"\x1f\x8b") or head.startswith((b"BZh", b"\xfd7zXZ\x00")):
+        return "tar" if name.endswith((".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")) else "gzip"
+    if len(head) > 262 and head[257:262] == b"ustar":
+        return "tar"
+    if head.startswith((b"\x89PNG", b"\xff\xd8\xff", b"GIF8")) or head[8:12] == b"WEBP":
+        return "image"
+    if b"\x00" in head:
+        return "binary"
+    try:
+        # A multi-byte character may be cut at the end of the sniffed prefix
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:
+            return "binary"
+    return "text"
+
+def language_for(path: str) -> Optional[str]:
+    base = os.path.basename(path)
+    if base in FILENAME_LANGUAGES:
+        return FILENAME_LANGUAGES[base]
+    return EXTENSION_LANGUAGES.get(os.path.splitext(base)[1].lower())
+
+def detect_text_language(text: str) -> Optional[str]:
+    """Best guess for an unnamed snippet, from shebangs and telltale syntax"""
+    first = text.lstrip()[:200]
+    if first.startswith("#!"):
+        line = first.splitlines()[0]
+        for marker, language in (("python", "Python"), ("node", "JavaScript"), ("ruby", "Ruby"), ("sh", "Shell")):
+            if marker in line:
+                return language
+    signals = [
+        ("Python", ("def ", "import ", "self.", "elif ", "__name__")),
+        ("JavaScript", ("const ", "function ", "=> ", "require(", "console.log")),
+        ("TypeScript", ("interface ", ": string", ": number", "export type ")),
+        ("Java", ("public class ", "private ", "System.out", "@Override")),
+        ("Go", ("package main", "func ", ":= ", "fmt.")),
+        ("Rust", ("fn ", "let mut ", "impl ", "pub struct ")),
+        ("C++", ("#include", "std::", "cout <<")),
+        ("SQL", ("SELECT ", "INSERT INTO", "CREATE TABLE")),
+        ("HTML", ("<!DOCTYPE", "<html", "<div")),
+    ]
+    sample = text[:20000]
+    scores = {language: sum(sample.count(token) for token in tokens) for language, tokens in signals}
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= 2 else None
+
+def _skipped(path: str) -> bool:
+    parts = path.replace("\\", "/").split("/")
+    return any(part in SKIPPED_DIRECTORIES for part in parts[:-1])
+
+def iter_archive_members(
+    path: str, kind: str, limits: ProcessingLimits, skipped: List[Dict[str, str]]
+) -> Iterator[Tuple[str, io.TextIOBase]]:
+    """Yield (name, text stream) for each readable text member, enforcing archive limits"""
+    members = 0
+    uncompressed = 0
+    if kind == "zip":
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _skipped(info.filename):
+                    continue
+                members += 1
+                if members > limits.max_archive_members:
+                    raise FileTooLarge(f"Archive has more than {limits.max_archive_members} files")
+                if info.file_size > limits.max_member_bytes:
+                    skipped.append({"path": info.filename, "reason": "too_large"})
+                    continue
+                uncompressed += info.file_size
+                if uncompressed > limits.max_uncompressed_bytes:
+                    raise FileTooLarge("Archive expands beyond the uncompressed size limit")
+                with archive.open(info) as member:
+                    head = member.read(512)
+                    if sniff_content_type(head, info.filename) != "text":
+                        skipped.append({"path": info.filename, "reason": "binary"})
+                        continue
+                    # Read at most the declared size, in case the header lies
+                    rest = member.read(limits.max_member_bytes - len(head) + 1)
+                    if len(head) + len(rest) > limits.max_member_bytes:
+                        skipped.append({"path": info.filename, "reason": "too_large"})
+                        continue
+                yield info.filename, io.StringIO((head + rest).decode("utf-8", errors="replace"))
+    else:
+        # Streaming mode reads members in order without seeking
+        with tarfile.open(path, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile() or _skipped(info.name):
+                    continue
+                members += 1
+                if members > limits.max_archive_members:
+                    raise FileTooLarge(f"Archive has more than {limits.max_archive_members} files")
+                if info.size > limits.max_member_bytes:
+                    skipped.append({"path": info.name, "reason": "too_large"})
+                    continue
+                uncompressed += info.size
+                if uncompressed > limits.max_uncompressed_bytes:
+                    raise FileTooLarge("Archive expands beyond the uncompressed size limit")
+                member = archive.extractfile(info)
+                if member is None:
+                    continue
+                data = member.read()
+                if sniff_content_type(data[:512], info.name) != "text":
+                    skipped.append({"path": info.name, "reason": "binary"})
+                    continue
+                yield info.name, io.StringIO(data.decode("utf-8", errors="replace"))
+
+@contextlib.contextmanager
+def archive_path(upload: SpooledUpload) -> Iterator[str]:
+    """A filesystem path for the upload; archive readers want a file, small uploads are in memory"""
+    if upload.path:
+        yield upload.path
+        return
+    handle = tempfile.NamedTemporaryFile(suffix=f".{upload.content_type}", delete=False)
+    try:
+        handle.write(upload.data or b"")
+        handle.close()
+        yield handle.name
+    finally:
+        os.unlink(handle.name)
+
+def iter_pdf_pages(stream) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedFileType("PDF extraction requires pypdf (pip install pypdf)")
+    reader = PdfReader(stream)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+def line_stats(lines: Iterator[str], language: Optional[str]) -> Dict[str, int]:
+    comments = LINE_COMMENTS.get(language, C_STYLE_COMMENTS)
+    stats = {"lines": 0, "code": 0, "comment": 0, "blank": 0}
+    for line in lines:
+        stats["lines"] += 1
+        stripped = line.strip()
+        if not stripped:
+            stats["blank"] += 1
+        elif stripped.startswith(comments):
+            stats["comment"] += 1
+        else:
+            stats["code"] += 1
+    return stats
+
+class _TextBudget:
+    """Collects extracted text up to a character limit"""
+
+    def __init__(self, max_chars: int):
+        self.remaining = max_chars
+        self.parts: List[str] = []
+        self.truncated = False
+
+    def add(self, text: str) -> bool:
+        if self.remaining <= 0:
+            self.truncated = True
+            return False
+        if len(text) > self.remaining:
+            text = text[:self.remaining]
+            self.truncated = True
+        self.parts.append(text)
+        self.remaining -= len(text)
+        return self.remaining > 0
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+def run_extraction(upload: SpooledUpload, operation: str, limits: ProcessingLimits) -> Dict[str, Any]:
+    """Extract text or code statistics; runs in a pool worker for large uploads"""
+    kind = sniff_content_type(upload.head, upload.filename)
+    skipped: List[Dict[str, str]] = []
+    budget = _TextBudget(limits.max_text_chars)
+    result: Dict[str, Any] = {"filename": upload.filename, "content_type": kind, "size_bytes": upload.size}
+
+    if kind in ("zip", "tar"):
+        try:
+            files = []
+            languages: Dict[str, Dict[str, int]] = {}
+            with archive_path(upload) as source:
+                for name, stream in iter_archive_members(source, kind, limits, skipped):
+                    language = language_for(name)
+                    if operation == "extract_text":
+                        budget.add(f"\n--- {name} ---\n")
+                        for line in stream:
+                            if not budget.add(line):
+                                break
+                        files.append({"path": name, "language": language})
+                        if budget.truncated:
+                            break
+                    else:
+                        stats = line_stats(stream, language)
+                        files.append({"path": name, "language": language, **stats})
+                        if language:
+                            totals = languages.setdefault(language, {"files": 0, "lines": 0, "code": 0, "comment": 0, "blank": 0})
+                            totals["files"] += 1
+                            for key in ("lines", "code", "comment", "blank"):
+                                totals[key] += stats[key]
+            result["files"] = files
+            if operation != "extract_text":
+                result["languages"] = languages
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            raise UnsupportedFileType(f"Unreadable {kind} archive: {str(e)}")
+    elif kind == "pdf":
+        if operation != "extract_text":
+            raise UnsupportedFileType("Code analysis needs source files or an archive, not a PDF")
+        pages = 0
+        with upload.open() as stream:
+            for page_text in iter_pdf_pages(stream):
+                pages += 1
+                if not budget.add(page_text + "\n"):
+                    break
+        result["pages"] = pages
+    elif kind == "text":
+        language = language_for(upload.filename)
+        with upload.open() as raw:
+            stream = io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+            if operation == "extract_text":
+                for line in stream:
+                    if not budget.add(line):
+                        break
+            else:
+                stats = line_stats(stream, language)
+                result["files"] = [{"path": upload.filename, "language": language, **stats}]
+                result["languages"] = {language: {"files": 1, **stats}} if language else {}
+            stream.detach()
+        if language is None and operation == "extract_text":
+            language = detect_text_language(budget.text())
+        result["language"] = language
+    else:
+        raise UnsupportedFileType(f"Cannot process {kind} content")
+
+    if operation == "extract_text":
+        result["text"] = budget.text()
+        result["truncated"] = budget.truncated
+        result["characters"] = len(result["text"])
+    if skipped:
+        result["skipped"] = skipped
+    return result
+
+class FileProcessor:
+    """Upload spooling plus pooled extraction, shared per worker"""
+
+    processing_types = ("extract_text", "analyze_code", "detect_language")
+
+    def __init__(self, limits: Optional[ProcessingLimits] = None):
+        self.limits = limits or ProcessingLimits.from_env()
+        self.spool_memory_bytes = int(os.getenv("FILE_SPOOL_MEMORY_KB", "1024")) * 1024
+        # Uploads below this are parsed on a thread; the process hop costs more than it saves
+        self.inline_bytes = int(os.getenv("FILE_INLINE_KB", "256")) * 1024
+        self.workers = int(os.getenv("FILE_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the server process has threads (watchdog, warm-up, tracing)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @traced("file.spool")
+    async def spool(self, upload) -> SpooledUpload:
+        """Copy an UploadFile in chunks, rejecting it as soon as it is too large or unsupported"""
+        async def chunks() -> AsyncIterator[bytes]:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+        return await self.spool_stream(chunks(), upload.filename or "upload", getattr(upload, "size", None))
+
+    @traced("file.spool")
+    async def spool_multipart(
+        self, content_type: str, body: AsyncIterator[bytes],
+        content_length: Optional[int] = None, field: str = "file"
+    ) -> SpooledUpload:
+        """Spool one file field of a multipart/form-data body straight off the request stream,
+        so nothing is buffered before the size and type checks run"""
+        if content_length is not None and content_length > self.limits.max_upload_bytes + MULTIPART_OVERHEAD:
+            raise FileTooLarge(f"File exceeds {self.limits.max_upload_bytes // (1024 * 1024)}MB")
+        try:
+            import python_multipart as multipart
+            from python_multipart.multipart import parse_options_header
+        except ImportError:
+            try:
+                import multipart
+                from multipart.multipart import parse_options_header
+            except ImportError:
+                raise RuntimeError("File uploads require python-multipart (pip install python-multipart)")
+
+        mime, options = parse_options_header(content_type or "")
+        if mime != b"multipart/form-data" or not options.get(b"boundary"):
+            raise ValueError("Expected a multipart/form-data upload")
+
+        part = {"name": b"", "value": b"", "headers": {}, "filename": None, "active": False, "done": False}
+        pending: List[bytes] = []
+
+        def on_part_begin():
+            part["headers"] = {}
+
+        def on_header_field(data, start, end):
+            part["name"] += data[start:end]
+
+        def on_header_value(data, start, end):
+            part["value"] += data[start:end]
+
+        def on_header_end():
+            part["headers"][part["name"].lower()] = part["value"]
+            part["name"] = part["value"] = b""
+
+        def on_headers_finished():
+            _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+            part["active"] = not part["done"] and disposition.get(b"name") == field.encode()
+            if part["active"]:
+                part["filename"] = disposition.get(b"filename", b"").decode("utf-8", "replace") or "upload"
+
+        def on_part_data(data, start, end):
+            if part["active"]:
+                pending.append(data[start:end])
+
+        def on_part_end():
+            if part["active"]:
+                part["active"], part["done"] = False, True
+
+        parser = multipart.MultipartParser(options[b"boundary"], {
+            "on_part_begin": on_part_begin, "on_header_field": on_header_field,
+            "on_header_value": on_header_value, "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished, "on_part_data": on_part_data, "on_part_end": on_part_end
+        })
+        body = body.__aiter__()
+        # Read up to the file part's headers: its filename feeds type sniffing on the first chunk
+        while part["filename"] is None:
+            try:
+                parser.write(await body.__anext__())
+            except StopAsyncIteration:
+                raise ValueError(f"Missing '{field}' file field")
+
+        async def chunks() -> AsyncIterator[bytes]:
+            while True:
+                if pending:
+                    data = b"".join(pending)
+                    pending.clear()
+                    yield data
+                if part["done"]:
+                    return
+                try:
+                    parser.write(await body.__anext__())
+                except StopAsyncIteration:
+                    raise ValueError("Upload ended before the file part was complete")
+        return await self.spool_stream(chunks(), part["filename"])
+
+    async def spool_stream(
+        self, chunks: AsyncIterator[bytes], filename: str, declared_size: Optional[int] = None
+    ) -> SpooledUpload:
+        """Spool any byte stream (an upload, a download) under the same limits and sniffing"""
+        if declared_size is not None and declared_size > self.limits.max_upload_bytes:
+            raise FileTooLarge(f"File exceeds {self.limits.max_upload_bytes // (1024 * 1024)}MB")
+
+        spooled: Optional[SpooledUpload] = None
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        disk = None
+        try:
+            async for chunk in chunks:
+                if spooled is None:
+                    kind = sniff_content_type(chunk[:4096], filename)
+                    if kind in ("binary", "image", "gzip"):
+                        raise UnsupportedFileType(f"Unsupported file content: {kind}")
+                    spooled = SpooledUpload(filename=filename, content_type=kind, size=0, head=chunk[:4096])
+                spooled.size += len(chunk)
+                if spooled.size > self.limits.max_upload_bytes:
+                    raise FileTooLarge(f"File exceeds {self.limits.max_upload_bytes // (1024 * 1024)}MB")
+                digest.update(chunk)
+                if disk is None and spooled.size > self.spool_memory_bytes:
+                    disk = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+                    spooled.path = disk.name
+                    await asyncio.to_thread(disk.write, buffer.getvalue() + chunk)
+                    buffer = None
+                elif disk is not None:
+                    await asyncio.to_thread(disk.write, chunk)
+                else:
+                    buffer.write(chunk)
+        except BaseException:
+            if disk is not None:
+                disk.close()
+            if spooled is not None:
+                spooled.close()
+            raise
+        if spooled is None:
+            raise UnsupportedFileType("Empty file")
+        if disk is not None:
+            disk.close()
+        else:
+            spooled.data = buffer.getvalue()
+        spooled.sha256 = digest.hexdigest()
+        return spooled
+
+    async def run_in_pool(self, size: int, fn: Callable, *args) -> Any:
+        """Run CPU-bound parsing of an input of ``size`` bytes off the event loop"""
+        if size <= self.inline_bytes:
+            return await asyncio.to_thread(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def _run(self, upload: SpooledUpload, operation: str) -> Dict[str, Any]:
+        return await self.run_in_pool(upload.size, run_extraction, upload, operation, self.limits)
+
+    @traced("file.extract_text")
+    async def extract_text(self, upload: SpooledUpload) -> Dict[str, Any]:
+        return await self._run(upload, "extract_text")
+
+    @traced("file.analyze_code")
+    async def analyze_code(self, upload: SpooledUpload) -> Dict[str, Any]:
+        return await self._run(upload, "analyze_code")
+
+    async def detect_language(self, upload: SpooledUpload) -> Dict[str, Any]:
+        if upload.content_type == "text":
+            language = language_for(upload.filename) or detect_text_language(
+                upload.head.decode("utf-8", errors="replace")
+            )
+            return {"filename": upload.filename, "content_type": "text", "language": language}
+        analysis = await self.analyze_code(upload)
+        languages = analysis.get("languages", {})
+        code = {name: stats for name, stats in languages.items() if name in CODE_LANGUAGES}
+        primary = max(code, key=lambda name: code[name]["code"]) if code else None
+        return {
+            "filename": upload.filename,
+            "content_type": upload.content_type,
+            "language": primary,
+            "languages": {name: stats["code"] for name, stats in languages.items()}
+        }
+
+    async def process_file(self, upload: SpooledUpload, processing_type: str) -> Dict[str, Any]:
+        if processing_type not in self.processing_types:
+            raise ValueError(
+                f"Unknown processing type '{processing_type}'; expected one of {', '.join(self.processing_types)}"
+            )
+        return await getattr(self, processing_type)(upload)
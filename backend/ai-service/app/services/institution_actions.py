@@ -4,17 +4,21 @@ Institution/University Action Handlers for Conversation Service
 Handles university-specific intents for analytics, student tracking, and insights.
 """
 
+import asyncio
 import os
 import json
 import logging
-import httpx
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from collections import Counter
-import redis
 
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.benchmark_engine import BenchmarkEngine
 from app.services.market_analyzer import MarketAnalyzer
+from app.services.risk_scoring import RiskScoringEngine
+from app.utils.connections import get_backend_client, get_redis_client
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -54,25 +58,37 @@ class StudentRiskProfile:
     job_applications: int
 
 
+RISK_FACTOR_LABELS = {
+    "inactivity": "No recent activity",
+    "profile_completeness": "Incomplete profiles",
+    "applications": "Few or no job applications",
+    "projects": "Missing projects",
+    "company_views": "Not viewed by companies"
+}
+
+
 class InstitutionActionHandler:
     """Handles institution/university-specific conversation intents"""
 
-    def __init__(self):
-        self.market_analyzer = MarketAnalyzer()
+    def __init__(
+        self,
+        market_analyzer: Optional[MarketAnalyzer] = None,
+        analytics_engine: Optional[AnalyticsEngine] = None,
+        risk_engine: Optional[RiskScoringEngine] = None,
+        benchmark_engine: Optional[BenchmarkEngine] = None
+    ):
+        # The service container passes its shared instances
+        self.market_analyzer = market_analyzer or MarketAnalyzer()
+        self.analytics_engine = analytics_engine or AnalyticsEngine()
+        self.risk_engine = risk_engine or RiskScoringEngine(analytics_engine=self.analytics_engine)
+        self.benchmark_engine = benchmark_engine or BenchmarkEngine(analytics_engine=self.analytics_engine)
         self.backend_api_url = os.getenv("BACKEND_API_URL", "http://localhost:3001")
         self.api_key = os.getenv("AI_SERVICE_API_KEY", "")
         self.redis_client = self._init_redis()
 
     def _init_redis(self):
         """Initialize Redis for caching analytics"""
-        try:
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            client = redis.from_url(redis_url, decode_responses=True)
-            client.ping()
-            return client
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}")
-            return None
+        return get_redis_client()
 
     async def handle_search_analytics(
         self,
@@ -87,7 +103,7 @@ class InstitutionActionHandler:
         try:
             # Get time period from entities
             period = entities.get('period', 'month')
-            institution_id = entities.get('institution_id') or context.get('institution_id') if context else None
+            institution_id = entities.get('institution_id') or (context or {}).get('institution_id')
 
             # Fetch analytics data
             analytics = await self._fetch_search_analytics(institution_id, period)
@@ -168,7 +184,7 @@ class InstitutionActionHandler:
         Shows what skills are most in demand vs what students have.
         """
         try:
-            institution_id = entities.get('institution_id') or context.get('institution_id') if context else None
+            institution_id = entities.get('institution_id') or (context or {}).get('institution_id')
 
             # Fetch skill demand data
             demand_data = await self._fetch_skill_demand(institution_id)
@@ -239,11 +255,15 @@ class InstitutionActionHandler:
         Based on profile activity, completeness, and engagement.
         """
         try:
-            institution_id = entities.get('institution_id') or context.get('institution_id') if context else None
+            institution_id = entities.get('institution_id') or (context or {}).get('institution_id')
             risk_level = entities.get('risk_level', 'all')  # 'high', 'medium', 'all'
 
-            # Fetch at-risk students
-            at_risk = await self._fetch_at_risk_students(institution_id, risk_level)
+            # Cohort-wide scores when the institution's students are loaded locally
+            cohort = await self._fetch_local_risk(institution_id, risk_level)
+            if cohort:
+                at_risk = [StudentRiskProfile(**self._risk_profile_fields(s)) for s in cohort["students"]]
+            else:
+                at_risk = await self._fetch_at_risk_students(institution_id, risk_level)
 
             if not at_risk:
                 return ActionResult(
@@ -283,6 +303,20 @@ class InstitutionActionHandler:
             total_at_risk = len(at_risk)
             high_count = len(high_risk)
             medium_count = len(medium_risk)
+            factors_text = (
+                "• Incomplete profiles (< 50%)\n"
+                "• No job applications in 30+ days\n"
+                "• Missing projects\n"
+                "• No recent activity"
+            )
+            if cohort:
+                levels = cohort["summary"]["levels"]
+                high_count, medium_count = levels["high"], levels["medium"]
+                total_at_risk = high_count + medium_count
+                factors_text = "\n".join(
+                    f"• {RISK_FACTOR_LABELS[f['factor']]}: {f['students']:,} students"
+                    for f in cohort["summary"]["common_factors"][:4]
+                ) or factors_text
 
             return ActionResult(
                 success=True,
@@ -292,11 +326,7 @@ class InstitutionActionHandler:
                        f"• 🟡 Medium risk: **{medium_count}** students\n"
                        f"• Total needing attention: **{total_at_risk}**\n\n"
                        f"**🔴 High Risk Students:**\n{high_risk_text}\n\n"
-                       f"**Common Risk Factors:**\n"
-                       f"• Incomplete profiles (< 50%)\n"
-                       f"• No job applications in 30+ days\n"
-                       f"• Missing projects\n"
-                       f"• No recent activity\n\n"
+                       f"**Common Risk Factors:**\n{factors_text}\n\n"
                        f"**Recommended Actions:**\n"
                        f"• Send personalized outreach\n"
                        f"• Offer profile completion workshop\n"
@@ -304,7 +334,8 @@ class InstitutionActionHandler:
                 data={
                     "at_risk_count": total_at_risk,
                     "high_risk": [s.__dict__ for s in high_risk[:10]],
-                    "medium_risk_count": medium_count
+                    "medium_risk_count": medium_count,
+                    "cohort_summary": cohort["summary"] if cohort else None
                 },
                 suggested_actions=[
                     {"label": "Contact High Risk", "action": "contact_high_risk"},
@@ -341,7 +372,7 @@ class InstitutionActionHandler:
         Shows company engagement metrics.
         """
         try:
-            institution_id = entities.get('institution_id') or context.get('institution_id') if context else None
+            institution_id = entities.get('institution_id') or (context or {}).get('institution_id')
             period = entities.get('period', 'month')
 
             # Fetch company interest data
@@ -417,7 +448,7 @@ class InstitutionActionHandler:
         Shows how students compare to peers at other institutions.
         """
         try:
-            institution_id = entities.get('institution_id') or context.get('institution_id') if context else None
+            institution_id = entities.get('institution_id') or (context or {}).get('institution_id')
             compare_to = entities.get('compare_to', 'national')  # 'national', 'regional', 'similar'
 
             # Fetch benchmark data
@@ -432,17 +463,22 @@ class InstitutionActionHandler:
                 diff = your_value - avg_value
                 emoji = "✅" if diff > 0 else "⚠️" if diff < -10 else "➡️"
                 diff_text = f"+{diff:.0f}" if diff > 0 else f"{diff:.0f}"
+                percentile_text = f" | Percentile: {data['percentile']:.0f}" if 'percentile' in data else ""
                 metrics_items.append(
                     f"{emoji} **{metric.replace('_', ' ').title()}**\n"
-                    f"   You: {your_value:.0f}% | Average: {avg_value:.0f}% | {diff_text}%"
+                    f"   You: {your_value:.0f}% | Average: {avg_value:.0f}% | {diff_text}%{percentile_text}"
                 )
 
             metrics_text = "\n\n".join(metrics_items)
 
             # Ranking
             ranking = benchmark.get('ranking', {})
-            rank = ranking.get('position', 'N/A')
-            total = ranking.get('total', 'N/A')
+            rank = ranking.get('position') or 'N/A'
+            total = ranking.get('total') or 'N/A'
+            peer_group = benchmark.get('peer_group', {})
+            peers_note = ""
+            if peer_group.get('widened'):
+                peers_note = f"_Too few {compare_to} peers to compare; showing {peer_group['label']}._\n\n"
 
             # Strengths and improvements
             strengths = benchmark.get('strengths', [])
@@ -454,6 +490,7 @@ class InstitutionActionHandler:
             return ActionResult(
                 success=True,
                 message=f"**📊 Benchmark Comparison - {compare_to.title()} Average**\n\n"
+                       f"{peers_note}"
                        f"**Your Ranking:** #{rank} of {total} institutions\n\n"
                        f"**Key Metrics:**\n{metrics_text}\n\n"
                        f"**💪 Your Strengths:**\n{strengths_text}\n\n"
@@ -596,23 +633,37 @@ class InstitutionActionHandler:
 
     # Helper methods for data fetching
 
+    async def _local_analytics(self, query: str, *args) -> Optional[Any]:
+        """Answer from the local rollups; None when they have no data for it"""
+        try:
+            await self.analytics_engine.refresh()
+            return getattr(self.analytics_engine, query)(*args)
+        except Exception as e:
+            logger.error(f"Local analytics {query} failed: {e}")
+            return None
+
+    @traced("backend.search_analytics")
     async def _fetch_search_analytics(
         self,
         institution_id: Optional[str],
         period: str
     ) -> SearchAnalytics:
-        """Fetch search analytics from backend or generate sample data"""
+        """Fetch search analytics from local rollups, the backend, or generate sample data"""
+        local = await self._local_analytics("search_analytics", institution_id, period)
+        if local:
+            return SearchAnalytics(**local)
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/analytics/searches",
-                    params={"institution_id": institution_id, "period": period},
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return SearchAnalytics(**data)
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/analytics/searches",
+                params={"institution_id": institution_id, "period": period},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return SearchAnalytics(**data)
         except Exception as e:
             logger.error(f"Failed to fetch search analytics: {e}")
 
@@ -636,21 +687,26 @@ class InstitutionActionHandler:
             conversion_rate=0.12
         )
 
+    @traced("backend.skill_demand")
     async def _fetch_skill_demand(
         self,
         institution_id: Optional[str]
     ) -> Dict[str, Any]:
         """Fetch skill demand data"""
+        local = await self._local_analytics("skill_demand", institution_id)
+        if local:
+            return local
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/analytics/skill-demand",
-                    params={"institution_id": institution_id},
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/analytics/skill-demand",
+                params={"institution_id": institution_id},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             logger.error(f"Failed to fetch skill demand: {e}")
 
@@ -677,6 +733,23 @@ class InstitutionActionHandler:
             ]
         }
 
+    async def _fetch_local_risk(self, institution_id: Optional[str], risk_level: str) -> Optional[Dict[str, Any]]:
+        """First page of the locally scored cohort, or None when it is not loaded"""
+        if not institution_id:
+            return None
+        try:
+            # The chat's 'all' means every student needing attention, not the whole cohort
+            level = risk_level if risk_level in ("high", "medium") else "at_risk"
+            return await self.risk_engine.at_risk_page(institution_id, level, page=1, page_size=20)
+        except Exception as e:
+            logger.error(f"Local risk scoring failed: {e}")
+            return None
+
+    @staticmethod
+    def _risk_profile_fields(student: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: student[name] for name in StudentRiskProfile.__dataclass_fields__}
+
+    @traced("backend.at_risk_students")
     async def _fetch_at_risk_students(
         self,
         institution_id: Optional[str],
@@ -684,16 +757,16 @@ class InstitutionActionHandler:
     ) -> List[StudentRiskProfile]:
         """Fetch at-risk students data"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/analytics/at-risk-students",
-                    params={"institution_id": institution_id, "risk_level": risk_level},
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return [StudentRiskProfile(**s) for s in data.get('students', [])]
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/analytics/at-risk-students",
+                params={"institution_id": institution_id, "risk_level": risk_level},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return [StudentRiskProfile(**s) for s in data.get('students', [])]
         except Exception as e:
             logger.error(f"Failed to fetch at-risk students: {e}")
 
@@ -731,22 +804,27 @@ class InstitutionActionHandler:
             ),
         ]
 
+    @traced("backend.company_interest")
     async def _fetch_company_interest(
         self,
         institution_id: Optional[str],
         period: str
     ) -> Dict[str, Any]:
         """Fetch company interest data"""
+        local = await self._local_analytics("company_interest", institution_id, period)
+        if local:
+            return local
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/analytics/company-interest",
-                    params={"institution_id": institution_id, "period": period},
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/analytics/company-interest",
+                params={"institution_id": institution_id, "period": period},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             logger.error(f"Failed to fetch company interest: {e}")
 
@@ -775,22 +853,33 @@ class InstitutionActionHandler:
             }
         }
 
+    @traced("backend.benchmark_data")
     async def _fetch_benchmark_data(
         self,
         institution_id: Optional[str],
         compare_to: str
     ) -> Dict[str, Any]:
         """Fetch benchmark comparison data"""
+        if institution_id:
+            try:
+                # Percentiles over local distributions, fed by the analytics rollups
+                await self.analytics_engine.refresh()
+                local = await asyncio.to_thread(self.benchmark_engine.compare, institution_id, compare_to)
+                if local:
+                    return local
+            except Exception as e:
+                logger.error(f"Local benchmark failed: {e}")
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/analytics/benchmark",
-                    params={"institution_id": institution_id, "compare_to": compare_to},
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/analytics/benchmark",
+                params={"institution_id": institution_id, "compare_to": compare_to},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             logger.error(f"Failed to fetch benchmark data: {e}")
 
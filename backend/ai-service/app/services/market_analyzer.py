@@ -7,11 +7,10 @@ AI-powered market trend analysis and career insights
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-import openai
 from dataclasses import dataclass
 from enum import Enum
-import json
 from datetime import datetime, timedelta
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +53,7 @@ class JobMarketInsight:
 
 class MarketAnalyzer:
     def __init__(self):
-        self.client = openai.AsyncOpenAI()
+        self.llm = get_llm_gateway()
         
         # Technology categories for analysis
         self.tech_categories = {
@@ -225,15 +224,14 @@ class MarketAnalyzer:
             }}
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            trend_data = await self.llm.complete(
+                prompt,
                 max_tokens=400,
-                temperature=0.3
+                temperature=0.3,
+                output=OutputFormat.JSON,
+                call_site="market.trend"
             )
-            
-            trend_data = json.loads(response.choices[0].message.content.strip())
-            
+
             return MarketTrend(
                 technology=technology,
                 trend_direction=TrendDirection(trend_data["trend_direction"]),
@@ -292,15 +290,14 @@ class MarketAnalyzer:
             }}
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            job_data = await self.llm.complete(
+                prompt,
                 max_tokens=500,
-                temperature=0.3
+                temperature=0.3,
+                output=OutputFormat.JSON,
+                call_site="market.job_insight"
             )
-            
-            job_data = json.loads(response.choices[0].message.content.strip())
-            
+
             return JobMarketInsight(
                 role_title=role_title,
                 demand_level=job_data["demand_level"],
@@ -350,15 +347,13 @@ class MarketAnalyzer:
             Keep it professional and actionable, 3-4 sentences.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.5
+                temperature=0.5,
+                call_site="market.summary"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Market summary generation failed: {str(e)}")
             return "Technology market shows continued growth with opportunities in cloud computing, AI/ML, and modern development frameworks."
@@ -415,15 +410,13 @@ class MarketAnalyzer:
             Keep it concise and actionable, 3-4 sentences.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.5
+                temperature=0.5,
+                call_site="market.job_overview"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Job market overview generation failed: {str(e)}")
             return "Job market shows strong demand for technical roles with continued growth expected across multiple sectors."
@@ -451,14 +444,14 @@ class MarketAnalyzer:
                 Return only the numerical score.
                 """
                 
-                response = await self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
+                score = await self.llm.complete(
+                    prompt,
                     max_tokens=50,
-                    temperature=0.1
+                    temperature=0.1,
+                    output=OutputFormat.FLOAT,
+                    call_site="market.skill_value"
                 )
-                
-                score = float(response.choices[0].message.content.strip())
+
                 skill_values[skill] = score
                 
             except Exception as e:
@@ -489,16 +482,14 @@ class MarketAnalyzer:
             Format as JSON: {{"min": number, "median": number, "max": number}}
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=100,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.JSON,
+                call_site="market.base_salary"
             )
             
-            salary_data = json.loads(response.choices[0].message.content.strip())
-            return salary_data
-            
         except Exception as e:
             logger.error(f"Base salary estimation failed: {str(e)}")
             # Default ranges based on experience
@@ -532,14 +523,14 @@ class MarketAnalyzer:
                 Return only the number.
                 """
                 
-                response = await self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
+                premium = await self.llm.complete(
+                    prompt,
                     max_tokens=50,
-                    temperature=0.1
+                    temperature=0.1,
+                    output=OutputFormat.FLOAT,
+                    call_site="market.skill_premium"
                 )
-                
-                premium = float(response.choices[0].message.content.strip())
+
                 skill_premiums[skill] = premium
                 
             except Exception as e:
@@ -589,16 +580,14 @@ class MarketAnalyzer:
             Format as actionable bullet points.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=250,
-                temperature=0.6
+                temperature=0.6,
+                output=OutputFormat.LINES,
+                call_site="market.salary_recommendations"
             )
             
-            recommendations_text = response.choices[0].message.content.strip()
-            return [r.strip("- ").strip() for r in recommendations_text.split("\n") if r.strip()]
-            
         except Exception as e:
             logger.error(f"Salary recommendations generation failed: {str(e)}")
             return [
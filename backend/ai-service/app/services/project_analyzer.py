@@ -1,16 +1,15 @@
-import openai
-import os
-import json
-import re
 from typing import Dict, List, Optional, Any
 import asyncio
+import math
 from datetime import datetime
+from app.services.repo_analyzer import RepoAnalyzer
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
+from app.utils.tracing import traced
 
 class ProjectAnalyzer:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+    def __init__(self, repo_analyzer: Optional[RepoAnalyzer] = None):
+        self.llm = get_llm_gateway()
+        self.repo_analyzer = repo_analyzer or RepoAnalyzer()
         
         # Technology categories and their weights
         self.tech_categories = {
@@ -40,6 +39,7 @@ class ProjectAnalyzer:
             }
         }
 
+    @traced("project.analyze")
     async def analyze_project(
         self,
         title: str,
@@ -53,10 +53,18 @@ class ProjectAnalyzer:
         Comprehensive project analysis using AI and rule-based scoring.
         """
         try:
+            # Static analysis of the code itself, when the project came with files
+            repo_analysis = None
+            if project_files:
+                try:
+                    repo_analysis = await self.repo_analyzer.analyze_project_files(project_files)
+                except Exception as e:
+                    print(f"Repository analysis error: {e}")
+
             # Parallel analysis tasks
             tasks = [
                 self._analyze_with_ai(title, description, technologies, category),
-                self._calculate_complexity_score(technologies, description),
+                self._calculate_complexity_score(technologies, description, repo_analysis),
                 self._assess_market_relevance(title, description, category),
                 self._extract_learning_outcomes(description, technologies),
                 self._generate_improvement_suggestions(description, technologies),
@@ -92,9 +100,9 @@ class ProjectAnalyzer:
             tags = await self._extract_enhanced_tags(title, description, technologies)
             
             # Technology assessment
-            tech_assessment = self._assess_technologies(technologies)
+            tech_assessment = self._assess_technologies(technologies, repo_analysis)
             
-            return {
+            result = {
                 "innovation_score": innovation_score,
                 "complexity_level": complexity_level,
                 "skill_level": skill_level,
@@ -109,6 +117,9 @@ class ProjectAnalyzer:
                 "ai_insights": ai_analysis,
                 "analysis_timestamp": datetime.now().isoformat()
             }
+            if repo_analysis:
+                result["repository_analysis"] = repo_analysis
+            return result
             
         except Exception as e:
             print(f"Project analysis error: {e}")
@@ -146,17 +157,14 @@ class ProjectAnalyzer:
             Respond only with valid JSON.
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
+                max_tokens=1000,
                 temperature=0.3,
-                max_tokens=1000
+                output=OutputFormat.JSON,
+                call_site="project.ai_analysis"
             )
             
-            content = response.choices[0].message.content
-            return json.loads(content)
-            
         except Exception as e:
             print(f"AI analysis error: {e}")
             return {
@@ -173,10 +181,12 @@ class ProjectAnalyzer:
     async def _calculate_complexity_score(
         self,
         technologies: List[str],
-        description: str
+        description: str,
+        repo_analysis: Optional[Dict[str, Any]] = None
     ) -> float:
         """
         Calculate project complexity score (0-100).
+        Blends in a score measured from the repository when one was analyzed.
         """
         score = 0
         
@@ -206,7 +216,49 @@ class ProjectAnalyzer:
         # Integration complexity
         if len(technologies) > 5:
             score += 10  # Integration bonus
-            
+        
+        declared_score = min(score, 100)
+        if not repo_analysis or not repo_analysis.get("code_lines"):
+            return declared_score
+        # Measured code outweighs what the description claims
+        return round(0.7 * self._repository_complexity_score(repo_analysis) + 0.3 * declared_score, 1)
+
+    def _repository_complexity_score(self, repo_analysis: Dict[str, Any]) -> float:
+        """
+        Complexity (0-100) from static analysis: size, stack breadth, code structure and practices.
+        """
+        score = 0.0
+        
+        # Size: log-scaled so 1k lines ~ 9 points and 100k lines ~ 30
+        score += min(math.log10(max(repo_analysis["code_lines"], 1)) * 6, 30)
+        
+        # Stack breadth weighted like declared technologies
+        weights = [
+            data["complexity_weight"]
+            for tech in repo_analysis.get("technologies", [])
+            for data in self.tech_categories.values()
+            if tech in data["technologies"]
+        ]
+        score += min(sum(weights) * 3, 25)
+        score += min(len(repo_analysis.get("frameworks", [])) * 2, 8)
+        
+        # Structure: branching per function and how connected the modules are
+        complexity = repo_analysis.get("complexity", {})
+        score += min(max(complexity.get("average", 1.0) - 1, 0) * 2.5, 10)
+        graph = repo_analysis.get("import_graph", {})
+        score += min(graph.get("average_fan_out", 0.0) * 2, 7)
+        
+        # Engineering practices
+        practices = repo_analysis.get("practices", {})
+        if practices.get("tests"):
+            score += 8
+        if practices.get("ci"):
+            score += 5
+        if practices.get("docker"):
+            score += 4
+        if practices.get("kubernetes") or practices.get("terraform"):
+            score += 3
+        
         return min(score, 100)
 
     async def _assess_market_relevance(
@@ -235,17 +287,16 @@ class ProjectAnalyzer:
             Respond with only a number (1-10).
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            score = await self.llm.complete(
+                prompt,
+                tier="fast",
+                max_tokens=10,
                 temperature=0.1,
-                max_tokens=10
+                output=OutputFormat.FLOAT,
+                call_site="project.market_relevance"
             )
-            
-            content = response.choices[0].message.content.strip()
-            score = int(re.search(r'\d+', content).group())
-            return min(max(score, 1), 10)
+
+            return min(max(int(score), 1), 10)
             
         except Exception as e:
             print(f"Market relevance assessment error: {e}")
@@ -275,16 +326,15 @@ class ProjectAnalyzer:
             Format as a simple list, one item per line.
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            outcomes = await self.llm.complete(
+                prompt,
+                tier="fast",
+                max_tokens=400,
                 temperature=0.4,
-                max_tokens=400
+                output=OutputFormat.LINES,
+                call_site="project.learning_outcomes"
             )
-            
-            content = response.choices[0].message.content
-            outcomes = [line.strip().lstrip('- ') for line in content.split('\n') if line.strip()]
+
             return outcomes[:7]
             
         except Exception as e:
@@ -323,16 +373,15 @@ class ProjectAnalyzer:
             Be specific and actionable. Format as a simple list.
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            suggestions = await self.llm.complete(
+                prompt,
+                tier="fast",
+                max_tokens=400,
                 temperature=0.5,
-                max_tokens=400
+                output=OutputFormat.LINES,
+                call_site="project.improvements"
             )
-            
-            content = response.choices[0].message.content
-            suggestions = [line.strip().lstrip('- ') for line in content.split('\n') if line.strip()]
+
             return suggestions[:6]
             
         except Exception as e:
@@ -410,17 +459,16 @@ class ProjectAnalyzer:
             Respond with only a number (0-100).
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            score = await self.llm.complete(
+                prompt,
+                tier="fast",
+                max_tokens=10,
                 temperature=0.2,
-                max_tokens=10
+                output=OutputFormat.FLOAT,
+                call_site="project.innovation"
             )
-            
-            content = response.choices[0].message.content.strip()
-            score = int(re.search(r'\d+', content).group())
-            return min(max(score, 0), 100)
+
+            return min(max(int(score), 0), 100)
             
         except Exception as e:
             print(f"Innovation score calculation error: {e}")
@@ -465,16 +513,14 @@ class ProjectAnalyzer:
             - Emphasize impact and skills
             """
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
+                tier="fast",
+                max_tokens=200,
                 temperature=0.6,
-                max_tokens=200
+                call_site="project.story"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             print(f"Professional story generation error: {e}")
             return f"Developed {title} using {', '.join(technologies[:3])}, demonstrating strong technical skills and problem-solving abilities in creating a functional solution."
@@ -517,9 +563,13 @@ class ProjectAnalyzer:
         
         return list(tags)[:15]  # Limit to 15 tags
 
-    def _assess_technologies(self, technologies: List[str]) -> Dict[str, Any]:
+    def _assess_technologies(
+        self,
+        technologies: List[str],
+        repo_analysis: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
-        Assess the technology stack.
+        Assess the technology stack, merged with what the repository actually uses.
         """
         assessment = {
             "categories": {},
@@ -528,6 +578,18 @@ class ProjectAnalyzer:
             "learning_curve": "moderate"
         }
         
+        if repo_analysis:
+            detected = repo_analysis.get("technologies", [])
+            declared = {tech.lower() for tech in technologies}
+            assessment["detected_technologies"] = detected
+            assessment["frameworks"] = repo_analysis.get("frameworks", [])
+            assessment["primary_language"] = repo_analysis.get("primary_language")
+            # Only meaningful when the whole archive was analyzed, not a file listing
+            if repo_analysis.get("dependencies") is not None:
+                found = {tech.lower() for tech in detected} | {f.lower() for f in assessment["frameworks"]}
+                assessment["declared_not_found"] = [tech for tech in technologies if tech.lower() not in found]
+            technologies = technologies + [tech for tech in detected if tech.lower() not in declared]
+        
         for tech in technologies:
             for category, data in self.tech_categories.items():
                 if any(t.lower() in tech.lower() for t in data["technologies"]):
@@ -7,20 +7,126 @@ Handles recruiter-specific intents for candidate search, matching, and insights.
 import os
 import json
 import logging
-import httpx
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
-import redis
 
 from app.services.candidate_matcher import CandidateMatcher
 from app.services.market_analyzer import MarketAnalyzer
 from app.services.skills_assessor import SkillsAssessor
+from app.utils.connections import get_backend_client, get_redis_client
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+# Entity dictionaries for search extraction, built once per process
+SKILL_KEYWORDS: Dict[str, List[str]] = {
+    # Programming Languages
+    "python": ["python", "py", "django", "flask", "fastapi"],
+    "javascript": ["javascript", "js", "node", "nodejs", "node.js"],
+    "typescript": ["typescript", "ts"],
+    "java": ["java", "spring", "spring boot", "springboot"],
+    "react": ["react", "reactjs", "react.js", "next.js", "nextjs"],
+    "angular": ["angular", "angularjs"],
+    "vue": ["vue", "vuejs", "vue.js", "nuxt"],
+    "sql": ["sql", "mysql", "postgresql", "postgres", "oracle", "database"],
+    "aws": ["aws", "amazon web services", "ec2", "s3", "lambda"],
+    "docker": ["docker", "container", "kubernetes", "k8s"],
+    "machine learning": ["ml", "machine learning", "ai", "artificial intelligence", "deep learning"],
+    "data science": ["data science", "data scientist", "analytics", "data analysis"],
+    "cybersecurity": ["cybersecurity", "security", "infosec", "penetration testing", "ethical hacking"],
+    "devops": ["devops", "ci/cd", "jenkins", "github actions"],
+    "mobile": ["mobile", "ios", "android", "swift", "kotlin", "flutter", "react native"],
+    "cloud": ["cloud", "azure", "gcp", "google cloud"],
+    # Business/Soft Skills
+    "marketing": ["marketing", "digital marketing", "seo", "sem", "social media"],
+    "design": ["design", "ux", "ui", "figma", "sketch", "adobe"],
+    "project management": ["project management", "pm", "agile", "scrum", "jira"],
+    "sales": ["sales", "business development", "account management"],
+    "finance": ["finance", "accounting", "financial analysis", "excel"],
+}
+
+LOCATION_KEYWORDS: Dict[str, str] = {
+    # Italian cities
+    "milano": "Milan", "milan": "Milan",
+    "roma": "Rome", "rome": "Rome",
+    "torino": "Turin", "turin": "Turin",
+    "bologna": "Bologna",
+    "firenze": "Florence", "florence": "Florence",
+    "napoli": "Naples", "naples": "Naples",
+    "venezia": "Venice", "venice": "Venice",
+    "genova": "Genoa", "genoa": "Genoa",
+    "palermo": "Palermo",
+    "bari": "Bari",
+    "catania": "Catania",
+    "verona": "Verona",
+    "padova": "Padua", "padua": "Padua",
+    "trieste": "Trieste",
+    "brescia": "Brescia",
+    "parma": "Parma",
+    "modena": "Modena",
+    "reggio emilia": "Reggio Emilia",
+    "pisa": "Pisa",
+    # Regions
+    "lombardia": "Lombardy", "lombardy": "Lombardy",
+    "lazio": "Lazio",
+    "piemonte": "Piedmont", "piedmont": "Piedmont",
+    "emilia romagna": "Emilia-Romagna", "emilia-romagna": "Emilia-Romagna",
+    "veneto": "Veneto",
+    "toscana": "Tuscany", "tuscany": "Tuscany",
+    "campania": "Campania",
+    "sicilia": "Sicily", "sicily": "Sicily",
+    # Remote
+    "remote": "Remote", "remoto": "Remote",
+    "hybrid": "Hybrid", "ibrido": "Hybrid",
+}
+
+UNIVERSITY_KEYWORDS: Dict[str, str] = {
+    "politecnico milano": "Politecnico di Milano",
+    "polimi": "Politecnico di Milano",
+    "politecnico torino": "Politecnico di Torino",
+    "polito": "Politecnico di Torino",
+    "bocconi": "Università Bocconi",
+    "sapienza": "Sapienza Università di Roma",
+    "la sapienza": "Sapienza Università di Roma",
+    "bologna": "Università di Bologna",
+    "unibo": "Università di Bologna",
+    "padova": "Università di Padova",
+    "statale milano": "Università degli Studi di Milano",
+    "unimi": "Università degli Studi di Milano",
+    "bicocca": "Università di Milano-Bicocca",
+    "cattolica": "Università Cattolica",
+    "luiss": "LUISS",
+    "its": "ITS",
+}
+
+EXPERIENCE_PATTERNS: Dict[str, List[str]] = {
+    "junior": ["junior", "entry level", "entry-level", "neo laureato", "neolaureato", "fresh graduate"],
+    "mid": ["mid", "middle", "2-3 years", "2-4 years", "3-5 years", "some experience"],
+    "senior": ["senior", "lead", "5+ years", "experienced", "expert"],
+    "intern": ["intern", "internship", "stage", "tirocinio", "stagista"],
+}
+
+LANGUAGE_PATTERNS: Dict[str, List[str]] = {
+    "english": ["english", "inglese"],
+    "italian": ["italian", "italiano"],
+    "german": ["german", "tedesco"],
+    "french": ["french", "francese"],
+    "spanish": ["spanish", "spagnolo"],
+}
+
+DISCIPLINE_PATTERNS: Dict[str, List[str]] = {
+    "tech": ["tech", "software", "developer", "engineer", "programmer", "informatica"],
+    "business": ["business", "commerce", "economia", "management"],
+    "design": ["design", "creative", "graphic", "visual"],
+    "marketing": ["marketing", "communication", "comunicazione"],
+    "data": ["data", "analytics", "scientist"],
+    "healthcare": ["healthcare", "medical", "medicina", "sanità"],
+}
+
+
 @dataclass
 class ActionResult:
     """Result from an action handler"""
@@ -48,115 +154,28 @@ class SearchQuery:
 class RecruiterActionHandler:
     """Handles recruiter-specific conversation intents"""
 
-    def __init__(self):
-        self.candidate_matcher = CandidateMatcher()
-        self.market_analyzer = MarketAnalyzer()
-        self.skills_assessor = SkillsAssessor()
+    def __init__(
+        self,
+        candidate_matcher: Optional[CandidateMatcher] = None,
+        market_analyzer: Optional[MarketAnalyzer] = None,
+        skills_assessor: Optional[SkillsAssessor] = None
+    ):
+        # The service container passes its shared instances
+        self.candidate_matcher = candidate_matcher or CandidateMatcher()
+        self.market_analyzer = market_analyzer or MarketAnalyzer()
+        self.skills_assessor = skills_assessor or SkillsAssessor()
         self.backend_api_url = os.getenv("BACKEND_API_URL", "http://localhost:3001")
         self.api_key = os.getenv("AI_SERVICE_API_KEY", "")
         self.redis_client = self._init_redis()
 
-        # Entity dictionaries for extraction
-        self.skill_keywords = self._load_skill_keywords()
-        self.location_keywords = self._load_location_keywords()
-        self.university_keywords = self._load_university_keywords()
+        # Entity dictionaries are module constants, shared by every instance
+        self.skill_keywords = SKILL_KEYWORDS
+        self.location_keywords = LOCATION_KEYWORDS
+        self.university_keywords = UNIVERSITY_KEYWORDS
 
     def _init_redis(self):
         """Initialize Redis for saved searches"""
-        try:
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            client = redis.from_url(redis_url, decode_responses=True)
-            client.ping()
-            return client
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}")
-            return None
-
-    def _load_skill_keywords(self) -> Dict[str, List[str]]:
-        """Load skill keywords for entity extraction"""
-        return {
-            # Programming Languages
-            "python": ["python", "py", "django", "flask", "fastapi"],
-            "javascript": ["javascript", "js", "node", "nodejs", "node.js"],
-            "typescript": ["typescript", "ts"],
-            "java": ["java", "spring", "spring boot", "springboot"],
-            "react": ["react", "reactjs", "react.js", "next.js", "nextjs"],
-            "angular": ["angular", "angularjs"],
-            "vue": ["vue", "vuejs", "vue.js", "nuxt"],
-            "sql": ["sql", "mysql", "postgresql", "postgres", "oracle", "database"],
-            "aws": ["aws", "amazon web services", "ec2", "s3", "lambda"],
-            "docker": ["docker", "container", "kubernetes", "k8s"],
-            "machine learning": ["ml", "machine learning", "ai", "artificial intelligence", "deep learning"],
-            "data science": ["data science", "data scientist", "analytics", "data analysis"],
-            "cybersecurity": ["cybersecurity", "security", "infosec", "penetration testing", "ethical hacking"],
-            "devops": ["devops", "ci/cd", "jenkins", "github actions"],
-            "mobile": ["mobile", "ios", "android", "swift", "kotlin", "flutter", "react native"],
-            "cloud": ["cloud", "azure", "gcp", "google cloud"],
-            # Business/Soft Skills
-            "marketing": ["marketing", "digital marketing", "seo", "sem", "social media"],
-            "design": ["design", "ux", "ui", "figma", "sketch", "adobe"],
-            "project management": ["project management", "pm", "agile", "scrum", "jira"],
-            "sales": ["sales", "business development", "account management"],
-            "finance": ["finance", "accounting", "financial analysis", "excel"],
-        }
-
-    def _load_location_keywords(self) -> Dict[str, str]:
-        """Load location keywords for entity extraction"""
-        return {
-            # Italian cities
-            "milano": "Milan", "milan": "Milan",
-            "roma": "Rome", "rome": "Rome",
-            "torino": "Turin", "turin": "Turin",
-            "bologna": "Bologna",
-            "firenze": "Florence", "florence": "Florence",
-            "napoli": "Naples", "naples": "Naples",
-            "venezia": "Venice", "venice": "Venice",
-            "genova": "Genoa", "genoa": "Genoa",
-            "palermo": "Palermo",
-            "bari": "Bari",
-            "catania": "Catania",
-            "verona": "Verona",
-            "padova": "Padua", "padua": "Padua",
-            "trieste": "Trieste",
-            "brescia": "Brescia",
-            "parma": "Parma",
-            "modena": "Modena",
-            "reggio emilia": "Reggio Emilia",
-            "pisa": "Pisa",
-            # Regions
-            "lombardia": "Lombardy", "lombardy": "Lombardy",
-            "lazio": "Lazio",
-            "piemonte": "Piedmont", "piedmont": "Piedmont",
-            "emilia romagna": "Emilia-Romagna", "emilia-romagna": "Emilia-Romagna",
-            "veneto": "Veneto",
-            "toscana": "Tuscany", "tuscany": "Tuscany",
-            "campania": "Campania",
-            "sicilia": "Sicily", "sicily": "Sicily",
-            # Remote
-            "remote": "Remote", "remoto": "Remote",
-            "hybrid": "Hybrid", "ibrido": "Hybrid",
-        }
-
-    def _load_university_keywords(self) -> Dict[str, str]:
-        """Load university keywords for entity extraction"""
-        return {
-            "politecnico milano": "Politecnico di Milano",
-            "polimi": "Politecnico di Milano",
-            "politecnico torino": "Politecnico di Torino",
-            "polito": "Politecnico di Torino",
-            "bocconi": "Università Bocconi",
-            "sapienza": "Sapienza Università di Roma",
-            "la sapienza": "Sapienza Università di Roma",
-            "bologna": "Università di Bologna",
-            "unibo": "Università di Bologna",
-            "padova": "Università di Padova",
-            "statale milano": "Università degli Studi di Milano",
-            "unimi": "Università degli Studi di Milano",
-            "bicocca": "Università di Milano-Bicocca",
-            "cattolica": "Università Cattolica",
-            "luiss": "LUISS",
-            "its": "ITS",
-        }
+        return get_redis_client()
 
     def extract_search_entities(self, message: str) -> SearchQuery:
         """
@@ -187,26 +206,13 @@ class RecruiterActionHandler:
                     query.universities.append(university)
 
         # Extract experience level
-        experience_patterns = {
-            "junior": ["junior", "entry level", "entry-level", "neo laureato", "neolaureato", "fresh graduate"],
-            "mid": ["mid", "middle", "2-3 years", "2-4 years", "3-5 years", "some experience"],
-            "senior": ["senior", "lead", "5+ years", "experienced", "expert"],
-            "intern": ["intern", "internship", "stage", "tirocinio", "stagista"],
-        }
-        for level, patterns in experience_patterns.items():
+        for level, patterns in EXPERIENCE_PATTERNS.items():
             if any(p in message_lower for p in patterns):
                 query.experience_level = level
                 break
 
         # Extract languages
-        language_patterns = {
-            "english": ["english", "inglese"],
-            "italian": ["italian", "italiano"],
-            "german": ["german", "tedesco"],
-            "french": ["french", "francese"],
-            "spanish": ["spanish", "spagnolo"],
-        }
-        for lang, patterns in language_patterns.items():
+        for lang, patterns in LANGUAGE_PATTERNS.items():
             if any(p in message_lower for p in patterns):
                 query.languages.append(lang)
 
@@ -217,15 +223,7 @@ class RecruiterActionHandler:
             query.availability = "1_month"
 
         # Extract discipline/field
-        discipline_patterns = {
-            "tech": ["tech", "software", "developer", "engineer", "programmer", "informatica"],
-            "business": ["business", "commerce", "economia", "management"],
-            "design": ["design", "creative", "graphic", "visual"],
-            "marketing": ["marketing", "communication", "comunicazione"],
-            "data": ["data", "analytics", "scientist"],
-            "healthcare": ["healthcare", "medical", "medicina", "sanità"],
-        }
-        for disc, patterns in discipline_patterns.items():
+        for disc, patterns in DISCIPLINE_PATTERNS.items():
             if any(p in message_lower for p in patterns):
                 if disc not in query.disciplines:
                     query.disciplines.append(disc)
@@ -874,19 +872,20 @@ class RecruiterActionHandler:
 
     # Helper methods
 
+    @traced("backend.candidates")
     async def _fetch_candidates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Fetch candidates from backend API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/students",
-                    params=params,
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('students', data) if isinstance(data, dict) else data
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/students",
+                params=params,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return data.get('students', data) if isinstance(data, dict) else data
         except Exception as e:
             logger.error(f"Failed to fetch candidates: {e}")
 
@@ -927,17 +926,18 @@ class RecruiterActionHandler:
             }
         ]
 
+    @traced("backend.candidate")
     async def _fetch_candidate(self, candidate_id: str) -> Optional[Dict[str, Any]]:
         """Fetch a single candidate by ID"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/students/{candidate_id}",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/students/{candidate_id}",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             logger.error(f"Failed to fetch candidate: {e}")
         return None
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Repository Analyzer Service
+Static analysis of repository archives for ProjectAnalyzer: languages and
+lines of code, frameworks from manifests (package.json, requirements.txt,
+pyproject.toml, pom.xml, build.gradle, go.mod, Cargo.toml, ...), a sampled
+import graph, cyclomatic complexity and engineering practices (tests, CI,
+containers).
+
+Analysis is deterministic and keyed by the archive's SHA-256, so results are
+cached in memory and Redis and a repository is only parsed once. Parsing runs
+in the file processor's process pool.
+"""
+
+import ast
+import asyncio
+import json
+import logging
+import os
+import re
+import tarfile
+import zipfile
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.services.file_processor import (
+    CODE_LANGUAGES,
+    FileProcessor,
+    ProcessingLimits,
+    SpooledUpload,
+    UnsupportedFileType,
+    archive_path,
+    iter_archive_members,
+    language_for,
+    line_stats
+)
+from app.utils.connections import get_redis_client
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Dependency name (lowercase) -> technology name as used in ProjectAnalyzer.tech_categories
+FRAMEWORK_SIGNATURES = {
+    # JavaScript / TypeScript
+    "react": "React", "next": "React", "react-native": "React Native", "vue": "Vue", "nuxt": "Vue",
+    "@angular/core": "Angular", "svelte": "Svelte", "express": "Node.js", "@nestjs/core": "Node.js",
+    "fastify": "Node.js", "koa": "Node.js", "typescript": "TypeScript", "pg": "PostgreSQL",
+    "mysql2": "MySQL", "mongoose": "MongoDB", "mongodb": "MongoDB", "redis": "Redis", "ioredis": "Redis",
+    "@tensorflow/tfjs": "TensorFlow", "openai": "OpenAI", "prisma": "PostgreSQL", "sqlite3": "SQLite",
+    "aws-sdk": "AWS", "@aws-sdk/client-s3": "AWS", "firebase": "GCP",
+    # Python
+    "django": "Python", "flask": "Python", "fastapi": "Python", "tensorflow": "TensorFlow",
+    "torch": "PyTorch", "pytorch": "PyTorch", "scikit-learn": "scikit-learn", "sklearn": "scikit-learn",
+    "transformers": "Hugging Face", "sentence-transformers": "Hugging Face", "psycopg2": "PostgreSQL",
+    "psycopg2-binary": "PostgreSQL", "asyncpg": "PostgreSQL", "pymongo": "MongoDB", "boto3": "AWS",
+    "google-cloud-storage": "GCP", "azure-storage-blob": "Azure",
+    # JVM
+    "spring-boot-starter-web": "Java", "spring-boot-starter": "Java", "postgresql": "PostgreSQL",
+    "mysql-connector-java": "MySQL", "kotlin-stdlib": "Kotlin",
+    # Other ecosystems
+    "github.com/gin-gonic/gin": "Go", "github.com/lib/pq": "PostgreSQL", "actix-web": "Rust",
+    "tokio": "Rust", "rails": "Ruby", "laravel/framework": "PHP", "flutter": "Flutter"
+}
+# Frameworks reported by name, beyond the technology they map to
+FRAMEWORK_NAMES = {
+    "next": "Next.js", "nuxt": "Nuxt", "express": "Express", "@nestjs/core": "NestJS", "django": "Django",
+    "flask": "Flask", "fastapi": "FastAPI", "spring-boot-starter-web": "Spring Boot",
+    "spring-boot-starter": "Spring Boot", "github.com/gin-gonic/gin": "Gin", "actix-web": "Actix",
+    "rails": "Rails", "laravel/framework": "Laravel", "jest": "Jest", "pytest": "pytest",
+    "vitest": "Vitest", "junit": "JUnit", "junit-jupiter": "JUnit", "mocha": "Mocha", "cypress": "Cypress",
+    "playwright": "Playwright", "@playwright/test": "Playwright"
+}
+# Languages that count as technologies in their own right (not Dockerfile, Shell, ...)
+LANGUAGE_TECHNOLOGIES = {
+    "Python", "JavaScript", "TypeScript", "Java", "Kotlin", "Scala", "Go", "Rust", "Ruby", "PHP",
+    "Swift", "Dart", "C", "C++", "C#", "HTML", "CSS", "Vue", "Svelte", "R", "Julia"
+}
+TEST_FRAMEWORKS = {"Jest", "pytest", "Vitest", "JUnit", "Mocha", "Cypress", "Playwright"}
+
+MANIFESTS = {
+    "package.json", "requirements.txt", "pyproject.toml", "Pipfile", "setup.py", "pom.xml",
+    "build.gradle", "build.gradle.kts", "go.mod", "Cargo.toml", "Gemfile", "composer.json", "pubspec.yaml"
+}
+
+# Branch points for the cyclomatic estimate of non-Python code
+DECISION_PATTERN = re.compile(r"\b(?:if|for|while|case|catch|elif|except)\b|&&|\|\||\?(?=[^.?:])")
+FUNCTION_PATTERN = re.compile(
+    r"\bfunction\b|=>|\bfunc\s+\w|\bfn\s+\w|\bfun\s+\w|\bdef\s+\w|"
+    # Parameter list bounded to one line, or a miss would rescan to the end of the file
+    r"(?:public|private|protected|static)\s+[\w<>\[\], ]+\s+\w+\s*\([^;{}\n]*?\)\s*\{"
+)
+IMPORT_PATTERNS = {
+    "Python": re.compile(
+        r"^\s*(?:from\s+(\.*[\w.]*)\s+import\s+(?:\(([^)]*)\)|([\w \t,*]+))|import\s+([\w.]+))", re.M
+    ),
+    "JavaScript": re.compile(r"""(?:^\s*import\s[^'"]*?['"]([^'"]+)['"]|require\(\s*['"]([^'"]+)['"]\s*\))""", re.M),
+    "Java": re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)\s*;", re.M),
+    "Kotlin": re.compile(r"^\s*import\s+([\w.]+)", re.M),
+    "Go": re.compile(r"""^\s*(?:import\s+)?(?:\w+\s+)?"([\w./-]+)"\s*$""", re.M)
+}
+IMPORT_PATTERNS["TypeScript"] = IMPORT_PATTERNS["JavaScript"]
+
+def _deps_from_manifest(name: str, text: str) -> Set[str]:
+    """Dependency names declared in one manifest; tolerant of malformed files"""
+    base = os.path.basename(name)
+    deps: Set[str] = set()
+    try:
+        if base in ("package.json", "composer.json"):
+            data = json.loads(text)
+            for key in ("dependencies", "devDependencies", "peerDependencies", "require", "require-dev"):
+                deps.update((data.get(key) or {}).keys())
+        elif base in ("requirements.txt", "Pipfile"):
+            for line in text.splitlines():
+                match = re.match(r"\s*([A-Za-z0-9_.\-]+)", line.split("#")[0])
+                if match and not line.strip().startswith(("-", "[")):
+                    deps.add(match.group(1))
+        elif base in ("pyproject.toml", "setup.py", "Gemfile", "Cargo.toml", "pubspec.yaml"):
+            deps.update(re.findall(r"""["']([A-Za-z0-9_.\-]+)\s*(?:[<>=~!^].*?)?["']""", text))
+            deps.update(re.findall(r"^\s*([A-Za-z0-9_\-]+)\s*=", text, re.M))
+            deps.update(re.findall(r"^\s*gem\s+['\"]([\w\-]+)['\"]", text, re.M))
+            deps.update(re.findall(r"^\s{2}([a-z_]+):", text, re.M))
+        elif base == "pom.xml":
+            deps.update(re.findall(r"<artifactId>\s*([\w.\-]+)\s*</artifactId>", text))
+        elif base.startswith("build.gradle"):
+            deps.update(re.findall(r"""['"][\w.\-]+:([\w.\-]+)(?::[^'"]*)?['"]""", text))
+        elif base == "go.mod":
+            deps.update(re.findall(r"^\s*(?:require\s+)?([\w.\-]+/[\w./\-]+)\s+v", text, re.M))
+    except (ValueError, AttributeError):
+        pass
+    return {dep.lower() for dep in deps}
+
+def _python_complexity(text: str) -> List[Tuple[str, int]]:
+    """(function, cyclomatic complexity) for each function in a Python module"""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    branches = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.IfExp, ast.With, ast.Assert)
+    results = []
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    for node in ast.walk(tree):
+        if isinstance(node, functions):
+            complexity = 1
+            # Nested functions are scored on their own, not added to the enclosing one
+            pending = list(ast.iter_child_nodes(node))
+            while pending:
+                child = pending.pop()
+                if isinstance(child, functions):
+                    continue
+                pending.extend(ast.iter_child_nodes(child))
+                if isinstance(child, branches):
+                    complexity += 1
+                elif isinstance(child, ast.BoolOp):
+                    complexity += len(child.values) - 1
+                elif isinstance(child, ast.comprehension):
+                    complexity += 1 + len(child.ifs)
+            results.append((node.name, complexity))
+    return results
+
+def _module_name(path: str, language: str) -> str:
+    stem = os.path.splitext(path.replace("\\", "/"))[0]
+    if language == "Python":
+        return stem.replace("/", ".").removesuffix(".__init__")
+    return stem
+
+def _python_targets(matches: List[Tuple[str, str, str, str]]) -> Iterator[str]:
+    """Dotted targets of Python imports; ``from X import Y`` yields ``X.Y`` (a submodule or a name in X)"""
+    for module, grouped, names, plain in matches:
+        if plain:
+            yield plain
+            continue
+        for name in re.sub(r"#.*", "", grouped or names).split(","):
+            name = name.split()[0] if name.split() else ""
+            if name == "*":
+                yield module
+            elif name.isidentifier():
+                yield f"{module}{name}" if module.endswith(".") else f"{module}.{name}"
+
+def _archive_root(paths: List[str]) -> str:
+    """The single top-level directory every path sits under (GitHub-style archives), or ''"""
+    roots = {path.replace("\\", "/").split("/", 1)[0] for path in paths}
+    if len(roots) == 1 and all("/" in path.replace("\\", "/") for path in paths):
+        return f"{roots.pop()}/"
+    return ""
+
+def _resolve_python(target: str, package: str, modules: Dict[str, str]) -> Set[str]:
+    """Internal modules for a dotted (possibly dot-relative) import, trying ``X.Y`` before ``X``"""
+    relative = target.startswith(".")
+    if relative:
+        level = len(target) - len(target.lstrip("."))
+        base = package.split(".") if package else []
+        if level - 1 > len(base):
+            return set()
+        base = base[:len(base) - (level - 1)]
+        target = ".".join(base + [part for part in target[level:].split(".") if part])
+    parts = target.split(".")
+    for end in range(len(parts), 0, -1):
+        prefix = ".".join(parts[:end])
+        if prefix in modules:
+            return {prefix}
+        if not relative:
+            # src/ layouts and nested roots: the module path ends with the dotted import
+            candidates = {m for m in modules if m.endswith(f".{prefix}")}
+            if candidates:
+                return candidates
+    return set()
+
+def _strongly_connected(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """Tarjan's algorithm, iterative; returns components with more than one module"""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components = []
+    counter = 0
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph.get(child, ()))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(component)
+    return components
+
+def analyze_repository(upload: SpooledUpload, limits: ProcessingLimits, graph_max_files: int) -> Dict[str, Any]:
+    """Full static analysis of one archive; runs in a pool worker for large archives"""
+    kind = upload.content_type
+    if kind not in ("zip", "tar"):
+        raise UnsupportedFileType("Repository analysis needs a ZIP or tar archive")
+
+    skipped: List[Dict[str, str]] = []
+    languages: Dict[str, Dict[str, int]] = {}
+    dependencies: Set[str] = set()
+    manifests: List[str] = []
+    practices = {"tests": 0, "ci": False, "docker": False, "kubernetes": False, "terraform": False}
+    functions: List[Tuple[str, str, int]] = []
+    decision_density: List[float] = []
+    imports: Dict[str, Tuple[str, Set[str]]] = {}
+    files = 0
+
+    try:
+        with archive_path(upload) as source:
+            for name, stream in iter_archive_members(source, kind, limits, skipped):
+                files += 1
+                base = os.path.basename(name)
+                lower = name.lower()
+                language = language_for(name)
+                text = stream.read()
+
+                if base in MANIFESTS:
+                    manifests.append(name)
+                    dependencies |= _deps_from_manifest(name, text)
+                if base == "Dockerfile" or base.startswith(("docker-compose", "compose.y")):
+                    practices["docker"] = True
+                if ".github/workflows/" in lower or base in (".gitlab-ci.yml", "Jenkinsfile", ".travis.yml") \
+                        or "/.circleci/" in f"/{lower}":
+                    practices["ci"] = True
+                if language == "YAML" and "apiVersion:" in text and "kind:" in text:
+                    practices["kubernetes"] = True
+                if language == "HCL":
+                    practices["terraform"] = True
+                if re.search(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]+\.py$|_test\.(py|go)$|\.(test|spec)\.[jt]sx?$|Test\.java$", name):
+                    practices["tests"] += 1
+
+                if not language:
+                    continue
+                stats = line_stats(iter(text.splitlines()), language)
+                totals = languages.setdefault(language, {"files": 0, "lines": 0, "code": 0, "comment": 0, "blank": 0})
+                totals["files"] += 1
+                for key in ("lines", "code", "comment", "blank"):
+                    totals[key] += stats[key]
+
+                if language == "Python":
+                    functions.extend((name, fn, cc) for fn, cc in _python_complexity(text))
+                elif language in CODE_LANGUAGES and stats["code"]:
+                    decisions = len(DECISION_PATTERN.findall(text))
+                    count = max(len(FUNCTION_PATTERN.findall(text)), 1)
+                    functions.extend([(name, "", 1 + decisions / count)] * min(count, 500))
+                    decision_density.append(decisions / stats["code"])
+
+                pattern = IMPORT_PATTERNS.get(language)
+                if pattern and len(imports) < graph_max_files:
+                    if language == "Python":
+                        targets = set(_python_targets(pattern.findall(text)))
+                    else:
+                        targets = {next(group for group in match if group) for match in pattern.findall(text)}
+                    imports[name] = (language, targets)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise UnsupportedFileType(f"Unreadable {kind} archive: {str(e)}")
+
+    technologies = sorted({FRAMEWORK_SIGNATURES[dep] for dep in dependencies if dep in FRAMEWORK_SIGNATURES})
+    frameworks = sorted({FRAMEWORK_NAMES[dep] for dep in dependencies if dep in FRAMEWORK_NAMES})
+    if practices["docker"]:
+        technologies.append("Docker")
+    if practices["kubernetes"]:
+        technologies.append("Kubernetes")
+    if practices["terraform"]:
+        technologies.append("Terraform")
+    code_languages = {lang: stats for lang, stats in languages.items() if lang in CODE_LANGUAGES and stats["code"]}
+    technologies = sorted(set(technologies) | (set(code_languages) & LANGUAGE_TECHNOLOGIES))
+
+    complexities = sorted((cc for _, _, cc in functions), reverse=True)
+    hotspots = sorted(
+        ({"file": path, "function": fn, "complexity": round(cc, 1)} for path, fn, cc in functions if fn),
+        key=lambda item: item["complexity"], reverse=True
+    )[:10]
+    return {
+        "repo_id": f"repo:{upload.sha256}",
+        "filename": upload.filename,
+        "size_bytes": upload.size,
+        "files": files,
+        "languages": languages,
+        "code_lines": sum(stats["code"] for stats in code_languages.values()),
+        "primary_language": max(code_languages, key=lambda lang: code_languages[lang]["code"]) if code_languages else None,
+        "manifests": manifests,
+        "dependencies": sorted(dependencies)[:200],
+        "dependency_count": len(dependencies),
+        "frameworks": frameworks,
+        "technologies": technologies,
+        "practices": {**practices, "test_frameworks": sorted(set(frameworks) & TEST_FRAMEWORKS)},
+        "complexity": {
+            "functions": len(complexities),
+            "average": round(sum(complexities) / len(complexities), 2) if complexities else 0.0,
+            "p90": round(complexities[len(complexities) // 10], 1) if complexities else 0.0,
+            "max": round(complexities[0], 1) if complexities else 0.0,
+            "decision_density": round(sum(decision_density) / len(decision_density), 3) if decision_density else None,
+            "hotspots": hotspots
+        },
+        "import_graph": _import_graph(imports),
+        "skipped": skipped[:50]
+    }
+
+def _import_graph(imports: Dict[str, Tuple[str, Set[str]]]) -> Dict[str, Any]:
+    """Internal module edges and external packages from the sampled files"""
+    root = _archive_root(list(imports))
+    names = {path: _module_name(path[len(root):], language) for path, (language, _) in imports.items()}
+    modules = {names[path]: path for path in imports}
+    by_leaf = defaultdict(set)
+    for module in modules:
+        by_leaf[module.rsplit(".", 1)[-1].rsplit("/", 1)[-1]].add(module)
+
+    graph: Dict[str, Set[str]] = {module: set() for module in modules}
+    external = Counter()
+    for path, (language, targets) in imports.items():
+        source = names[path]
+        packages: Set[str] = set()
+        for target in targets:
+            if language == "Python":
+                package = source if os.path.basename(path).startswith("__init__.") else source.rpartition(".")[0]
+                candidates = _resolve_python(target, package, modules)
+                if not candidates and target.startswith("."):
+                    # Relative import of a file outside the sample: internal, never a package
+                    continue
+                if not candidates and "." not in target:
+                    candidates = by_leaf.get(target, set())
+            elif target.startswith("."):
+                # Relative JS/TS import: resolve against the importing file
+                resolved = os.path.normpath(os.path.join(os.path.dirname(path[len(root):]), target)).replace("\\", "/")
+                candidates = {m for m in modules if m == resolved or m == f"{resolved}/index"}
+            elif target in modules:
+                candidates = {target}
+            else:
+                candidates = {m for m in modules if m.endswith(f".{target}") or m.endswith(f"/{target}")}
+            if candidates:
+                graph[source] |= candidates - {source}
+            elif language in ("JavaScript", "TypeScript"):
+                packages.add("/".join(target.split("/")[:2]) if target.startswith("@") else target.split("/")[0])
+            elif language == "Go":
+                packages.add(target.split("/")[0])
+            else:
+                packages.add(target.split(".")[0])
+        external.update(packages)
+
+    fan_in = Counter(target for targets in graph.values() for target in targets)
+    edges = sum(len(targets) for targets in graph.values())
+    cycles = _strongly_connected(graph)
+    return {
+        "sampled_files": len(imports),
+        "modules": len(graph),
+        "internal_edges": edges,
+        "average_fan_out": round(edges / len(graph), 2) if graph else 0.0,
+        "most_imported": [{"module": module, "imported_by": count} for module, count in fan_in.most_common(5)],
+        "cycles": len(cycles),
+        "largest_cycle": max((len(c) for c in cycles), default=0),
+        "external_packages": [{"package": name, "imports": count} for name, count in external.most_common(15)]
+    }
+
+def analyze_file_list(paths: List[str]) -> Dict[str, Any]:
+    """Signals available from file names alone, when only a listing is known"""
+    languages = Counter(language_for(path) for path in paths if language_for(path))
+    bases = {os.path.basename(path) for path in paths}
+    return {
+        "files": len(paths),
+        "languages": {lang: {"files": count} for lang, count in languages.items()},
+        "manifests": sorted(bases & MANIFESTS),
+        "technologies": sorted(lang for lang in languages if lang in LANGUAGE_TECHNOLOGIES),
+        "practices": {
+            "tests": sum(1 for path in paths if re.search(r"(^|/)(tests?|__tests__)/|test_|\.(test|spec)\.", path)),
+            "ci": any(".github/workflows/" in path for path in paths),
+            "docker": "Dockerfile" in bases
+        }
+    }
+
+class RepoAnalyzer:
+    """Repository analysis with a per-content-hash cache, shared per worker"""
+
+    cache_prefix = "repo_analysis:"
+
+    def __init__(self, file_processor: Optional[FileProcessor] = None):
+        self.file_processor = file_processor or FileProcessor()
+        self.graph_max_files = int(os.getenv("REPO_GRAPH_MAX_FILES", "500"))
+        self.cache_ttl = int(os.getenv("REPO_CACHE_TTL_SECONDS", str(7 * 86400)))
+        self.memory_items = int(os.getenv("REPO_CACHE_ITEMS", "256"))
+        # Archive URLs are only fetched from these hosts (the upload storage), never arbitrary ones
+        self.archive_hosts = {h.strip().lower() for h in os.getenv("REPO_ARCHIVE_HOSTS", "").split(",") if h.strip()}
+        self.memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.redis_client = get_redis_client()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self.memory_cache:
+            self.memory_cache.move_to_end(key)
+            return self.memory_cache[key]
+        if self.redis_client:
+            try:
+                raw = self.redis_client.get(f"{self.cache_prefix}{key}")
+                if raw:
+                    result = json.loads(raw)
+                    self._remember(key, result)
+                    return result
+            except Exception as e:
+                logger.warning(f"Repo analysis cache read failed: {str(e)}")
+        return None
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self.memory_cache[key] = result
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.memory_items:
+            self.memory_cache.popitem(last=False)
+
+    def _cache_set(self, key: str, result: Dict[str, Any]):
+        self._remember(key, result)
+        if self.redis_client:
+            try:
+                self.redis_client.setex(f"{self.cache_prefix}{key}", self.cache_ttl, json.dumps(result))
+            except Exception as e:
+                logger.warning(f"Repo analysis cache write failed: {str(e)}")
+
+    @traced("repo.analyze")
+    async def analyze_upload(self, upload: SpooledUpload) -> Dict[str, Any]:
+        """Analyze a spooled archive, reusing the cached result for identical content"""
+        key = upload.sha256
+        cached = await asyncio.to_thread(self._cache_get, key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        # Identical archives uploaded concurrently are analyzed once
+        if key in self._in_flight:
+            return {**await asyncio.shield(self._in_flight[key]), "cached": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self.file_processor.run_in_pool(
+                upload.size, analyze_repository, upload, self.file_processor.limits, self.graph_max_files
+            )
+            await asyncio.to_thread(self._cache_set, key, result)
+            future.set_result(result)
+            return {**result, "cached": False}
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieve it so the loop does not log it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _download(self, url: str) -> SpooledUpload:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0), follow_redirects=False)
+        async with self._client.stream("GET", url) as response:
+            response.raise_for_status()
+            declared = response.headers.get("content-length")
+            return await self.file_processor.spool_stream(
+                response.aiter_bytes(), os.path.basename(urlparse(url).path) or "archive",
+                int(declared) if declared and declared.isdigit() else None
+            )
+
+    def _fetchable(self, url: str) -> bool:
+        parsed = urlparse(url)
+        return parsed.scheme == "https" and (parsed.hostname or "").lower() in self.archive_hosts
+
+    async def analyze_project_files(self, project_files: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Analysis for ProjectAnalyzer from ``project_files`` entries: ``repo:<sha256>``
+        ids from /analyze-repository, archive URLs on REPO_ARCHIVE_HOSTS, or plain
+        file paths (name-based signals only). None when nothing is usable.
+        """
+        paths = []
+        for entry in project_files:
+            try:
+                if entry.startswith("repo:"):
+                    cached = await asyncio.to_thread(self._cache_get, entry[len("repo:"):])
+                    if cached:
+                        return cached
+                elif entry.startswith(("http://", "https://")):
+                    if not self._fetchable(entry):
+                        logger.warning(f"Skipping archive URL on a host outside REPO_ARCHIVE_HOSTS: {urlparse(entry).hostname}")
+                        continue
+                    upload = await self._download(entry)
+                    try:
+                        return await self.analyze_upload(upload)
+                    finally:
+                        upload.close()
+                else:
+                    paths.append(entry)
+            except (UnsupportedFileType, httpx.HTTPError) as e:
+                logger.warning(f"Repository analysis of a project file failed: {str(e)}")
+        return analyze_file_list(paths) if paths else None
+
+    def shutdown(self):
+        # The process pool belongs to the file processor; only the HTTP client is ours
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                asyncio.get_running_loop().create_task(client.aclose())
+            except RuntimeError:
+                pass
@@ -7,11 +7,11 @@ AI-powered resume optimization and enhancement
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-import openai
 from dataclasses import dataclass
 from enum import Enum
 import json
 import re
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +54,7 @@ class ResumeAnalysis:
 
 class ResumeOptimizer:
     def __init__(self):
-        self.client = openai.AsyncOpenAI()
+        self.llm = get_llm_gateway()
         
         # Common ATS keywords by category
         self.ats_keywords = {
@@ -216,15 +216,14 @@ class ResumeOptimizer:
             Format as JSON: {{"category": density_score}}
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.JSON,
+                call_site="resume.keyword_density"
             )
             
-            return json.loads(response.choices[0].message.content.strip())
-            
         except Exception as e:
             logger.error(f"Keyword density analysis failed: {str(e)}")
             return {
@@ -291,16 +290,14 @@ class ResumeOptimizer:
             Return as a simple list, one strength per line.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.5
+                temperature=0.5,
+                output=OutputFormat.LINES,
+                call_site="resume.strengths"
             )
             
-            strengths_text = response.choices[0].message.content.strip()
-            return [s.strip("- ").strip() for s in strengths_text.split("\n") if s.strip()]
-            
         except Exception as e:
             logger.error(f"Strengths identification failed: {str(e)}")
             return ["Technical skills demonstrated", "Professional experience", "Educational background"]
@@ -331,16 +328,14 @@ class ResumeOptimizer:
             Return as a simple list, one weakness per line.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.5
+                temperature=0.5,
+                output=OutputFormat.LINES,
+                call_site="resume.weaknesses"
             )
             
-            weaknesses_text = response.choices[0].message.content.strip()
-            return [w.strip("- ").strip() for w in weaknesses_text.split("\n") if w.strip()]
-            
         except Exception as e:
             logger.error(f"Weaknesses identification failed: {str(e)}")
             return ["Could benefit from more quantified achievements", "Technical skills could be expanded"]
@@ -392,14 +387,14 @@ class ResumeOptimizer:
             Return 2-3 most important missing elements, one per line.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            ai_missing = await self.llm.complete(
+                prompt,
                 max_tokens=150,
-                temperature=0.5
+                temperature=0.5,
+                output=OutputFormat.LINES,
+                call_site="resume.missing_elements"
             )
-            
-            ai_missing = [m.strip("- ").strip() for m in response.choices[0].message.content.strip().split("\n") if m.strip()]
+
             missing.extend(ai_missing)
             
         except Exception as e:
@@ -468,15 +463,13 @@ class ResumeOptimizer:
             Return only the optimized summary.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            optimized_summary = await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.6
+                temperature=0.6,
+                call_site="resume.summary"
             )
-            
-            optimized_summary = response.choices[0].message.content.strip()
-            
+
             return OptimizationSuggestion(
                 section=ResumeSection.SUMMARY,
                 priority="high",
@@ -531,15 +524,13 @@ class ResumeOptimizer:
             Return optimized bullets, one per line, starting with "-".
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            optimized_bullets = await self.llm.complete(
+                prompt,
                 max_tokens=300,
-                temperature=0.6
+                temperature=0.6,
+                call_site="resume.experience"
             )
-            
-            optimized_bullets = response.choices[0].message.content.strip()
-            
+
             return OptimizationSuggestion(
                 section=ResumeSection.EXPERIENCE,
                 priority="high",
@@ -604,15 +595,13 @@ class ResumeOptimizer:
             Tools: skill1, skill2
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            optimized_skills = await self.llm.complete(
+                prompt,
                 max_tokens=250,
-                temperature=0.5
+                temperature=0.5,
+                call_site="resume.skills"
             )
-            
-            optimized_skills = response.choices[0].message.content.strip()
-            
+
             return OptimizationSuggestion(
                 section=ResumeSection.SKILLS,
                 priority="medium",
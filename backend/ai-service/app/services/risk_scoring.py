@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Student Risk Scoring
+Scores every student of an institution for disengagement risk in one
+vectorized pass over the cohort: inactivity, profile completeness, job
+applications, projects and company views received.
+
+Each factor contributes a 0-1 value times its weight; the weighted sum is the
+0-100 risk score, and the factors are ranked per student by contribution to
+explain it. Cohorts are kept per institution as Parquet files, so every worker
+serves the same data. Only students whose records or view counts changed are
+rescored; inactivity grows daily, so the first query of a day rescores the
+whole cohort.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.analytics_engine import AnalyticsEngine, require_pandas
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = ["name", "last_active_at", "profile_completeness", "applications", "projects", "views_received"]
+# Views in the last RISK_VIEWS_DAYS from the analytics rollups; recomputed on
+# every sync and never persisted, so counts that age out of the window drop
+ANALYTICS_VIEWS = "analytics_views"
+# Factor name, weight, and the feature range over which its risk goes from 0 to 1
+RISK_FACTORS: List[Tuple[str, float]] = [
+    ("inactivity", 0.30),
+    ("profile_completeness", 0.25),
+    ("applications", 0.20),
+    ("projects", 0.15),
+    ("company_views", 0.10)
+]
+INACTIVE_AFTER_DAYS = 14
+INACTIVE_MAX_DAYS = 60
+TARGET_COMPLETENESS = 0.8
+TARGET_APPLICATIONS = 3
+TARGET_PROJECTS = 2
+TARGET_VIEWS = 5
+# Factors explaining less than this share of their weight are not reported
+FACTOR_REPORT_MIN = 0.2
+RECOMMENDATIONS = {
+    "inactivity": "Personal outreach to re-engage",
+    "profile_completeness": "Profile completion workshop",
+    "applications": "Career counseling and application support",
+    "projects": "Project guidance and portfolio review",
+    "company_views": "Improve visibility: skills, headline and featured projects"
+}
+RISK_LEVELS = ("low", "medium", "high")
+SAFE_INSTITUTION_ID = re.compile(r"^[\w.-]{1,128}$")
+
+def _safe_id(institution_id: str) -> str:
+    if not institution_id or not SAFE_INSTITUTION_ID.match(institution_id):
+        raise ValueError("institution_id may only contain letters, digits, '.', '_' and '-'")
+    return institution_id
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def normalize_student(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """One cohort row from a backend student record; raises ValueError"""
+    student_id = str(raw.get("student_id") or raw.get("id") or "").strip()
+    if not student_id:
+        raise ValueError("student_id is required")
+    completeness = float(raw.get("profile_completeness") or 0)
+    return {
+        "student_id": student_id,
+        "name": str(raw.get("name") or student_id),
+        "last_active_at": _timestamp(raw.get("last_active_at") or raw.get("last_activity")),
+        # Accept 0-1 or percentages
+        "profile_completeness": min(completeness / 100 if completeness > 1 else completeness, 1.0),
+        "applications": int(raw.get("applications", raw.get("job_applications")) or 0),
+        "projects": int(raw.get("projects", raw.get("project_count")) or 0),
+        "views_received": int(raw.get("views_received") or 0)
+    }
+
+def views_received(frame) -> np.ndarray:
+    """Views as the backend reported them, or as analytics saw them, whichever is higher"""
+    reported = frame["views_received"].to_numpy(dtype="int64")
+    if ANALYTICS_VIEWS not in frame.columns:
+        return reported
+    return np.maximum(reported, frame[ANALYTICS_VIEWS].to_numpy(dtype="int64"))
+
+def factor_contributions(frame, today: date) -> np.ndarray:
+    """(students x factors) risk per factor in 0-1, in RISK_FACTORS order"""
+    now = np.datetime64(datetime(today.year, today.month, today.day), "s")
+    last_active = frame["last_active_at"].dt.tz_convert(None).to_numpy(dtype="datetime64[s]")
+    inactive_days = (now - last_active).astype("timedelta64[D]").astype(float)
+    # Never active counts as fully inactive
+    inactive_days = np.where(np.isnat(last_active), INACTIVE_MAX_DAYS, inactive_days)
+    return np.column_stack([
+        (inactive_days - INACTIVE_AFTER_DAYS) / (INACTIVE_MAX_DAYS - INACTIVE_AFTER_DAYS),
+        (TARGET_COMPLETENESS - frame["profile_completeness"].to_numpy(dtype=float)) / TARGET_COMPLETENESS,
+        1 - frame["applications"].to_numpy(dtype=float) / TARGET_APPLICATIONS,
+        1 - frame["projects"].to_numpy(dtype=float) / TARGET_PROJECTS,
+        1 - views_received(frame).astype(float) / TARGET_VIEWS
+    ]).clip(0, 1)
+
+def score_contributions(contributions: np.ndarray, high: float, medium: float) -> Dict[str, np.ndarray]:
+    weights = np.array([weight for _, weight in RISK_FACTORS])
+    weighted = contributions * weights
+    scores = weighted.sum(axis=1) * 100
+    # Top three factors per student by weighted contribution, -1 where too small to report
+    ranked = np.argsort(-weighted, axis=1)[:, :3]
+    reportable = np.take_along_axis(contributions, ranked, axis=1) >= FACTOR_REPORT_MIN
+    return {
+        "risk_score": scores.round(1),
+        "risk_level": np.where(scores >= high, 2, np.where(scores >= medium, 1, 0)).astype(np.int8),
+        "factor_1": np.where(reportable[:, 0], ranked[:, 0], -1).astype(np.int8),
+        "factor_2": np.where(reportable[:, 1], ranked[:, 1], -1).astype(np.int8),
+        "factor_3": np.where(reportable[:, 2], ranked[:, 2], -1).astype(np.int8)
+    }
+
+def _explain(factor: int, row, today: date) -> str:
+    name = RISK_FACTORS[factor][0]
+    if name == "inactivity":
+        if row.last_active_at is None or row.last_active_at != row.last_active_at:
+            return "No recorded activity"
+        return f"No activity in {(today - row.last_active_at.date()).days} days"
+    if name == "profile_completeness":
+        return f"Profile {row.profile_completeness:.0%} complete"
+    if name == "applications":
+        return "Zero applications" if not row.applications else f"Only {row.applications} application(s)"
+    if name == "projects":
+        return "No projects uploaded" if not row.projects else f"Only {row.projects} project"
+    views = max(row.views_received, getattr(row, ANALYTICS_VIEWS, 0))
+    return "No company views" if not views else f"Only {views} company views"
+
+@dataclass
+class _Cohort:
+    frame: Any
+    # (mtime_ns, inode) of the file this frame was read from or written to
+    file_version: Tuple[int, int] = (0, 0)
+    scored_on: Optional[date] = None
+    views_version: int = -1
+    dirty: Set[str] = field(default_factory=set)
+    # Row positions sorted by descending score, rebuilt after each scoring
+    order: Optional[np.ndarray] = None
+
+class RiskScoringEngine:
+    """Per-institution cohorts with vectorized, incremental risk scoring"""
+
+    def __init__(self, analytics_engine: Optional[AnalyticsEngine] = None, data_dir: Optional[str] = None):
+        self.analytics_engine = analytics_engine
+        self.data_dir = data_dir or os.getenv("RISK_DIR", os.path.join("data", "risk"))
+        self.high_threshold = float(os.getenv("RISK_HIGH_THRESHOLD", "60"))
+        self.medium_threshold = float(os.getenv("RISK_MEDIUM_THRESHOLD", "35"))
+        self.views_days = int(os.getenv("RISK_VIEWS_DAYS", "90"))
+        self.cohorts: Dict[str, _Cohort] = {}
+        self._lock = threading.RLock()
+        self.last_run: Dict[str, Dict[str, Any]] = {}
+
+    def _path(self, institution_id: str) -> str:
+        return os.path.join(self.data_dir, f"{_safe_id(institution_id)}.parquet")
+
+    def _empty_frame(self):
+        pd = require_pandas()
+        frame = pd.DataFrame({
+            "name": pd.Series(dtype="string"),
+            "last_active_at": pd.Series(dtype="datetime64[us, UTC]"),
+            "profile_completeness": pd.Series(dtype=float),
+            "applications": pd.Series(dtype="int64"),
+            "projects": pd.Series(dtype="int64"),
+            "views_received": pd.Series(dtype="int64")
+        })
+        frame.index.name = "student_id"
+        return frame
+
+    def _cohort(self, institution_id: str) -> Optional[_Cohort]:
+        """Cached cohort, reloaded when another worker rewrote its file"""
+        path = self._path(institution_id)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self.cohorts.get(institution_id)
+        cohort = self.cohorts.get(institution_id)
+        # Every write replaces the file, so a new inode means another writer
+        file_version = (stat.st_mtime_ns, stat.st_ino)
+        if cohort is None or file_version != cohort.file_version:
+            pd = require_pandas()
+            frame = pd.read_parquet(path)
+            cohort = _Cohort(frame=frame, file_version=file_version)
+            self.cohorts[institution_id] = cohort
+        return cohort
+
+    def upsert_students(self, institution_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insert or update student records (``deleted: true`` removes); blocking"""
+        pd = require_pandas()
+        rows, removed, rejected = [], [], []
+        for index, raw in enumerate(records):
+            try:
+                if raw.get("deleted"):
+                    removed.append(str(raw.get("student_id") or raw.get("id")))
+                else:
+                    rows.append(normalize_student(raw))
+            except (ValueError, TypeError) as e:
+                rejected.append({"index": index, "reason": str(e)})
+
+        path = self._path(institution_id)
+        # The file lock makes read-merge-write atomic across workers: the
+        # merge starts from whatever the last writer left on disk
+        with self._lock, file_lock(path):
+            cohort = self._cohort(institution_id) or _Cohort(frame=self._empty_frame())
+            frame = cohort.frame.drop(index=[r for r in removed if r in cohort.frame.index])
+            if rows:
+                updates = pd.DataFrame(rows).drop_duplicates("student_id", keep="last").set_index("student_id")
+                updates["last_active_at"] = pd.to_datetime(updates["last_active_at"], utc=True)
+                features = frame[FEATURE_COLUMNS]
+                features = pd.concat([features.drop(index=updates.index, errors="ignore"), updates[FEATURE_COLUMNS]])
+                # Keep existing scores; changed rows are rescored on the next query
+                scored = [column for column in frame.columns if column not in FEATURE_COLUMNS]
+                frame = features.join(frame[scored]) if scored else features
+                cohort.dirty.update(updates.index)
+                # New students have no analytics count yet; take them on the next query
+                cohort.views_version = -1
+            cohort.frame = frame
+            cohort.order = None
+
+            os.makedirs(self.data_dir, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            frame.drop(columns=[ANALYTICS_VIEWS], errors="ignore").to_parquet(temporary)
+            os.replace(temporary, path)
+            stat = os.stat(path)
+            cohort.file_version = (stat.st_mtime_ns, stat.st_ino)
+            self.cohorts[institution_id] = cohort
+        return {"upserted": len(rows), "removed": len(removed), "rejected": rejected, "total": len(frame)}
+
+    def _sync_views(self, institution_id: str, cohort: _Cohort):
+        """Recompute windowed views from the analytics rollups; marks students whose count changed"""
+        if self.analytics_engine is None or cohort.views_version == self.analytics_engine.version:
+            return
+        frame = cohort.frame
+        counts = self.analytics_engine.student_view_counts(institution_id, self.views_days)
+        views = np.fromiter((counts.get(student_id, 0) for student_id in frame.index), dtype="int64", count=len(frame))
+        if ANALYTICS_VIEWS in frame.columns:
+            changed = views != frame[ANALYTICS_VIEWS].fillna(0).to_numpy(dtype="int64")
+        else:
+            changed = views > 0
+        frame[ANALYTICS_VIEWS] = views
+        if changed.any():
+            cohort.dirty.update(frame.index[changed])
+        cohort.views_version = self.analytics_engine.version
+
+    def score(self, institution_id: str) -> Optional[_Cohort]:
+        """Bring the cohort's scores up to date: changed students only, or everyone once a day"""
+        today = datetime.now(timezone.utc).date()
+        with self._lock:
+            cohort = self._cohort(institution_id)
+            if cohort is None or cohort.frame.empty:
+                return None
+            self._sync_views(institution_id, cohort)
+            frame = cohort.frame
+            full = cohort.scored_on != today or "risk_score" not in frame.columns
+            if not full and not cohort.dirty:
+                return cohort
+
+            if full:
+                rows = np.arange(len(frame))
+            else:
+                rows = frame.index.get_indexer(list(cohort.dirty))
+                rows = rows[rows >= 0]
+            scored = score_contributions(
+                factor_contributions(frame.iloc[rows], today), self.high_threshold, self.medium_threshold
+            )
+            if full:
+                for column, values in scored.items():
+                    frame[column] = values
+            else:
+                for column, values in scored.items():
+                    frame.iloc[rows, frame.columns.get_loc(column)] = values
+                    # Rows added since the last run joined with NaN scores, which made the column float
+                    if frame[column].dtype != values.dtype:
+                        frame[column] = frame[column].astype(values.dtype)
+            cohort.scored_on = today
+            cohort.dirty.clear()
+            cohort.order = np.argsort(-frame["risk_score"].to_numpy(), kind="stable")
+            self.last_run[institution_id] = {"rescored": len(rows), "full": full, "cohort": len(frame)}
+            return cohort
+
+    def _profiles(self, frame, positions: np.ndarray) -> List[Dict[str, Any]]:
+        today = datetime.now(timezone.utc).date()
+        profiles = []
+        for student_id, row in zip(frame.index[positions], frame.iloc[positions].itertuples(index=False)):
+            factors = [f for f in (row.factor_1, row.factor_2, row.factor_3) if f >= 0]
+            last_active = row.last_active_at if row.last_active_at == row.last_active_at else None
+            profiles.append({
+                "student_id": student_id,
+                "name": row.name,
+                "risk_level": RISK_LEVELS[row.risk_level],
+                "risk_score": float(row.risk_score),
+                "risk_factors": [_explain(f, row, today) for f in factors],
+                "recommendations": [RECOMMENDATIONS[RISK_FACTORS[f][0]] for f in factors[:2]],
+                "last_activity": last_active.to_pydatetime() if last_active is not None else None,
+                "profile_completeness": round(float(row.profile_completeness), 3),
+                "job_applications": int(row.applications),
+                "projects": int(row.projects),
+                "views_received": max(int(row.views_received), int(getattr(row, ANALYTICS_VIEWS, 0)))
+            })
+        return profiles
+
+    def page(
+        self,
+        institution_id: str,
+        risk_level: str = "at_risk",
+        page: int = 1,
+        page_size: int = 50
+    ) -> Optional[Dict[str, Any]]:
+        """Students by descending risk; risk_level is high, medium, low, at_risk (high+medium) or all"""
+        with self._lock:
+            cohort = self.score(institution_id)
+            if cohort is None:
+                return None
+            frame = cohort.frame
+            levels = frame["risk_level"].to_numpy()
+            wanted = {"high": (2,), "medium": (1,), "low": (0,), "all": (0, 1, 2)}.get(risk_level, (1, 2))
+            ordered = cohort.order[np.isin(levels[cohort.order], wanted)]
+            start = (max(page, 1) - 1) * page_size
+            students = self._profiles(frame, ordered[start:start + page_size])
+            return {
+                "students": students,
+                "total": int(len(ordered)),
+                "page": max(page, 1),
+                "page_size": page_size,
+                "summary": self._summary(frame, levels)
+            }
+
+    def _summary(self, frame, levels: np.ndarray) -> Dict[str, Any]:
+        at_risk = levels > 0
+        # How many at-risk students each factor is a top-three reason for
+        factor_counts = np.zeros(len(RISK_FACTORS), dtype=int)
+        for column in ("factor_1", "factor_2", "factor_3"):
+            values = frame[column].to_numpy()[at_risk]
+            factor_counts += np.bincount(values[values >= 0], minlength=len(RISK_FACTORS))
+        return {
+            "cohort_size": int(len(frame)),
+            "levels": {name: int((levels == code).sum()) for code, name in enumerate(RISK_LEVELS)},
+            "average_score": round(float(frame["risk_score"].mean()), 1),
+            "common_factors": [
+                {"factor": RISK_FACTORS[i][0], "students": int(factor_counts[i])}
+                for i in np.argsort(-factor_counts) if factor_counts[i]
+            ]
+        }
+
+    async def upsert(self, institution_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.upsert_students, institution_id, records)
+
+    async def at_risk_page(self, institution_id: str, risk_level: str = "at_risk", page: int = 1, page_size: int = 50):
+        # A full daily rescore of a large cohort takes milliseconds, but reads Parquet after a reload
+        return await asyncio.to_thread(self.page, institution_id, risk_level, page, page_size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cohorts": {institution_id: len(cohort.frame) for institution_id, cohort in self.cohorts.items()},
+                "last_run": dict(self.last_run)
+            }
@@ -7,10 +7,9 @@ AI-powered skills assessment and career path recommendations
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-import openai
 from dataclasses import dataclass
 from enum import Enum
-import json
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +52,7 @@ class CareerPath:
 
 class SkillsAssessor:
     def __init__(self):
-        self.client = openai.AsyncOpenAI()
+        self.llm = get_llm_gateway()
         
         # Skill categories and their typical technologies
         self.skill_categories = {
@@ -184,19 +183,15 @@ class SkillsAssessor:
             Format: ["skill1", "skill2", "skill3"]
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            skills = await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.JSON,
+                call_site="skills.extract"
             )
-            
-            skills_text = response.choices[0].message.content.strip()
-            try:
-                skills = json.loads(skills_text)
-                return skills if isinstance(skills, list) else []
-            except json.JSONDecodeError:
-                return []
+
+            return skills if isinstance(skills, list) else []
                 
         except Exception as e:
             logger.error(f"Skill extraction failed: {str(e)}")
@@ -313,14 +308,14 @@ class SkillsAssessor:
             Return only the level: beginner, intermediate, advanced, or expert
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            level_text = await self.llm.complete(
+                prompt,
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                call_site="skills.level"
             )
-            
-            level_text = response.choices[0].message.content.strip().lower()
+
+            level_text = level_text.lower()
             
             if "expert" in level_text:
                 return ExperienceLevel.EXPERT
@@ -377,16 +372,14 @@ class SkillsAssessor:
             Return only the numerical score (0.0 to 1.0).
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=50,
-                temperature=0.1
+                temperature=0.1,
+                output=OutputFormat.FLOAT,
+                call_site="skills.market_demand"
             )
             
-            score_text = response.choices[0].message.content.strip()
-            return float(score_text)
-            
         except Exception as e:
             logger.error(f"Market demand assessment failed: {str(e)}")
             return 0.7  # Default moderate demand
@@ -415,16 +408,14 @@ class SkillsAssessor:
             Format as a simple list.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=200,
-                temperature=0.6
+                temperature=0.6,
+                output=OutputFormat.LINES,
+                call_site="skills.suggestions"
             )
             
-            suggestions_text = response.choices[0].message.content.strip()
-            return [s.strip("- ").strip() for s in suggestions_text.split("\n") if s.strip()]
-            
         except Exception as e:
             logger.error(f"Skill suggestions generation failed: {str(e)}")
             return [f"Practice {skill} in more complex projects", f"Study {skill} best practices"]
@@ -444,16 +435,14 @@ class SkillsAssessor:
             Return as a simple comma-separated list.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=100,
-                temperature=0.5
+                temperature=0.3,  # a lookup, not a creative answer: keep it under the cache threshold
+                output=OutputFormat.CSV,
+                call_site="skills.related"
             )
             
-            related_text = response.choices[0].message.content.strip()
-            return [s.strip() for s in related_text.split(",")]
-            
         except Exception as e:
             logger.error(f"Related skills finding failed: {str(e)}")
             return []
@@ -554,16 +543,14 @@ class SkillsAssessor:
             Return as a simple comma-separated list.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=150,
-                temperature=0.6
+                temperature=0.6,
+                output=OutputFormat.CSV,
+                call_site="skills.recommendations"
             )
             
-            recommendations_text = response.choices[0].message.content.strip()
-            return [s.strip() for s in recommendations_text.split(",")]
-            
         except Exception as e:
             logger.error(f"Skill recommendation failed: {str(e)}")
             return ["Cloud Computing", "Machine Learning", "DevOps", "Mobile Development", "Cybersecurity"]
@@ -601,18 +588,17 @@ class SkillsAssessor:
             Format as JSON list with objects containing: title, description, required_skills, growth_potential
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            career_paths = await self.llm.complete(
+                prompt,
                 max_tokens=400,
-                temperature=0.6
+                temperature=0.6,
+                output=OutputFormat.JSON,
+                call_site="skills.career_paths"
             )
-            
-            career_text = response.choices[0].message.content.strip()
-            try:
-                return json.loads(career_text)
-            except json.JSONDecodeError:
-                return self._default_career_paths(experience_level)
+
+            if isinstance(career_paths, list):
+                return career_paths
+            return self._default_career_paths(experience_level)
                 
         except Exception as e:
             logger.error(f"Career path suggestion failed: {str(e)}")
@@ -663,15 +649,13 @@ class SkillsAssessor:
             Keep it to 2-3 sentences, professional tone.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=150,
-                temperature=0.6
+                temperature=0.6,
+                call_site="skills.summary"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Assessment summary generation failed: {str(e)}")
             return "Comprehensive technical skills across multiple domains with strong foundation for professional growth."
\ No newline at end of file
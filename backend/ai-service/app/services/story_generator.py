@@ -5,12 +5,16 @@ AI-powered professional story generation from project data
 """
 
 import asyncio
+import hashlib
+import json
 import logging
 from typing import Dict, List, Optional, Any
-import openai
 from dataclasses import dataclass
 from enum import Enum
 
+from app.utils.cache_manager import CacheManager
+from app.utils.llm_gateway import OutputFormat, get_llm_gateway
+
 logger = logging.getLogger(__name__)
 
 class StoryTone(Enum):
@@ -40,9 +44,32 @@ class StoryResult:
     alternative_versions: List[str]
     metadata: Dict[str, Any]
 
+@dataclass
+class StoryBundle:
+    story: str
+    key_points: List[str]
+    call_to_action: str
+    alternative_versions: List[str]
+    linkedin_post: str
+    elevator_pitch: str
+    metadata: Dict[str, Any]
+
 class StoryGenerator:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI()
+    # Values used by the public API schemas that have no direct enum member
+    tone_aliases = {
+        "academic": StoryTone.TECHNICAL,
+        "enthusiastic": StoryTone.INSPIRATIONAL
+    }
+    audience_aliases = {
+        "recruiter": TargetAudience.RECRUITERS,
+        "peer": TargetAudience.PEERS,
+        "academic": TargetAudience.TECHNICAL_MANAGERS,
+        "client": TargetAudience.EXECUTIVES
+    }
+
+    def __init__(self, cache_manager: Optional[CacheManager] = None):
+        self.llm = get_llm_gateway()
+        self.cache_manager = cache_manager
         
         self.tone_prompts = {
             StoryTone.PROFESSIONAL: "professional, polished, and business-appropriate",
@@ -119,6 +146,249 @@ class StoryGenerator:
             logger.error(f"Story generation failed: {str(e)}")
             raise
 
+    async def generate_story_bundle(
+        self,
+        project_data: Dict[str, Any],
+        target_audience: str = "recruiters",
+        tone: str = "professional",
+        length: str = "medium",
+        focus_areas: Optional[List[str]] = None,
+        linkedin_style: str = "achievement",
+        pitch_duration: int = 30
+    ) -> StoryBundle:
+        """Generate story, alternatives, LinkedIn post, elevator pitch, key points
+        and call-to-action from a single structured completion"""
+        try:
+            tone_enum = self.tone_aliases.get(tone) or StoryTone(tone)
+            length_enum = StoryLength(length)
+            audience_enum = self.audience_aliases.get(target_audience) or TargetAudience(target_audience)
+
+            project_summary = self._extract_project_summary(project_data)
+            content_hash = self._project_content_hash(
+                project_summary,
+                focus_areas=focus_areas or [],
+                linkedin_style=linkedin_style,
+                pitch_duration=pitch_duration
+            )
+            cache_params = {
+                "content_hash": content_hash,
+                "tone": tone_enum.value,
+                "audience": audience_enum.value,
+                "length": length_enum.value
+            }
+
+            if self.cache_manager:
+                cached = await self.cache_manager.get("story_bundle", **cache_params)
+                if cached is not None:
+                    return StoryBundle(**cached)
+
+            prompt = self._build_bundle_prompt(
+                project_summary, audience_enum, tone_enum, length_enum,
+                focus_areas, linkedin_style, pitch_duration
+            )
+
+            parts: Dict[str, Any] = {}
+            try:
+                response = await self.llm.complete(
+                    prompt,
+                    max_tokens=2000,
+                    temperature=0.7,
+                    output=OutputFormat.JSON,
+                    call_site="story.bundle"
+                )
+
+                parts = self._parse_bundle(response)
+            except Exception as e:
+                logger.error(f"Story bundle completion failed: {str(e)}")
+
+            # Only regenerate the formats the structured completion did not return
+            parts = await self._fill_missing_bundle_parts(
+                parts, project_data, project_summary, audience_enum, tone_enum,
+                length_enum, focus_areas, linkedin_style, pitch_duration
+            )
+            backfilled = parts.pop("_backfilled", False)
+
+            story_bundle = StoryBundle(
+                story=parts["story"],
+                key_points=parts["key_points"],
+                call_to_action=parts["call_to_action"],
+                alternative_versions=parts["alternative_versions"],
+                linkedin_post=parts["linkedin_post"],
+                elevator_pitch=parts["elevator_pitch"],
+                metadata={
+                    "word_count": len(parts["story"].split()),
+                    "tone": tone_enum.value,
+                    "audience": audience_enum.value,
+                    "length": length_enum.value,
+                    "focus_areas": focus_areas or [],
+                    "project_id": project_data.get("id"),
+                    "content_hash": content_hash,
+                    "single_pass": not backfilled
+                }
+            )
+
+            # Backfilled parts may be canned fallbacks or empty after a failed
+            # call; serve them once but let the next request try again
+            if self.cache_manager and not backfilled:
+                await self.cache_manager.set("story_bundle", story_bundle.__dict__, **cache_params)
+
+            return story_bundle
+
+        except Exception as e:
+            logger.error(f"Story bundle generation failed: {str(e)}")
+            raise
+
+    def _project_content_hash(self, project_summary: Dict[str, Any], **extra: Any) -> str:
+        """Stable hash of everything in the project that shapes the prompt"""
+        payload = json.dumps({"project": project_summary, **extra}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _build_bundle_prompt(
+        self,
+        project_summary: Dict[str, Any],
+        audience: TargetAudience,
+        tone: StoryTone,
+        length: StoryLength,
+        focus_areas: Optional[List[str]],
+        linkedin_style: str,
+        pitch_duration: int
+    ) -> str:
+        """Build one prompt carrying the project context once for every output format"""
+
+        word_targets = {
+            StoryLength.SHORT: "100-200",
+            StoryLength.MEDIUM: "200-400",
+            StoryLength.LONG: "400-600"
+        }
+
+        linkedin_styles = {
+            "achievement": "celebrating an accomplishment",
+            "learning": "sharing lessons learned",
+            "technical": "discussing technical details",
+            "inspiration": "inspiring others"
+        }
+
+        focus_prompt = ""
+        if focus_areas:
+            focus_prompt = f"\nSpecial focus on: {', '.join(focus_areas)}"
+
+        return f"""
+        You are writing a complete portfolio publishing kit for this project, targeted at {self.audience_contexts[audience]}.
+        
+        Project Information:
+        - Title: {project_summary['title']}
+        - Description: {project_summary['description']}
+        - Technologies: {', '.join(project_summary['technologies'])}
+        - Role: {project_summary['role']}
+        - Team Size: {project_summary['team_size']}
+        - Timeline: {project_summary.get('timeline', {}).get('duration', 'Not specified')}
+        - Category: {project_summary['category']}
+        
+        Key Challenges:
+        {self._format_list(project_summary['challenges'])}
+        
+        Solutions Implemented:
+        {self._format_list(project_summary['solutions'])}
+        
+        Achievements:
+        {self._format_list(project_summary['achievements'])}
+        
+        Impact/Results:
+        {self._format_dict(project_summary['impact'])}
+        
+        Key Learnings:
+        {self._format_list(project_summary['learnings'])}
+        {focus_prompt}
+        
+        Tone for every piece: {self.tone_prompts[tone]}
+        
+        Produce all of the following:
+        1. story: {word_targets[length]} words, structured Problem → Solution → Impact → Growth,
+           quantifying achievements and ending with a forward-looking statement
+        2. alternative_versions: three 100-150 word versions focused respectively on
+           technical innovation and problem-solving, teamwork and collaboration, business impact and results
+        3. linkedin_post: 100-200 words {linkedin_styles.get(linkedin_style, linkedin_styles['achievement'])},
+           engaging first-line hook, relevant hashtags and a call for engagement
+        4. elevator_pitch: a {pitch_duration}-second pitch ({pitch_duration * 2} words max):
+           hook, solution, impact, call to action; value over technical detail
+        5. key_points: 4-6 concise bullet points on the most important accomplishments and skills
+        6. call_to_action: 1-2 sentences inviting engagement, appropriate for the audience
+        
+        Respond only with valid JSON using exactly these keys:
+        {{
+            "story": "string",
+            "alternative_versions": ["string", "string", "string"],
+            "linkedin_post": "string",
+            "elevator_pitch": "string",
+            "key_points": ["string"],
+            "call_to_action": "string"
+        }}
+        """
+
+    def _parse_bundle(self, data: Any) -> Dict[str, Any]:
+        """Keep only the well-formed fields of the structured completion"""
+        if not isinstance(data, dict):
+            logger.warning("Story bundle response was not a JSON object")
+            return {}
+
+        parts: Dict[str, Any] = {}
+        for key in ("story", "linkedin_post", "elevator_pitch", "call_to_action"):
+            value = data.get(key)
+            if isinstance(value, str) and value.strip():
+                parts[key] = value.strip()
+        for key in ("alternative_versions", "key_points"):
+            value = data.get(key)
+            if isinstance(value, list):
+                items = [str(item).strip("- ").strip() for item in value if str(item).strip()]
+                if items:
+                    parts[key] = items
+        return parts
+
+    async def _fill_missing_bundle_parts(
+        self,
+        parts: Dict[str, Any],
+        project_data: Dict[str, Any],
+        project_summary: Dict[str, Any],
+        audience: TargetAudience,
+        tone: StoryTone,
+        length: StoryLength,
+        focus_areas: Optional[List[str]],
+        linkedin_style: str,
+        pitch_duration: int
+    ) -> Dict[str, Any]:
+        """Fall back to the per-format generators, concurrently, for missing fields"""
+        missing = [
+            key for key in (
+                "story", "alternative_versions", "linkedin_post",
+                "elevator_pitch", "call_to_action", "key_points"
+            )
+            if key not in parts
+        ]
+        if not missing:
+            return parts
+
+        logger.warning(f"Story bundle missing {', '.join(missing)}; generating separately")
+        parts["_backfilled"] = True
+
+        if "story" not in parts:
+            parts["story"] = await self._generate_main_story(
+                project_summary, audience, tone, length, focus_areas
+            )
+
+        generators = {
+            "alternative_versions": lambda: self._generate_alternatives(
+                project_summary, audience, tone, length
+            ),
+            "linkedin_post": lambda: self.generate_linkedin_post(project_data, linkedin_style),
+            "elevator_pitch": lambda: self.generate_elevator_pitch(project_data, pitch_duration),
+            "call_to_action": lambda: self._generate_call_to_action(project_data, audience),
+            "key_points": lambda: self._extract_key_points(parts["story"], project_data)
+        }
+        pending = [key for key in missing if key in generators]
+        results = await asyncio.gather(*(generators[key]() for key in pending))
+        parts.update(zip(pending, results))
+        return parts
+
     def _extract_project_summary(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract and structure key project information"""
         return {
@@ -203,15 +473,13 @@ class StoryGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=800,
-                temperature=0.7
+                temperature=0.7,
+                call_site="story.main"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Main story generation failed: {str(e)}")
             raise
@@ -240,16 +508,14 @@ class StoryGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=300,
-                temperature=0.5
+                temperature=0.5,
+                output=OutputFormat.LINES,
+                call_site="story.key_points"
             )
             
-            points_text = response.choices[0].message.content.strip()
-            return [point.strip("- ").strip() for point in points_text.split("\n") if point.strip()]
-            
         except Exception as e:
             logger.error(f"Key points extraction failed: {str(e)}")
             return [
@@ -295,15 +561,13 @@ class StoryGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=100,
-                temperature=0.7
+                temperature=0.7,
+                call_site="story.call_to_action"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"CTA generation failed: {str(e)}")
             return "I'd be happy to discuss this project and my approach to solving complex technical challenges."
@@ -339,14 +603,14 @@ class StoryGenerator:
                 Audience: {self.audience_contexts[audience]}
                 """
                 
-                response = await self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
+                alternative = await self.llm.complete(
+                    prompt,
                     max_tokens=200,
-                    temperature=0.8
+                    temperature=0.8,
+                    call_site="story.alternative"
                 )
-                
-                alternatives.append(response.choices[0].message.content.strip())
+
+                alternatives.append(alternative)
                 
             except Exception as e:
                 logger.error(f"Alternative generation failed for {focus}: {str(e)}")
@@ -388,15 +652,13 @@ class StoryGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=300,
-                temperature=0.7
+                temperature=0.7,
+                call_site="story.linkedin_post"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"LinkedIn post generation failed: {str(e)}")
             raise
@@ -429,15 +691,13 @@ class StoryGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            return await self.llm.complete(
+                prompt,
                 max_tokens=150,
-                temperature=0.6
+                temperature=0.6,
+                call_site="story.elevator_pitch"
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             logger.error(f"Elevator pitch generation failed: {str(e)}")
             raise
@@ -7,7 +7,6 @@ Handles student-specific intents by integrating with existing AI services.
 import os
 import json
 import logging
-import httpx
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
@@ -15,6 +14,8 @@ from dataclasses import dataclass
 from app.services.skills_assessor import SkillsAssessor
 from app.services.candidate_matcher import CandidateMatcher
 from app.services.market_analyzer import MarketAnalyzer
+from app.utils.connections import get_backend_client
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -31,10 +32,16 @@ class ActionResult:
 class StudentActionHandler:
     """Handles student-specific conversation intents"""
 
-    def __init__(self):
-        self.skills_assessor = SkillsAssessor()
-        self.candidate_matcher = CandidateMatcher()
-        self.market_analyzer = MarketAnalyzer()
+    def __init__(
+        self,
+        skills_assessor: Optional[SkillsAssessor] = None,
+        candidate_matcher: Optional[CandidateMatcher] = None,
+        market_analyzer: Optional[MarketAnalyzer] = None
+    ):
+        # The service container passes its shared instances
+        self.skills_assessor = skills_assessor or SkillsAssessor()
+        self.candidate_matcher = candidate_matcher or CandidateMatcher()
+        self.market_analyzer = market_analyzer or MarketAnalyzer()
         self.backend_api_url = os.getenv("BACKEND_API_URL", "http://localhost:3001")
         self.api_key = os.getenv("AI_SERVICE_API_KEY", "")
 
@@ -552,19 +559,20 @@ class StudentActionHandler:
 
     # Helper methods
 
+    @traced("backend.jobs")
     async def _fetch_jobs(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Fetch jobs from backend API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/jobs",
-                    params=params,
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('jobs', data) if isinstance(data, dict) else data
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/jobs",
+                params=params,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return data.get('jobs', data) if isinstance(data, dict) else data
         except Exception as e:
             logger.error(f"Failed to fetch jobs: {e}")
 
@@ -588,17 +596,18 @@ class StudentActionHandler:
             }
         ]
 
+    @traced("backend.user_profile")
     async def _fetch_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Fetch user profile from backend API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.backend_api_url}/api/students/{user_id}",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            client = get_backend_client()
+            response = await client.get(
+                f"{self.backend_api_url}/api/students/{user_id}",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
         except Exception as e:
             logger.error(f"Failed to fetch user profile: {e}")
         return None
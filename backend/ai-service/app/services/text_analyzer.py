@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Text Analyzer Service
+Local sentiment, readability, complexity and keyword analysis for project
+descriptions, stories and profiles. No LLM calls: every metric comes from one
+tokenization pass over the text, so a typical description takes well under a
+millisecond.
+
+Sentiment uses NLTK's VADER when its lexicon is installed and a compact
+built-in valence lexicon otherwise. Syllables are counted with a vowel-group
+heuristic: textstat's counter may download the CMU dictionary on a cache miss,
+which must never happen on the request path. Lexicons and tokenizers load once
+per process and are shared by every request; batches run in the file
+processor's process pool.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+import os
+import re
+import statistics
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.services.file_processor import FileProcessor
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9+#'.\-]*[A-Za-z0-9+#]|[A-Za-z]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n|\n\s*[-*•]\s+")
+PHRASE_BREAK_PATTERN = re.compile(r"[.,;:!?()\[\]{}\"\n–—]|\s-\s")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being below
+between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during each etc
+few for from further had hadn't has hasn't have haven't having he her here hers herself him himself his how i
+if in into is isn't it it's its itself just let's me more most mustn't my myself no nor not now of off on once
+only or other ought our ours ourselves out over own same she should shouldn't so some such than that that's
+the their theirs them themselves then there these they this those through to too under until up upon us very
+via was wasn't we were weren't what when where which while who whom why will with within without won't would
+wouldn't you your yours yourself yourselves using used use uses new well many much make makes made also able
+""".split())
+
+# Valence from -4 to 4 on VADER's scale; used when the VADER lexicon is not installed
+FALLBACK_LEXICON = {
+    "good": 1.9, "great": 3.1, "excellent": 3.2, "amazing": 2.8, "awesome": 3.1, "best": 3.2, "better": 1.9,
+    "love": 3.2, "loved": 2.9, "like": 1.5, "enjoy": 2.2, "enjoyed": 2.3, "happy": 2.7, "glad": 2.0,
+    "success": 2.7, "successful": 2.8, "successfully": 2.6, "effective": 2.1, "efficient": 1.8,
+    "improve": 1.9, "improved": 2.1, "improvement": 2.0, "innovative": 2.2, "innovation": 1.9,
+    "robust": 1.6, "reliable": 1.9, "scalable": 1.2, "fast": 1.1, "easy": 1.9, "clean": 1.7,
+    "strong": 2.3, "proud": 2.1, "passionate": 2.0, "excited": 2.5, "exciting": 2.2, "impressive": 2.6,
+    "win": 2.8, "won": 2.7, "award": 2.5, "awarded": 2.4, "achieve": 2.0, "achieved": 2.1,
+    "achievement": 2.2, "helpful": 1.9, "valuable": 2.1, "benefit": 2.0, "positive": 2.6, "perfect": 2.7,
+    "outstanding": 3.0, "remarkable": 2.4, "solid": 1.4, "smooth": 1.4, "intuitive": 1.8, "creative": 1.9,
+    "bad": -2.5, "worse": -2.1, "worst": -3.1, "poor": -2.1, "terrible": -2.9, "awful": -2.9,
+    "hate": -2.7, "dislike": -1.6, "fail": -2.3, "failed": -2.3, "failure": -2.3, "failing": -2.1,
+    "problem": -1.7, "problems": -1.7, "issue": -0.9, "issues": -1.0, "bug": -1.1, "bugs": -1.2,
+    "broken": -2.1, "slow": -1.0, "difficult": -1.5, "hard": -0.4, "hardly": -1.0, "struggle": -1.7,
+    "struggled": -1.6, "frustrating": -2.3, "frustrated": -2.1, "confusing": -1.5, "confused": -1.3,
+    "error": -1.5, "errors": -1.5, "crash": -1.9, "crashes": -1.9, "wrong": -2.1, "lack": -1.2,
+    "lacking": -1.4, "weak": -1.9, "unfortunately": -1.6, "sad": -2.1, "angry": -2.3, "worried": -1.7,
+    "risk": -1.1, "risky": -1.4, "unstable": -1.6, "limited": -0.8, "tedious": -1.6, "boring": -1.3,
+    "disappointing": -2.2, "disappointed": -2.3, "useless": -2.4, "painful": -2.0, "annoying": -2.0
+}
+NEGATIONS = frozenset(["not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without",
+                       "cannot", "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't",
+                       "can't", "couldn't", "won't", "wouldn't", "shouldn't", "hasn't", "haven't", "hadn't"])
+BOOSTERS = {
+    "very": 0.293, "really": 0.293, "extremely": 0.293, "highly": 0.293, "incredibly": 0.293,
+    "especially": 0.293, "truly": 0.293, "so": 0.293, "most": 0.293, "quite": 0.147, "fairly": -0.147,
+    "slightly": -0.293, "somewhat": -0.293, "barely": -0.293, "kind": -0.293, "sort": -0.293
+}
+
+# Terms that mark text as technical, in lowercase
+TECHNICAL_TERMS = frozenset("""
+api apis rest graphql grpc sdk cli backend frontend database databases sql nosql postgresql mysql mongodb redis
+cache caching docker kubernetes k8s container containers microservice microservices serverless cloud aws azure
+gcp terraform ci cd pipeline pipelines devops deployment algorithm algorithms latency throughput concurrency
+asynchronous async distributed scalability scalable authentication authorization oauth jwt encryption
+python javascript typescript java kotlin go golang rust c++ c# php ruby swift dart scala react angular vue
+svelte node.js nodejs django flask fastapi spring express next.js flutter tensorflow pytorch scikit-learn
+pandas numpy machine learning neural network networks model models inference embedding embeddings llm nlp
+regression classification clustering dataset datasets etl analytics architecture framework frameworks
+library libraries websocket websockets queue kafka rabbitmq orm schema indexing index indexes testing unit
+integration refactoring repository git linux http https tcp protocol optimization benchmark benchmarks
+""".split())
+
+SENTIMENT_THRESHOLD = 0.05
+
+@functools.lru_cache(maxsize=1)
+def _resources() -> Dict[str, Any]:
+    """Lexicons and helpers, loaded once per process (server or pool worker)"""
+    resources: Dict[str, Any] = {"vader": None, "stop_words": STOP_WORDS}
+    try:
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        resources["vader"] = SentimentIntensityAnalyzer()
+    except (ImportError, LookupError) as e:
+        # The lexicon is an nltk data download (python -m nltk.downloader vader_lexicon)
+        logger.info(f"VADER unavailable, using the built-in sentiment lexicon: {str(e).splitlines()[0] if str(e) else e}")
+    try:
+        from nltk.corpus import stopwords
+        resources["stop_words"] = STOP_WORDS | frozenset(stopwords.words("english"))
+    except (ImportError, LookupError):
+        pass
+    return resources
+
+@functools.lru_cache(maxsize=50000)
+def syllable_count(word: str) -> int:
+    """Vowel groups, less a silent final e or -ed/-es ending"""
+    word = word.lower().strip("'")
+    count = len(VOWEL_GROUPS.findall(word))
+    if count > 1:
+        if word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+            count -= 1
+        elif word.endswith(("ed", "es")) and not word.endswith(("ted", "ded", "ses", "ces", "zes", "ges", "xes")):
+            count -= 1
+    return max(1, count)
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_PATTERN.split(text) if s and WORD_PATTERN.search(s)]
+
+class _Tokens:
+    """One tokenization of a text, shared by every metric"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.sentences = split_sentences(text)
+        self.words = WORD_PATTERN.findall(text)
+        self.lower = [w.lower() for w in self.words]
+        self.syllables = [syllable_count(w) for w in self.lower]
+
+def _sentiment(tokens: _Tokens) -> Dict[str, Any]:
+    vader = _resources()["vader"]
+    if vader is not None and tokens.text.strip():
+        scores = vader.polarity_scores(tokens.text)
+        engine = "vader"
+    else:
+        scores = _lexicon_polarity(tokens.lower)
+        engine = "lexicon"
+    compound = scores["compound"]
+    label = "positive" if compound >= SENTIMENT_THRESHOLD else "negative" if compound <= -SENTIMENT_THRESHOLD else "neutral"
+    return {
+        "label": label,
+        "compound": round(compound, 4),
+        "positive": round(scores["pos"], 3),
+        "negative": round(scores["neg"], 3),
+        "neutral": round(scores["neu"], 3),
+        "engine": engine
+    }
+
+def _lexicon_polarity(words: List[str]) -> Dict[str, float]:
+    """VADER's scoring rules (negation, boosters, contrast on "but") over the fallback lexicon"""
+    valences = []
+    but_index = words.index("but") if "but" in words else -1
+    for i, word in enumerate(words):
+        valence = FALLBACK_LEXICON.get(word)
+        if valence is None:
+            continue
+        for distance, previous in enumerate(reversed(words[max(0, i - 3):i]), start=1):
+            boost = BOOSTERS.get(previous)
+            if boost:
+                scaled = boost * (1.0, 0.95, 0.9)[distance - 1]
+                valence += scaled if valence > 0 else -scaled
+        if any(previous in NEGATIONS for previous in words[max(0, i - 3):i]):
+            valence *= -0.74
+        if but_index >= 0:
+            valence *= 0.5 if i < but_index else 1.5 if i > but_index else 1.0
+        valences.append(valence)
+
+    if not valences:
+        return {"compound": 0.0, "pos": 0.0, "neg": 0.0, "neu": 1.0}
+    total = sum(valences)
+    compound = total / math.sqrt(total * total + 15)
+    positive = sum(v + 1 for v in valences if v > 0)
+    negative = sum(v - 1 for v in valences if v < 0)
+    neutral = len(words) - len(valences)
+    denominator = positive + abs(negative) + neutral
+    return {
+        "compound": max(-1.0, min(1.0, compound)),
+        "pos": positive / denominator,
+        "neg": abs(negative) / denominator,
+        "neu": neutral / denominator
+    }
+
+def _grade_label(grade: float) -> str:
+    if grade < 6:
+        return "elementary"
+    if grade < 9:
+        return "middle_school"
+    if grade < 13:
+        return "high_school"
+    if grade < 16:
+        return "college"
+    return "graduate"
+
+def _readability(tokens: _Tokens) -> Dict[str, Any]:
+    words = len(tokens.words)
+    if not words:
+        return {"word_count": 0, "sentence_count": 0, "reading_level": None, "reading_time_seconds": 0}
+    sentences = max(len(tokens.sentences), 1)
+    syllables = sum(tokens.syllables)
+    polysyllables = sum(1 for count in tokens.syllables if count >= 3)
+    letters = sum(sum(ch.isalpha() for ch in word) for word in tokens.words)
+    words_per_sentence = words / sentences
+    syllables_per_word = syllables / words
+
+    kincaid = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+    fog = 0.4 * (words_per_sentence + 100 * polysyllables / words)
+    smog = 1.0430 * math.sqrt(polysyllables * 30 / sentences) + 3.1291
+    coleman_liau = 0.0588 * (letters / words * 100) - 0.296 * (sentences / words * 100) - 15.8
+    ari = 4.71 * (letters / words) + 0.5 * words_per_sentence - 21.43
+    grade = statistics.median([kincaid, fog, smog, coleman_liau, ari])
+    return {
+        "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1),
+        "flesch_kincaid_grade": round(kincaid, 1),
+        "gunning_fog": round(fog, 1),
+        "smog_index": round(smog, 1),
+        "coleman_liau_index": round(coleman_liau, 1),
+        "automated_readability_index": round(ari, 1),
+        "grade_level": round(grade, 1),
+        "reading_level": _grade_label(grade),
+        "word_count": words,
+        "sentence_count": len(tokens.sentences),
+        # 230 words per minute for technical prose
+        "reading_time_seconds": round(words / 230 * 60)
+    }
+
+def _complexity(tokens: _Tokens) -> Dict[str, Any]:
+    words = len(tokens.words)
+    if not words:
+        return {"complexity_score": 0.0, "level": "simple", "word_count": 0}
+    sentences = max(len(tokens.sentences), 1)
+    sentence_lengths = [len(WORD_PATTERN.findall(s)) for s in tokens.sentences] or [words]
+    unique = len(set(tokens.lower))
+    # Moving-average type-token ratio: plain TTR falls with length, this does not
+    window = min(50, words)
+    if words > window:
+        step = max(1, (words - window) // 50)
+        ratios = [len(set(tokens.lower[i:i + window])) / window for i in range(0, words - window + 1, step)]
+        diversity = sum(ratios) / len(ratios)
+    else:
+        diversity = unique / words
+    technical = sum(1 for w in tokens.lower if w in TECHNICAL_TERMS)
+    polysyllable_ratio = sum(1 for count in tokens.syllables if count >= 3) / words
+    long_word_ratio = sum(1 for w in tokens.words if len(w) > 6) / words
+    average_sentence = words / sentences
+
+    score = (
+        min(average_sentence / 30, 1) * 25
+        + min(polysyllable_ratio / 0.3, 1) * 20
+        + min(long_word_ratio / 0.4, 1) * 15
+        + min(diversity / 0.9, 1) * 15
+        + min(technical / words / 0.15, 1) * 25
+    )
+    return {
+        "complexity_score": round(score, 1),
+        "level": "simple" if score < 35 else "moderate" if score < 60 else "complex",
+        "word_count": words,
+        "unique_words": unique,
+        "lexical_diversity": round(diversity, 3),
+        "average_sentence_length": round(average_sentence, 1),
+        "sentence_length_stdev": round(statistics.pstdev(sentence_lengths), 1),
+        "average_word_length": round(sum(len(w) for w in tokens.words) / words, 2),
+        "polysyllable_ratio": round(polysyllable_ratio, 3),
+        "long_word_ratio": round(long_word_ratio, 3),
+        "technical_term_density": round(technical / words, 3)
+    }
+
+def _keywords(tokens: _Tokens, limit: int = 15) -> Dict[str, Any]:
+    """RAKE: phrases between stop words, scored by word degree over frequency"""
+    stop_words: Set[str] = _resources()["stop_words"]
+    phrases: List[Tuple[str, ...]] = []
+    for fragment in PHRASE_BREAK_PATTERN.split(tokens.text):
+        current: List[str] = []
+        for word in WORD_PATTERN.findall(fragment):
+            word = word.lower()
+            if word in stop_words or (len(word) < 2 and word not in ("c", "r")) or word.replace(".", "").isdigit():
+                if current:
+                    phrases.append(tuple(current))
+                current = []
+            else:
+                current.append(word)
+                if len(current) == 3:
+                    phrases.append(tuple(current))
+                    current = []
+        if current:
+            phrases.append(tuple(current))
+
+    frequency: Counter = Counter()
+    degree: Counter = Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+    word_score = {word: degree[word] / frequency[word] for word in frequency}
+    phrase_counts = Counter(phrases)
+    scored = sorted(
+        ((" ".join(phrase), sum(word_score[w] for w in phrase) * (1 + 0.5 * (count - 1)))
+         for phrase, count in phrase_counts.items()),
+        key=lambda item: item[1], reverse=True
+    )
+    seen = set()
+    keywords = []
+    for phrase, score in scored:
+        if phrase in seen:
+            continue
+        seen.add(phrase)
+        keywords.append({"keyword": phrase, "score": round(score, 2), "count": phrase_counts[tuple(phrase.split(" "))]})
+        if len(keywords) >= limit:
+            break
+    return {
+        "keywords": keywords,
+        "top_terms": [{"term": term, "count": count} for term, count in frequency.most_common(limit)],
+        "technical_terms": sorted({w for w in tokens.lower if w in TECHNICAL_TERMS})
+    }
+
+ANALYSES: Dict[str, Callable[[_Tokens], Dict[str, Any]]] = {
+    "sentiment": _sentiment,
+    "readability": _readability,
+    "complexity": _complexity,
+    "keywords": _keywords
+}
+
+def analyze(text: str, analysis_type: str = "all") -> Dict[str, Any]:
+    """Analyze one text; ``all`` runs every analysis over a single tokenization"""
+    tokens = _Tokens(text or "")
+    if analysis_type in ANALYSES:
+        return ANALYSES[analysis_type](tokens)
+    return {name: fn(tokens) for name, fn in ANALYSES.items()}
+
+def analyze_many(texts: List[str], analysis_type: str = "all") -> List[Dict[str, Any]]:
+    """Batch entry point for pool workers: one task per chunk, not per text"""
+    return [analyze(text, analysis_type) for text in texts]
+
+class TextAnalyzer:
+    """Shared local text analysis; load resources once per worker"""
+
+    analysis_types = ("sentiment", "complexity", "readability", "keywords", "all")
+
+    def __init__(self, file_processor: Optional[FileProcessor] = None):
+        self.file_processor = file_processor or FileProcessor()
+        # Texts up to this size run on the event loop: well under a millisecond, cheaper than a thread hop
+        self.inline_chars = int(os.getenv("TEXT_INLINE_CHARS", "2000"))
+        # Batches above this total size go to the process pool, below it to a thread
+        self.pool_chars = int(os.getenv("TEXT_POOL_CHARS", "500000"))
+        self.max_text_chars = int(os.getenv("TEXT_MAX_CHARS", "200000"))
+        self.batch_chunk = int(os.getenv("TEXT_BATCH_CHUNK", "64"))
+        _resources()
+
+    def _check(self, text: str, analysis_type: str):
+        if analysis_type not in self.analysis_types:
+            raise ValueError(f"Unknown analysis type: {analysis_type}")
+        if len(text or "") > self.max_text_chars:
+            raise ValueError(f"Text exceeds {self.max_text_chars} characters")
+
+    async def _analyze(self, text: str, analysis_type: str) -> Dict[str, Any]:
+        self._check(text, analysis_type)
+        if len(text or "") <= self.inline_chars:
+            return analyze(text, analysis_type)
+        return await asyncio.to_thread(analyze, text, analysis_type)
+
+    async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+        return await self._analyze(text, "sentiment")
+
+    async def analyze_complexity(self, text: str) -> Dict[str, Any]:
+        return await self._analyze(text, "complexity")
+
+    async def analyze_readability(self, text: str) -> Dict[str, Any]:
+        return await self._analyze(text, "readability")
+
+    async def extract_keywords(self, text: str) -> Dict[str, Any]:
+        return await self._analyze(text, "keywords")
+
+    @traced("text.analyze")
+    async def analyze_all(self, text: str) -> Dict[str, Any]:
+        return await self._analyze(text, "all")
+
+    @traced("text.analyze_batch")
+    async def analyze_batch(self, texts: List[str], analysis_type: str = "all") -> List[Dict[str, Any]]:
+        """Score many texts in chunks; results keep the input order"""
+        for text in texts:
+            self._check(text, analysis_type)
+        chunks = [texts[i:i + self.batch_chunk] for i in range(0, len(texts), self.batch_chunk)]
+        if sum(len(text or "") for text in texts) > self.pool_chars:
+            loop = asyncio.get_running_loop()
+            pool = self.file_processor.pool
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(pool, analyze_many, chunk, analysis_type) for chunk in chunks
+            ))
+        else:
+            # One thread hop for the whole batch; chunking only pays off across processes
+            parts = [await asyncio.to_thread(analyze_many, texts, analysis_type)] if texts else []
+        return [result for part in parts for result in part]
@@ -9,9 +9,10 @@ import logging
 import json
 import hashlib
 from typing import Dict, List, Optional, Any, Union
-import redis
-import os
 from datetime import datetime, timedelta
+from app.utils.connections import get_redis_client
+from app.utils.metrics import record_cache_lookup
+from app.utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ class CacheManager:
             "project_analysis": 3600,      # 1 hour
             "skill_assessment": 1800,      # 30 minutes
             "story_generation": 3600,      # 1 hour
+            "story_bundle": 86400,         # 24 hours, keyed by project content hash
             "market_trends": 7200,         # 2 hours
             "job_matching": 1800,          # 30 minutes
             "resume_optimization": 1800,   # 30 minutes
@@ -37,20 +39,9 @@ class CacheManager:
 
     def _init_redis(self):
         """Initialize Redis connection"""
-        try:
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            # Test connection
-            self.redis_client.ping()
-            logger.info("Redis cache connected successfully")
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {str(e)}. Using memory cache only.")
-            self.redis_client = None
+        self.redis_client = get_redis_client()
+        if not self.redis_client:
+            logger.warning("Redis unavailable. Using memory cache only.")
 
     def _generate_cache_key(self, operation: str, **kwargs) -> str:
         """Generate cache key from operation and parameters"""
@@ -59,9 +50,12 @@ class CacheManager:
         param_hash = hashlib.md5(param_string.encode()).hexdigest()
         return f"ai_cache:{operation}:{param_hash}"
 
+    @traced("cache.get")
     async def get(self, operation: str, **kwargs) -> Optional[Any]:
         """Get cached result for operation"""
         cache_key = self._generate_cache_key(operation, **kwargs)
+        span = current_span()
+        span.set_attribute("cache.operation", operation)
         
         # Try Redis first
         if self.redis_client:
@@ -70,6 +64,8 @@ class CacheManager:
                 if cached_data:
                     result = json.loads(cached_data)
                     logger.debug(f"Cache hit (Redis): {operation}")
+                    span.set_attribute("cache.hit", "redis")
+                    record_cache_lookup("app", operation, "hit")
                     return result
             except Exception as e:
                 logger.error(f"Redis cache get failed: {str(e)}")
@@ -79,14 +75,19 @@ class CacheManager:
             cache_entry = self.memory_cache[cache_key]
             if datetime.now() < cache_entry["expires_at"]:
                 logger.debug(f"Cache hit (Memory): {operation}")
+                span.set_attribute("cache.hit", "memory")
+                record_cache_lookup("app", operation, "hit")
                 return cache_entry["data"]
             else:
                 # Remove expired entry
                 del self.memory_cache[cache_key]
         
         logger.debug(f"Cache miss: {operation}")
+        span.set_attribute("cache.hit", "miss")
+        record_cache_lookup("app", operation, "miss")
         return None
 
+    @traced("cache.set")
     async def set(self, operation: str, result: Any, **kwargs) -> bool:
         """Cache result for operation"""
         cache_key = self._generate_cache_key(operation, **kwargs)
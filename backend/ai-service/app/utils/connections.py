@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Shared Connections
+One Redis connection pool and one HTTP pool for the backend API per process.
+Services take their clients from here instead of opening their own, so a
+worker holds a bounded number of sockets and checks Redis once, not once per
+service. The check runs in the startup warm-up, off the event loop, and is
+retried with backoff while Redis is unreachable.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import redis
+
+from app.utils.metrics import InstrumentedTransport
+
+logger = logging.getLogger(__name__)
+
+_redis_lock = threading.Lock()
+_redis_client: Optional[redis.Redis] = None
+# After a failed check, no new attempt before this (monotonic); backs off up to REDIS_RETRY_MAX_SECONDS
+_redis_retry_at = 0.0
+_redis_backoff = 0.0
+_redis_reconnecting = threading.Lock()
+
+def get_redis_client() -> Optional[redis.Redis]:
+    """Shared Redis client, or None while Redis is unreachable.
+
+    Never pings on the event loop: there it returns what the last check found
+    and leaves reconnecting to a background thread. Off the loop it checks
+    inline once the retry backoff has passed.
+    """
+    if _redis_client is not None:
+        return _redis_client
+    if time.monotonic() < _redis_retry_at:
+        return None
+    if _on_event_loop():
+        _reconnect_in_background()
+        return None
+    return connect_redis()
+
+def connect_redis(attempts: int = 1) -> Optional[redis.Redis]:
+    """Check Redis up to ``attempts`` times with backoff; blocking, so call it off the loop"""
+    global _redis_client, _redis_retry_at, _redis_backoff
+    with _redis_lock:
+        if _redis_client is not None or time.monotonic() < _redis_retry_at:
+            return _redis_client
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(min(0.25 * 2 ** (attempt - 1), 2.0))
+            client = _connect_redis()
+            if client is not None:
+                _redis_client = client
+                _redis_backoff = 0.0
+                return client
+        _redis_backoff = min(max(_redis_backoff * 2, 1.0), float(os.getenv("REDIS_RETRY_MAX_SECONDS", "60")))
+        _redis_retry_at = time.monotonic() + _redis_backoff
+        return None
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def _reconnect_in_background():
+    # One reconnecting thread at a time; it holds the lock until it is done
+    if not _redis_reconnecting.acquire(blocking=False):
+        return
+
+    def reconnect():
+        try:
+            connect_redis()
+        finally:
+            _redis_reconnecting.release()
+
+    threading.Thread(target=reconnect, name="redis-connect", daemon=True).start()
+
+def _connect_redis() -> Optional[redis.Redis]:
+    try:
+        pool = redis.ConnectionPool.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379"),
+            decode_responses=True,
+            socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", "2")),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", "5")),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        )
+        client = redis.Redis(connection_pool=pool)
+        client.ping()
+        logger.info("Redis connected")
+        return client
+    except Exception as e:
+        logger.warning(f"Redis connection failed: {str(e)}")
+        return None
+
+def redis_status() -> str:
+    """connected, unreachable or unavailable (never connected); pings, so call it off the loop"""
+    client = get_redis_client()
+    if client is None:
+        return "unavailable"
+    try:
+        client.ping()
+        return "connected"
+    except Exception as e:
+        logger.warning(f"Redis ping failed: {str(e)}")
+        return "unreachable"
+
+def redis_pool_stats() -> Dict[str, Any]:
+    if _redis_client is None:
+        return {"connected": False}
+    pool = _redis_client.connection_pool
+    return {
+        "connected": True,
+        "max_connections": pool.max_connections,
+        "created_connections": len(pool._available_connections) + len(pool._in_use_connections),
+        "in_use_connections": len(pool._in_use_connections)
+    }
+
+_backend_client: Optional[httpx.AsyncClient] = None
+
+def get_backend_client() -> httpx.AsyncClient:
+    """Pooled client for the InTransparency backend API"""
+    global _backend_client
+    if _backend_client is None or _backend_client.is_closed:
+        _backend_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            transport=InstrumentedTransport(
+                "backend",
+                httpx.Limits(
+                    max_connections=int(os.getenv("BACKEND_MAX_CONNECTIONS", "50")),
+                    max_keepalive_connections=20
+                )
+            )
+        )
+    return _backend_client
+
+async def close_connections():
+    global _backend_client
+    if _backend_client is not None:
+        await _backend_client.aclose()
+        _backend_client = None
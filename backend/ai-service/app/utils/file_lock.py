@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+File Lock
+Exclusive advisory lock around a read-merge-write of a data file shared by
+every worker. flock on a sidecar ``<path>.lock`` serializes processes (and
+threads, which open their own descriptor); without fcntl (Windows) only the
+threads of this process are serialized.
+"""
+
+import contextlib
+import os
+import threading
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_local_locks: Dict[str, threading.Lock] = {}
+_local_guard = threading.Lock()
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` for the block; blocks until acquired"""
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    if fcntl is None:
+        with _local_guard:
+            lock = _local_locks.setdefault(os.path.abspath(lock_path), threading.Lock())
+        with lock:
+            yield
+        return
+
+    with open(lock_path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+Content-addressed cache under the LLM gateway: identical low-temperature
+prompts are answered from memory, Redis or disk instead of the provider
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.connections import get_redis_client
+from app.utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """SQLite-backed tier that survives restarts and Redis flushes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        if row[1] <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, data) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, json.dumps(value))
+            )
+            self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            self._db.commit()
+        return deleted
+
+class LLMResponseCache:
+    """Memory -> Redis -> disk lookup, with hits promoted to the faster tiers"""
+
+    # TTLs per call site, falling back to the family (prefix before the dot)
+    ttl_settings = {
+        "skills": 86400,                # skill demand, related skills: slow-moving
+        "skills.extract": 604800,       # pure function of the project text
+        "matcher": 86400,
+        "market": 21600,                # trends and salaries drift faster
+        "project": 604800,
+        "resume": 3600,
+        "story": 3600,
+        "conversation.intent": 3600,
+        "default": 3600
+    }
+
+    def __init__(self):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        # Above this the caller asked for variety, so a cached answer would be wrong
+        self.max_temperature = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.3"))
+        self.memory_capacity = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "10000"))
+        self.ttl_settings = dict(self.ttl_settings)
+        self.ttl_settings.update(json.loads(os.getenv("LLM_CACHE_TTLS") or "{}"))
+
+        self.memory_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.redis_client = None
+        self.disk: Optional[DiskCache] = None
+        if self.enabled:
+            self._init_redis()
+            disk_path = os.getenv("LLM_CACHE_DISK_PATH")
+            if disk_path:
+                try:
+                    self.disk = DiskCache(disk_path)
+                except Exception as e:
+                    logger.warning(f"LLM disk cache unavailable: {str(e)}")
+
+        self.metrics: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "bypassed": 0, "memory": 0, "redis": 0, "disk": 0}
+        )
+
+    def _init_redis(self):
+        """Initialize Redis connection"""
+        self.redis_client = get_redis_client()
+        if not self.redis_client:
+            logger.warning("Redis unavailable. LLM cache uses memory and disk only.")
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> str:
+        """Collapse whitespace so re-indented prompt templates share a key"""
+        return re.sub(r"\s+", " ", text or "").strip()
+
+    def make_key(
+        self,
+        model: str,
+        system: Optional[str],
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        payload = json.dumps([
+            model,
+            self.normalize(system),
+            [[m.get("role"), self.normalize(m.get("content"))] for m in messages],
+            round(float(temperature), 3),
+            int(max_tokens)
+        ], separators=(",", ":"))
+        return f"llm_cache:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def ttl_for(self, call_site: str) -> int:
+        if call_site in self.ttl_settings:
+            return self.ttl_settings[call_site]
+        return self.ttl_settings.get(call_site.split(".")[0], self.ttl_settings["default"])
+
+    def cacheable(self, temperature: float, call_site: str) -> bool:
+        if not self.enabled or self.ttl_for(call_site) <= 0:
+            return False
+        if temperature > self.max_temperature:
+            self.metrics[call_site]["bypassed"] += 1
+            record_cache_lookup("llm", call_site, "bypassed")
+            return False
+        return True
+
+    async def get(self, key: str, call_site: str) -> Optional[Dict[str, Any]]:
+        stats = self.metrics[call_site]
+        now = time.time()
+
+        entry = self.memory_cache.get(key)
+        if entry and entry[1] > now:
+            self.memory_cache.move_to_end(key)
+            stats["hits"] += 1
+            stats["memory"] += 1
+            record_cache_lookup("llm", call_site, "hit")
+            return entry[0]
+        if entry:
+            del self.memory_cache[key]
+
+        found = None
+        if self.redis_client or self.disk:
+            # Redis and SQLite calls block; keep them off the event loop
+            found = await asyncio.to_thread(self._get_shared, key, now)
+        if found:
+            value, expires_at, tier = found
+            self._set_memory(key, value, expires_at)
+            stats["hits"] += 1
+            stats[tier] += 1
+            record_cache_lookup("llm", call_site, "hit")
+            return value
+
+        stats["misses"] += 1
+        record_cache_lookup("llm", call_site, "miss")
+        return None
+
+    def _get_shared(self, key: str, now: float) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """Redis, then disk (promoting disk hits to Redis); blocking"""
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.get(key)
+                pipe.ttl(key)
+                data, ttl = pipe.execute()
+                if data:
+                    return json.loads(data), now + max(ttl, 1), "redis"
+            except Exception as e:
+                logger.error(f"LLM cache Redis get failed: {str(e)}")
+
+        if self.disk:
+            try:
+                found = self.disk.get(key)
+                if found:
+                    value, expires_at = found
+                    self._set_redis(key, value, int(expires_at - now))
+                    return value, expires_at, "disk"
+            except Exception as e:
+                logger.error(f"LLM cache disk get failed: {str(e)}")
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any], call_site: str):
+        ttl = self.ttl_for(call_site)
+        self._set_memory(key, value, time.time() + ttl)
+        if self.redis_client or self.disk:
+            await asyncio.to_thread(self._set_shared, key, value, ttl)
+
+    def _set_shared(self, key: str, value: Dict[str, Any], ttl: int):
+        self._set_redis(key, value, ttl)
+        if self.disk:
+            try:
+                self.disk.set(key, value, ttl)
+            except Exception as e:
+                logger.error(f"LLM cache disk set failed: {str(e)}")
+
+    async def delete(self, key: str):
+        self.memory_cache.pop(key, None)
+        if self.redis_client or self.disk:
+            await asyncio.to_thread(self._delete_shared, key)
+
+    def _delete_shared(self, key: str):
+        if self.redis_client:
+            try:
+                self.redis_client.delete(key)
+            except Exception as e:
+                logger.error(f"LLM cache Redis delete failed: {str(e)}")
+        if self.disk:
+            self.disk.delete(key)
+
+    def _set_memory(self, key: str, value: Dict[str, Any], expires_at: float):
+        self.memory_cache[key] = (value, expires_at)
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.memory_capacity:
+            self.memory_cache.popitem(last=False)
+
+    def _set_redis(self, key: str, value: Dict[str, Any], ttl: int):
+        if not self.redis_client or ttl <= 0:
+            return
+        try:
+            self.redis_client.setex(key, ttl, json.dumps(value))
+        except Exception as e:
+            logger.error(f"LLM cache Redis set failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rates per call site and overall"""
+        call_sites = {}
+        totals = {"hits": 0, "misses": 0, "bypassed": 0}
+        for call_site, stats in sorted(self.metrics.items()):
+            lookups = stats["hits"] + stats["misses"]
+            call_sites[call_site] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+            for name in totals:
+                totals[name] += stats[name]
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "enabled": self.enabled,
+            "max_temperature": self.max_temperature,
+            "memory_items": len(self.memory_cache),
+            "redis_connected": self.redis_client is not None,
+            "disk_enabled": self.disk is not None,
+            **totals,
+            "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+            "call_sites": call_sites
+        }
@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+"""
+LLM Gateway
+Single entry point for OpenAI and Anthropic completions with deadlines,
+retries, hedging, circuit breakers, provider failover and output parsing
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional
+
+import httpx
+
+from app.utils.llm_cache import LLMResponseCache
+from app.utils.llm_governor import LLMBudgetExceeded, get_llm_governor, governed_async_client
+from app.utils.metrics import LLM_LATENCY, LLM_TTFT, InstrumentedTransport, record_llm_call
+from app.utils.tracing import get_tracer, span
+
+logger = logging.getLogger(__name__)
+
+class OutputFormat(Enum):
+    TEXT = "text"
+    JSON = "json"
+    FLOAT = "float"
+    LINES = "lines"   # one item per line, bullets and numbering stripped
+    CSV = "csv"       # comma-separated items
+
+class LLMError(Exception):
+    """Every provider failed or was unavailable"""
+
+class LLMOutputError(ValueError):
+    """The completion did not match the requested output format"""
+
+class RetryableLLMError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@dataclass
+class LLMResult:
+    value: Any
+    text: str
+    provider: str
+    model: str
+    latency: float
+    usage: Dict[str, int] = field(default_factory=dict)
+    hedged: bool = False
+    cached: bool = False
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("llm_deadline", default=None)
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]):
+    """Bound every LLM call in this block by the caller's overall deadline
+
+    ``None`` clears any inherited deadline, for background work spawned from a request.
+    """
+    if seconds is None:
+        deadline = None
+    else:
+        deadline = time.monotonic() + seconds
+        current = _deadline.get()
+        deadline = min(deadline, current) if current else deadline
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets a single probe through after cool-off"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def release(self):
+        """End a probe without a verdict (our own throttling, a cancelled caller)"""
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+class LLMGateway:
+    """Provider-agnostic completions used by every service"""
+
+    model_tiers = {
+        "default": {
+            "openai": os.getenv("OPENAI_MODEL", "gpt-4"),
+            "anthropic": os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620")
+        },
+        "fast": {
+            "openai": os.getenv("OPENAI_FAST_MODEL", "gpt-3.5-turbo"),
+            "anthropic": os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-haiku-20240307")
+        }
+    }
+    retryable_status = {408, 409, 429, 500, 502, 503, 504, 529}
+
+    def __init__(self, cache: Optional[LLMResponseCache] = None):
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+        self.base_urls = {
+            "openai": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/"),
+            "anthropic": os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com").rstrip("/")
+        }
+        self.provider_order = [
+            p.strip() for p in os.getenv("LLM_PROVIDER_ORDER", "openai,anthropic").split(",") if p.strip()
+        ]
+        self.default_timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self.max_attempts = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+        self.hedge_max_tokens = 64
+
+        self.breakers = {provider: CircuitBreaker() for provider in self.base_urls}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache = cache or LLMResponseCache()
+
+        # Let the governor recognise self-hosted or proxied endpoints
+        self.governor = get_llm_governor()
+        for provider, url in self.base_urls.items():
+            self.governor.provider_hosts[httpx.URL(url).host] = provider
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = governed_async_client(
+                transport=InstrumentedTransport(
+                    "llm", httpx.Limits(max_connections=100, max_keepalive_connections=20)
+                )
+            )
+        return self._client
+
+    def available_providers(self, preferred: Optional[List[str]] = None) -> List[str]:
+        keys = {"openai": self.openai_api_key, "anthropic": self.anthropic_api_key}
+        order = list(preferred or self.provider_order)
+        order += [p for p in self.provider_order if p not in order]
+        return [p for p in order if keys.get(p)]
+
+    async def complete(self, prompt: Optional[str] = None, **kwargs) -> Any:
+        """Run a completion and return only the parsed value"""
+        return (await self.generate(prompt, **kwargs)).value
+
+    async def generate(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        system: Optional[str] = None,
+        messages: Optional[List[Dict[str, str]]] = None,
+        tier: str = "default",
+        max_tokens: int = 500,
+        temperature: float = 0.3,
+        output: OutputFormat = OutputFormat.TEXT,
+        providers: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        cache: bool = True,
+        call_site: str = "default"
+    ) -> LLMResult:
+        """Complete ``prompt`` (or ``messages``) with failover across providers"""
+        messages = messages or [{"role": "user", "content": prompt or ""}]
+        hedge = max_tokens <= self.hedge_max_tokens if hedge is None else hedge
+        with span("llm.generate", **{"llm.call_site": call_site, "llm.tier": tier}) as current:
+            try:
+                result = await self._generate(
+                    system, messages, tier, max_tokens, temperature, output,
+                    providers, timeout, hedge, cache, call_site
+                )
+            except Exception:
+                record_llm_call("none", "none", call_site, "error")
+                raise
+            if result.cached:
+                record_llm_call(result.provider, result.model, call_site, "cached")
+            else:
+                record_llm_call(result.provider, result.model, call_site, "ok", result.usage)
+            current.set_attributes({
+                "llm.provider": result.provider,
+                "llm.model": result.model,
+                "llm.cached": result.cached,
+                "llm.hedged": result.hedged,
+                "llm.prompt_tokens": result.usage.get("prompt_tokens", 0),
+                "llm.completion_tokens": result.usage.get("completion_tokens", 0)
+            })
+            return result
+
+    async def _generate(
+        self,
+        system: Optional[str],
+        messages: List[Dict[str, str]],
+        tier: str,
+        max_tokens: int,
+        temperature: float,
+        output: OutputFormat,
+        providers: Optional[List[str]],
+        timeout: Optional[float],
+        hedge: bool,
+        cache: bool,
+        call_site: str
+    ) -> LLMResult:
+        candidates = self.available_providers(providers)
+        if not candidates:
+            raise LLMError("No LLM provider configured")
+
+        # Keyed on the preferred provider's model: a failover answer is still
+        # the answer to this prompt until that provider is back
+        cache_key = None
+        if cache and self.cache.cacheable(temperature, call_site):
+            model = self.model_tiers.get(tier, self.model_tiers["default"])[candidates[0]]
+            cache_key = self.cache.make_key(model, system, messages, temperature, max_tokens)
+            with span("cache.llm.get", **{"llm.call_site": call_site}) as current:
+                cached = await self.cache.get(cache_key, call_site)
+                current.set_attribute("cache.hit", bool(cached))
+            if cached:
+                try:
+                    return LLMResult(
+                        value=parse_output(cached["text"], output),
+                        text=cached["text"],
+                        provider=cached["provider"],
+                        model=cached["model"],
+                        latency=0.0,
+                        cached=True
+                    )
+                except LLMOutputError:
+                    await self.cache.delete(cache_key)
+
+        errors = []
+        for provider in candidates:
+            breaker = self.breakers[provider]
+            if not breaker.allow():
+                errors.append(f"{provider}: circuit open")
+                continue
+            # Half-open: this call is the single probe and must give it back however it ends
+            probe = breaker.probing
+            try:
+                result = await self._generate_with_retries(
+                    provider, tier, system, messages, max_tokens, temperature, timeout, hedge
+                )
+                breaker.record_success()
+            except LLMBudgetExceeded as e:
+                # Our own throttling, not a provider health signal
+                errors.append(f"{provider}: {str(e)}")
+                continue
+            except (RetryableLLMError, httpx.TransportError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                errors.append(f"{provider}: {str(e) or type(e).__name__}")
+                logger.warning(f"LLM call {call_site} failed on {provider}: {str(e)}")
+                continue
+            except LLMError as e:
+                # Rejected request (auth, bad model): not a health signal, but try the next provider
+                errors.append(str(e))
+                continue
+            except Exception as e:
+                # Malformed response body (bad JSON, missing fields): the provider's fault
+                breaker.record_failure()
+                errors.append(f"{provider}: malformed response ({type(e).__name__})")
+                logger.error(f"LLM call {call_site} got a malformed response from {provider}: {str(e)}")
+                continue
+            finally:
+                # Cancellation and the branches above leave no verdict; free the probe
+                if probe:
+                    breaker.release()
+
+            result.value = parse_output(result.text, output)
+            if cache_key:
+                with span("cache.llm.set", **{"llm.call_site": call_site}):
+                    await self.cache.set(
+                        cache_key,
+                        {"text": result.text, "provider": result.provider, "model": result.model},
+                        call_site
+                    )
+            return result
+
+        raise LLMError(f"LLM call {call_site} failed: {'; '.join(errors)}")
+
+    async def _generate_with_retries(
+        self,
+        provider: str,
+        tier: str,
+        system: Optional[str],
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: Optional[float],
+        hedge: bool
+    ) -> LLMResult:
+        model = self.model_tiers.get(tier, self.model_tiers["default"])[provider]
+        body = self._build_request(provider, model, system, messages, max_tokens, temperature)[2]
+        for attempt in range(1, self.max_attempts + 1):
+            # Budget waits come before the timed attempt, so throttling never reads as a timeout
+            await self._admit(provider, model, body)
+            call_timeout = self._call_timeout(timeout)
+            try:
+                call = lambda admitted=False: self._request(
+                    provider, tier, system, messages, max_tokens, temperature, call_timeout, admitted
+                )
+                if hedge:
+                    return await self._hedged(provider, tier, call)
+                return await call(True)
+            except (RetryableLLMError, httpx.TransportError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_attempts:
+                    raise
+                # Full jitter, but never sleep past the caller's deadline
+                delay = random.uniform(0, min(0.25 * 2 ** attempt, 4.0))
+                if isinstance(e, RetryableLLMError) and e.retry_after:
+                    delay = max(delay, e.retry_after)
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    raise
+                await asyncio.sleep(delay)
+        raise RetryableLLMError(f"{provider}: retries exhausted")
+
+    def _call_timeout(self, timeout: Optional[float]) -> float:
+        call_timeout = timeout or self.default_timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise asyncio.TimeoutError("request deadline exceeded")
+            call_timeout = min(call_timeout, remaining)
+        return call_timeout
+
+    async def _admit(self, provider: str, model: str, body: Dict[str, Any]):
+        """Take budget for one call, waiting no longer than the caller's deadline"""
+        await self.governor.acquire(
+            provider, model, self.governor.estimate_tokens(body), max_wait=remaining_time()
+        )
+
+    async def _hedged(self, provider: str, tier: str, call) -> LLMResult:
+        """Send a duplicate request if the first is slower than the recent p95"""
+        primary = asyncio.ensure_future(call(True))
+        done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay(provider, tier))
+        if done:
+            return primary.result()
+
+        backup = asyncio.ensure_future(call())
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        result.hedged = task is backup
+                        return result
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, provider: str, tier: str) -> float:
+        samples = self._latencies.get(f"{provider}:{tier}")
+        if not samples or len(samples) < 20:
+            return 2.0
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def _record_latency(self, provider: str, tier: str, latency: float):
+        self._latencies.setdefault(f"{provider}:{tier}", deque(maxlen=200)).append(latency)
+
+    async def _request(
+        self,
+        provider: str,
+        tier: str,
+        system: Optional[str],
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: float,
+        admitted: bool = False
+    ) -> LLMResult:
+        model = self.model_tiers.get(tier, self.model_tiers["default"])[provider]
+        url, headers, body = self._build_request(provider, model, system, messages, max_tokens, temperature)
+        if not admitted:
+            await self._admit(provider, model, body)
+
+        with span("llm.request", **{"llm.provider": provider, "llm.model": model}) as current:
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(
+                    self.client.post(
+                    url, headers=headers, json=body, timeout=timeout,
+                    extensions={"llm_provider": provider, "llm_admitted": True}
+                ),
+                    timeout=timeout
+                )
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                status = "timeout" if isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)) else "transport_error"
+                LLM_LATENCY.labels(provider, model, status).observe(time.monotonic() - started)
+                raise
+            latency = time.monotonic() - started
+            LLM_LATENCY.labels(provider, model, str(response.status_code)).observe(latency)
+            current.set_attribute("http.status_code", response.status_code)
+
+            if response.status_code in self.retryable_status:
+                retry_after = response.headers.get("retry-after")
+                raise RetryableLLMError(
+                    f"{provider} returned {response.status_code}",
+                    float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None
+                )
+            if response.status_code != 200:
+                raise LLMError(f"{provider} returned {response.status_code}: {response.text[:200]}")
+
+            self._record_latency(provider, tier, latency)
+            data = response.json()
+            if provider == "anthropic":
+                text = "".join(block.get("text", "") for block in data.get("content", []))
+            else:
+                text = data["choices"][0]["message"]["content"] or ""
+            usage = self._normalize_usage(data.get("usage") or {})
+            current.set_attributes({
+                "llm.prompt_tokens": usage["prompt_tokens"],
+                "llm.completion_tokens": usage["completion_tokens"]
+            })
+            return LLMResult(
+                value=None,
+                text=text.strip(),
+                provider=provider,
+                model=model,
+                latency=latency,
+                usage=usage
+            )
+
+    @staticmethod
+    def _normalize_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+        """OpenAI reports prompt/completion tokens, Anthropic input/output tokens"""
+        return {
+            "prompt_tokens": int(usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0),
+            "completion_tokens": int(usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0)
+        }
+
+    def _build_request(
+        self,
+        provider: str,
+        model: str,
+        system: Optional[str],
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        stream: bool = False
+    ):
+        if provider == "anthropic":
+            headers = {
+                "x-api-key": self.anthropic_api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            }
+            body = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": messages
+            }
+            if system:
+                body["system"] = system
+            url = f"{self.base_urls['anthropic']}/v1/messages"
+        else:
+            headers = {
+                "Authorization": f"Bearer {self.openai_api_key}",
+                "Content-Type": "application/json"
+            }
+            body = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": ([{"role": "system", "content": system}] if system else []) + messages
+            }
+            url = f"{self.base_urls['openai']}/chat/completions"
+        if stream:
+            body["stream"] = True
+        return url, headers, body
+
+    async def stream(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        system: Optional[str] = None,
+        messages: Optional[List[Dict[str, str]]] = None,
+        tier: str = "default",
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        providers: Optional[List[str]] = None,
+        timeout: float = 60.0,
+        call_site: str = "default"
+    ) -> AsyncGenerator[str, None]:
+        """Stream text deltas; fails over only until the first token is sent"""
+        messages = messages or [{"role": "user", "content": prompt or ""}]
+        tracer = get_tracer()
+        errors = []
+        for provider in self.available_providers(providers):
+            breaker = self.breakers[provider]
+            if not breaker.allow():
+                errors.append(f"{provider}: circuit open")
+                continue
+            probe = breaker.probing
+            model = self.model_tiers.get(tier, self.model_tiers["default"])[provider]
+            url, headers, body = self._build_request(
+                provider, model, system, messages, max_tokens, temperature, stream=True
+            )
+            started = False
+            # Not made current: the consumer runs between our yields
+            stream_span = tracer.start_span(
+                "llm.stream", {"llm.call_site": call_site, "llm.provider": provider, "llm.model": model}
+            )
+            try:
+                await self._admit(provider, model, body)
+                begun = time.monotonic()
+                async with self.client.stream(
+                    "POST", url, headers=headers, json=body, timeout=timeout,
+                    extensions={"llm_provider": provider, "llm_admitted": True}
+                ) as response:
+                    if response.status_code != 200:
+                        raise RetryableLLMError(f"{provider} returned {response.status_code}")
+                    async for text in self._iter_stream(provider, response):
+                        if not started:
+                            ttft = time.monotonic() - begun
+                            stream_span.set_attribute("llm.ttft_ms", round(ttft * 1000, 1))
+                            LLM_TTFT.labels(provider, model).observe(ttft)
+                        started = True
+                        yield text
+                breaker.record_success()
+                tracer.end_span(stream_span)
+                record_llm_call(provider, model, call_site, "ok")
+                return
+            except LLMBudgetExceeded as e:
+                tracer.end_span(stream_span, e)
+                errors.append(f"{provider}: {str(e)}")
+            except Exception as e:
+                # Provider errors, transport errors and malformed events all count
+                tracer.end_span(stream_span, e)
+                breaker.record_failure()
+                if started:
+                    record_llm_call(provider, model, call_site, "error")
+                    raise
+                errors.append(f"{provider}: {str(e) or type(e).__name__}")
+                logger.warning(f"LLM stream {call_site} failed on {provider}: {str(e)}")
+            except BaseException as e:
+                # Cancelled, or the consumer stopped reading (GeneratorExit): no verdict
+                tracer.end_span(stream_span, e)
+                raise
+            finally:
+                if probe:
+                    breaker.release()
+        record_llm_call("none", "none", call_site, "error")
+        raise LLMError(f"LLM stream {call_site} failed: {'; '.join(errors) or 'no provider configured'}")
+
+    @staticmethod
+    async def _iter_stream(provider: str, response: httpx.Response) -> AsyncGenerator[str, None]:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            data = json.loads(line[6:])
+            if provider == "anthropic":
+                if data.get("type") == "content_block_delta":
+                    text = data.get("delta", {}).get("text", "")
+                else:
+                    text = ""
+            else:
+                text = (data.get("choices") or [{}])[0].get("delta", {}).get("content", "")
+            if text:
+                yield text
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def parse_output(text: str, output: OutputFormat) -> Any:
+    """Centralized parsing of model output into the requested shape"""
+    if output == OutputFormat.TEXT:
+        return text
+    if output == OutputFormat.FLOAT:
+        match = re.search(r"-?\d+(?:\.\d+)?", text)
+        if not match:
+            raise LLMOutputError(f"Expected a number, got: {text[:80]!r}")
+        return float(match.group())
+    if output == OutputFormat.JSON:
+        cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+        try:
+            return json.loads(cleaned)
+        except json.JSONDecodeError:
+            # Models sometimes wrap JSON in prose; take the outermost object/array
+            match = re.search(r"(\{.*\}|\[.*\])", cleaned, re.DOTALL)
+            if match:
+                try:
+                    return json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    pass
+            raise LLMOutputError(f"Expected JSON, got: {text[:80]!r}")
+    if output == OutputFormat.LINES:
+        items = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in text.splitlines()]
+        return [item for item in items if item]
+    if output == OutputFormat.CSV:
+        return [item.strip() for item in text.split(",") if item.strip()]
+    raise ValueError(f"Unknown output format: {output}")
+
+_gateway: Optional[LLMGateway] = None
+
+def get_llm_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+LLM Governor
+Shared requests-per-minute and tokens-per-minute budgets for upstream LLM
+providers, enforced across all workers through Redis
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.utils.connections import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+class LLMPriority(Enum):
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BATCH = "batch"
+
+@dataclass
+class ModelBudget:
+    rpm: int
+    tpm: int
+
+class LLMBudgetExceeded(Exception):
+    """The call could not be scheduled within its priority's maximum wait"""
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar(
+    "llm_priority", default=LLMPriority.STANDARD
+)
+
+@contextmanager
+def llm_priority(priority: LLMPriority):
+    """Run LLM calls made inside this block (and tasks it spawns) at ``priority``"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority() -> LLMPriority:
+    return _current_priority.get()
+
+# Two-bucket sliding minute window per provider/model, as one hash.
+# KEYS: state hash, cooldown key. ARGV: rpm, tpm, headroom, estimated tokens.
+# Returns {admitted, wait_ms}.
+GOVERNOR_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cooldown = redis.call('PTTL', KEYS[2])
+if cooldown > 0 then
+    return {0, cooldown}
+end
+
+local rpm = tonumber(ARGV[1]) * tonumber(ARGV[3])
+local tpm = tonumber(ARGV[2]) * tonumber(ARGV[3])
+local estimate = math.min(tonumber(ARGV[4]), tpm)
+
+local bucket = math.floor(now / 60000)
+local elapsed = now - bucket * 60000
+local state = redis.call('HMGET', KEYS[1], 'b', 'r', 't', 'pr', 'pt')
+local b = tonumber(state[1] or -1)
+local r, tk = tonumber(state[2] or 0), tonumber(state[3] or 0)
+local pr, pt = tonumber(state[4] or 0), tonumber(state[5] or 0)
+if b ~= bucket then
+    if b == bucket - 1 then pr, pt = r, tk else pr, pt = 0, 0 end
+    r, tk = 0, 0
+end
+
+local weight = 1 - elapsed / 60000
+if pr * weight + r + 1 > rpm or pt * weight + tk + estimate > tpm then
+    redis.call('HSET', KEYS[1], 'b', bucket, 'r', r, 't', tk, 'pr', pr, 'pt', pt)
+    redis.call('PEXPIRE', KEYS[1], 180000)
+    local wait = 60000 - elapsed
+    if r + 1 <= rpm and tk + estimate <= tpm then
+        -- Room appears as the previous minute decays
+        local needed = 0
+        if pr > 0 then needed = math.max(needed, 60000 * (1 - (rpm - 1 - r) / pr)) end
+        if pt > 0 then needed = math.max(needed, 60000 * (1 - (tpm - estimate - tk) / pt)) end
+        wait = needed - elapsed
+    end
+    return {0, math.max(math.ceil(wait), 50)}
+end
+
+redis.call('HSET', KEYS[1], 'b', bucket, 'r', r + 1, 't', tk + estimate, 'pr', pr, 'pt', pt)
+redis.call('PEXPIRE', KEYS[1], 180000)
+return {1, 0}
+"""
+
+# Replace a call's token estimate with actual usage in the current minute
+GOVERNOR_ADJUST_LUA = """
+local t = redis.call('TIME')
+local bucket = math.floor((tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)) / 60000)
+if tonumber(redis.call('HGET', KEYS[1], 'b') or -1) == bucket then
+    redis.call('HINCRBY', KEYS[1], 't', ARGV[1])
+end
+return 1
+"""
+
+class LLMGovernor:
+    """Admission control for upstream LLM calls.
+
+    Lower priorities only get a fraction of each budget, so batch work
+    cannot starve interactive chat. Provider rate-limit headers feed back
+    into learned limits and cooldowns.
+    """
+
+    headroom = {
+        LLMPriority.INTERACTIVE: 1.0,
+        LLMPriority.STANDARD: 0.85,
+        LLMPriority.BATCH: 0.6
+    }
+    max_wait = {
+        LLMPriority.INTERACTIVE: 10.0,
+        LLMPriority.STANDARD: 30.0,
+        LLMPriority.BATCH: 300.0
+    }
+    default_budgets = {
+        "openai:*": ModelBudget(rpm=500, tpm=150000),
+        "openai:gpt-4": ModelBudget(rpm=500, tpm=40000),
+        "openai:gpt-3.5-turbo": ModelBudget(rpm=3500, tpm=160000),
+        "anthropic:*": ModelBudget(rpm=50, tpm=40000)
+    }
+    provider_hosts = {
+        "api.openai.com": "openai",
+        "api.anthropic.com": "anthropic"
+    }
+
+    def __init__(self):
+        self.redis_client = None
+        self.budgets = dict(self.default_budgets)
+        self.budgets.update(self._budgets_from_env())
+        # Each worker enforces its share of the budget when Redis is down
+        self.local_share = 1 / max(int(os.getenv("WEB_CONCURRENCY", "4")), 1)
+        self._local_state: Dict[str, Dict[str, float]] = {}
+        self._local_cooldowns: Dict[str, float] = {}
+        self._local_failures: Dict[str, int] = {}
+        self._learned: Dict[str, ModelBudget] = {}
+        self._init_redis()
+
+    def _init_redis(self):
+        """Initialize Redis connection for shared budgets"""
+        self.redis_client = get_redis_client()
+        if self.redis_client:
+            self._acquire_script = self.redis_client.register_script(GOVERNOR_ACQUIRE_LUA)
+            self._adjust_script = self.redis_client.register_script(GOVERNOR_ADJUST_LUA)
+        else:
+            logger.warning("Redis unavailable. LLM budgets are per worker.")
+
+    @staticmethod
+    def _budgets_from_env() -> Dict[str, ModelBudget]:
+        """LLM_BUDGETS='{"openai:gpt-4": {"rpm": 500, "tpm": 300000}}'"""
+        raw = os.getenv("LLM_BUDGETS")
+        if not raw:
+            return {}
+        try:
+            return {key: ModelBudget(**value) for key, value in json.loads(raw).items()}
+        except Exception as e:
+            logger.error(f"Invalid LLM_BUDGETS: {str(e)}")
+            return {}
+
+    def budget_for(self, provider: str, model: str) -> ModelBudget:
+        key = f"{provider}:{model}"
+        configured = self.budgets.get(key) or self.budgets.get(f"{provider}:*") or ModelBudget(60, 60000)
+        learned = self._learned.get(key)
+        if learned:
+            return ModelBudget(min(configured.rpm, learned.rpm), min(configured.tpm, learned.tpm))
+        return configured
+
+    async def acquire(
+        self,
+        provider: str,
+        model: str,
+        estimated_tokens: int,
+        priority: Optional[LLMPriority] = None,
+        max_wait: Optional[float] = None
+    ):
+        """Wait until the call fits the shared budget for its priority, at most ``max_wait`` seconds"""
+        priority = priority or current_priority()
+        wait = self.max_wait[priority] if max_wait is None else min(max_wait, self.max_wait[priority])
+        deadline = time.monotonic() + wait
+        budget = self.budget_for(provider, model)
+        headroom = self.headroom[priority]
+
+        while True:
+            admitted, wait_ms = await self._try_acquire(provider, model, budget, headroom, estimated_tokens)
+            if admitted:
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMBudgetExceeded(
+                    f"{provider}:{model} budget exhausted for {priority.value} traffic"
+                )
+            # Jitter so waiting workers do not retry in lockstep
+            await asyncio.sleep(min(wait_ms / 1000 * (0.8 + random.random() * 0.4), remaining, 5.0))
+
+    async def _try_acquire(
+        self,
+        provider: str,
+        model: str,
+        budget: ModelBudget,
+        headroom: float,
+        estimated_tokens: int
+    ) -> Tuple[bool, int]:
+        key = f"{provider}:{model}"
+        if self.redis_client:
+            try:
+                # Runs on every LLM request and every wait poll; keep it off the loop
+                admitted, wait_ms = await asyncio.to_thread(
+                    self._acquire_script,
+                    keys=[f"llm:governor:{key}", f"llm:cooldown:{key}"],
+                    args=[budget.rpm, budget.tpm, headroom, estimated_tokens]
+                )
+                return bool(admitted), int(wait_ms)
+            except Exception as e:
+                logger.error(f"LLM governor acquire failed: {str(e)}")
+
+        return self._local_try_acquire(
+            key,
+            ModelBudget(
+                max(int(budget.rpm * self.local_share), 1),
+                max(int(budget.tpm * self.local_share), 1)
+            ),
+            headroom,
+            estimated_tokens
+        )
+
+    def _local_try_acquire(
+        self,
+        key: str,
+        budget: ModelBudget,
+        headroom: float,
+        estimated_tokens: int
+    ) -> Tuple[bool, int]:
+        now_ms = time.time() * 1000
+        cooldown = self._local_cooldowns.get(key, 0) - now_ms
+        if cooldown > 0:
+            return False, int(cooldown)
+
+        rpm, tpm = budget.rpm * headroom, budget.tpm * headroom
+        estimate = min(estimated_tokens, tpm)
+        bucket = int(now_ms // 60000)
+        elapsed = now_ms - bucket * 60000
+        state = self._local_state.setdefault(key, {"b": bucket, "r": 0, "t": 0, "pr": 0, "pt": 0})
+        if state["b"] != bucket:
+            if state["b"] == bucket - 1:
+                state["pr"], state["pt"] = state["r"], state["t"]
+            else:
+                state["pr"], state["pt"] = 0, 0
+            state.update(b=bucket, r=0, t=0)
+
+        weight = 1 - elapsed / 60000
+        if state["pr"] * weight + state["r"] + 1 > rpm or state["pt"] * weight + state["t"] + estimate > tpm:
+            return False, max(int(min(60000 - elapsed, 1000)), 50)
+        state["r"] += 1
+        state["t"] += estimate
+        return True, 0
+
+    async def record(
+        self,
+        provider: str,
+        model: str,
+        estimated_tokens: int,
+        status_code: int,
+        headers: httpx.Headers,
+        actual_tokens: Optional[int] = None
+    ):
+        """Reconcile usage and adapt to the provider's rate-limit headers"""
+        key = f"{provider}:{model}"
+
+        if actual_tokens is not None:
+            await self._adjust(key, actual_tokens - estimated_tokens)
+
+        limits = self._parse_limits(provider, headers)
+        if limits:
+            known = self._learned.get(key) or self.budget_for(provider, model)
+            self._learned[key] = ModelBudget(
+                limits.get("rpm", known.rpm), limits.get("tpm", known.tpm)
+            )
+
+        cooldown_ms = 0
+        if status_code == 429 or status_code in (503, 529):
+            failures = await self._bump_failures(key)
+            retry_after = self._retry_after_ms(headers)
+            cooldown_ms = retry_after or min(1000 * 2 ** (failures - 1), 60000)
+            logger.warning(f"{key} throttled ({status_code}); cooling down {cooldown_ms}ms")
+        elif status_code < 400:
+            await self._clear_failures(key)
+            # Stop sending just before the provider would start rejecting
+            if limits.get("remaining_requests") == 0 or limits.get("remaining_tokens", math.inf) < estimated_tokens:
+                cooldown_ms = limits.get("reset_ms", 1000)
+
+        if cooldown_ms:
+            await self._set_cooldown(key, int(cooldown_ms))
+
+    async def _adjust(self, key: str, delta: int):
+        if not delta:
+            return
+        if self.redis_client:
+            try:
+                await asyncio.to_thread(self._adjust_script, keys=[f"llm:governor:{key}"], args=[int(delta)])
+                return
+            except Exception as e:
+                logger.error(f"LLM governor adjust failed: {str(e)}")
+        state = self._local_state.get(key)
+        if state and state["b"] == int(time.time() * 1000 // 60000):
+            state["t"] = max(state["t"] + delta, 0)
+
+    async def _set_cooldown(self, key: str, cooldown_ms: int):
+        if self.redis_client:
+            try:
+                await asyncio.to_thread(self._extend_cooldown, key, cooldown_ms)
+                return
+            except Exception as e:
+                logger.error(f"LLM governor cooldown failed: {str(e)}")
+        self._local_cooldowns[key] = max(
+            self._local_cooldowns.get(key, 0), time.time() * 1000 + cooldown_ms
+        )
+
+    def _extend_cooldown(self, key: str, cooldown_ms: int):
+        # Only ever extend an existing cooldown
+        current = self.redis_client.pttl(f"llm:cooldown:{key}")
+        if current < cooldown_ms:
+            self.redis_client.set(f"llm:cooldown:{key}", 1, px=cooldown_ms)
+
+    def _incr_backoff(self, key: str) -> int:
+        pipe = self.redis_client.pipeline()
+        pipe.incr(f"llm:backoff:{key}")
+        pipe.expire(f"llm:backoff:{key}", 300)
+        return int(pipe.execute()[0])
+
+    async def _bump_failures(self, key: str) -> int:
+        if self.redis_client:
+            try:
+                # Remember the shared count so a later success knows there is something to clear
+                self._local_failures[key] = await asyncio.to_thread(self._incr_backoff, key)
+                return self._local_failures[key]
+            except Exception as e:
+                logger.error(f"LLM governor backoff failed: {str(e)}")
+        self._local_failures[key] = self._local_failures.get(key, 0) + 1
+        return self._local_failures[key]
+
+    async def _clear_failures(self, key: str):
+        # Nearly every response is a success; only reset a count this worker saw.
+        # Counts bumped elsewhere expire after 300s or are cleared by that worker.
+        if not self._local_failures.pop(key, None):
+            return
+        if self.redis_client:
+            try:
+                await asyncio.to_thread(self.redis_client.delete, f"llm:backoff:{key}")
+            except Exception as e:
+                logger.error(f"LLM governor backoff reset failed: {str(e)}")
+
+    @staticmethod
+    def _retry_after_ms(headers: httpx.Headers) -> Optional[int]:
+        if headers.get("retry-after-ms"):
+            try:
+                return int(float(headers["retry-after-ms"]))
+            except ValueError:
+                pass
+        if headers.get("retry-after"):
+            try:
+                return int(float(headers["retry-after"]) * 1000)
+            except ValueError:
+                pass
+        return None
+
+    @classmethod
+    def _parse_limits(cls, provider: str, headers: httpx.Headers) -> Dict[str, Any]:
+        """Normalize OpenAI x-ratelimit-* and Anthropic anthropic-ratelimit-* headers"""
+        limits: Dict[str, Any] = {}
+        if provider == "openai":
+            fields = {
+                "rpm": "x-ratelimit-limit-requests",
+                "tpm": "x-ratelimit-limit-tokens",
+                "remaining_requests": "x-ratelimit-remaining-requests",
+                "remaining_tokens": "x-ratelimit-remaining-tokens"
+            }
+            resets = ["x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"]
+        else:
+            fields = {
+                "rpm": "anthropic-ratelimit-requests-limit",
+                "tpm": "anthropic-ratelimit-tokens-limit",
+                "remaining_requests": "anthropic-ratelimit-requests-remaining",
+                "remaining_tokens": "anthropic-ratelimit-tokens-remaining"
+            }
+            resets = ["anthropic-ratelimit-requests-reset", "anthropic-ratelimit-tokens-reset"]
+
+        for name, header in fields.items():
+            value = headers.get(header)
+            if value is not None:
+                try:
+                    limits[name] = int(value)
+                except ValueError:
+                    pass
+
+        reset_ms = [cls._parse_reset(headers.get(header)) for header in resets if headers.get(header)]
+        reset_ms = [value for value in reset_ms if value is not None]
+        if reset_ms:
+            limits["reset_ms"] = max(reset_ms)
+        return limits
+
+    @staticmethod
+    def _parse_reset(value: str) -> Optional[int]:
+        """Accepts OpenAI durations ("6m0s", "20ms") and RFC 3339 timestamps"""
+        units = {"h": 3600000, "m": 60000, "s": 1000, "ms": 1}
+        parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+        if parts and "".join(n + u for n, u in parts) == value:
+            return int(sum(float(number) * units[unit] for number, unit in parts))
+        try:
+            reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return max(int((reset_at.timestamp() - time.time()) * 1000), 0)
+        except ValueError:
+            return None
+
+    def provider_for(self, url: httpx.URL) -> Optional[str]:
+        return self.provider_hosts.get(url.host)
+
+    @staticmethod
+    def estimate_tokens(body: Dict[str, Any]) -> int:
+        """Rough prompt size (4 chars per token) plus the completion ceiling"""
+        text = body.get("system", "") if isinstance(body.get("system"), str) else ""
+        for message in body.get("messages", []):
+            content = message.get("content", "")
+            text += content if isinstance(content, str) else json.dumps(content)
+        return len(text) // 4 + int(body.get("max_tokens") or 1024)
+
+    async def on_request(self, request: httpx.Request):
+        """httpx request hook: admit LLM calls against the shared budget"""
+        # The gateway names the provider; the host map covers other clients
+        provider = request.extensions.get("llm_provider") or self.provider_for(request.url)
+        if not provider or request.method != "POST":
+            return
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            return
+        model = body.get("model", "unknown")
+        estimate = self.estimate_tokens(body)
+        # The gateway takes budget itself before starting its timed attempt
+        if not request.extensions.get("llm_admitted"):
+            await self.acquire(provider, model, estimate)
+        request.extensions["llm_governor"] = (provider, model, estimate, bool(body.get("stream")))
+
+    async def on_response(self, response: httpx.Response):
+        """httpx response hook: reconcile tokens and apply backoff"""
+        ticket = response.request.extensions.get("llm_governor")
+        if not ticket:
+            return
+        provider, model, estimate, stream = ticket
+        actual = None
+        if response.status_code == 200 and not stream:
+            try:
+                await response.aread()
+                usage = response.json().get("usage", {})
+                if provider == "openai":
+                    actual = usage.get("total_tokens")
+                elif usage:
+                    actual = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            except Exception:
+                actual = None
+        await self.record(provider, model, estimate, response.status_code, response.headers, actual)
+
+_governor: Optional[LLMGovernor] = None
+
+def get_llm_governor() -> LLMGovernor:
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor()
+    return _governor
+
+def governed_async_client(**kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient whose LLM requests pass through the governor"""
+    governor = get_llm_governor()
+    hooks = kwargs.pop("event_hooks", {}) or {}
+    kwargs.setdefault("timeout", httpx.Timeout(600.0, connect=5.0))
+    return httpx.AsyncClient(
+        event_hooks={
+            "request": list(hooks.get("request", [])) + [governor.on_request],
+            "response": list(hooks.get("response", [])) + [governor.on_response]
+        },
+        **kwargs
+    )
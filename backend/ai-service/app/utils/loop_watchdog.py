@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Event Loop Watchdog
+A heartbeat coroutine measures loop lag continuously; a watchdog thread notices
+when the heartbeat is overdue and captures the stack of whatever is blocking
+the loop. Offenders are kept in a ring buffer for the admin endpoint.
+
+Strict mode (LOOP_WATCHDOG_STRICT_MS) logs any block longer than the limit as
+an error with its full stack and counts it in the stats; ``strict_loop()`` in
+tests turns such blocks into a BlockingCallDetected failure.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# Frames under this directory are ours; the innermost one names the offender
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class BlockingCallDetected(AssertionError):
+    """Something blocked the event loop longer than strict mode allows"""
+
+    def __init__(self, stalls: List[Dict[str, Any]]):
+        self.stalls = stalls
+        worst = max(stalls, key=lambda stall: stall["duration_ms"])
+        super().__init__(
+            f"{len(stalls)} blocking call(s) on the event loop, worst {worst['duration_ms']:.0f}ms "
+            f"in {worst['culprit']}"
+        )
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold_ms: Optional[float] = None,
+        strict_ms: Optional[float] = None,
+        interval: float = 0.1
+    ):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = (threshold_ms or float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "100"))) / 1000
+        strict = strict_ms if strict_ms is not None else os.getenv("LOOP_WATCHDOG_STRICT_MS")
+        self.strict_ms = float(strict) if strict else None
+        if self.strict_ms is not None:
+            self.threshold = min(self.threshold, self.strict_ms / 1000)
+
+        buffer = int(os.getenv("LOOP_WATCHDOG_BUFFER", "100"))
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=buffer)
+        # Violations since the last check(); bounded, nothing drains it in the service
+        self.violations: Deque[Dict[str, Any]] = deque(maxlen=buffer)
+        self.stalls_total = 0
+        self.violations_total = 0
+        self.max_lag_ms = 0.0
+
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._loop_thread: Optional[int] = None
+        self._stopped = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Must be called from the loop being watched"""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = self.loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+            with self._lock:
+                self._last_beat = now
+                stall, self._pending = self._pending, None
+            if stall is not None:
+                self._record(stall, lag)
+
+    def _watch(self):
+        poll = min(self.threshold / 2, 0.05)
+        while not self._stopped.wait(poll):
+            if self.loop.is_closed():
+                return
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat - self.interval
+                if overdue >= self.threshold and self._pending is None:
+                    # The loop thread is stuck, so its stack is the blocking call
+                    self._pending = self._capture(overdue)
+
+    def _capture(self, overdue: float) -> Dict[str, Any]:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.extract_stack(frame, limit=40) if frame is not None else []
+        task = asyncio.current_task(self.loop)
+        return {
+            "detected_at": time.time(),
+            "detected_after_ms": round(overdue * 1000, 1),
+            "task": task.get_name() if task else None,
+            "coroutine": getattr(task.get_coro(), "__qualname__", None) if task else None,
+            "culprit": self._culprit(stack),
+            "stack": [f"{f.filename}:{f.lineno} in {f.name}: {f.line or ''}".rstrip() for f in stack]
+        }
+
+    @staticmethod
+    def _culprit(stack: traceback.StackSummary) -> str:
+        for f in reversed(stack):
+            if f.filename.startswith(SERVICE_ROOT) and not f.filename.endswith("loop_watchdog.py"):
+                return f"{os.path.relpath(f.filename, SERVICE_ROOT)}:{f.lineno} in {f.name}"
+        return f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}" if stack else "unknown"
+
+    def _record(self, stall: Dict[str, Any], lag: float):
+        # The heartbeat's lag is the block's length, at least what the watchdog saw
+        stall["duration_ms"] = round(max(lag * 1000, stall["detected_after_ms"]), 1)
+        self.stalls.append(stall)
+        self.stalls_total += 1
+        EVENT_LOOP_STALLS.inc()
+        if self.strict_ms is not None and stall["duration_ms"] >= self.strict_ms:
+            self.violations.append(stall)
+            self.violations_total += 1
+            stack = "\n".join(stall["stack"])
+            logger.error(
+                f"Strict mode violation: event loop blocked for {stall['duration_ms']}ms "
+                f"(limit {self.strict_ms:.0f}ms) in {stall['culprit']}\n{stack}"
+            )
+        else:
+            logger.warning(f"Event loop blocked for {stall['duration_ms']}ms in {stall['culprit']}")
+
+    def check(self):
+        """Raise for blocks over the strict limit recorded since the last check"""
+        violations = list(self.violations)
+        self.violations.clear()
+        if violations:
+            raise BlockingCallDetected(violations)
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        recent = list(self.stalls)[-limit:][::-1]
+        return {
+            "pid": os.getpid(),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "strict_ms": self.strict_ms,
+            "stalls_total": self.stalls_total,
+            "strict_violations_total": self.violations_total,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "recent": recent
+        }
+
+_watchdogs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LoopWatchdog]" = weakref.WeakKeyDictionary()
+
+def start_loop_watchdog() -> Optional[LoopWatchdog]:
+    """Watch the running loop (once per loop); disabled by LOOP_WATCHDOG_ENABLED=false"""
+    if os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() != "true":
+        return None
+    loop = asyncio.get_running_loop()
+    if loop not in _watchdogs:
+        watchdog = LoopWatchdog(loop)
+        watchdog.start()
+        _watchdogs[loop] = watchdog
+    return _watchdogs[loop]
+
+def get_loop_watchdog() -> Optional[LoopWatchdog]:
+    try:
+        return _watchdogs.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+
+@contextlib.asynccontextmanager
+async def strict_loop(max_block_ms: float = 50):
+    """``async with strict_loop(50): ...`` fails if anything inside blocks the loop longer"""
+    watchdog = LoopWatchdog(asyncio.get_running_loop(), strict_ms=max_block_ms, interval=0.01)
+    watchdog.start()
+    try:
+        yield watchdog
+        # Let the heartbeat record a block that ended just before the body returned
+        await asyncio.sleep(watchdog.interval * 2)
+    finally:
+        watchdog.stop()
+    watchdog.check()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Service Metrics
+Prometheus metrics for capacity planning: request rate and latency per route,
+LLM calls and tokens, cache hit ratios, rate-limit rejections, upstream HTTP
+pool utilization and event-loop lag (fed by the loop watchdog). When several
+uvicorn workers run, each writes to PROMETHEUS_MULTIPROC_DIR and /metrics
+aggregates all of them
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# Gauges use live* modes so a worker that exits stops counting once it is marked dead
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ["method", "route"], buckets=REQUEST_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", multiprocess_mode="livesum"
+)
+
+LLM_CALLS = Counter(
+    "llm_calls_total", "LLM gateway calls by outcome (ok, cached, error)",
+    ["provider", "model", "call_site", "outcome"]
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by the provider", ["provider", "model", "call_site", "kind"]
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "Upstream LLM request latency per attempt",
+    ["provider", "model", "status"], buckets=LLM_BUCKETS
+)
+LLM_TTFT = Histogram(
+    "llm_time_to_first_token_seconds", "Time to the first streamed token",
+    ["provider", "model"], buckets=LLM_BUCKETS
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by cache, operation and result (hit, miss, bypassed)",
+    ["cache", "operation", "result"]
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ["operation", "kind"]
+)
+
+HTTP_POOL_IN_USE = Gauge(
+    "http_pool_requests_in_flight", "Upstream requests holding or waiting for a pooled connection",
+    ["pool"], multiprocess_mode="livesum"
+)
+HTTP_POOL_CAPACITY = Gauge(
+    "http_pool_max_connections", "Configured connection limit of the pool",
+    ["pool"], multiprocess_mode="livesum"
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a scheduled wakeup", buckets=LAG_BUCKETS
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Blocking calls caught by the loop watchdog"
+)
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+def prepare_multiprocess_dir(workers: int):
+    """Point the workers at a fresh shared directory; call before uvicorn forks them"""
+    if workers <= 1:
+        return
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "ai-service-metrics")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    # Files left by a previous run would be summed into this one
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition of every worker's metrics (or this process's when single-process)"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+if multiprocess_enabled():
+    atexit.register(lambda: multiprocess.mark_process_dead(os.getpid()))
+
+def record_cache_lookup(cache: str, operation: str, result: str):
+    CACHE_LOOKUPS.labels(cache, operation, result).inc()
+
+def record_llm_call(provider: str, model: str, call_site: str, outcome: str, usage: Optional[Dict[str, int]] = None):
+    LLM_CALLS.labels(provider, model, call_site, outcome).inc()
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = (usage or {}).get(kind, 0)
+        if tokens:
+            LLM_TOKENS.labels(provider, model, call_site, kind.split("_")[0]).inc(tokens)
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives the pool slot back when it is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+        self.released = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.released:
+                self.released = True
+                self.release()
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """httpx transport reporting how much of its connection pool is in use"""
+
+    def __init__(self, pool: str, limits: httpx.Limits, **kwargs):
+        self.transport = httpx.AsyncHTTPTransport(limits=limits, **kwargs)
+        self.in_flight = HTTP_POOL_IN_USE.labels(pool)
+        HTTP_POOL_CAPACITY.labels(pool).set(limits.max_connections or 0)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight.inc()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            self.in_flight.dec()
+            raise
+        # The connection stays checked out until the body is read or closed
+        response.stream = _ReleasingStream(response.stream, self.in_flight.dec)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class MetricsMiddleware:
+    """ASGI middleware recording rate and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            # Templates, not raw paths, keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(scope["method"], route, str(status["code"])).inc()
+            HTTP_LATENCY.labels(scope["method"], route).observe(time.perf_counter() - started)
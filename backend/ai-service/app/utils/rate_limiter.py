@@ -6,13 +6,20 @@ Implements rate limiting for API endpoints and AI operations
 
 import asyncio
 import logging
+import math
+import random
 import time
-from typing import Dict, List, Optional, Any
-import redis
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 import os
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
+from app.utils.connections import get_redis_client
+from app.utils.metrics import RATE_LIMIT_REJECTIONS
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +29,93 @@ class RateLimitType(Enum):
     PER_DAY = "per_day"
     CONCURRENT = "concurrent"
 
+class RateLimitAlgorithm(Enum):
+    SLIDING_LOG = "sliding_log"  # exact, one sorted-set entry per request
+    GCRA = "gcra"                # token bucket as a single timestamp per key
+
 @dataclass
 class RateLimit:
     limit: int
     window: int  # seconds
     limit_type: RateLimitType
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_LOG
+
+# Evaluates every limit first and records the request only if all of them
+# pass, so a denied request never consumes quota. Uses server time so that
+# workers with skewed clocks agree.
+#
+# KEYS: one key per limit
+# ARGV: member, then (algorithm, limit, window_ms) per key
+# Returns: {allowed, remaining_1, retry_after_ms_1, reset_ms_1, ...}
+MULTI_LIMIT_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local member = ARGV[1]
+local allowed = 1
+local state = {}
+
+for i, key in ipairs(KEYS) do
+    local base = 2 + (i - 1) * 3
+    local algorithm = ARGV[base]
+    local limit = tonumber(ARGV[base + 1])
+    local window = tonumber(ARGV[base + 2])
+    local remaining, retry_after, reset, extra
+
+    if algorithm == 'gcra' then
+        local interval = window / limit
+        local tat = tonumber(redis.call('GET', key) or now)
+        if tat < now then tat = now end
+        local new_tat = tat + interval
+        local allow_at = new_tat - window
+        if now < allow_at then
+            allowed = 0
+            remaining = 0
+            retry_after = math.ceil(allow_at - now)
+        else
+            remaining = math.floor((window - (new_tat - now)) / interval)
+            retry_after = 0
+        end
+        reset = math.ceil(tat - now)
+        extra = new_tat
+    else
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        local count = redis.call('ZCARD', key)
+        if count >= limit then
+            allowed = 0
+            remaining = 0
+            local blocking = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+            retry_after = math.max(math.ceil(tonumber(blocking[2]) + window - now), 1)
+        else
+            remaining = limit - count - 1
+            retry_after = 0
+        end
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        if oldest[2] then
+            reset = math.ceil(tonumber(oldest[2]) + window - now)
+        else
+            reset = window
+        end
+    end
+    state[i] = {algorithm, window, remaining, retry_after, reset, extra}
+end
+
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local s = state[i]
+    if allowed == 1 then
+        if s[1] == 'gcra' then
+            redis.call('SET', key, tostring(s[6]), 'PX', math.max(math.ceil(s[6] - now), 1))
+        else
+            redis.call('ZADD', key, now, member)
+            redis.call('PEXPIRE', key, s[2])
+        end
+    end
+    table.insert(result, s[3])
+    table.insert(result, s[4])
+    table.insert(result, s[5])
+end
+return result
+"""
 
 @dataclass
 class RateLimitStatus:
@@ -35,10 +124,178 @@ class RateLimitStatus:
     reset_time: datetime
     retry_after: Optional[int] = None
 
+class ConcurrentLimitExceeded(Exception):
+    """No concurrent slot became free within the allowed wait"""
+
+    def __init__(self, operation: str, queue_position: int = 0, retry_after: int = 1):
+        super().__init__(f"Concurrent limit exceeded for {operation}")
+        self.operation = operation
+        self.queue_position = queue_position
+        self.retry_after = retry_after
+
+# Lease semaphore. KEYS: holders zset (member -> lease expiry ms), FIFO queue
+# zset (member -> arrival ms), waiters zset (member -> last poll ms).
+# ARGV: holder, limit, lease_ms, waiter_ttl_ms. Returns {acquired, position}.
+LEASE_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local holder = ARGV[1]
+local limit = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local waiter_ttl = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now - waiter_ttl)
+for _, waiter in ipairs(stale) do
+    redis.call('ZREM', KEYS[2], waiter)
+    redis.call('ZREM', KEYS[3], waiter)
+end
+
+if redis.call('ZSCORE', KEYS[1], holder) then
+    redis.call('ZADD', KEYS[1], now + lease, holder)
+    return {1, 0}
+end
+
+redis.call('ZADD', KEYS[2], 'NX', now, holder)
+redis.call('ZADD', KEYS[3], now, holder)
+local position = redis.call('ZRANK', KEYS[2], holder)
+local free = limit - redis.call('ZCARD', KEYS[1])
+
+if position < free then
+    redis.call('ZREM', KEYS[2], holder)
+    redis.call('ZREM', KEYS[3], holder)
+    redis.call('ZADD', KEYS[1], now + lease, holder)
+    redis.call('PEXPIRE', KEYS[1], lease * 2)
+    return {1, 0}
+end
+
+redis.call('PEXPIRE', KEYS[2], waiter_ttl * 2)
+redis.call('PEXPIRE', KEYS[3], waiter_ttl * 2)
+return {0, position}
+"""
+
+LEASE_RENEW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local expiry = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not expiry or tonumber(expiry) <= now then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+return 1
+"""
+
+class WindowCounterStore:
+    """Fixed-capacity in-process limiter state with LRU eviction of idle keys.
+
+    Each key owns one slot in parallel arrays: a two-bucket sliding-window
+    counter (previous bucket weighted by its overlap with the window) or a
+    GCRA theoretical arrival time. Checks are O(1) and memory is bounded by
+    ``capacity`` regardless of traffic or key cardinality.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+        self.free = list(range(capacity - 1, -1, -1))
+        self.bucket = array('q', [0]) * capacity
+        self.current = array('l', [0]) * capacity
+        self.previous = array('l', [0]) * capacity
+        self.tat = array('d', [0.0]) * capacity
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _slot(self, key: str, create: bool) -> Optional[int]:
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.slots.move_to_end(key)
+            return slot
+        if not create:
+            return None
+        if self.free:
+            slot = self.free.pop()
+        else:
+            # Evict the least recently used key and reuse its slot
+            _, slot = self.slots.popitem(last=False)
+            self.evictions += 1
+        self.bucket[slot] = 0
+        self.current[slot] = 0
+        self.previous[slot] = 0
+        self.tat[slot] = 0.0
+        self.slots[key] = slot
+        return slot
+
+    def check(self, key: str, limit: "RateLimit", now: float, record: bool = True) -> Tuple[bool, int, float, float]:
+        """Return (allowed, remaining, retry_after, reset_after) in seconds"""
+        slot = self._slot(key, create=True)
+        window = float(limit.window)
+
+        if limit.algorithm == RateLimitAlgorithm.GCRA:
+            interval = window / limit.limit
+            tat = max(self.tat[slot], now)
+            new_tat = tat + interval
+            allow_at = new_tat - window
+            if now < allow_at:
+                return False, 0, allow_at - now, tat - now
+            if record:
+                self.tat[slot] = new_tat
+            return True, int((window - (new_tat - now)) // interval), 0.0, new_tat - now
+
+        bucket = int(now // window)
+        if self.bucket[slot] != bucket:
+            self.previous[slot] = self.current[slot] if self.bucket[slot] == bucket - 1 else 0
+            self.current[slot] = 0
+            self.bucket[slot] = bucket
+
+        elapsed = now - bucket * window
+        previous, current = self.previous[slot], self.current[slot]
+        estimate = previous * (1 - elapsed / window) + current
+        reset_after = window - elapsed + (window if current else 0)
+
+        if estimate + 1 > limit.limit:
+            if current + 1 > limit.limit:
+                # Wait into the next bucket, where this bucket becomes "previous"
+                retry_after = window - elapsed + window * (1 - (limit.limit - 1) / current)
+            elif not previous:
+                retry_after = window - elapsed
+            else:
+                # Point where the decaying previous bucket leaves room for one more
+                retry_after = window * (1 - (limit.limit - 1 - current) / previous) - elapsed
+            return False, 0, max(retry_after, 1.0), reset_after
+
+        if record:
+            self.current[slot] = current + 1
+        return True, int(limit.limit - estimate - 1), 0.0, reset_after
+
+    def usage(self, key: str, limit: "RateLimit", now: float) -> int:
+        slot = self._slot(key, create=False)
+        if slot is None:
+            return 0
+        window = float(limit.window)
+        if limit.algorithm == RateLimitAlgorithm.GCRA:
+            return math.ceil(max(0.0, self.tat[slot] - now) / (window / limit.limit))
+        bucket = int(now // window)
+        if self.bucket[slot] == bucket:
+            previous, current = self.previous[slot], self.current[slot]
+        elif self.bucket[slot] == bucket - 1:
+            previous, current = self.current[slot], 0
+        else:
+            return 0
+        return math.ceil(previous * (1 - (now - bucket * window) / window) + current)
+
+    def delete(self, key: str):
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.free.append(slot)
+
 class RateLimiter:
     def __init__(self):
         self.redis_client = None
         self.memory_store = {}
+        self.window_store = WindowCounterStore(int(os.getenv("RATE_LIMIT_MEMORY_KEYS", "100000")))
         
         # Initialize Redis connection
         self._init_redis()
@@ -46,7 +303,7 @@ class RateLimiter:
         # Default rate limits
         self.default_limits = {
             # General API limits
-            "default": RateLimit(100, 3600, RateLimitType.PER_HOUR),  # 100 per hour
+            "default": RateLimit(int(os.getenv("RATE_LIMIT_PER_HOUR", "100")), 3600, RateLimitType.PER_HOUR),
             "analysis": RateLimit(20, 3600, RateLimitType.PER_HOUR),   # 20 analyses per hour
             "generation": RateLimit(10, 3600, RateLimitType.PER_HOUR), # 10 generations per hour
             
@@ -59,28 +316,32 @@ class RateLimiter:
             "market_analysis": RateLimit(20, 3600, RateLimitType.PER_HOUR),
             
             # Burst limits (per minute)
-            "burst": RateLimit(10, 60, RateLimitType.PER_MINUTE),
+            "burst": RateLimit(int(os.getenv("RATE_LIMIT_PER_MINUTE", "10")), 60, RateLimitType.PER_MINUTE),
             
             # Concurrent operation limits
-            "concurrent_analysis": RateLimit(3, 0, RateLimitType.CONCURRENT),
+            # Per end user; size for the deployment with CONCURRENT_ANALYSIS_LIMIT
+            "concurrent_analysis": RateLimit(int(os.getenv("CONCURRENT_ANALYSIS_LIMIT", "3")), 0, RateLimitType.CONCURRENT),
         }
+        # Concurrent slots are leases: a crashed worker's slot frees itself
+        # after lease_ttl_ms unless the holder keeps renewing it
+        self.lease_ttl_ms = int(float(os.getenv("CONCURRENT_LEASE_SECONDS", "30")) * 1000)
+        self.lease_wait_seconds = float(os.getenv("CONCURRENT_WAIT_SECONDS", "10"))
+        self.waiter_ttl_ms = 2000
+        
+        self._multi_limit_script = None
+        self._lease_scripts = {}
+        if self.redis_client:
+            self._multi_limit_script = self.redis_client.register_script(MULTI_LIMIT_LUA)
+            self._lease_scripts = {
+                "acquire": self.redis_client.register_script(LEASE_ACQUIRE_LUA),
+                "renew": self.redis_client.register_script(LEASE_RENEW_LUA)
+            }
 
     def _init_redis(self):
         """Initialize Redis connection for distributed rate limiting"""
-        try:
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            # Test connection
-            self.redis_client.ping()
-            logger.info("Redis rate limiter connected successfully")
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {str(e)}. Using memory-based rate limiting.")
-            self.redis_client = None
+        self.redis_client = get_redis_client()
+        if not self.redis_client:
+            logger.warning("Redis unavailable. Using memory-based rate limiting.")
 
     async def check_limit(
         self,
@@ -110,108 +371,123 @@ class RateLimiter:
         if limit.limit_type == RateLimitType.CONCURRENT:
             return await self._check_concurrent_limit(identifier, operation, limit)
         else:
-            return await self._check_time_window_limit(identifier, operation, limit)
+            statuses = await self._check_time_window_limits(identifier, [(operation, limit)])
+            return statuses[operation]
+
+    @traced("ratelimit.check")
+    async def check_limits(self, identifier: str, operations: List[str]) -> RateLimitStatus:
+        """Check several time-window limits atomically (e.g. burst + hourly + per-operation).
+
+        The request is counted against every limit only if all of them allow it.
+        """
+        try:
+            checks = [
+                (operation, self.default_limits.get(operation, self.default_limits["default"]))
+                for operation in dict.fromkeys(operations)
+            ]
+            checks = [(op, limit) for op, limit in checks if limit.limit_type != RateLimitType.CONCURRENT]
+            if not checks:
+                return RateLimitStatus(allowed=True, remaining=0, reset_time=datetime.now())
+            statuses = await self._check_time_window_limits(identifier, checks)
+            return self._combine_statuses(list(statuses.values()))
+        except Exception as e:
+            logger.error(f"Rate limit check failed: {str(e)}")
+            return RateLimitStatus(allowed=True, remaining=0, reset_time=datetime.now())
+
+    @staticmethod
+    def _combine_statuses(statuses: List[RateLimitStatus]) -> RateLimitStatus:
+        allowed = all(status.allowed for status in statuses)
+        retry_after = [status.retry_after for status in statuses if status.retry_after]
+        return RateLimitStatus(
+            allowed=allowed,
+            remaining=min(status.remaining for status in statuses),
+            reset_time=max(status.reset_time for status in statuses),
+            retry_after=max(retry_after) if retry_after and not allowed else None
+        )
 
-    async def _check_time_window_limit(
+    async def _check_time_window_limits(
         self,
         identifier: str,
-        operation: str,
-        limit: RateLimit
-    ) -> RateLimitStatus:
+        checks: List[Tuple[str, RateLimit]]
+    ) -> Dict[str, RateLimitStatus]:
         """Check time-window based rate limits"""
         
-        current_time = int(time.time())
-        window_start = current_time - limit.window
-        key = f"rate_limit:{operation}:{identifier}"
+        keys = [f"rate_limit:{operation}:{identifier}" for operation, _ in checks]
+        limits = [limit for _, limit in checks]
         
         if self.redis_client:
-            return await self._redis_time_window_check(key, limit, current_time, window_start)
+            statuses = await self._redis_time_window_check(keys, limits)
         else:
-            return await self._memory_time_window_check(key, limit, current_time, window_start)
+            statuses = await self._memory_time_window_check(keys, limits, time.time())
+        if not all(status.allowed for status in statuses):
+            # Attribute the rejection to the exhausted limits, not every limit checked
+            exhausted = [op for (op, _), status in zip(checks, statuses) if status.retry_after] or [checks[0][0]]
+            for operation in exhausted:
+                RATE_LIMIT_REJECTIONS.labels(operation, "window").inc()
+        return {operation: status for (operation, _), status in zip(checks, statuses)}
 
     async def _redis_time_window_check(
         self,
-        key: str,
-        limit: RateLimit,
-        current_time: int,
-        window_start: int
-    ) -> RateLimitStatus:
-        """Redis-based time window rate limiting"""
+        keys: List[str],
+        limits: List[RateLimit]
+    ) -> List[RateLimitStatus]:
+        """Redis-based time window rate limiting, one EVALSHA round trip"""
         
         try:
-            pipe = self.redis_client.pipeline()
-            
-            # Remove old entries
-            pipe.zremrangebyscore(key, 0, window_start)
-            
-            # Count current entries
-            pipe.zcard(key)
-            
-            # Add current request
-            pipe.zadd(key, {str(current_time): current_time})
-            
-            # Set expiration
-            pipe.expire(key, limit.window)
-            
-            results = pipe.execute()
-            current_count = results[1]
-            
-            # Check if within limit
-            allowed = current_count < limit.limit
-            remaining = max(0, limit.limit - current_count - (1 if allowed else 0))
-            
-            if not allowed:
-                # Remove the request we just added since it's not allowed
-                self.redis_client.zrem(key, str(current_time))
+            # Unique member so requests in the same millisecond are all counted
+            args = [f"{time.time_ns()}-{uuid.uuid4().hex}"]
+            for limit in limits:
+                args.extend([limit.algorithm.value, limit.limit, limit.window * 1000])
             
-            reset_time = datetime.fromtimestamp(current_time + limit.window)
-            retry_after = limit.window if not allowed else None
+            result = await asyncio.to_thread(self._multi_limit_script, keys=keys, args=args)
+            allowed = bool(result[0])
+            now = time.time()
             
-            return RateLimitStatus(
-                allowed=allowed,
-                remaining=remaining,
-                reset_time=reset_time,
-                retry_after=retry_after
-            )
+            statuses = []
+            for i in range(len(limits)):
+                remaining, retry_after_ms, reset_ms = result[1 + i * 3:4 + i * 3]
+                statuses.append(RateLimitStatus(
+                    allowed=allowed,
+                    remaining=max(0, int(remaining)),
+                    reset_time=datetime.fromtimestamp(now + int(reset_ms) / 1000),
+                    retry_after=math.ceil(int(retry_after_ms) / 1000) if int(retry_after_ms) > 0 else None
+                ))
+            return statuses
             
         except Exception as e:
             logger.error(f"Redis rate limit check failed: {str(e)}")
             # Fallback to memory check
-            return await self._memory_time_window_check(key, limit, current_time, window_start)
+            return await self._memory_time_window_check(keys, limits, time.time())
 
     async def _memory_time_window_check(
         self,
-        key: str,
-        limit: RateLimit,
-        current_time: int,
-        window_start: int
-    ) -> RateLimitStatus:
+        keys: List[str],
+        limits: List[RateLimit],
+        current_time: float
+    ) -> List[RateLimitStatus]:
         """Memory-based time window rate limiting"""
         
-        if key not in self.memory_store:
-            self.memory_store[key] = []
-        
-        timestamps = self.memory_store[key]
-        
-        # Remove old entries
-        timestamps[:] = [ts for ts in timestamps if ts > window_start]
-        
-        # Check if within limit
-        allowed = len(timestamps) < limit.limit
-        remaining = max(0, limit.limit - len(timestamps) - (1 if allowed else 0))
-        
+        # Peek every limit first so a denied request consumes nothing
+        checks = [
+            self.window_store.check(key, limit, current_time, record=False)
+            for key, limit in zip(keys, limits)
+        ]
+        allowed = all(check[0] for check in checks)
         if allowed:
-            timestamps.append(current_time)
+            checks = [
+                self.window_store.check(key, limit, current_time)
+                for key, limit in zip(keys, limits)
+            ]
         
-        reset_time = datetime.fromtimestamp(current_time + limit.window)
-        retry_after = limit.window if not allowed else None
-        
-        return RateLimitStatus(
-            allowed=allowed,
-            remaining=remaining,
-            reset_time=reset_time,
-            retry_after=retry_after
-        )
+        return [
+            RateLimitStatus(
+                allowed=allowed,
+                remaining=max(0, remaining) if allowed else 0,
+                reset_time=datetime.fromtimestamp(current_time + reset_after),
+                retry_after=math.ceil(retry_after) if retry_after > 0 else None
+            )
+            for _, remaining, retry_after, reset_after in checks
+        ]
 
     async def _check_concurrent_limit(
         self,
@@ -221,13 +497,16 @@ class RateLimiter:
     ) -> RateLimitStatus:
         """Check concurrent operation limits"""
         
+        # Limits are named "concurrent_<operation>"; leases are keyed by operation
+        if operation.startswith("concurrent_"):
+            operation = operation[len("concurrent_"):]
         key = f"concurrent:{operation}:{identifier}"
+        now_ms = time.time() * 1000
         
         if self.redis_client:
             try:
-                current_count = self.redis_client.get(key) or 0
-                current_count = int(current_count)
-                
+                # Only unexpired leases count; single read, no mutation
+                current_count = await asyncio.to_thread(self.redis_client.zcount, key, now_ms, "+inf")
                 allowed = current_count < limit.limit
                 remaining = max(0, limit.limit - current_count - (1 if allowed else 0))
                 
@@ -242,7 +521,8 @@ class RateLimiter:
                 logger.error(f"Redis concurrent check failed: {str(e)}")
         
         # Memory fallback
-        current_count = self.memory_store.get(key, 0)
+        holders = self.memory_store.get(key, {})
+        current_count = sum(1 for expiry in holders.values() if expiry > now_ms)
         allowed = current_count < limit.limit
         remaining = max(0, limit.limit - current_count - (1 if allowed else 0))
         
@@ -253,52 +533,87 @@ class RateLimiter:
             retry_after=None
         )
 
-    async def acquire_concurrent_slot(self, identifier: str, operation: str) -> bool:
-        """Acquire a slot for concurrent operations"""
+    def _concurrent_limit_for(self, operation: str) -> RateLimit:
+        return self.default_limits.get(f"concurrent_{operation}", self.default_limits["concurrent_analysis"])
+
+    @traced("ratelimit.acquire_lease")
+    async def try_acquire_lease(self, identifier: str, operation: str, holder_id: str) -> Tuple[bool, int]:
+        """One fair acquisition attempt; returns (acquired, position in queue)"""
         
-        limit = self.default_limits.get(f"concurrent_{operation}", self.default_limits.get("concurrent_analysis"))
+        limit = self._concurrent_limit_for(operation)
         key = f"concurrent:{operation}:{identifier}"
         
         if self.redis_client:
             try:
-                current = self.redis_client.incr(key)
-                if current > limit.limit:
-                    self.redis_client.decr(key)
-                    return False
-                
-                # Set expiration to prevent stuck counters
-                self.redis_client.expire(key, 3600)  # 1 hour max
-                return True
-                
+                # Callers poll this; keep the blocking round trip off the event loop
+                result = await asyncio.to_thread(
+                    self._lease_scripts["acquire"],
+                    keys=[key, f"{key}:queue", f"{key}:waiters"],
+                    args=[holder_id, limit.limit, self.lease_ttl_ms, self.waiter_ttl_ms]
+                )
+                return bool(result[0]), int(result[1])
             except Exception as e:
                 logger.error(f"Redis concurrent acquisition failed: {str(e)}")
         
-        # Memory fallback
-        current = self.memory_store.get(key, 0)
-        if current >= limit.limit:
-            return False
+        # Memory fallback, same FIFO semantics within this process
+        now_ms = time.time() * 1000
+        holders = self.memory_store.setdefault(key, {})
+        queue = self.memory_store.setdefault(f"{key}:queue", OrderedDict())
+        for holder, expiry in list(holders.items()):
+            if expiry <= now_ms:
+                del holders[holder]
+        for waiter, last_seen in list(queue.items()):
+            if last_seen <= now_ms - self.waiter_ttl_ms:
+                del queue[waiter]
+        
+        if holder_id in holders:
+            holders[holder_id] = now_ms + self.lease_ttl_ms
+            return True, 0
+        queue[holder_id] = now_ms
+        position = list(queue).index(holder_id)
+        if position < limit.limit - len(holders):
+            del queue[holder_id]
+            holders[holder_id] = now_ms + self.lease_ttl_ms
+            return True, 0
+        return False, position
+
+    async def renew_lease(self, identifier: str, operation: str, holder_id: str) -> bool:
+        """Heartbeat: push the lease expiry forward; False if the lease was lost"""
         
-        self.memory_store[key] = current + 1
+        key = f"concurrent:{operation}:{identifier}"
+        
+        if self.redis_client:
+            try:
+                return bool(await asyncio.to_thread(
+                    self._lease_scripts["renew"], keys=[key], args=[holder_id, self.lease_ttl_ms]
+                ))
+            except Exception as e:
+                logger.error(f"Redis lease renewal failed: {str(e)}")
+        
+        holders = self.memory_store.get(key, {})
+        if holder_id not in holders:
+            return False
+        holders[holder_id] = time.time() * 1000 + self.lease_ttl_ms
         return True
 
-    async def release_concurrent_slot(self, identifier: str, operation: str):
-        """Release a slot for concurrent operations"""
+    async def release_lease(self, identifier: str, operation: str, holder_id: str):
+        """Release a lease or abandon a queued acquisition"""
         
         key = f"concurrent:{operation}:{identifier}"
         
         if self.redis_client:
             try:
-                current = self.redis_client.get(key)
-                if current and int(current) > 0:
-                    self.redis_client.decr(key)
+                pipe = self.redis_client.pipeline()
+                pipe.zrem(key, holder_id)
+                pipe.zrem(f"{key}:queue", holder_id)
+                pipe.zrem(f"{key}:waiters", holder_id)
+                await asyncio.to_thread(pipe.execute)
             except Exception as e:
                 logger.error(f"Redis concurrent release failed: {str(e)}")
         
         # Memory fallback
-        if key in self.memory_store:
-            self.memory_store[key] = max(0, self.memory_store[key] - 1)
-            if self.memory_store[key] == 0:
-                del self.memory_store[key]
+        self.memory_store.get(key, {}).pop(holder_id, None)
+        self.memory_store.get(f"{key}:queue", {}).pop(holder_id, None)
 
     async def get_usage_stats(self, identifier: str) -> Dict[str, Any]:
         """Get usage statistics for an identifier"""
@@ -315,18 +630,23 @@ class RateLimiter:
             
             if self.redis_client:
                 try:
-                    # Remove old entries and count current
-                    pipe = self.redis_client.pipeline()
-                    pipe.zremrangebyscore(key, 0, window_start)
-                    pipe.zcard(key)
-                    results = pipe.execute()
-                    current_usage = results[1]
+                    if limit.algorithm == RateLimitAlgorithm.GCRA:
+                        # Outstanding emission intervals ahead of now
+                        tat = float(await asyncio.to_thread(self.redis_client.get, key) or 0)
+                        interval = limit.window * 1000 / limit.limit
+                        current_usage = math.ceil(max(0.0, tat - time.time() * 1000) / interval)
+                    else:
+                        # Remove old entries and count current
+                        pipe = self.redis_client.pipeline()
+                        pipe.zremrangebyscore(key, 0, window_start * 1000)
+                        pipe.zcard(key)
+                        results = await asyncio.to_thread(pipe.execute)
+                        current_usage = results[1]
                 except Exception as e:
                     logger.error(f"Redis stats failed: {str(e)}")
                     current_usage = 0
             else:
-                timestamps = self.memory_store.get(key, [])
-                current_usage = len([ts for ts in timestamps if ts > window_start])
+                current_usage = self.window_store.usage(key, limit, time.time())
             
             stats[operation] = {
                 "used": current_usage,
@@ -352,15 +672,14 @@ class RateLimiter:
         if self.redis_client:
             try:
                 if keys:
-                    self.redis_client.delete(*keys)
+                    await asyncio.to_thread(self.redis_client.delete, *keys)
                 logger.info(f"Reset Redis limits for {identifier}, operation: {operation}")
             except Exception as e:
                 logger.error(f"Redis reset failed: {str(e)}")
         
         # Reset memory store
         for key in keys:
-            if key in self.memory_store:
-                del self.memory_store[key]
+            self.window_store.delete(key)
         
         logger.info(f"Reset memory limits for {identifier}, operation: {operation}")
 
@@ -380,29 +699,60 @@ class RateLimiter:
 
     # Context manager for concurrent operations
     class ConcurrentLimitContext:
-        def __init__(self, rate_limiter, identifier: str, operation: str):
+        def __init__(self, rate_limiter, identifier: str, operation: str, wait_timeout: Optional[float] = None):
             self.rate_limiter = rate_limiter
             self.identifier = identifier
             self.operation = operation
+            self.wait_timeout = rate_limiter.lease_wait_seconds if wait_timeout is None else wait_timeout
+            self.holder_id = uuid.uuid4().hex
             self.acquired = False
+            self._heartbeat = None
 
         async def __aenter__(self):
-            self.acquired = await self.rate_limiter.acquire_concurrent_slot(
-                self.identifier, self.operation
-            )
-            if not self.acquired:
-                raise Exception(f"Concurrent limit exceeded for {self.operation}")
+            deadline = time.monotonic() + self.wait_timeout
+            delay = 0.05
+            try:
+                while True:
+                    self.acquired, position = await self.rate_limiter.try_acquire_lease(
+                        self.identifier, self.operation, self.holder_id
+                    )
+                    if self.acquired:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        RATE_LIMIT_REJECTIONS.labels(self.operation, "concurrent").inc()
+                        raise ConcurrentLimitExceeded(self.operation, position, retry_after=1)
+                    # Polling keeps our queue entry alive; back off up to 0.5s
+                    await asyncio.sleep(min(delay * (0.5 + random.random()), remaining))
+                    delay = min(delay * 2, 0.5)
+            except BaseException:
+                if not self.acquired:
+                    await self.rate_limiter.release_lease(self.identifier, self.operation, self.holder_id)
+                raise
+            
+            self._heartbeat = asyncio.create_task(self._renew())
             return self
 
+        async def _renew(self):
+            """Keep the lease alive while a long LLM call is in flight"""
+            interval = self.rate_limiter.lease_ttl_ms / 3000
+            while True:
+                await asyncio.sleep(interval)
+                if not await self.rate_limiter.renew_lease(self.identifier, self.operation, self.holder_id):
+                    logger.warning(f"Concurrent lease lost for {self.operation}")
+                    return
+
         async def __aexit__(self, exc_type, exc_val, exc_tb):
+            if self._heartbeat:
+                self._heartbeat.cancel()
             if self.acquired:
-                await self.rate_limiter.release_concurrent_slot(
-                    self.identifier, self.operation
+                await self.rate_limiter.release_lease(
+                    self.identifier, self.operation, self.holder_id
                 )
 
-    def concurrent_limit(self, identifier: str, operation: str):
+    def concurrent_limit(self, identifier: str, operation: str, wait_timeout: Optional[float] = None):
         """Context manager for concurrent operations"""
-        return self.ConcurrentLimitContext(self, identifier, operation)
+        return self.ConcurrentLimitContext(self, identifier, operation, wait_timeout)
 
 # Decorator for automatic rate limiting
 def rate_limited(operation: str, identifier_key: str = "api_key"):
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Semantic Response Cache
+Serves chat answers for near-duplicate questions: entries are bucketed by
+(role, intent, normalized entities) and matched by sentence-embedding similarity
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.embedding_service import EmbeddingService
+from app.utils.connections import get_redis_client
+from app.utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    """Near-duplicate chat answer cache shared through Redis when available"""
+
+    # Only general-knowledge intents are cached. Intents that fetch user or
+    # institution data (job_search, candidate_search, at_risk_students, ...)
+    # and context-dependent ones (clarification, unknown) are never cached.
+    # Callers only store first-turn answers: buckets are shared across users,
+    # and later answers are written from one user's conversation.
+    intent_ttls = {
+        "greeting": 604800,
+        "help": 604800,
+        "partnership_info": 604800,
+        "education_info": 86400,
+        "career_advice": 86400,
+        "profile_build": 86400,
+        "project_help": 86400,
+        "job_posting_help": 86400,
+        "skill_analysis": 21600,
+        "market_intelligence": 21600,
+        "company_trends": 21600
+    }
+
+    def __init__(self, embedding_service: EmbeddingService, shared: bool = True):
+        self.embedding_service = embedding_service
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.max_entries_per_bucket = int(os.getenv("SEMANTIC_CACHE_BUCKET_SIZE", "200"))
+        self.max_buckets = 5000
+        self.intent_ttls = dict(self.intent_ttls)
+        self.intent_ttls.update(json.loads(os.getenv("SEMANTIC_CACHE_TTLS") or "{}"))
+
+        # bucket -> entries; each entry is {vector, message, response, suggested_actions, expires_at}
+        self.buckets: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.redis_client = None
+        if shared:
+            self._init_redis()
+        # Replaced by the replay harness to simulate TTLs on recorded traffic
+        self.clock = time.time
+        self.metrics: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "stores": 0}
+        )
+
+    def _init_redis(self):
+        """Initialize Redis connection"""
+        self.redis_client = get_redis_client()
+        if not self.redis_client:
+            logger.warning("Redis unavailable. Semantic cache is per process.")
+
+    def cacheable(self, intent: str) -> bool:
+        return self.intent_ttls.get(intent, 0) > 0
+
+    @staticmethod
+    def normalize_entities(entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Case-fold and sort entity values so equivalent extractions share a bucket"""
+        normalized = {}
+        for key, value in (entities or {}).items():
+            if value in (None, "", [], {}):
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = sorted({str(v).strip().lower() for v in value if str(v).strip()})
+            elif isinstance(value, str):
+                value = " ".join(value.lower().split())
+            normalized[str(key).lower()] = value
+        return normalized
+
+    def bucket_key(self, role: str, intent: str, entities: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [role, intent, self.normalize_entities(entities)], sort_keys=True, default=str
+        )
+        return f"chat_cache:{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    async def lookup(
+        self,
+        role: str,
+        intent: str,
+        entities: Dict[str, Any],
+        message: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return the closest cached answer above the similarity threshold"""
+        if not self.cacheable(intent):
+            return None
+        key = self.bucket_key(role, intent, entities)
+        vector = (await self.embedding_service.aencode([message]))[0]
+
+        match = self._best_match(self._live_entries(key), vector)
+        if match is None and self.redis_client:
+            # LRANGE plus JSON/base64 decoding of up to a full bucket: off the event loop
+            remote = await asyncio.to_thread(self._load_redis, key)
+            if remote:
+                self._merge_entries(key, remote)
+                match = self._best_match(self._live_entries(key), vector)
+
+        if match is None:
+            self.metrics[intent]["misses"] += 1
+            record_cache_lookup("semantic", intent, "miss")
+            return None
+        entry, similarity = match
+        self.metrics[intent]["hits"] += 1
+        record_cache_lookup("semantic", intent, "hit")
+        return {
+            "message": entry["response"],
+            "suggested_actions": entry.get("suggested_actions", []),
+            "similarity": similarity,
+            "matched_message": entry["message"]
+        }
+
+    async def store(
+        self,
+        role: str,
+        intent: str,
+        entities: Dict[str, Any],
+        message: str,
+        response: str,
+        suggested_actions: Optional[List[Dict[str, str]]] = None
+    ):
+        if not self.cacheable(intent) or not response:
+            return
+        key = self.bucket_key(role, intent, entities)
+        ttl = self.intent_ttls[intent]
+        vector = (await self.embedding_service.aencode([message]))[0]
+        entry = {
+            "vector": vector.astype(np.float32),
+            "message": message,
+            "response": response,
+            "suggested_actions": suggested_actions or [],
+            "expires_at": self.clock() + ttl
+        }
+        self._merge_entries(key, [entry])
+        self.metrics[intent]["stores"] += 1
+
+        if self.redis_client:
+            await asyncio.to_thread(self._store_redis, key, entry, ttl)
+
+    def _best_match(self, entries: List[Dict[str, Any]], vector: np.ndarray):
+        if not entries:
+            return None
+        matrix = np.stack([entry["vector"] for entry in entries])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return entries[best], float(similarities[best])
+
+    def _live_entries(self, key: str) -> List[Dict[str, Any]]:
+        entries = self.buckets.get(key)
+        if not entries:
+            return []
+        now = self.clock()
+        live = [entry for entry in entries if entry["expires_at"] > now]
+        if len(live) != len(entries):
+            self.buckets[key] = live
+        self.buckets.move_to_end(key)
+        return live
+
+    def _merge_entries(self, key: str, new_entries: List[Dict[str, Any]]):
+        entries = self.buckets.get(key, [])
+        seen = {entry["message"] for entry in entries}
+        entries = [entry for entry in new_entries if entry["message"] not in seen] + entries
+        self.buckets[key] = entries[:self.max_entries_per_bucket]
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+
+    def _store_redis(self, key: str, entry: Dict[str, Any], ttl: int):
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.lpush(key, self._serialize(entry))
+            pipe.ltrim(key, 0, self.max_entries_per_bucket - 1)
+            pipe.expire(key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Semantic cache Redis store failed: {str(e)}")
+
+    def _load_redis(self, key: str) -> List[Dict[str, Any]]:
+        try:
+            raw = self.redis_client.lrange(key, 0, self.max_entries_per_bucket - 1)
+            return [self._deserialize(item) for item in raw]
+        except Exception as e:
+            logger.error(f"Semantic cache Redis load failed: {str(e)}")
+            return []
+
+    @staticmethod
+    def _serialize(entry: Dict[str, Any]) -> str:
+        # float16 halves the Redis footprint; cosine error stays well below 1e-3
+        return json.dumps({
+            **{k: v for k, v in entry.items() if k != "vector"},
+            "vector": base64.b64encode(entry["vector"].astype(np.float16).tobytes()).decode()
+        })
+
+    @staticmethod
+    def _deserialize(raw: str) -> Dict[str, Any]:
+        entry = json.loads(raw)
+        entry["vector"] = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float16).astype(np.float32)
+        return entry
+
+    def get_stats(self) -> Dict[str, Any]:
+        intents = {}
+        for intent, stats in sorted(self.metrics.items()):
+            lookups = stats["hits"] + stats["misses"]
+            intents[intent] = {**stats, "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0}
+        hits = sum(s["hits"] for s in self.metrics.values())
+        lookups = hits + sum(s["misses"] for s in self.metrics.values())
+        return {
+            "threshold": self.threshold,
+            "buckets": len(self.buckets),
+            "entries": sum(len(entries) for entries in self.buckets.values()),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "intents": intents
+        }
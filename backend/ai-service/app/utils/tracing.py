@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Request Tracing
+Lightweight in-process tracer: spans are propagated through contextvars,
+sampled per trace, batched by a collector thread and exported in the
+OpenTelemetry (OTLP/JSON) span shape to the console or a JSONL file
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "events")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = "UNSET"
+        self.status_message = ""
+        self.events: List[Dict[str, Any]] = []
+
+    @property
+    def sampled(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException):
+        self.status = "ERROR"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "events": [
+                {**event, "attributes": [
+                    {"key": k, "value": _otlp_value(v)} for k, v in event["attributes"].items()
+                ]} for event in self.events
+            ],
+            "status": {"code": f"STATUS_CODE_{self.status}", "message": self.status_message}
+        }
+
+class _NoopSpan:
+    """Returned when the trace is not sampled; every method is a no-op"""
+    __slots__ = ()
+    sampled = False
+    trace_id = ""
+    span_id = ""
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+class _SpanContext:
+    """Context manager for one span; usable from sync and async code"""
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        if exc is not None:
+            self.span.record_exception(exc)
+        self.span.end_ns = time.time_ns()
+        self.tracer.collector.submit(self.span)
+        return False
+
+class _NoopContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_CONTEXT = _NoopContext()
+
+class ConsoleSpanExporter:
+    def export(self, spans: List[Span]):
+        for span in spans:
+            attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            logger.info(
+                f"span {span.name} {span.duration_ms:.1f}ms trace={span.trace_id} "
+                f"status={span.status} {attributes}"
+            )
+
+class JsonlSpanExporter:
+    """Appends OTLP/JSON resourceSpans, one batch per line"""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "intransparency.ai-service"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload, default=str) + "\n")
+
+class SpanCollector:
+    """Buffers finished spans and exports them off the event loop"""
+
+    def __init__(self, exporters: List[Any], max_queue: int = 10000, flush_interval: float = 1.0):
+        self.exporters = exporters
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: Deque[Span] = deque(maxlen=max_queue)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(span)
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-collector", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        spans = []
+        while self._queue:
+            try:
+                spans.append(self._queue.popleft())
+            except IndexError:
+                break
+        if not spans:
+            return
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.error(f"Span export failed: {str(e)}")
+
+class Tracer:
+    def __init__(self):
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+        self.service_name = os.getenv("TRACE_SERVICE_NAME", "ai-service")
+        exporters = []
+        for name in os.getenv("TRACE_EXPORTERS", "jsonl").split(","):
+            name = name.strip()
+            if name == "console":
+                exporters.append(ConsoleSpanExporter())
+            elif name == "jsonl":
+                exporters.append(JsonlSpanExporter(os.getenv("TRACE_FILE", "traces.jsonl"), self.service_name))
+        self.collector = SpanCollector(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Child of the current span; a new root (subject to sampling) if there is none"""
+        if self.sample_rate <= 0:
+            return _NOOP_CONTEXT
+        parent = _current_span.get()
+        if parent is None:
+            if random.random() >= self.sample_rate:
+                # Remember the decision so children of an unsampled root stay cheap
+                return _UnsampledRoot()
+            return _SpanContext(self, Span(name, f"{random.getrandbits(128):032x}", None, dict(attributes or {})))
+        if not parent.sampled:
+            return _NOOP_CONTEXT
+        return _SpanContext(self, Span(name, parent.trace_id, parent.span_id, dict(attributes or {})))
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Child span that is not made current, for async generators; close with end_span()"""
+        parent = _current_span.get()
+        if self.sample_rate <= 0 or parent is None or not parent.sampled:
+            return NOOP_SPAN
+        return Span(name, parent.trace_id, parent.span_id, dict(attributes or {}))
+
+    def end_span(self, span, exc: Optional[BaseException] = None):
+        if not span.sampled:
+            return
+        if exc is not None:
+            span.record_exception(exc)
+        span.end_ns = time.time_ns()
+        self.collector.submit(span)
+
+    def root_span(self, name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        """Start a trace, continuing a W3C ``traceparent`` when the caller sent one"""
+        if self.sample_rate <= 0:
+            return _NOOP_CONTEXT
+        remote = parse_traceparent(traceparent) if traceparent else None
+        if remote:
+            trace_id, parent_id, sampled = remote
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return _UnsampledRoot()
+        return _SpanContext(self, Span(name, trace_id, parent_id, dict(attributes or {})))
+
+class _UnsampledRoot:
+    """Marks the context as unsampled so nested span() calls short-circuit"""
+    __slots__ = ("token",)
+
+    def __enter__(self):
+        self.token = _current_span.set(NOOP_SPAN)
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        return False
+
+def parse_traceparent(header: str) -> Optional[Tuple[str, str, bool]]:
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def span(name: str, **attributes):
+    """``with span("stage", key=value) as s:`` around any unit of work"""
+    return get_tracer().span(name, attributes)
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping an async function in a span"""
+    def decorator(func: Callable):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.tracer = get_tracer()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent")
+        context = self.tracer.root_span(
+            f"{scope['method']} {scope['path']}",
+            traceparent.decode("latin-1") if traceparent else None,
+            {"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        with context as root:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    if root.sampled:
+                        message.setdefault("headers", [])
+                        message["headers"] = list(message["headers"]) + [
+                            (b"x-trace-id", root.trace_id.encode())
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            route = scope.get("route")
+            if root.sampled and route is not None and getattr(route, "path", None):
+                root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.route", route.path)
+
+class TraceContextFilter(logging.Filter):
+    """Adds ``trace_id`` to log records so log lines join up with spans"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_span().trace_id or "-"
+        return True
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Chat Semantic Cache Replay
+Replays recorded chat turns (CHAT_TRAFFIC_LOG JSONL) through the semantic
+response cache and reports hit rate, latency saved and lookup overhead,
+optionally sweeping several similarity thresholds. Lookup overhead includes
+encoding the message, so only the first threshold of a sweep is measured cold.
+
+Usage:
+    python -m benchmarks.chat_cache_replay --traffic chat_traffic.jsonl --thresholds 0.88 0.92 0.95
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.embedding_service import get_embedding_service
+from app.utils.semantic_cache import SemanticResponseCache
+
+def load_traffic(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle if line.strip()]
+    return sorted(records, key=lambda r: r.get("ts", 0))
+
+async def replay(records: List[Dict], embedding_service, threshold: float, show_matches: int) -> Dict:
+    cache = SemanticResponseCache(embedding_service, shared=False)
+    cache.threshold = threshold
+    replay_time = {"now": 0.0}
+    cache.clock = lambda: replay_time["now"]
+
+    eligible = hits = 0
+    saved_ms = 0.0
+    overhead_ms: List[float] = []
+    per_intent = defaultdict(lambda: {"eligible": 0, "hits": 0})
+    matches = []
+
+    for record in records:
+        replay_time["now"] = record.get("ts", replay_time["now"])
+        # Same gates as ConversationService: no action data, first turn, cacheable intent
+        if record.get("action_data") or not record.get("history_free", False):
+            continue
+        if not cache.cacheable(record["intent"]):
+            continue
+        eligible += 1
+        per_intent[record["intent"]]["eligible"] += 1
+
+        started = time.perf_counter()
+        cached = await cache.lookup(record["role"], record["intent"], record.get("entities", {}), record["message"])
+        overhead_ms.append((time.perf_counter() - started) * 1000)
+
+        if cached:
+            hits += 1
+            per_intent[record["intent"]]["hits"] += 1
+            saved_ms += record.get("latency_ms", 0.0)
+            if len(matches) < show_matches:
+                matches.append({
+                    "query": record["message"],
+                    "matched": cached["matched_message"],
+                    "similarity": round(cached["similarity"], 4)
+                })
+        else:
+            await cache.store(
+                record["role"], record["intent"], record.get("entities", {}),
+                record["message"], record.get("response") or "<recorded response>"
+            )
+
+    overhead = np.array(overhead_ms) if overhead_ms else np.zeros(1)
+    return {
+        "threshold": threshold,
+        "turns": len(records),
+        "eligible": eligible,
+        "hits": hits,
+        "hit_rate": round(hits / eligible, 4) if eligible else 0.0,
+        "hit_rate_all_turns": round(hits / len(records), 4) if records else 0.0,
+        "latency_saved_s": round(saved_ms / 1000, 2),
+        "lookup_overhead_s": round(float(overhead.sum()) / 1000, 2),
+        "net_saved_s": round((saved_ms - float(overhead.sum())) / 1000, 2),
+        "lookup_p50_ms": round(float(np.percentile(overhead, 50)), 3),
+        "lookup_p95_ms": round(float(np.percentile(overhead, 95)), 3),
+        "intents": {
+            intent: {**stats, "hit_rate": round(stats["hits"] / stats["eligible"], 4)}
+            for intent, stats in sorted(per_intent.items())
+        },
+        "sample_matches": matches
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay chat traffic through the semantic response cache")
+    parser.add_argument("--traffic", required=True, help="JSONL written via CHAT_TRAFFIC_LOG")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.92])
+    parser.add_argument("--show-matches", type=int, default=10,
+                        help="Matched question pairs to print per threshold, for spot-checking false hits")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    embedding_service = get_embedding_service()
+    if embedding_service is None:
+        print("Embedding service unavailable: install sentence-transformers and enable EMBEDDINGS_ENABLED",
+              file=sys.stderr)
+        return 1
+
+    records = load_traffic(args.traffic)
+
+    results = [
+        asyncio.run(replay(records, embedding_service, threshold, args.show_matches))
+        for threshold in args.thresholds
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
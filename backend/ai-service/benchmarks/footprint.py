@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Worker Footprint
+Measures what one worker holds once every service and action handler is
+built: resident memory, open sockets, Redis pool connections and how many
+instances of each analyzer exist. Each mode runs in a fresh interpreter.
+
+    shared    services and handlers from the service container (production)
+    isolated  each handler builds its own analyzers, as before the container
+
+Usage:
+    python -m benchmarks.footprint
+    python -m benchmarks.footprint --modes shared --chat 20
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from typing import Any, Dict, List
+
+# Constructing the services must never download or load an embedding model
+os.environ.setdefault("EMBEDDINGS_ENABLED", "false")
+
+TRACKED = [
+    "CandidateMatcher", "MarketAnalyzer", "SkillsAssessor", "ProjectAnalyzer", "StoryGenerator",
+    "ResumeOptimizer", "ConversationService", "StudentActionHandler", "RecruiterActionHandler",
+    "InstitutionActionHandler"
+]
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def open_sockets() -> int:
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return -1
+    count = 0
+    for fd in fds:
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            # The descriptor listdir itself used is already closed
+            continue
+    return count
+
+def instance_counts() -> Dict[str, int]:
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects() if type(obj).__name__ in TRACKED)
+    return {name: counts.get(name, 0) for name in TRACKED}
+
+def build(mode: str, chat_turns: int) -> Dict[str, Any]:
+    baseline = rss_mb()
+    import main  # noqa: F401  (the app as a worker imports it)
+    from app.container import container
+    from app.services.conversation_service import UserRole
+    from app.services.institution_actions import InstitutionActionHandler
+    from app.services.recruiter_actions import RecruiterActionHandler
+    from app.services.student_actions import StudentActionHandler
+    from app.utils.connections import redis_pool_stats
+    imported = rss_mb()
+
+    for name in ("cache_manager", "rate_limiter", "project_analyzer", "candidate_matcher", "story_generator",
+                 "skills_assessor", "market_analyzer", "resume_optimizer", "conversation_service", "batch_processor"):
+        getattr(container, name)
+    if mode == "isolated":
+        handlers = [StudentActionHandler(), RecruiterActionHandler(), InstitutionActionHandler()]
+    else:
+        handlers = [container.student_actions, container.recruiter_actions, container.institution_actions]
+
+    # Rule-based paths touch each handler's dictionaries and Redis without calling an LLM
+    async def exercise():
+        service = container.conversation_service
+        for i in range(chat_turns):
+            await service.get_session(f"footprint-{i}")
+            service._rule_based_intent("Find Python developers in Milan", UserRole.RECRUITER)
+        handlers[1].extract_search_entities("junior react developers in milano, english, remote")
+    asyncio.run(exercise())
+    gc.collect()
+
+    return {
+        "mode": mode,
+        "rss_mb": {"interpreter": baseline, "after_import": imported, "after_build": rss_mb()},
+        "open_sockets": open_sockets(),
+        "redis_pool": redis_pool_stats(),
+        "instances": instance_counts()
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-worker memory and connection footprint")
+    parser.add_argument("--modes", default="isolated,shared")
+    parser.add_argument("--chat", type=int, default=10, help="Session lookups to run after building")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    if args.child:
+        print(json.dumps(build(args.child, args.chat)))
+        return 0
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.footprint", "--child", mode, "--chat", str(args.chat)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
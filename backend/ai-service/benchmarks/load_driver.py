@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Load Driver
+Replays a weighted mix of /chat, /chat/stream, /find-matches and
+/analyze-project requests against a running service and reports throughput,
+p50/p95/p99 latency and time-to-first-token per endpoint. Run the service
+against benchmarks.mock_server for reproducible, free numbers.
+
+Closed loop by default (--concurrency virtual users back to back); --rate
+switches to open-loop Poisson arrivals, which does not hide queueing delay
+when the service falls behind: open-loop latency runs from each request's
+scheduled arrival, including time spent waiting for an in-flight slot.
+
+Each virtual user sends its own X-User-Id, so per-user rate limits apply;
+raise RATE_LIMIT_PER_MINUTE and RATE_LIMIT_PER_HOUR on the service under test
+unless the 429s are what you want to measure.
+
+Usage:
+    python -m benchmarks.load_driver --url http://127.0.0.1:8000 --api-key $AI_SERVICE_API_KEY \\
+        --concurrency 50 --duration 60 --mix chat=0.5,chat_stream=0.2,find_matches=0.15,analyze_project=0.15
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks import synthetic
+
+ROLE_WEIGHTS = {"student": 0.6, "recruiter": 0.25, "institution": 0.15}
+
+@dataclass
+class Sample:
+    scenario: str
+    started: float
+    latency: float
+    status: int
+    ttft: Optional[float] = None
+
+class VirtualUser:
+    """Keeps a chat session for a few turns, like a person in a conversation"""
+
+    def __init__(self, rng: random.Random, turns_per_session: int, name: str = "load-user"):
+        self.rng = rng
+        self.name = name
+        self.turns_per_session = turns_per_session
+        self.role = "student"
+        self.session_id = ""
+        self.turns = turns_per_session
+
+    def next_turn(self) -> Dict[str, Any]:
+        if self.turns >= self.turns_per_session:
+            self.role = self.rng.choices(list(ROLE_WEIGHTS), weights=list(ROLE_WEIGHTS.values()))[0]
+            self.session_id = f"load-{uuid.UUID(int=self.rng.getrandbits(128)).hex[:16]}"
+            self.turns = 0
+        self.turns += 1
+        return {
+            "session_id": self.session_id,
+            "message": synthetic.chat_message(self.rng, self.role),
+            "user_role": self.role,
+            "user_id": f"user-{self.session_id[-6:]}"
+        }
+
+class LoadDriver:
+    def __init__(self, url: str, api_key: str, mix: Dict[str, float], candidates: int, seed: int,
+                 turns_per_session: int = 4, timeout: float = 300.0):
+        self.url = url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.mix = mix
+        self.candidates = candidates
+        self.seed = seed
+        self.turns_per_session = turns_per_session
+        self.timeout = timeout
+        self.samples: List[Sample] = []
+        self.scenarios = {
+            "chat": self._chat,
+            "chat_stream": self._chat_stream,
+            "find_matches": self._find_matches,
+            "analyze_project": self._analyze_project
+        }
+        unknown = set(mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    def _headers(self, user: VirtualUser) -> Dict[str, str]:
+        # Per-user limits key on X-User-Id, as behind the real backend
+        return {**self.headers, "X-User-Id": user.name}
+
+    async def _chat(self, client: httpx.AsyncClient, user: VirtualUser) -> Sample:
+        started = time.perf_counter()
+        response = await client.post(f"{self.url}/chat", json=user.next_turn(), headers=self._headers(user))
+        return Sample("chat", started, time.perf_counter() - started, response.status_code)
+
+    async def _chat_stream(self, client: httpx.AsyncClient, user: VirtualUser) -> Sample:
+        started = time.perf_counter()
+        ttft = None
+        async with client.stream("POST", f"{self.url}/chat/stream", json=user.next_turn(),
+                                 headers=self._headers(user)) as response:
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data: ") and line != "data: [DONE]":
+                    ttft = time.perf_counter() - started
+        return Sample("chat_stream", started, time.perf_counter() - started, response.status_code, ttft)
+
+    async def _find_matches(self, client: httpx.AsyncClient, user: VirtualUser) -> Sample:
+        payload = {
+            "job_data": synthetic.job(user.rng, user.rng.randrange(1000)),
+            "candidates": synthetic.candidates(user.rng, self.candidates),
+            "limit": 10
+        }
+        started = time.perf_counter()
+        response = await client.post(f"{self.url}/find-matches", json=payload, headers=self._headers(user))
+        return Sample("find_matches", started, time.perf_counter() - started, response.status_code)
+
+    async def _analyze_project(self, client: httpx.AsyncClient, user: VirtualUser) -> Sample:
+        project = synthetic.project(user.rng, user.rng.randrange(1000))
+        payload = {key: project[key] for key in ("title", "description", "technologies", "category", "repository_url")}
+        started = time.perf_counter()
+        response = await client.post(f"{self.url}/analyze-project", json=payload, headers=self._headers(user))
+        return Sample("analyze_project", started, time.perf_counter() - started, response.status_code)
+
+    async def _one(self, client: httpx.AsyncClient, user: VirtualUser, scheduled: Optional[float] = None):
+        scenario = user.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        started = time.perf_counter()
+        try:
+            sample = await self.scenarios[scenario](client, user)
+        except httpx.HTTPError:
+            # Status 0 marks transport failures (refused, reset, timed out)
+            sample = Sample(scenario, started, time.perf_counter() - started, 0)
+        if scheduled is not None:
+            # Open loop: time from the scheduled arrival, so waiting for a free slot counts
+            queued = sample.started - scheduled
+            sample.started = scheduled
+            sample.latency += queued
+            if sample.ttft is not None:
+                sample.ttft += queued
+        self.samples.append(sample)
+
+    async def run_closed(self, concurrency: int, duration: float):
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def worker(index: int):
+                user = VirtualUser(random.Random(self.seed + index), self.turns_per_session, f"load-user-{index}")
+                while time.perf_counter() < deadline:
+                    await self._one(client, user)
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    async def run_open(self, rate: float, duration: float, max_in_flight: int):
+        rng = random.Random(self.seed)
+        # One idle user per slot: an arrival checks one out, so no two requests in flight share a session
+        idle = [VirtualUser(random.Random(self.seed + i), self.turns_per_session, f"load-user-{i}")
+                for i in range(max_in_flight)]
+        slots = asyncio.Semaphore(max_in_flight)
+        limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        tasks = []
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def fire(scheduled: float):
+                async with slots:
+                    user = idle.pop()
+                    try:
+                        await self._one(client, user, scheduled)
+                    finally:
+                        idle.append(user)
+
+            deadline = time.perf_counter() + duration
+            next_arrival = time.perf_counter()
+            while next_arrival < deadline:
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+                tasks.append(asyncio.create_task(fire(next_arrival)))
+                next_arrival += rng.expovariate(rate)
+            await asyncio.gather(*tasks)
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    data = np.array(values) * 1000
+    return {
+        "p50": round(float(np.percentile(data, 50)), 1),
+        "p95": round(float(np.percentile(data, 95)), 1),
+        "p99": round(float(np.percentile(data, 99)), 1),
+        "mean": round(float(data.mean()), 1),
+        "max": round(float(data.max()), 1)
+    }
+
+def summarize(samples: List[Sample], warmup: float) -> Dict[str, Any]:
+    if not samples:
+        return {"requests": 0}
+    start = min(s.started for s in samples) + warmup
+    measured = [s for s in samples if s.started >= start]
+    if not measured:
+        return {"requests": 0}
+    elapsed = max(s.started + s.latency for s in measured) - start
+
+    def stats(group: List[Sample]) -> Dict[str, Any]:
+        ok = [s for s in group if 200 <= s.status < 300]
+        errors = Counter(str(s.status) for s in group if not 200 <= s.status < 300)
+        result = {
+            "requests": len(group),
+            "ok": len(ok),
+            "error_rate": round(1 - len(ok) / len(group), 4),
+            "errors": dict(errors),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": _percentiles([s.latency for s in ok])
+        }
+        ttfts = [s.ttft for s in ok if s.ttft is not None]
+        if ttfts:
+            result["ttft_ms"] = _percentiles(ttfts)
+        return result
+
+    by_scenario = defaultdict(list)
+    for sample in measured:
+        by_scenario[sample.scenario].append(sample)
+    return {
+        "duration_s": round(elapsed, 2),
+        "overall": stats(measured),
+        "scenarios": {name: stats(group) for name, group in sorted(by_scenario.items())}
+    }
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a request mix against the AI service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--mix", default="chat=0.5,chat_stream=0.2,find_matches=0.15,analyze_project=0.15")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="Virtual users (closed loop) or the in-flight cap (open loop)")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Leading seconds excluded from the report")
+    parser.add_argument("--candidates", type=int, default=25, help="Candidates per /find-matches request")
+    parser.add_argument("--turns-per-session", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    driver = LoadDriver(args.url, args.api_key, parse_mix(args.mix), args.candidates, args.seed,
+                        args.turns_per_session)
+    if args.rate:
+        asyncio.run(driver.run_open(args.rate, args.duration, args.concurrency))
+    else:
+        asyncio.run(driver.run_closed(args.concurrency, args.duration))
+
+    report = summarize(driver.samples, args.warmup)
+    report["config"] = {
+        "url": args.url,
+        "mode": "open" if args.rate else "closed",
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "mix": parse_mix(args.mix)
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks
+Times the service's CPU hot paths on seeded synthetic data at several
+scales, saves results as a baseline and compares later runs against it, so
+optimizations and regressions show up as numbers rather than impressions.
+
+Each case times a batch of calls with timeit (auto-ranged, repeated) and
+reports the per-call median. Baselines record the machine they came from;
+compare only runs from comparable machines.
+
+Usage:
+    python -m benchmarks.microbench --list
+    python -m benchmarks.microbench --filter matcher --scales small,large
+    python -m benchmarks.microbench --save benchmarks/baselines/microbench.json
+    python -m benchmarks.microbench --compare benchmarks/baselines/microbench.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+# Constructing the services must never download or load an embedding model
+os.environ.setdefault("EMBEDDINGS_ENABLED", "false")
+
+from app.services.candidate_matcher import CandidateMatcher
+from app.services.conversation_service import ConversationContext, ConversationMessage, ConversationService, UserRole
+from app.services.recruiter_actions import RecruiterActionHandler
+from app.services.resume_optimizer import ResumeOptimizer
+from app.services.skills_assessor import SkillsAssessor
+from app.services.text_analyzer import analyze as analyze_text
+from app.utils.cache_manager import CacheManager
+from app.utils.rate_limiter import RateLimiter
+from benchmarks import synthetic
+
+SCALES = ("small", "medium", "large")
+
+@dataclass
+class Case:
+    name: str
+    description: str
+    sizes: Dict[str, int]
+    # (rng, size) -> (function timing one batch, calls per batch)
+    build: Callable[[random.Random, int], Tuple[Callable[[], Any], int]]
+
+CASES: Dict[str, Case] = {}
+
+def case(name: str, description: str, sizes: Dict[str, int]):
+    def register(build):
+        CASES[name] = Case(name, description, sizes, build)
+        return build
+    return register
+
+_loop = asyncio.new_event_loop()
+
+def run_async(coro):
+    return _loop.run_until_complete(coro)
+
+# Services are built once; only the methods under test run inside the timer
+
+@lru_cache(maxsize=None)
+def recruiter_handler() -> RecruiterActionHandler:
+    return RecruiterActionHandler()
+
+@lru_cache(maxsize=None)
+def conversation_service() -> ConversationService:
+    return ConversationService()
+
+@lru_cache(maxsize=None)
+def skills_assessor() -> SkillsAssessor:
+    return SkillsAssessor()
+
+@lru_cache(maxsize=None)
+def resume_optimizer() -> ResumeOptimizer:
+    return ResumeOptimizer()
+
+@lru_cache(maxsize=None)
+def candidate_matcher() -> CandidateMatcher:
+    return CandidateMatcher()
+
+def _messages(rng: random.Random, roles: List[str], sentences: int, count: int = 200) -> List[str]:
+    return [synthetic.long_message(rng, rng.choice(roles), sentences) for _ in range(count)]
+
+@case("recruiter.extract_search_entities", "Recruiter query parsing; size = sentences per message",
+      {"small": 1, "medium": 5, "large": 20})
+def _extract_search_entities(rng, size):
+    handler = recruiter_handler()
+    messages = _messages(rng, ["recruiter"], size)
+    return lambda: [handler.extract_search_entities(m) for m in messages], len(messages)
+
+@case("conversation.rule_based_intent", "Fallback intent rules; size = sentences per message",
+      {"small": 1, "medium": 5, "large": 20})
+def _rule_based_intent(rng, size):
+    service = conversation_service()
+    roles = [UserRole.STUDENT, UserRole.RECRUITER, UserRole.INSTITUTION]
+    messages = [(synthetic.long_message(rng, role.value, size), role) for role in rng.choices(roles, k=200)]
+    return lambda: [service._rule_based_intent(m, role) for m, role in messages], len(messages)
+
+@case("conversation.extract_entities", "Basic entity extraction; size = sentences per message",
+      {"small": 1, "medium": 5, "large": 20})
+def _extract_entities(rng, size):
+    service = conversation_service()
+    messages = _messages(rng, ["student", "recruiter", "institution"], size)
+    return lambda: [service._extract_entities(m) for m in messages], len(messages)
+
+@case("skills.categorize_skill", "Skill categorization; size = distinct skills in the batch",
+      {"small": 20, "medium": 200, "large": 2000})
+def _categorize_skill(rng, size):
+    assessor = skills_assessor()
+    # Half known skills, half unknown ones that fall through every category
+    skills = [rng.choice(synthetic.SKILLS) if i % 2 else f"Custom Tool {i}" for i in range(size)]
+    return lambda: [assessor._categorize_skill(s) for s in skills], len(skills)
+
+@case("skills.find_skill_evidence", "Evidence search; size = projects scanned per skill",
+      {"small": 5, "medium": 50, "large": 500})
+def _find_skill_evidence(rng, size):
+    assessor = skills_assessor()
+    projects = [synthetic.project(rng, i) for i in range(size)]
+    skills = rng.sample(synthetic.SKILLS, 10)
+    return lambda: [assessor._find_skill_evidence(s, projects) for s in skills], len(skills)
+
+@case("resume.extract_resume_text", "Resume flattening; size = experience entries",
+      {"small": 2, "medium": 10, "large": 50})
+def _extract_resume_text(rng, size):
+    optimizer = resume_optimizer()
+    resumes = [synthetic.resume(rng, size) for _ in range(20)]
+    return lambda: [optimizer._extract_resume_text(r) for r in resumes], len(resumes)
+
+@case("resume.ats_compatibility", "ATS heuristic; size = experience entries",
+      {"small": 2, "medium": 10, "large": 50})
+def _ats_compatibility(rng, size):
+    optimizer = resume_optimizer()
+    resumes = [synthetic.resume(rng, size) for _ in range(20)]
+    return lambda: [optimizer._calculate_ats_compatibility(r) for r in resumes], len(resumes)
+
+@case("cache_manager.memory_tier", "Memory-only get (80% hits) and set; size = entries cached",
+      {"small": 100, "medium": 1000, "large": 5000})
+def _cache_memory_tier(rng, size):
+    cache = CacheManager()
+    cache.redis_client = None
+    cache.max_memory_size = max(cache.max_memory_size, size)
+    payloads = [{"project_id": f"proj_{i}"} for i in range(size)]
+    for params in payloads:
+        run_async(cache.set("project_analysis", {"score": 0.8, "skills": ["Python"]}, **params))
+    lookups = [payloads[rng.randrange(size)] if rng.random() < 0.8 else {"project_id": f"missing_{i}"}
+               for i in range(500)]
+
+    async def batch():
+        for params in lookups:
+            if await cache.get("project_analysis", **params) is None:
+                await cache.set("project_analysis", {"score": 0.5}, **params)
+    return lambda: run_async(batch()), len(lookups)
+
+@case("rate_limiter.memory_window_check", "In-process window check; size = distinct identifiers",
+      {"small": 100, "medium": 10000, "large": 100000})
+def _memory_window_check(rng, size):
+    limiter = RateLimiter()
+    limiter.redis_client = None
+    operations = ["burst", "default", "analysis"]
+    limits = [limiter.default_limits[op] for op in operations]
+    identifiers = [f"key-{rng.randrange(size)}" for _ in range(1000)]
+    clock = {"now": time.time()}
+
+    async def batch():
+        for identifier in identifiers:
+            clock["now"] += 0.001
+            keys = [f"rate_limit:{op}:{identifier}" for op in operations]
+            await limiter._memory_time_window_check(keys, limits, clock["now"])
+    return lambda: run_async(batch()), len(identifiers)
+
+@case("conversation.session_roundtrip", "Session dump + load as in save/get_session; size = turns",
+      {"small": 5, "medium": 25, "large": 100})
+def _session_roundtrip(rng, size):
+    context = ConversationContext(
+        session_id="bench",
+        user_role=UserRole.STUDENT,
+        messages=[ConversationMessage(role=m["role"], content=m["content"], metadata={"intent": "career_advice"})
+                  for m in synthetic.chat_turns(rng, "student", size)],
+        detected_intents=["career_advice"] * size,
+        extracted_entities={"skills": rng.sample(synthetic.SKILLS, 5), "location": "Milan"}
+    )
+
+    def roundtrip():
+        return ConversationContext(**json.loads(context.model_dump_json()))
+    return roundtrip, 1
+
+@case("matcher.deterministic_scores", "Experience, education and location matching; size = candidates",
+      {"small": 10, "medium": 100, "large": 1000})
+def _deterministic_scores(rng, size):
+    matcher = candidate_matcher()
+    job = synthetic.job(rng)
+    candidates = synthetic.candidates(rng, size)
+
+    async def batch():
+        for candidate in candidates:
+            await matcher._calculate_experience_match(job["experience_requirements"], candidate["experience"])
+            await matcher._calculate_education_match(job["education_requirements"], candidate["education"])
+            matcher._calculate_location_match(job["location"], candidate["location"])
+    return lambda: run_async(batch()), len(candidates)
+
+@case("text.analyze_all", "Sentiment, readability, complexity and keywords; size = sentences per text",
+      {"small": 3, "medium": 10, "large": 40})
+def _analyze_text(rng, size):
+    texts = [" ".join(synthetic.project(rng, i)["description"] for i in range(max(1, size // 3)))
+             + " " + synthetic.long_message(rng, "student", size) for _ in range(100)]
+    return lambda: [analyze_text(text) for text in texts], len(texts)
+
+def measure(fn: Callable[[], Any], calls: int, repeat: int) -> Dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [t / number / calls * 1e6 for t in timer.repeat(repeat, number)]
+    quartiles = statistics.quantiles(per_call, n=4) if len(per_call) > 1 else [per_call[0]] * 3
+    median = statistics.median(per_call)
+    return {
+        "median_us": round(median, 3),
+        "min_us": round(min(per_call), 3),
+        "iqr_us": round(quartiles[2] - quartiles[0], 3),
+        "ops_per_sec": round(1e6 / median, 1) if median else 0.0
+    }
+
+def run(names: List[str], scales: List[str], repeat: int, seed: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name in names:
+        bench = CASES[name]
+        for scale in scales:
+            if scale not in bench.sizes:
+                continue
+            fn, calls = bench.build(random.Random(seed), bench.sizes[scale])
+            fn()  # warm caches and lazy imports outside the timer
+            results.setdefault(name, {})[scale] = {"size": bench.sizes[scale], **measure(fn, calls, repeat)}
+            print(f"  {name} [{scale}] {results[name][scale]['median_us']:.2f} us", file=sys.stderr)
+    return results
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any], threshold: float) -> Tuple[List[str], int]:
+    """Report lines and the number of regressions beyond ``threshold`` (0.1 = 10% slower)"""
+    lines = [f"{'case':<40} {'scale':<7} {'baseline us':>12} {'current us':>12} {'change':>8}  verdict"]
+    regressions = 0
+    for name, scales in sorted(results.items()):
+        for scale, current in scales.items():
+            base = baseline.get("results", {}).get(name, {}).get(scale)
+            if not base:
+                lines.append(f"{name:<40} {scale:<7} {'-':>12} {current['median_us']:>12.2f} {'':>8}  new")
+                continue
+            change = current["median_us"] / base["median_us"] - 1 if base["median_us"] else 0.0
+            # Changes inside the baseline's own spread are noise, whatever the threshold
+            noise = base.get("iqr_us", 0) / base["median_us"] if base["median_us"] else 0.0
+            if change > max(threshold, noise):
+                verdict = "REGRESSION"
+                regressions += 1
+            elif change < -max(threshold, noise):
+                verdict = "faster"
+            else:
+                verdict = "same"
+            lines.append(
+                f"{name:<40} {scale:<7} {base['median_us']:>12.2f} {current['median_us']:>12.2f} "
+                f"{change * 100:>7.1f}%  {verdict}"
+            )
+    if baseline.get("machine") and baseline["machine"] != machine_info():
+        lines.append("note: baseline was recorded on a different machine or Python; compare with care")
+    return lines, regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the service's CPU hot paths")
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    parser.add_argument("--filter", default="", help="Only cases whose name contains this text")
+    parser.add_argument("--scales", default=",".join(SCALES))
+    parser.add_argument("--repeat", type=int, default=7, help="Timed rounds per case and scale")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown counted as a regression")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    if args.list:
+        for bench in CASES.values():
+            sizes = ", ".join(f"{scale}={size}" for scale, size in bench.sizes.items())
+            print(f"{bench.name:<40} {bench.description} ({sizes})")
+        return 0
+
+    names = [name for name in CASES if args.filter in name]
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    results = run(names, scales, args.repeat, args.seed)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "machine": machine_info(),
+                "seed": args.seed,
+                "results": results
+            }, handle, indent=2)
+            handle.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        lines, regressions = compare(baseline, results, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Mock LLM and Backend Server
+Local stand-in for the OpenAI chat-completions API, the Anthropic messages API
+(both including SSE streaming) and the backend endpoints the action handlers
+call, so load tests are free and reproducible. Time to first token, token
+rate, answer length and injected errors are configurable.
+
+Latency specs: fixed:S, uniform:LO:HI, lognormal:MEDIAN:SIGMA, exponential:MEAN (seconds).
+
+Usage:
+    python -m benchmarks.mock_server --port 9100 --llm-latency lognormal:0.6:0.5 \\
+        --tokens-per-second 60 --error-rate 0.02 --error-statuses 429,503
+
+    # Point the service at it
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 ANTHROPIC_BASE_URL=http://127.0.0.1:9100 \\
+    BACKEND_API_URL=http://127.0.0.1:9100 OPENAI_API_KEY=mock ANTHROPIC_API_KEY=mock python main.py
+
+The service's LLM governor still enforces its default per-model budgets
+(Anthropic defaults to 50 rpm). Set LLM_BUDGETS for every model in use to
+the tier being modelled, or high enough that the mock is the only limit.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks import synthetic
+
+class LatencyDistribution:
+    """Seconds drawn from a named distribution, e.g. ``lognormal:0.6:0.5``"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Bad latency spec {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma)
+        return rng.expovariate(1 / self.params[0])
+
+@dataclass
+class MockConfig:
+    llm_latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("lognormal:0.5:0.4"))
+    backend_latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("lognormal:0.03:0.5"))
+    tokens_per_second: float = 60.0
+    output_tokens: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("lognormal:120:0.6"))
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [429, 500, 503])
+    error_targets: List[str] = field(default_factory=lambda: ["openai", "anthropic"])
+    retry_after: Optional[float] = 1.0
+    backend_items: int = 20
+    seed: int = 42
+
+# Keyword -> intent, so the service's intent call gets a plausible classification
+INTENT_KEYWORDS = [
+    ("greeting", ("hi", "hello", "hey", "ciao")),
+    ("help", ("help me with", "what can you")),
+    ("at_risk_students", ("at-risk", "at risk")),
+    ("company_trends", ("companies", "industries")),
+    ("student_analytics", ("compare", "universities")),
+    ("partnership_info", ("partner",)),
+    ("candidate_search", ("developers", "candidates")),
+    ("match_explanation", ("good match",)),
+    ("job_posting_help", ("job posting",)),
+    ("market_intelligence", ("market",)),
+    ("job_search", ("jobs", "internship", "salary")),
+    ("skill_analysis", ("skills", "learn")),
+    ("profile_build", ("profile",)),
+    ("project_help", ("project",)),
+]
+
+WORDS = (
+    "the candidate project skills experience team build deploy python data model api "
+    "recommend improve growth market role junior senior company student career learn "
+    "strong portfolio practical results impact production scalable design testing"
+).split()
+
+class MockServer:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.app = self._build_app()
+
+    def _injected_error(self, target: str) -> Optional[JSONResponse]:
+        if target not in self.config.error_targets or self.rng.random() >= self.config.error_rate:
+            return None
+        status = self.rng.choice(self.config.error_statuses)
+        self.errors[f"{target}:{status}"] += 1
+        headers = {}
+        if status == 429 and self.config.retry_after is not None:
+            headers["retry-after"] = str(self.config.retry_after)
+        return JSONResponse({"error": {"type": "injected", "message": f"mock {status}"}}, status_code=status, headers=headers)
+
+    def _answer(self, system: str, messages: List[Dict[str, Any]], max_tokens: int) -> str:
+        prompt = f"{system}\n" + "\n".join(str(m.get("content", "")) for m in messages)
+        last = str(messages[-1].get("content", "")).lower() if messages else ""
+        if "primary_intent" in prompt:
+            intent = next(
+                (name for name, words in INTENT_KEYWORDS if any(re.search(rf"\b{re.escape(w)}\b", last) for w in words)),
+                "career_advice"
+            )
+            return json.dumps({
+                "primary_intent": intent, "confidence": 0.85, "secondary_intents": [], "entities": {}
+            })
+        if re.search(r"\bjson\b", prompt, re.IGNORECASE):
+            if re.search(r"\b(array|list)\b", prompt, re.IGNORECASE):
+                return json.dumps(self.rng.sample(synthetic.SKILLS, 5))
+            return json.dumps({"summary": self._prose(30), "score": round(self.rng.uniform(0.4, 0.95), 2)})
+        if re.search(r"\b(score|rate)\b.*\b(0|1|number)\b", prompt, re.IGNORECASE):
+            return f"{self.rng.uniform(0.3, 0.95):.2f}"
+        tokens = max(1, min(max_tokens, int(self.config.output_tokens.sample(self.rng))))
+        return self._prose(tokens)
+
+    def _prose(self, tokens: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(tokens))
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        # One "token" per word keeps pacing and usage counts simple
+        return re.findall(r"\S+\s*", text)
+
+    async def _completion(self, provider: str, body: Dict[str, Any]):
+        self.requests[f"{provider}:{'stream' if body.get('stream') else 'complete'}"] += 1
+        error = self._injected_error(provider)
+        if error is not None:
+            await asyncio.sleep(self.config.llm_latency.sample(self.rng) / 4)
+            return error
+
+        messages = body.get("messages", [])
+        system = body.get("system", "") if provider == "anthropic" else "\n".join(
+            m.get("content", "") for m in messages if m.get("role") == "system"
+        )
+        conversation = [m for m in messages if m.get("role") != "system"]
+        text = self._answer(system, conversation, int(body.get("max_tokens", 500)))
+        tokens = self._tokens(text)
+        prompt_tokens = (len(system) + sum(len(str(m.get("content", ""))) for m in conversation)) // 4
+        ttft = self.config.llm_latency.sample(self.rng)
+        model = body.get("model", "mock")
+
+        if body.get("stream"):
+            events = self._anthropic_events if provider == "anthropic" else self._openai_events
+            return StreamingResponse(events(model, tokens, ttft), media_type="text/event-stream")
+
+        await asyncio.sleep(ttft + len(tokens) / self.config.tokens_per_second)
+        if provider == "anthropic":
+            return {
+                "id": f"msg_mock_{self.requests.total()}",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": len(tokens)}
+            }
+        return {
+            "id": f"chatcmpl-mock-{self.requests.total()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                      "total_tokens": prompt_tokens + len(tokens)}
+        }
+
+    async def _openai_events(self, model: str, tokens: List[str], ttft: float):
+        await asyncio.sleep(ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / self.config.tokens_per_second)
+            chunk = {"object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def _anthropic_events(self, model: str, tokens: List[str], ttft: float):
+        def event(name: str, data: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n"
+
+        await asyncio.sleep(ttft)
+        yield event("message_start", {"message": {"model": model, "role": "assistant", "content": []}})
+        yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / self.config.tokens_per_second)
+            yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": token}})
+        yield event("content_block_stop", {"index": 0})
+        yield event("message_delta", {"delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": len(tokens)}})
+        yield event("message_stop", {})
+
+    async def _backend(self, name: str):
+        self.requests[f"backend:{name}"] += 1
+        await asyncio.sleep(self.config.backend_latency.sample(self.rng))
+        return self._injected_error("backend")
+
+    def _students(self, count: int) -> List[Dict[str, Any]]:
+        students = []
+        for i in range(count):
+            profile = synthetic.candidate(self.rng, i)
+            profile["location"] = profile["location"]["city"]
+            profile["match_score"] = self.rng.randint(60, 98)
+            students.append(profile)
+        return students
+
+    def _jobs(self, count: int) -> List[Dict[str, Any]]:
+        jobs = []
+        for i in range(count):
+            posting = synthetic.job(self.rng, i)
+            low = self.rng.randrange(25, 45) * 1000
+            posting.update({
+                "location": posting["location"]["city"],
+                "salary_range": f"€{low:,} - €{low + 10000:,}",
+                "match_score": self.rng.randint(60, 98)
+            })
+            jobs.append(posting)
+        return jobs
+
+    def _at_risk(self, risk_level: str, count: int) -> List[Dict[str, Any]]:
+        factors = ["Profile 25% complete", "No activity in 45 days", "Zero applications",
+                   "No projects uploaded", "Missing skills section", "Low engagement"]
+        students = []
+        for i in range(count):
+            level = risk_level if risk_level in ("high", "medium", "low") else self.rng.choice(["high", "medium"])
+            students.append({
+                "student_id": f"stu_{i:05d}",
+                "name": synthetic.person_name(self.rng),
+                "risk_level": level,
+                "risk_factors": self.rng.sample(factors, 2),
+                "recommendations": ["Personal outreach", "Profile workshop"],
+                "last_activity": (datetime.now() - timedelta(days=self.rng.randint(7, 90))).isoformat(),
+                "profile_completeness": round(self.rng.uniform(0.1, 0.8), 2),
+                "job_applications": self.rng.randint(0, 4)
+            })
+        return students
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Mock LLM and backend")
+        items = self.config.backend_items
+
+        @app.post("/v1/chat/completions")
+        async def openai_chat(request: Request):
+            return await self._completion("openai", await request.json())
+
+        @app.post("/v1/messages")
+        async def anthropic_messages(request: Request):
+            return await self._completion("anthropic", await request.json())
+
+        @app.get("/api/students")
+        async def students():
+            return await self._backend("students") or {"students": self._students(items)}
+
+        @app.get("/api/students/{student_id}")
+        async def student(student_id: str):
+            return await self._backend("student") or {**self._students(1)[0], "id": student_id}
+
+        @app.get("/api/jobs")
+        async def jobs():
+            return await self._backend("jobs") or {"jobs": self._jobs(items)}
+
+        @app.get("/api/analytics/searches")
+        async def searches(period: str = "month"):
+            return await self._backend("analytics.searches") or {
+                "total_searches": self.rng.randint(500, 5000),
+                "unique_companies": self.rng.randint(20, 200),
+                "top_skills_searched": [[s, self.rng.randint(50, 400)] for s in self.rng.sample(synthetic.SKILLS, 10)],
+                "top_locations_searched": [[c, self.rng.randint(50, 500)] for c in synthetic.CITIES[:5]],
+                "search_trend": self.rng.choice(["increasing", "stable", "decreasing"]),
+                "period": period,
+                "your_students_viewed": self.rng.randint(100, 800),
+                "conversion_rate": round(self.rng.uniform(0.05, 0.2), 3)
+            }
+
+        @app.get("/api/analytics/skill-demand")
+        async def skill_demand():
+            return await self._backend("analytics.skill_demand") or {
+                "skill_gaps": [
+                    {"skill": s, "market_demand": round(self.rng.uniform(0.5, 0.9), 2),
+                     "student_supply": round(self.rng.uniform(0.1, 0.6), 2)}
+                    for s in self.rng.sample(synthetic.SKILLS, 5)
+                ],
+                "strengths": ["Strong Python fundamentals", "Project-based learning evident"],
+                "recommendations": ["Add cloud computing modules to curriculum"]
+            }
+
+        @app.get("/api/analytics/at-risk-students")
+        async def at_risk(risk_level: str = "high"):
+            return await self._backend("analytics.at_risk") or {"students": self._at_risk(risk_level, items)}
+
+        @app.get("/api/analytics/company-interest")
+        async def company_interest():
+            return await self._backend("analytics.company_interest") or {
+                "unique_companies": self.rng.randint(20, 120),
+                "total_views": self.rng.randint(200, 2000),
+                "total_messages": self.rng.randint(20, 300),
+                "trend": "increasing",
+                "top_companies": [
+                    {"name": c, "industry": "Tech", "student_views": self.rng.randint(10, 90),
+                     "messages_sent": self.rng.randint(1, 15)}
+                    for c in synthetic.COMPANIES
+                ],
+                "industry_breakdown": {"Tech": 0.4, "Consulting": 0.25, "Banking/Finance": 0.2, "Other": 0.15}
+            }
+
+        @app.get("/api/analytics/benchmark")
+        async def benchmark():
+            metrics = ["profile_completion", "projects_per_student", "company_engagement",
+                       "placement_rate", "student_activity"]
+            return await self._backend("analytics.benchmark") or {
+                "ranking": {"position": self.rng.randint(1, 85), "total": 85},
+                "metrics": {
+                    m: {"your_value": self.rng.randint(40, 90), "average": self.rng.randint(40, 90)} for m in metrics
+                },
+                "strengths": ["Good placement rate"],
+                "improvements": ["Company engagement could improve"]
+            }
+
+        @app.get("/mock/stats")
+        async def stats():
+            return {"requests": dict(self.requests), "injected_errors": dict(self.errors)}
+
+        return app
+
+def build_config(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        llm_latency=LatencyDistribution(args.llm_latency),
+        backend_latency=LatencyDistribution(args.backend_latency),
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=LatencyDistribution(args.output_tokens),
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",") if s],
+        error_targets=[t.strip() for t in args.error_targets.split(",") if t.strip()],
+        retry_after=args.retry_after,
+        backend_items=args.backend_items,
+        seed=args.seed
+    )
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mock OpenAI, Anthropic and backend server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-latency", default="lognormal:0.5:0.4", help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--output-tokens", default="lognormal:120:0.6",
+                        help="Length of free-text answers, capped by max_tokens")
+    parser.add_argument("--backend-latency", default="lognormal:0.03:0.5")
+    parser.add_argument("--backend-items", type=int, default=20, help="Items per backend list response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-statuses", default="429,500,503")
+    parser.add_argument("--error-targets", default="openai,anthropic",
+                        help="Comma-separated subset of openai, anthropic, backend")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with injected 429s")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    server = MockServer(build_config(args))
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Memory Benchmark
+Compares the in-process fallback stores at a large number of distinct
+identifiers: per-check latency and retained memory.
+
+Usage:
+    python -m benchmarks.rate_limiter_memory --identifiers 1000000 --capacity 100000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.rate_limiter import RateLimit, RateLimitAlgorithm, RateLimitType, WindowCounterStore
+
+class TimestampListStore:
+    """The previous fallback: a list of request timestamps per key, never evicted"""
+
+    def __init__(self):
+        self.memory_store: Dict[str, List[int]] = {}
+
+    def check(self, key: str, limit: RateLimit, now: float) -> bool:
+        window_start = int(now) - limit.window
+        timestamps = self.memory_store.setdefault(key, [])
+        timestamps[:] = [ts for ts in timestamps if ts > window_start]
+        allowed = len(timestamps) < limit.limit
+        if allowed:
+            timestamps.append(int(now))
+        return allowed
+
+def run(store_name: str, identifiers: int, requests: int, limit: RateLimit, capacity: int, seed: int) -> Dict:
+    rng = np.random.default_rng(seed)
+    # Every identifier is seen at least once, the rest of the traffic is skewed
+    keys = np.concatenate([
+        np.arange(identifiers),
+        (rng.zipf(1.2, max(requests - identifiers, 0)) - 1) % identifiers
+    ])
+    names = [f"rate_limit:default:key-{k}" for k in keys]
+
+    def replay():
+        if store_name == "window_counter":
+            store = WindowCounterStore(capacity)
+            check = lambda key, now: store.check(key, limit, now)[0]
+        else:
+            store = TimestampListStore()
+            check = lambda key, now: store.check(key, limit, now)
+
+        now = time.time()
+        started = time.perf_counter()
+        for i, key in enumerate(names):
+            check(key, now + i * 1e-4)
+        return time.perf_counter() - started, store
+
+    # Time without tracing, then replay under tracemalloc for memory
+    gc.collect()
+    elapsed, _ = replay()
+    gc.collect()
+    tracemalloc.start()
+    _, store = replay()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "store": store_name,
+        "checks": len(names),
+        "checks_per_second": round(len(names) / elapsed),
+        "mean_us": round(elapsed / len(names) * 1e6, 3),
+        "retained_mb": round(current / 2**20, 1),
+        "peak_mb": round(peak / 2**20, 1)
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark in-process rate limiter stores")
+    parser.add_argument("--identifiers", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=2000000)
+    parser.add_argument("--capacity", type=int, default=100000, help="WindowCounterStore slots")
+    parser.add_argument("--algorithm", choices=[a.value for a in RateLimitAlgorithm], default="sliding_log")
+    parser.add_argument("--stores", nargs="+", default=["timestamp_list", "window_counter"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    limit = RateLimit(100, 3600, RateLimitType.PER_HOUR, RateLimitAlgorithm(args.algorithm))
+    results = [
+        run(store, args.identifiers, args.requests, limit, args.capacity, args.seed)
+        for store in args.stores
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
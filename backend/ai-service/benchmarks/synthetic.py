@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data
+Seeded generators for the data the benchmarks use: chat messages and
+conversation turns per role, job postings, candidate profiles, projects and
+resumes. Shapes follow what the services read, so the same data drives the
+load driver, the mock backend and the microbenchmarks.
+"""
+
+import random
+from typing import Any, Dict, List
+
+SKILLS = [
+    "Python", "JavaScript", "TypeScript", "React", "Node.js", "Java", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "AWS", "Azure", "Machine Learning", "TensorFlow", "PyTorch",
+    "Data Analysis", "Pandas", "Git", "REST APIs", "GraphQL", "Go", "C++", "Figma",
+    "Cybersecurity", "DevOps", "Spring Boot", "Django", "FastAPI", "Vue.js", "MongoDB"
+]
+CITIES = ["Milan", "Rome", "Turin", "Bologna", "Naples", "Florence", "Padua", "Remote"]
+UNIVERSITIES = [
+    "Politecnico di Milano", "Università di Bologna", "Sapienza Roma", "Politecnico di Torino",
+    "Università di Padova", "Università Federico II", "Università di Firenze"
+]
+FIRST_NAMES = ["Marco", "Giulia", "Alessandro", "Francesca", "Luca", "Sara", "Andrea", "Chiara", "Matteo", "Elena"]
+LAST_NAMES = ["Rossi", "Bianchi", "Verdi", "Romano", "Esposito", "Colombo", "Ricci", "Marino", "Greco", "Bruno"]
+COMPANIES = ["TechCorp", "Accenture", "Reply", "Intesa Sanpaolo", "Enel", "Amazon", "Deloitte", "StartupXYZ"]
+ROLES = ["Software Developer", "Data Scientist", "Frontend Developer", "Backend Engineer", "DevOps Engineer", "ML Engineer"]
+LEVELS = ["entry", "junior", "mid", "senior"]
+DEGREES = ["bachelor", "master", "phd"]
+FIELDS = ["Computer Science", "Computer Engineering", "Data Science", "Mathematics", "Physics"]
+PROJECT_KINDS = [
+    ("E-commerce Platform", "web_development"), ("ML Pipeline", "machine_learning"),
+    ("Mobile Banking App", "mobile"), ("API Gateway", "backend"), ("Data Dashboard", "data_science"),
+    ("DevOps Toolkit", "devops"), ("Chat Application", "web_development"), ("Recommendation Engine", "machine_learning")
+]
+
+# Message templates per role; {skill}, {skill2} and {city} are filled per message
+CHAT_TEMPLATES = {
+    "student": [
+        "Hi!",
+        "What can you help me with?",
+        "Find me {skill} internships in {city}",
+        "Are there junior {skill} jobs in {city}?",
+        "How can I improve my profile?",
+        "What skills should I learn to become a {role}?",
+        "Analyze my skills: {skill}, {skill2}",
+        "Should I do a master's degree or start working?",
+        "How do I describe my {skill} project to recruiters?",
+        "What salary can a junior {role} expect in {city}?"
+    ],
+    "recruiter": [
+        "Hello",
+        "Find {skill} developers in {city}",
+        "Show me junior candidates with {skill} and {skill2}",
+        "Why is this candidate a good match for a {role} role?",
+        "Help me write a job posting for a {role}",
+        "What is the market like for {skill} engineers?",
+        "Which universities have the most {skill} students?"
+    ],
+    "institution": [
+        "Hi",
+        "Which companies are searching for our students?",
+        "Show me at-risk students",
+        "What skills are companies looking for?",
+        "How do we compare to other universities?",
+        "Which industries are most interested in our graduates?",
+        "How can we partner with companies in {city}?"
+    ]
+}
+
+def chat_message(rng: random.Random, role: str) -> str:
+    template = rng.choice(CHAT_TEMPLATES[role])
+    skill, skill2 = rng.sample(SKILLS, 2)
+    return template.format(skill=skill, skill2=skill2, city=rng.choice(CITIES), role=rng.choice(ROLES))
+
+def person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def project(rng: random.Random, index: int = 0) -> Dict[str, Any]:
+    title, category = rng.choice(PROJECT_KINDS)
+    technologies = rng.sample(SKILLS, rng.randint(2, 5))
+    return {
+        "id": f"proj_{index:05d}",
+        "title": title,
+        "category": category,
+        "technologies": technologies,
+        "description": (
+            f"A {category.replace('_', ' ')} project built with {', '.join(technologies)}. "
+            f"Implemented authentication, a REST API and automated tests; deployed with Docker "
+            f"and monitored in production. Reduced response times by {rng.randint(10, 60)}% "
+            f"and served {rng.randint(100, 50000)} users."
+        ),
+        "repository_url": f"https://github.com/example/{title.lower().replace(' ', '-')}-{index}"
+    }
+
+def candidate(rng: random.Random, index: int = 0) -> Dict[str, Any]:
+    city = rng.choice(CITIES)
+    return {
+        "id": f"cand_{index:05d}",
+        "name": person_name(rng),
+        "university": rng.choice(UNIVERSITIES),
+        "skills": rng.sample(SKILLS, rng.randint(3, 10)),
+        "experience": {"years": rng.randint(0, 6), "level": rng.choice(LEVELS)},
+        "education": {"degree_level": rng.choice(DEGREES), "field_of_study": rng.choice(FIELDS)},
+        "location": {"city": city, "remote_preference": city == "Remote" or rng.random() < 0.3},
+        "projects": [project(rng, index * 10 + i) for i in range(rng.randint(1, 4))],
+        "preferences": {"work_style": rng.choice(["remote", "hybrid", "office"]), "company_size": rng.choice(["startup", "large"])}
+    }
+
+def job(rng: random.Random, index: int = 0) -> Dict[str, Any]:
+    role = rng.choice(ROLES)
+    required = rng.sample(SKILLS, rng.randint(3, 6))
+    city = rng.choice(CITIES)
+    return {
+        "id": f"job_{index:05d}",
+        "title": f"{rng.choice(['Junior', '', 'Senior'])} {role}".strip(),
+        "company": rng.choice(COMPANIES),
+        "required_skills": required,
+        "preferred_skills": rng.sample([s for s in SKILLS if s not in required], 2),
+        "experience_requirements": {"years": rng.randint(0, 4), "level": rng.choice(LEVELS[:3])},
+        "education_requirements": {"degree_level": rng.choice(DEGREES[:2]), "field_of_study": rng.choice(FIELDS)},
+        "job_description": f"We are looking for a {role} to build {rng.choice(PROJECT_KINDS)[0].lower()}s with {', '.join(required)}.",
+        "location": {"city": city, "remote": city == "Remote"},
+        "company_culture": rng.choice(["fast-paced startup", "collaborative and remote-first", "structured enterprise"])
+    }
+
+def candidates(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [candidate(rng, i) for i in range(count)]
+
+FILLER_SENTENCES = [
+    "The team works on a modern stack and ships every week.",
+    "We value ownership, clear communication and curiosity.",
+    "Experience with testing and code review is a plus.",
+    "The role involves collaborating with product and design.",
+    "Candidates should be comfortable with agile workflows.",
+    "Previous internships or open-source contributions are appreciated."
+]
+
+def long_message(rng: random.Random, role: str, sentences: int) -> str:
+    """A chat message padded with filler, for length-dependent parsers"""
+    parts = [chat_message(rng, role)]
+    parts += [rng.choice(FILLER_SENTENCES) for _ in range(sentences - 1)]
+    return " ".join(parts)[:2000]
+
+def resume(rng: random.Random, experiences: int) -> Dict[str, Any]:
+    return {
+        "summary": f"{rng.choice(ROLES)} with {rng.randint(1, 8)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.",
+        "experience": [
+            {
+                "title": rng.choice(ROLES),
+                "company": rng.choice(COMPANIES),
+                "description": f"Worked on {rng.choice(PROJECT_KINDS)[0].lower()} features.",
+                "bullets": [
+                    f"Improved {rng.choice(['latency', 'throughput', 'conversion', 'coverage'])} by {rng.randint(5, 80)}%"
+                    if rng.random() < 0.5 else f"Built {rng.choice(PROJECT_KINDS)[0].lower()} with {rng.choice(SKILLS)}"
+                    for _ in range(rng.randint(2, 6))
+                ]
+            }
+            for _ in range(experiences)
+        ],
+        "skills": {"technical": rng.sample(SKILLS, 8), "soft": ["Communication", "Teamwork"]},
+        "education": [{"degree": rng.choice(DEGREES), "field": rng.choice(FIELDS), "school": rng.choice(UNIVERSITIES)}],
+        "projects": [project(rng, i) for i in range(max(1, experiences // 2))]
+    }
+
+def chat_turns(rng: random.Random, role: str, turns: int) -> List[Dict[str, str]]:
+    """Alternating user/assistant turns as stored in a conversation session"""
+    history = []
+    for _ in range(turns):
+        history.append({"role": "user", "content": chat_message(rng, role)})
+        history.append({"role": "assistant", "content": " ".join(rng.choice(FILLER_SENTENCES) for _ in range(4))})
+    return history
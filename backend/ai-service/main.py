@@ -12,22 +12,31 @@ Main FastAPI application for AI-powered features including:
 import os
 import asyncio
 import logging
+import time
+
+# Startup timings are measured from here, before the heavy imports
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import uvicorn
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 import redis
 import json
 from dotenv import load_dotenv
+from app.utils.tracing import TraceContextFilter, TracingMiddleware
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceContextFilter())
 logger = logging.getLogger(__name__)
 
 # Import our AI models and services
@@ -36,6 +45,8 @@ from app.models.schemas import (
     ProjectAnalysisResponse,
     StoryGenerationRequest,
     StoryGenerationResponse,
+    StoryBundleRequest,
+    StoryBundleResponse,
     CandidateMatchingRequest,
     CandidateMatchingResponse,
     SkillsAssessmentRequest,
@@ -50,32 +61,64 @@ from app.models.schemas import (
     ProjectRecommendationsResponse,
     BatchProcessingRequest,
     BatchProcessingResponse,
+    BatchJobStatusResponse,
+    ProfileIndexRequest,
+    ProfileIndexResponse,
+    TextBatchRequest,
+    TextBatchResponse,
+    AnalyticsEventsRequest,
+    AnalyticsEventsResponse,
+    StudentRecordsRequest,
+    StudentRecordsResponse,
+    AtRiskStudentsResponse,
+    BenchmarkProfilesRequest,
+    BenchmarkProfilesResponse,
+    BenchmarkComparisonResponse,
     ConversationMessageRequest,
     ConversationMessageResponse,
     ConversationHistoryRequest,
     ConversationHistoryResponse,
     UserRole
 )
-from app.services.project_analyzer import ProjectAnalyzer
-from app.services.candidate_matcher import CandidateMatcher
-from app.services.story_generator import StoryGenerator
-from app.services.skills_assessor import SkillsAssessor
-from app.services.market_analyzer import MarketAnalyzer
-from app.services.resume_optimizer import ResumeOptimizer
-from app.services.conversation_service import ConversationService, UserRole as ConvUserRole
-from app.utils.cache_manager import CacheManager
-from app.utils.rate_limiter import RateLimiter
-from fastapi.responses import StreamingResponse
+from app.container import container
+from app.services.ann_index import SearchFilter
+from app.services.conversation_service import UserRole as ConvUserRole
+from app.services.file_processor import FileTooLarge, UnsupportedFileType
+from app.utils.connections import close_connections, redis_pool_stats, redis_status
+from app.utils.rate_limiter import ConcurrentLimitExceeded
+from app.utils.llm_gateway import get_llm_gateway, llm_deadline
+from app.utils.llm_governor import LLMPriority, llm_priority
+from app.utils.metrics import MetricsMiddleware, prepare_multiprocess_dir, render_metrics
+from app.utils.loop_watchdog import get_loop_watchdog, start_loop_watchdog
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 
 load_dotenv()
 
+startup_timings: Dict[str, Optional[float]] = {"import_ms": None, "ready_ms": None, "first_request_ms": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One watchdog per worker, on the loop that serves requests
+    watchdog = start_loop_watchdog()
+    # Redis checks and optional prebuilding run behind the first requests, not before them;
+    # requests that arrive first wait for the Redis check, off the loop
+    container.start_warm_up()
+    startup_timings["ready_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+    logger.info(f"Ready to serve {startup_timings['ready_ms']}ms after import started")
+    yield
+    container.shutdown()
+    await close_connections()
+    if watchdog:
+        watchdog.stop()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="InTransparency AI Service",
     description="AI-powered services for student-recruiter matching and portfolio analysis",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -87,20 +130,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Upstream LLM calls share the request's time budget; callers may shorten it
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120"))
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    try:
+        budget = min(float(request.headers.get("x-request-timeout", REQUEST_TIMEOUT_SECONDS)), REQUEST_TIMEOUT_SECONDS)
+    except ValueError:
+        budget = REQUEST_TIMEOUT_SECONDS
+    if startup_timings["first_request_ms"] is None:
+        started = time.perf_counter()
+        await container.wait_for_redis_check()
+        with llm_deadline(budget):
+            response = await call_next(request)
+        startup_timings["first_request_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"First request took {startup_timings['first_request_ms']}ms")
+        return response
+    with llm_deadline(budget):
+        return await call_next(request)
+
+app.add_middleware(MetricsMiddleware)
+
+# Added last so it is outermost and the root span covers every other middleware
+app.add_middleware(TracingMiddleware)
+
 # Security
 security = HTTPBearer(auto_error=False)
 
-# Initialize services
-project_analyzer = ProjectAnalyzer()
-candidate_matcher = CandidateMatcher()
-story_generator = StoryGenerator()
-skills_assessor = SkillsAssessor()
-market_analyzer = MarketAnalyzer()
-resume_optimizer = ResumeOptimizer()
-conversation_service = ConversationService()
-cache_manager = CacheManager()
-rate_limiter = RateLimiter()
-
 # Authentication dependency
 async def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if not credentials:
@@ -113,14 +170,34 @@ async def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(securi
     return credentials.credentials
 
 # Mock user dependency for endpoints
-async def get_current_user(api_key: str = Depends(get_api_key)):
-    return {"api_key": api_key}
-
-# Rate limiting dependency
-async def check_rate_limit(request_type: str = "default", api_key: str = Depends(get_api_key)):
-    if not await rate_limiter.check_limit(api_key, request_type):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    return True
+async def get_current_user(request: Request, api_key: str = Depends(get_api_key)):
+    # Every caller shares the service key; the backend names the end user in
+    # X-User-Id, so per-user limits key on that (or the client address)
+    user_id = request.headers.get("x-user-id")
+    if user_id:
+        limit_key = f"user:{user_id}"
+    else:
+        limit_key = f"client:{request.client.host if request.client else 'unknown'}"
+    return {"api_key": api_key, "user_id": user_id, "limit_key": limit_key}
+
+# Rate limiting dependency: burst, hourly and per-operation windows are checked
+# in one atomic step, per end user, and counted only if all of them pass
+def rate_limited_user(operation: str):
+    async def check_rate_limit(user = Depends(get_current_user)):
+        status = await container.rate_limiter.check_limits(user["limit_key"], ["burst", "default", operation])
+        if not status.allowed:
+            headers = {"Retry-After": str(status.retry_after)} if status.retry_after else None
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=headers)
+        return user
+    return check_rate_limit
+
+@app.exception_handler(ConcurrentLimitExceeded)
+async def concurrent_limit_handler(request, exc: ConcurrentLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "queue_position": exc.queue_position},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.get("/")
 async def root():
@@ -128,33 +205,110 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "service": "ai",
-        "version": "1.0.0",
-        "services": {
-            "openai": "connected" if os.getenv("OPENAI_API_KEY") else "missing_key",
-            "database": "connected"  # Add actual DB check
+    """
+    Dependency checks: unhealthy (503) when no LLM provider can take calls,
+    degraded when Redis is unreachable or a provider's circuit is open.
+    """
+    gateway = get_llm_gateway()
+    configured = gateway.available_providers()
+    providers = {
+        provider: breaker.state if provider in configured else "missing_key"
+        for provider, breaker in gateway.breakers.items()
+    }
+
+    # Off the event loop: a hung Redis must not stall other requests
+    redis_state = await asyncio.to_thread(redis_status)
+
+    if not any(state in ("closed", "half_open") for state in providers.values()):
+        status = "unhealthy"
+    elif redis_state != "connected" or any(state == "open" for state in providers.values()):
+        status = "degraded"
+    else:
+        status = "healthy"
+
+    return JSONResponse(
+        status_code=503 if status == "unhealthy" else 200,
+        content={
+            "status": status,
+            "service": "ai",
+            "version": "1.0.0",
+            "services": {
+                "redis": redis_state,
+                "llm_providers": providers
+            }
         }
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus exposition, aggregated across all workers.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/admin/loop-stalls")
+async def loop_stalls(limit: int = 20, user = Depends(get_current_user)):
+    """
+    Recent blocking calls caught on this worker's event loop, with stacks.
+    """
+    watchdog = get_loop_watchdog()
+    if not watchdog:
+        return {"enabled": False}
+    return {"enabled": True, **watchdog.get_stats(limit)}
+
+@app.get("/admin/startup")
+async def startup_stats(user = Depends(get_current_user)):
+    """
+    Import, readiness and first-request timings, and which services are built.
+    """
+    return {
+        "pid": os.getpid(),
+        **startup_timings,
+        "services": container.get_stats(),
+        "redis_pool": redis_pool_stats()
     }
 
+@app.get("/cache/stats")
+async def cache_stats(user = Depends(get_current_user)):
+    """
+    Size and Redis status of the service result cache.
+    """
+    try:
+        return await container.cache_manager.get_cache_stats()
+    except Exception as e:
+        logger.error(f"Cache stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get cache stats")
+
+@app.get("/rate-limit/usage")
+async def rate_limit_usage(user = Depends(get_current_user)):
+    """
+    Current usage of each time-window limit for the calling API key.
+    """
+    try:
+        return await container.rate_limiter.get_usage_stats(user["limit_key"])
+    except Exception as e:
+        logger.error(f"Rate limit usage failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get rate limit usage")
+
 @app.post("/analyze-project", response_model=ProjectAnalysisResponse)
 async def analyze_project(
     request: ProjectAnalysisRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("project_analysis"))
 ):
     """
     Analyze a project using AI to extract insights, assess complexity, and generate scores.
     """
     try:
-        analysis = await project_analyzer.analyze_project(
-            title=request.title,
-            description=request.description,
-            technologies=request.technologies,
-            category=request.category,
-            repository_url=request.repository_url,
-            project_files=request.project_files
-        )
+        async with container.rate_limiter.concurrent_limit(user["limit_key"], "analysis"):
+            analysis = await container.project_analyzer.analyze_project(
+                title=request.title,
+                description=request.description,
+                technologies=request.technologies,
+                category=request.category,
+                repository_url=request.repository_url,
+                project_files=request.project_files
+            )
         
         return ProjectAnalysisResponse(
             innovation_score=analysis["innovation_score"],
@@ -170,19 +324,21 @@ async def analyze_project(
             tags=analysis["tags"],
             status="success"
         )
+    except ConcurrentLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/generate-story", response_model=StoryGenerationResponse)
 async def generate_story(
     request: StoryGenerationRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("story_generation"))
 ):
     """
     Generate compelling professional stories from project data.
     """
     try:
-        story = await story_generator.generate_story(
+        story = await container.story_generator.generate_story(
             project_data=request.project_data,
             target_audience=request.target_audience,
             tone=request.tone,
@@ -200,19 +356,53 @@ async def generate_story(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Story generation failed: {str(e)}")
 
+@app.post("/generate-story-bundle", response_model=StoryBundleResponse)
+async def generate_story_bundle(
+    request: StoryBundleRequest,
+    user = Depends(rate_limited_user("story_generation"))
+):
+    """
+    Generate the story, alternatives, LinkedIn post, elevator pitch, key points
+    and call-to-action for a project in a single pass.
+    """
+    try:
+        bundle = await container.story_generator.generate_story_bundle(
+            project_data=request.project_data,
+            target_audience=request.target_audience.value,
+            tone=request.tone.value,
+            length=request.length.value,
+            focus_areas=request.focus_areas,
+            linkedin_style=request.linkedin_style,
+            pitch_duration=request.pitch_duration
+        )
+
+        return StoryBundleResponse(
+            story=bundle.story,
+            key_points=bundle.key_points,
+            call_to_action=bundle.call_to_action,
+            alternative_versions=bundle.alternative_versions,
+            linkedin_post=bundle.linkedin_post,
+            elevator_pitch=bundle.elevator_pitch,
+            metadata=bundle.metadata,
+            status="success"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Story bundle generation failed: {str(e)}")
+
 @app.post("/find-matches", response_model=CandidateMatchingResponse)
 async def find_matches(
     request: CandidateMatchingRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("candidate_matching"))
 ):
     """
     Find relevant matches for candidates and jobs.
     """
     try:
-        matches = await candidate_matcher.find_candidate_matches(
+        matches = await container.candidate_matcher.find_candidate_matches(
             job_data=request.job_data,
             candidates=request.candidates,
-            limit=request.limit
+            limit=request.limit,
+            filters=SearchFilter(**request.filters.dict()) if request.filters else None
         )
         
         return CandidateMatchingResponse(
@@ -230,21 +420,43 @@ async def find_matches(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
 
+@app.post("/profiles/index", response_model=ProfileIndexResponse)
+async def index_profiles(
+    request: ProfileIndexRequest,
+    user = Depends(get_current_user)
+):
+    """
+    Insert, replace or remove candidate/job profiles in the matching index.
+    """
+    try:
+        counts = await container.candidate_matcher.index_profiles(
+            request.kind.value, request.profiles, request.remove_ids
+        )
+        if request.snapshot and os.getenv("ANN_INDEX_DIR"):
+            container.candidate_matcher.save_indexes(os.getenv("ANN_INDEX_DIR"))
+
+        return ProfileIndexResponse(kind=request.kind.value, **counts)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Profile indexing failed: {str(e)}")
+
 @app.post("/assess-skills", response_model=SkillsAssessmentResponse)
 async def assess_skills(
     request: SkillsAssessmentRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("skill_assessment"))
 ):
     """
     Assess user skills based on their projects and experience.
     """
     try:
-        assessment = await skills_assessor.assess_skills(
-            projects=request.projects,
-            technologies=request.technologies,
-            experience_level=request.experience_level,
-            education_background=request.education_background
-        )
+        async with container.rate_limiter.concurrent_limit(user["limit_key"], "analysis"):
+            assessment = await container.skills_assessor.assess_skills(
+                projects=request.projects,
+                technologies=request.technologies,
+                experience_level=request.experience_level,
+                education_background=request.education_background
+            )
         
         return SkillsAssessmentResponse(
             skill_scores=assessment["skill_scores"],
@@ -255,6 +467,8 @@ async def assess_skills(
             career_path_suggestions=assessment["career_path_suggestions"],
             status="success"
         )
+    except ConcurrentLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Skill assessment failed: {str(e)}")
 
@@ -268,8 +482,7 @@ async def analyze_text(
     Analyze text for various metrics (sentiment, complexity, readability, etc.)
     """
     try:
-        from app.services.text_analyzer import TextAnalyzer
-        text_analyzer = TextAnalyzer()
+        text_analyzer = container.text_analyzer
         
         if analysis_type == "sentiment":
             result = await text_analyzer.analyze_sentiment(text)
@@ -279,51 +492,206 @@ async def analyze_text(
             result = await text_analyzer.analyze_readability(text)
         elif analysis_type == "keywords":
             result = await text_analyzer.extract_keywords(text)
-        else:
+        elif analysis_type == "all":
             result = await text_analyzer.analyze_all(text)
+        else:
+            raise ValueError(f"Unknown analysis type: {analysis_type}")
             
         return {"analysis": result, "status": "success"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text analysis failed: {str(e)}")
 
-@app.post("/process-file")
+@app.post("/analyze-text/batch", response_model=TextBatchResponse)
+async def analyze_text_batch(
+    request: TextBatchRequest,
+    user = Depends(get_current_user)
+):
+    """
+    Analyze many texts in one call; results are in input order
+    """
+    try:
+        results = await container.text_analyzer.analyze_batch(request.texts, request.analysis_type)
+        return TextBatchResponse(results=results, count=len(results))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Text analysis failed: {str(e)}")
+
+# Upload endpoints read the multipart body themselves, so it is never buffered before the limits apply
+UPLOAD_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}
+}}}}}
+
+async def _spool_request_file(request: Request):
+    length = request.headers.get("content-length")
+    return await container.file_processor.spool_multipart(
+        request.headers.get("content-type", ""), request.stream(), int(length) if length and length.isdigit() else None
+    )
+
+@app.post("/process-file", openapi_extra=UPLOAD_BODY)
 async def process_file(
-    file: UploadFile = File(...),
+    request: Request,
     processing_type: str = "extract_text",
     user = Depends(get_current_user)
 ):
     """
-    Process uploaded files (extract text, analyze code, etc.)
+    Process uploaded files (extract text, analyze code, detect language).
+    Accepts text and source files, ZIP or tar archives and PDFs.
     """
+    upload = None
     try:
-        from app.services.file_processor import FileProcessor
-        file_processor = FileProcessor()
-        
-        content = await file.read()
-        
-        if processing_type == "extract_text":
-            result = await file_processor.extract_text(content, file.filename)
-        elif processing_type == "analyze_code":
-            result = await file_processor.analyze_code(content, file.filename)
-        elif processing_type == "detect_language":
-            result = await file_processor.detect_language(content)
-        else:
-            result = await file_processor.process_file(content, file.filename, processing_type)
-            
+        # Streams the upload to a spooled temp file; size and type are checked on the first chunk
+        upload = await _spool_request_file(request)
+        result = await container.file_processor.process_file(upload, processing_type)
         return {"result": result, "status": "success"}
+    except FileTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedFileType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File processing failed: {str(e)}")
+    finally:
+        if upload:
+            upload.close()
+
+@app.post("/analyze-repository", openapi_extra=UPLOAD_BODY)
+async def analyze_repository(
+    request: Request,
+    user = Depends(rate_limited_user("analysis"))
+):
+    """
+    Static analysis of a repository archive (ZIP or tar): languages, frameworks,
+    import graph, complexity and practices. The returned repo_id can be passed in
+    project_files to /analyze-project to score the project from its code.
+    """
+    upload = None
+    try:
+        upload = await _spool_request_file(request)
+        analysis = await container.repo_analyzer.analyze_upload(upload)
+        return {"repo_id": analysis["repo_id"], "analysis": analysis, "status": "success"}
+    except FileTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedFileType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Repository analysis failed: {str(e)}")
+    finally:
+        if upload:
+            upload.close()
+
+@app.post("/analytics/events", response_model=AnalyticsEventsResponse)
+async def ingest_analytics_events(
+    request: AnalyticsEventsRequest,
+    user = Depends(get_current_user)
+):
+    """
+    Append search, view, contact and profile events to the institution
+    analytics log and update the rollups. Send events in batches: each call
+    writes one log part per day it covers.
+    """
+    try:
+        result = await container.analytics_engine.ingest(request.events)
+        return AnalyticsEventsResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Event ingestion failed: {str(e)}")
+
+@app.post("/institutions/{institution_id}/students", response_model=StudentRecordsResponse)
+async def upsert_institution_students(
+    institution_id: str,
+    request: StudentRecordsRequest,
+    user = Depends(get_current_user)
+):
+    """
+    Insert or update student records for risk scoring; send only students
+    that changed. Records with "deleted": true are removed.
+    """
+    try:
+        result = await container.risk_engine.upsert(institution_id, request.students)
+        return StudentRecordsResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Student upsert failed: {str(e)}")
+
+@app.get("/institutions/{institution_id}/at-risk-students", response_model=AtRiskStudentsResponse)
+async def at_risk_students(
+    institution_id: str,
+    risk_level: str = "at_risk",
+    page: int = 1,
+    page_size: int = 50,
+    user = Depends(get_current_user)
+):
+    """
+    Students ranked by risk score with their top risk factors.
+    risk_level: high, medium, low, at_risk (high and medium) or all.
+    """
+    if risk_level not in ("high", "medium", "low", "at_risk", "all"):
+        raise HTTPException(status_code=400, detail=f"Unknown risk level: {risk_level}")
+    try:
+        result = await container.risk_engine.at_risk_page(
+            institution_id, risk_level, page=max(page, 1), page_size=min(max(page_size, 1), 500)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk scoring failed: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="No student records for this institution")
+    return AtRiskStudentsResponse(**result)
+
+@app.post("/institutions/benchmark-profiles", response_model=BenchmarkProfilesResponse)
+async def upsert_benchmark_profiles(
+    request: BenchmarkProfilesRequest,
+    user = Depends(get_current_user)
+):
+    """
+    Insert or update institution profiles for benchmarking: region, students,
+    disciplines and reported metrics. Send only institutions that changed.
+    """
+    try:
+        result = await asyncio.to_thread(container.benchmark_engine.upsert_profiles, request.institutions)
+        return BenchmarkProfilesResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Benchmark profile upsert failed: {str(e)}")
+
+@app.get("/institutions/{institution_id}/benchmark", response_model=BenchmarkComparisonResponse)
+async def institution_benchmark(
+    institution_id: str,
+    compare_to: str = "national",
+    user = Depends(get_current_user)
+):
+    """
+    Percentile rank, peer quartiles and ranking per metric.
+    compare_to: national, regional, similar (size band and discipline mix), size or discipline.
+    """
+    try:
+        await container.analytics_engine.refresh()
+        # Takes the engine lock and may reload the profiles file: not on the event loop
+        result = await asyncio.to_thread(container.benchmark_engine.compare, institution_id, compare_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Benchmark failed: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="No benchmark metrics for this institution")
+    return BenchmarkComparisonResponse(**result)
 
 @app.post("/analyze-market", response_model=MarketTrendsResponse)
 async def analyze_market(
     request: MarketTrendsRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("market_analysis"))
 ):
     """
     Analyze market trends for technologies and roles
     """
     try:
-        analysis = await market_analyzer.analyze_market_trends(
+        analysis = await container.market_analyzer.analyze_market_trends(
             technologies=request.technologies,
             time_horizon=request.time_horizon,
             industry_focus=request.industry_focus
@@ -343,18 +711,19 @@ async def analyze_market(
 @app.post("/optimize-resume", response_model=ResumeSuggestionsResponse)
 async def optimize_resume(
     request: ResumeSuggestionsRequest,
-    user = Depends(get_current_user)
+    user = Depends(rate_limited_user("resume_optimization"))
 ):
     """
     Optimize resume for target role and company
     """
     try:
-        optimization = await resume_optimizer.optimize_resume(
-            resume_data=request.resume_data,
-            target_role=request.target_role,
-            optimization_focus=request.optimization_focus,
-            target_company=request.target_company
-        )
+        async with container.rate_limiter.concurrent_limit(user["limit_key"], "analysis"):
+            optimization = await container.resume_optimizer.optimize_resume(
+                resume_data=request.resume_data,
+                target_role=request.target_role,
+                optimization_focus=request.optimization_focus,
+                target_company=request.target_company
+            )
         
         return ResumeSuggestionsResponse(
             optimized_sections=optimization["optimized_sections"],
@@ -364,9 +733,100 @@ async def optimize_resume(
             custom_summary=optimization["custom_summary"],
             status="success"
         )
+    except ConcurrentLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Resume optimization failed: {str(e)}")
 
+# ============================================
+# Batch Processing Endpoints
+# ============================================
+
+async def _batch_status_response(job_id: str) -> BatchJobStatusResponse:
+    # The job store is blocking Redis or SQLite
+    status = await asyncio.to_thread(container.batch_processor.get_status, job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+
+    job = status["job"]
+    return BatchJobStatusResponse(
+        job_id=job_id,
+        job_status=job["status"],
+        progress=status["progress"],
+        results=status["results"],
+        errors=status["errors"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        finished_at=job.get("finished_at"),
+        runs=job.get("runs", 0)
+    )
+
+@app.post("/batch", response_model=BatchProcessingResponse, status_code=202)
+async def submit_batch(
+    request: BatchProcessingRequest,
+    user = Depends(rate_limited_user("analysis"))
+):
+    """
+    Submit a batch of mixed operations (analyze, assess, match, story).
+    Returns a job id immediately; poll /batch/{job_id} for progress.
+    """
+    try:
+        job = await asyncio.to_thread(container.batch_processor.create_job, request.operations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch submission failed: {str(e)}")
+
+    container.batch_processor.start(job.job_id)
+
+    return BatchProcessingResponse(
+        results=[],
+        status=job.status,
+        job_id=job.job_id,
+        progress={"total": job.total, "pending": job.total}
+    )
+
+@app.get("/batch/{job_id}", response_model=BatchJobStatusResponse)
+async def get_batch_status(
+    job_id: str,
+    user = Depends(get_current_user)
+):
+    """
+    Get batch job progress, partial results and per-item errors.
+    """
+    try:
+        return await _batch_status_response(job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch status error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get batch status: {str(e)}")
+
+@app.post("/batch/{job_id}/retry", response_model=BatchJobStatusResponse, status_code=202)
+async def retry_batch(
+    job_id: str,
+    user = Depends(get_current_user)
+):
+    """
+    Re-run failed or interrupted items of a batch job; succeeded items are kept.
+    """
+    try:
+        await asyncio.to_thread(container.batch_processor.retry_job, job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    container.batch_processor.start(job_id)
+    return await _batch_status_response(job_id)
+
+@app.get("/llm/cache-stats")
+async def llm_cache_stats(user = Depends(get_current_user)):
+    """
+    Hit rates of the LLM response cache, overall and per call site.
+    """
+    return get_llm_gateway().cache.get_stats()
+
 # ============================================
 # Conversation / Chat Endpoints
 # ============================================
@@ -394,13 +854,14 @@ async def chat(
         if request.stream:
             # Return streaming response
             async def generate():
-                async for chunk in conversation_service.stream_response(
-                    session_id=request.session_id,
-                    message=request.message,
-                    user_role=conv_role,
-                    user_id=request.user_id
-                ):
-                    yield f"data: {json.dumps({'text': chunk})}\n\n"
+                with llm_priority(LLMPriority.INTERACTIVE):
+                    async for chunk in container.conversation_service.stream_response(
+                        session_id=request.session_id,
+                        message=request.message,
+                        user_role=conv_role,
+                        user_id=request.user_id
+                    ):
+                        yield f"data: {json.dumps({'text': chunk})}\n\n"
                 yield "data: [DONE]\n\n"
 
             return StreamingResponse(
@@ -414,12 +875,13 @@ async def chat(
             )
 
         # Regular (non-streaming) response
-        response = await conversation_service.process_message(
-            session_id=request.session_id,
-            message=request.message,
-            user_role=conv_role,
-            user_id=request.user_id
-        )
+        with llm_priority(LLMPriority.INTERACTIVE):
+            response = await container.conversation_service.process_message(
+                session_id=request.session_id,
+                message=request.message,
+                user_role=conv_role,
+                user_id=request.user_id
+            )
 
         return ConversationMessageResponse(
             message=response.message,
@@ -435,6 +897,15 @@ async def chat(
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
 
+@app.get("/chat/cache-stats")
+async def chat_cache_stats(user = Depends(get_current_user)):
+    """
+    Hit rates of the semantic chat answer cache per intent.
+    """
+    if not container.conversation_service.semantic_cache:
+        return {"enabled": False}
+    return {"enabled": True, **container.conversation_service.semantic_cache.get_stats()}
+
 @app.get("/chat/history/{session_id}", response_model=ConversationHistoryResponse)
 async def get_chat_history(
     session_id: str,
@@ -444,7 +915,7 @@ async def get_chat_history(
     Get conversation history for a session.
     """
     try:
-        context = await conversation_service.get_session(session_id)
+        context = await container.conversation_service.get_session(session_id)
 
         if not context:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -481,8 +952,8 @@ async def delete_chat_session(
     """
     try:
         # Clear from Redis
-        if conversation_service.redis_client:
-            conversation_service.redis_client.delete(f"conv:{session_id}")
+        if container.conversation_service.redis_client:
+            container.conversation_service.redis_client.delete(f"conv:{session_id}")
 
         return {"status": "success", "message": "Session deleted"}
 
@@ -510,13 +981,14 @@ async def chat_stream(
         conv_role = role_mapping.get(request.user_role, ConvUserRole.STUDENT)
 
         async def generate():
-            async for chunk in conversation_service.stream_response(
-                session_id=request.session_id,
-                message=request.message,
-                user_role=conv_role,
-                user_id=request.user_id
-            ):
-                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            with llm_priority(LLMPriority.INTERACTIVE):
+                async for chunk in container.conversation_service.stream_response(
+                    session_id=request.session_id,
+                    message=request.message,
+                    user_role=conv_role,
+                    user_id=request.user_id
+                ):
+                    yield f"data: {json.dumps({'text': chunk})}\n\n"
             yield "data: [DONE]\n\n"
 
         return StreamingResponse(
@@ -534,14 +1006,18 @@ async def chat_stream(
         raise HTTPException(status_code=500, detail=f"Streaming failed: {str(e)}")
 
 
+startup_timings["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = "0.0.0.0"
+    workers = 1 if os.getenv("ENVIRONMENT") == "development" else 4
+    prepare_multiprocess_dir(workers)
 
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
         reload=os.getenv("ENVIRONMENT") == "development",
-        workers=1 if os.getenv("ENVIRONMENT") == "development" else 4
+        workers=workers
     )
\ No newline at end of file
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Analytics Engine Tests
+Round trips through the Parquet event log: parts written by one worker are
+applied by another, and a rebuild recomputes the same rollups
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from app.services.analytics_engine import AnalyticsEngine
+
+def _events():
+    now = datetime.now(timezone.utc).isoformat()
+    events = [
+        {"event_type": "search", "institution_id": "uni_1", "company_id": "c1", "skills": "python,sql",
+         "location": "Milan", "occurred_at": now},
+        {"event_type": "search", "institution_id": "uni_1", "company_id": "c2", "skills": ["python"], "occurred_at": now},
+        {"event_type": "profile", "institution_id": "uni_1", "student_id": "s1", "skills": "python", "occurred_at": now},
+        {"event_type": "profile", "institution_id": "uni_1", "student_id": "s2", "skills": "java", "occurred_at": now},
+    ]
+    for student_id, company_id in (("s1", "c1"), ("s1", "c2"), ("s2", "c1")):
+        events.append({"event_type": "view", "institution_id": "uni_1", "student_id": student_id,
+                       "company_id": company_id, "company_name": company_id.upper(), "industry": "Banking",
+                       "occurred_at": now})
+    events.append({"event_type": "contact", "institution_id": "uni_1", "student_id": "s1", "company_id": "c1",
+                   "occurred_at": now})
+    return events
+
+def test_other_worker_applies_log_parts(tmp_path):
+    writer = AnalyticsEngine(data_dir=str(tmp_path))
+    result = writer.ingest_records(_events())
+    assert result["accepted"] == 8 and result["parts"] == 1
+
+    reader = AnalyticsEngine(data_dir=str(tmp_path))
+    assert reader.refresh_sync(force=True) == 1
+    assert reader.search_analytics("uni_1", "month") == writer.search_analytics("uni_1", "month")
+    assert reader.company_interest("uni_1", "month")["total_views"] == 3
+
+def test_rebuild_recomputes_same_rollups(tmp_path):
+    engine = AnalyticsEngine(data_dir=str(tmp_path))
+    engine.ingest_records(_events())
+    stats = engine.get_stats()
+    interest = engine.company_interest("uni_1", "month")
+
+    assert engine.rebuild() == 1
+    assert engine.get_stats() == stats
+    assert engine.company_interest("uni_1", "month") == interest
+
+    restarted = AnalyticsEngine(data_dir=str(tmp_path))
+    assert restarted.refresh_sync(force=True) == 0
+    assert restarted.get_stats() == stats
+
+def test_failed_rebuild_keeps_rollups_and_snapshot(tmp_path, monkeypatch):
+    engine = AnalyticsEngine(data_dir=str(tmp_path))
+    engine.ingest_records(_events())
+    engine.save_snapshot()
+    stats = engine.get_stats()
+    snapshot = (tmp_path / "rollups.json").read_text()
+
+    def unreadable(self, parts):
+        raise OSError("corrupt part")
+    monkeypatch.setattr(AnalyticsEngine, "_read_parts", unreadable)
+    with pytest.raises(OSError):
+        engine.rebuild()
+    assert engine.get_stats() == stats
+    assert (tmp_path / "rollups.json").read_text() == snapshot
+
+    # A refresh that cannot apply its parts reports none applied
+    reader = AnalyticsEngine(data_dir=str(tmp_path / "empty"))
+    reader.events_dir = engine.events_dir
+    assert reader.refresh_sync(force=True) == 0
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Benchmark Engine Tests
+Workers reporting institution profiles at once must not lose each other's
+institutions
+"""
+
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("fcntl")
+
+from app.services.benchmark_engine import BenchmarkEngine
+
+def _upsert_batches(data_dir: str, worker: int, batches: int):
+    engine = BenchmarkEngine(data_dir=data_dir)
+    for batch in range(batches):
+        engine.upsert_profiles([{
+            "institution_id": f"uni_{worker}_{batch}",
+            "region": "lombardy",
+            "students": 1000,
+            "metrics": {"placement_rate": 0.5}
+        }])
+
+def test_concurrent_upserts_keep_every_institution(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_upsert_batches, args=(str(tmp_path), worker, 10)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    engine = BenchmarkEngine(data_dir=str(tmp_path))
+    engine.sync()
+    assert len(engine.profiles) == 40
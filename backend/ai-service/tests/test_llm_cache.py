@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+LLM Cache Tests
+The deterministic, high-volume prompts must be answered from the cache the
+second time they are asked
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils import llm_gateway
+from app.utils.llm_gateway import LLMGateway, LLMResult
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("EMBEDDINGS_ENABLED", "false")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_CACHE_DISK_PATH", raising=False)
+    gateway = LLMGateway()
+    gateway.cache.redis_client = None
+    gateway.calls = 0
+
+    async def answer(provider, tier, system, messages, max_tokens, temperature, timeout, hedge):
+        gateway.calls += 1
+        return LLMResult(value=None, text="0.8", provider=provider, model="test", latency=0.01)
+    monkeypatch.setattr(gateway, "_generate_with_retries", answer)
+    monkeypatch.setattr(llm_gateway, "_gateway", gateway)
+    return gateway
+
+def _call_sites():
+    from app.services.candidate_matcher import CandidateMatcher
+    from app.services.conversation_service import ConversationService, UserRole
+    from app.services.market_analyzer import MarketAnalyzer
+    from app.services.skills_assessor import SkillsAssessor
+
+    skills = SkillsAssessor()
+    matcher = CandidateMatcher()
+    market = MarketAnalyzer()
+    conversation = ConversationService()
+    return {
+        "skills.market_demand": lambda: skills._get_market_demand("Python"),
+        "skills.related": lambda: skills._find_related_skills("Python"),
+        "matcher.skills": lambda: matcher._calculate_skills_match(["Python"], ["Django"]),
+        "market.trend": lambda: market._analyze_technology_trend("Rust", "1_year", None),
+        "conversation.intent": lambda: conversation.detect_intent("Find me a Python internship", UserRole.STUDENT)
+    }
+
+def test_named_call_sites_hit_the_cache_on_repeat(gateway):
+    async def body():
+        for call_site, call in _call_sites().items():
+            before = gateway.calls
+            await call()
+            await call()
+            assert gateway.calls == before + 1, call_site
+            assert gateway.cache.metrics[call_site]["hits"] == 1, call_site
+            assert gateway.cache.metrics[call_site]["bypassed"] == 0, call_site
+
+    asyncio.run(body())
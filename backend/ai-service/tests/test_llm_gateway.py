@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+LLM Gateway Tests
+A half-open circuit lets one probe through; however the probe ends, the
+circuit must not stay closed to every later call
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.utils.llm_gateway import LLMError, LLMGateway
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    gateway = LLMGateway()
+    breaker = gateway.breakers["openai"]
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+    return gateway
+
+def test_cancelled_probe_releases_half_open_circuit(gateway, monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+    monkeypatch.setattr(gateway, "_generate_with_retries", hang)
+
+    async def body():
+        call = asyncio.create_task(gateway.generate("hi", cache=False))
+        await asyncio.sleep(0.01)
+        assert gateway.breakers["openai"].probing
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(body())
+    breaker = gateway.breakers["openai"]
+    assert breaker.state == "half_open" and not breaker.probing
+    assert breaker.allow()
+
+def test_malformed_response_fails_the_probe(gateway, monkeypatch):
+    async def malformed(*args, **kwargs):
+        raise KeyError("choices")
+    monkeypatch.setattr(gateway, "_generate_with_retries", malformed)
+
+    with pytest.raises(LLMError, match="malformed response"):
+        asyncio.run(gateway.generate("hi", cache=False))
+    breaker = gateway.breakers["openai"]
+    assert breaker.state == "open" and not breaker.probing
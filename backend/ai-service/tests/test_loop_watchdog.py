@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Loop Watchdog Tests
+Strict mode fails blocking code in tests and reports violations in the service
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.utils.loop_watchdog import BlockingCallDetected, LoopWatchdog, strict_loop
+
+def test_strict_loop_raises_for_blocking_call():
+    async def body():
+        async with strict_loop(30):
+            time.sleep(0.15)
+
+    with pytest.raises(BlockingCallDetected):
+        asyncio.run(body())
+
+def test_strict_limit_logs_and_counts_violations(caplog):
+    async def body():
+        watchdog = LoopWatchdog(asyncio.get_running_loop(), strict_ms=30, interval=0.01)
+        watchdog.start()
+        try:
+            time.sleep(0.15)
+            await asyncio.sleep(0.05)
+        finally:
+            watchdog.stop()
+        return watchdog
+
+    with caplog.at_level(logging.ERROR, logger="app.utils.loop_watchdog"):
+        watchdog = asyncio.run(body())
+    assert watchdog.get_stats()["strict_violations_total"] == 1
+    assert "Strict mode violation" in caplog.text
+    with pytest.raises(BlockingCallDetected):
+        watchdog.check()
+    watchdog.check()
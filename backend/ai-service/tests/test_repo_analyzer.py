@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Repository Analyzer Tests
+Python ``from X import Y`` and dot-relative imports are internal edges of the
+import graph, not external packages
+"""
+
+import io
+import zipfile
+
+from app.services.file_processor import ProcessingLimits, SpooledUpload
+from app.services.repo_analyzer import analyze_repository
+
+def _archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, text in files.items():
+            archive.writestr(name, text)
+    data = buffer.getvalue()
+    return SpooledUpload(filename="repo.zip", content_type="zip", size=len(data), head=data[:16], data=data)
+
+def test_from_imports_and_relative_imports_resolve_internally():
+    upload = _archive({
+        "repo-main/app/__init__.py": "",
+        "repo-main/app/main.py": "import os\nfrom app import util\nfrom . import db\n",
+        "repo-main/app/util.py": "from app.main import run\nfrom typing import (\n    Dict,  # mapping\n    List,\n)\n",
+        "repo-main/app/db.py": "from .util import helper\nimport sqlite3\n"
+    })
+
+    graph = analyze_repository(upload, ProcessingLimits(), 100)["import_graph"]
+
+    packages = {entry["package"] for entry in graph["external_packages"]}
+    assert packages == {"os", "typing", "sqlite3"}
+    assert graph["cycles"] == 1
+    assert graph["largest_cycle"] == 3
+    assert graph["internal_edges"] == 4
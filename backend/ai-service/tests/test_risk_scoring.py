@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Risk Scoring Tests
+Workers upserting the same institution at once must not lose each other's
+students, and analytics view counts age out instead of being stored
+"""
+
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("fcntl")
+
+from app.services.risk_scoring import RiskScoringEngine
+
+def _upsert_batches(data_dir: str, worker: int, batches: int):
+    engine = RiskScoringEngine(data_dir=data_dir)
+    for batch in range(batches):
+        engine.upsert_students("uni_1", [{
+            "student_id": f"w{worker}-s{batch}",
+            "name": f"Student {worker}.{batch}",
+            "last_active_at": "2026-01-01T00:00:00Z",
+            "profile_completeness": 0.5
+        }])
+
+def test_concurrent_upserts_keep_every_student(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_upsert_batches, args=(str(tmp_path), worker, 10)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    engine = RiskScoringEngine(data_dir=str(tmp_path))
+    assert engine.upsert_students("uni_1", [])["total"] == 40
+    assert engine.score("uni_1").frame["risk_score"].notna().all()
+
+class _Views:
+    """Stands in for the analytics engine's windowed view counts"""
+
+    def __init__(self, counts):
+        self.version = 1
+        self.counts = counts
+
+    def student_view_counts(self, institution_id, days):
+        return dict(self.counts)
+
+def test_analytics_views_age_out_and_are_not_persisted(tmp_path):
+    pd = pytest.importorskip("pandas")
+    analytics = _Views({"s1": 10})
+    engine = RiskScoringEngine(analytics_engine=analytics, data_dir=str(tmp_path))
+    student = {"student_id": "s1", "last_active_at": "2026-01-01T00:00:00Z", "profile_completeness": 0.2}
+    engine.upsert_students("uni_1", [student])
+
+    profile = engine.page("uni_1", "all")["students"][0]
+    assert profile["views_received"] == 10
+
+    # The views age out of the window
+    analytics.counts, analytics.version = {}, 2
+    aged = engine.page("uni_1", "all")["students"][0]
+    assert aged["views_received"] == 0
+    assert aged["risk_score"] > profile["risk_score"]
+
+    engine.upsert_students("uni_1", [{**student, "student_id": "s2"}])
+    stored = pd.read_parquet(tmp_path / "uni_1.parquet")
+    assert "analytics_views" not in stored.columns
+    assert stored["views_received"].tolist() == [0, 0]